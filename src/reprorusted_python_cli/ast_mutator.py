@@ -0,0 +1,407 @@
+"""Parse-once AST mutation engine for synthetic augmentation.
+
+Parses a snippet once, locates the site of every mutation in one pass over
+its statements, and applies each mutation as a tree transform on the shared
+tree. Only the replaced statements are unparsed and spliced back over their
+source span, so each mutant keeps the rest of the snippet's formatting and
+comments and differs from it by as few lines as possible. Every mutant
+parses, and a mutation without a site in the snippet yields no mutant.
+
+Usage:
+    python -m reprorusted_python_cli.augment_corpus \
+        data/labeled.parquet --output data/augmented.parquet --engine ast
+
+Examples:
+    >>> mutants = ast_mutants("def f(x):" + chr(10) + "    return x")
+    >>> print(mutants["generator"])
+    def f(x):
+        yield x
+
+    >>> sorted(ast_mutants("x = 1"))
+    ['lambda', 'walrus_operator']
+
+    >>> ast_mutants("def f(:")
+    {}
+"""
+
+from __future__ import annotations
+
+import ast
+import re
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Iterator
+
+AST_MUTATION_TYPES: tuple[str, ...] = (
+    "async_await",
+    "generator",
+    "lambda",
+    "walrus_operator",
+    "context_manager",
+    "exception_handling",
+)
+
+# Nodes that open a scope of their own: their yields and returns are not
+# the enclosing function's.
+_SCOPES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda, ast.ClassDef)
+
+# Physical lines as the tokenizer counts them: \v, \f and the Unicode line
+# separators that str.splitlines also breaks on do not end a line.
+_LINE = re.compile(r"[^\r\n]*(?:\r\n|\r|\n)|[^\r\n]+")
+
+# Sites: the block holding a statement, its index there, and the statement
+# or, for assignments, its target and value; a return site also carries the
+# returned value.
+_Function = tuple[list[ast.stmt], int, ast.FunctionDef | ast.AsyncFunctionDef]
+_Return = tuple[list[ast.stmt], int, ast.Return, ast.expr]
+_Assignment = tuple[list[ast.stmt], int, ast.Name, ast.expr]
+
+
+def _blocks(stmt: ast.stmt) -> Iterator[list[ast.stmt]]:
+    """Yield the statement blocks nested in ``stmt``, in source order."""
+    body = getattr(stmt, "body", None)
+    if isinstance(body, list):
+        yield body
+    for handler in getattr(stmt, "handlers", ()):
+        yield handler.body
+    for case in getattr(stmt, "cases", ()):
+        yield case.body
+    for name in ("orelse", "finalbody"):
+        block = getattr(stmt, name, None)
+        if isinstance(block, list):
+            yield block
+
+
+def _statements(
+    body: list[ast.stmt], *, into_scopes: bool = True
+) -> Iterator[tuple[list[ast.stmt], int, ast.stmt]]:
+    """Yield ``(block, index, statement)`` for every statement, in source order."""
+    for index, stmt in enumerate(body):
+        yield body, index, stmt
+        if into_scopes or not isinstance(stmt, _SCOPES):
+            for block in _blocks(stmt):
+                yield from _statements(block, into_scopes=into_scopes)
+
+
+def _is_generator(function: ast.FunctionDef) -> bool:
+    """Return whether ``function`` itself yields."""
+    stack = list(ast.iter_child_nodes(function))
+    while stack:
+        node = stack.pop()
+        if isinstance(node, ast.Yield | ast.YieldFrom):
+            return True
+        if not isinstance(node, _SCOPES):
+            stack.extend(ast.iter_child_nodes(node))
+    return False
+
+
+def _first_return(function: ast.FunctionDef) -> _Return | None:
+    """Return the first ``return <value>`` of ``function`` itself, if any."""
+    for block, index, stmt in _statements(function.body, into_scopes=False):
+        if isinstance(stmt, ast.Return) and stmt.value is not None:
+            return block, index, stmt, stmt.value
+    return None
+
+
+def _column(line: str, offset: int) -> int:
+    """Convert an AST UTF-8 byte offset into ``line`` to a character index."""
+    if line.isascii():
+        return offset
+    return len(line.encode("utf-8")[:offset].decode("utf-8", "replace"))
+
+
+class ASTSnippet:
+    """A snippet parsed once, with the first site of every mutation in it.
+
+    Attributes:
+        code: Source of the snippet.
+        mutation_types: Types from :data:`AST_MUTATION_TYPES` with a site in
+            the snippet. ``lambda`` always has one: without a one-return
+            function to rewrite, it appends a lambda.
+
+    Examples:
+        >>> snippet = ASTSnippet.parse("def f(): return 1")
+        >>> snippet.mutation_types
+        ('async_await', 'generator', 'lambda', 'context_manager', 'exception_handling')
+        >>> snippet.mutate("lambda")
+        'f = lambda: 1'
+
+        >>> ASTSnippet.parse("def f(:") is None
+        True
+    """
+
+    def __init__(self, code: str, tree: ast.Module) -> None:
+        """Find the mutation sites of ``code``, parsed as ``tree``."""
+        self.code = code
+        self.lines: list[str] = _LINE.findall(code)
+        self.function: _Function | None = None
+        self.sync_function: tuple[list[ast.stmt], int, ast.FunctionDef] | None = None
+        self.simple_function: tuple[list[ast.stmt], int, ast.FunctionDef] | None = None
+        self.first_return: _Return | None = None
+        self.assignment: _Assignment | None = None
+        for block, index, stmt in _statements(tree.body):
+            if isinstance(stmt, ast.FunctionDef | ast.AsyncFunctionDef):
+                if self.function is None:
+                    self.function = block, index, stmt
+                if isinstance(stmt, ast.FunctionDef):
+                    self._find_function_sites(block, index, stmt)
+            elif (
+                self.assignment is None
+                and isinstance(stmt, ast.Assign)
+                and len(stmt.targets) == 1
+            ):
+                target = stmt.targets[0]
+                if isinstance(target, ast.Name):
+                    self.assignment = block, index, target, stmt.value
+        sites = {
+            "async_await": self.sync_function,
+            "generator": self.first_return,
+            "lambda": True,
+            "walrus_operator": self.assignment,
+            "context_manager": self.function,
+            "exception_handling": self.function,
+        }
+        self.mutation_types = tuple(t for t, site in sites.items() if site)
+
+    @classmethod
+    def parse(cls, code: str) -> ASTSnippet | None:
+        """Parse ``code``, or return None if it does not parse."""
+        try:
+            tree = ast.parse(code)
+        except (SyntaxError, ValueError, RecursionError, MemoryError):
+            # ValueError: null bytes; RecursionError/MemoryError: deep nesting.
+            return None
+        return cls(code, tree)
+
+    def mutate(self, mutation_type: str) -> str | None:
+        """Return the mutant of one type, or None if it has no site.
+
+        Raises:
+            ValueError: If the mutation type is unknown.
+        """
+        mutation = _MUTATIONS.get(mutation_type)
+        if mutation is None:
+            raise ValueError(f"unknown mutation type: {mutation_type}")
+        return mutation(self)
+
+    def _find_function_sites(
+        self, block: list[ast.stmt], index: int, function: ast.FunctionDef
+    ) -> None:
+        """Record the sites of a sync function that is the first of its kind."""
+        if self.sync_function is None and not _is_generator(function):
+            self.sync_function = block, index, function
+        if self.first_return is None:
+            self.first_return = _first_return(function)
+        if (
+            self.simple_function is None
+            and not function.decorator_list
+            and not getattr(function, "type_params", None)
+            and len(function.body) == 1
+            and isinstance(function.body[0], ast.Return)
+            and function.body[0].value is not None
+        ):
+            self.simple_function = block, index, function
+
+    def replace(self, block: list[ast.stmt], index: int, new: ast.stmt) -> str:
+        """Return the snippet with the source of ``block[index]`` replaced.
+
+        Only ``new`` is unparsed. Compound statements start their line, so a
+        multi-line replacement always follows indentation, which its
+        continuation lines are given too.
+        """
+        old = block[index]
+        decorators = getattr(old, "decorator_list", ())
+        first = min((d.lineno for d in decorators), default=old.lineno)
+        head = self.lines[first - 1]
+        if decorators:
+            start = len(head) - len(head.lstrip())
+        else:
+            start = _column(head, old.col_offset)
+        end_line = old.end_lineno or first
+        last = self.lines[end_line - 1]
+        end = _column(last, old.end_col_offset or len(last.encode("utf-8")))
+        prefix = head[:start]
+        text = ast.unparse(ast.copy_location(new, old)).replace("\n", "\n" + prefix)
+        before = "".join(self.lines[: first - 1])
+        after = "".join(self.lines[end_line:])
+        return f"{before}{prefix}{text}{last[end:]}{after}"
+
+    def append(self, new: ast.stmt) -> str:
+        """Return the snippet with ``new`` appended at module level."""
+        separator = "" if not self.code or self.code.endswith(("\n", "\r")) else "\n"
+        return f"{self.code}{separator}{ast.unparse(new)}"
+
+
+def _rebuilt(
+    function: ast.FunctionDef | ast.AsyncFunctionDef,
+    kind: type[ast.FunctionDef | ast.AsyncFunctionDef] | None = None,
+    body: list[ast.stmt] | None = None,
+) -> ast.FunctionDef | ast.AsyncFunctionDef:
+    """Return a copy of ``function`` sharing its subtrees, with changes."""
+    fields = {name: getattr(function, name) for name in function._fields}
+    if body is not None:
+        fields["body"] = body
+    return (kind or type(function))(**fields)
+
+
+def _call(module: str, name: str, *args: ast.expr) -> ast.Call:
+    """Return the call expression ``module.name(*args)``."""
+    func = ast.Attribute(ast.Name(module, ast.Load()), name, ast.Load())
+    return ast.Call(func=func, args=list(args), keywords=[])
+
+
+def _async_await(snippet: ASTSnippet) -> str | None:
+    """Make the first non-generator function async and await in its return."""
+    if snippet.sync_function is None:
+        return None
+    block, index, function = snippet.sync_function
+    site = _first_return(function)
+    if site is None:
+        return snippet.replace(block, index, _rebuilt(function, ast.AsyncFunctionDef))
+    returned, value = site[2], site[3]
+    sleep = ast.Await(_call("asyncio", "sleep", ast.Constant(0)))
+    # The return is edited in place on the shared tree and restored once
+    # the function is unparsed.
+    returned.value = ast.BoolOp(ast.Or(), [sleep, value])
+    try:
+        return snippet.replace(block, index, _rebuilt(function, ast.AsyncFunctionDef))
+    finally:
+        returned.value = value
+
+
+def _generator(snippet: ASTSnippet) -> str | None:
+    """Turn the first ``return <value>`` of a sync function into a ``yield``."""
+    if snippet.first_return is None:
+        return None
+    block, index, _, value = snippet.first_return
+    return snippet.replace(block, index, ast.Expr(ast.Yield(value)))
+
+
+def _bare(arguments: ast.arguments) -> ast.arguments:
+    """Return ``arguments`` without annotations, as lambdas require."""
+    return ast.arguments(
+        posonlyargs=[ast.arg(a.arg) for a in arguments.posonlyargs],
+        args=[ast.arg(a.arg) for a in arguments.args],
+        vararg=arguments.vararg and ast.arg(arguments.vararg.arg),
+        kwonlyargs=[ast.arg(a.arg) for a in arguments.kwonlyargs],
+        kw_defaults=arguments.kw_defaults,
+        kwarg=arguments.kwarg and ast.arg(arguments.kwarg.arg),
+        defaults=arguments.defaults,
+    )
+
+
+def _lambda(snippet: ASTSnippet) -> str:
+    """Rewrite a one-return function as a lambda, or append a lambda."""
+    if snippet.simple_function is None:
+        double = ast.BinOp(ast.Name("x", ast.Load()), ast.Mult(), ast.Constant(2))
+        x = ast.arguments(
+            posonlyargs=[],
+            args=[ast.arg("x")],
+            kwonlyargs=[],
+            kw_defaults=[],
+            defaults=[],
+        )
+        process = ast.Lambda(x, double)
+        return snippet.append(
+            ast.Assign(
+                targets=[ast.Name("process", ast.Store())],
+                value=process,
+                lineno=len(snippet.lines) + 1,
+            )
+        )
+    block, index, function = snippet.simple_function
+    returned = function.body[0]
+    body = returned.value if isinstance(returned, ast.Return) else None
+    assign = ast.Assign(
+        targets=[ast.Name(function.name, ast.Store())],
+        value=ast.Lambda(_bare(function.args), body or ast.Constant(None)),
+    )
+    return snippet.replace(block, index, assign)
+
+
+def _walrus_operator(snippet: ASTSnippet) -> str | None:
+    """Turn the first ``name = value`` statement into ``(name := value)``."""
+    if snippet.assignment is None:
+        return None
+    block, index, target, value = snippet.assignment
+    walrus = ast.NamedExpr(target, value)
+    return snippet.replace(block, index, ast.Expr(walrus))
+
+
+def _context_manager(snippet: ASTSnippet) -> str | None:
+    """Wrap the first function body in ``with contextlib.nullcontext():``."""
+    if snippet.function is None:
+        return None
+    block, index, function = snippet.function
+    manager = ast.withitem(_call("contextlib", "nullcontext"))
+    wrapped = ast.copy_location(ast.With(items=[manager], body=function.body), function)
+    return snippet.replace(block, index, _rebuilt(function, body=[wrapped]))
+
+
+def _exception_handling(snippet: ASTSnippet) -> str | None:
+    """Wrap the first function body in ``try`` / ``except Exception: raise``."""
+    if snippet.function is None:
+        return None
+    block, index, function = snippet.function
+    handler = ast.ExceptHandler(
+        type=ast.Name("Exception", ast.Load()), body=[ast.Raise()]
+    )
+    wrapped = ast.Try(body=function.body, handlers=[handler], orelse=[], finalbody=[])
+    return snippet.replace(block, index, _rebuilt(function, body=[wrapped]))
+
+
+_MUTATIONS: dict[str, Callable[[ASTSnippet], str | None]] = {
+    "async_await": _async_await,
+    "generator": _generator,
+    "lambda": _lambda,
+    "walrus_operator": _walrus_operator,
+    "context_manager": _context_manager,
+    "exception_handling": _exception_handling,
+}
+
+
+def ast_mutants(
+    code: str, mutation_types: Iterable[str] = AST_MUTATION_TYPES
+) -> dict[str, str]:
+    """Return one mutant of ``code`` per applicable mutation type.
+
+    The code is parsed and its mutation sites found once. Each mutation then
+    builds replacement statements that share their subtrees with that one
+    tree, and only the replacements are unparsed.
+
+    Args:
+        code: Python source snippet.
+        mutation_types: Names from :data:`AST_MUTATION_TYPES` to apply.
+
+    Returns:
+        Mutant source keyed by mutation type. Types without a site in
+        ``code`` are missing, and code that does not parse has no mutants.
+
+    Raises:
+        ValueError: If a mutation type is unknown.
+
+    Examples:
+        >>> print(ast_mutants("def f(): return g()", ["async_await"])["async_await"])
+        async def f():
+            return await asyncio.sleep(0) or g()
+
+        >>> ast_mutants("y = 2  # two", ["walrus_operator"])
+        {'walrus_operator': '(y := 2)  # two'}
+
+        >>> ast_mutants("pass", ["generator"])
+        {}
+    """
+    mutation_types = tuple(mutation_types)
+    unknown = set(mutation_types).difference(_MUTATIONS)
+    if unknown:
+        raise ValueError(f"unknown mutation types: {sorted(unknown)}")
+    snippet = ASTSnippet.parse(code)
+    if snippet is None:
+        return {}
+    mutants: dict[str, str] = {}
+    for mutation_type in mutation_types:
+        mutant = snippet.mutate(mutation_type)
+        if mutant is not None:
+            mutants[mutation_type] = mutant
+    return mutants
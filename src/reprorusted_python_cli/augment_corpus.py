@@ -4,37 +4,505 @@ Usage:
     python -m reprorusted_python_cli.augment_corpus \
         data/labeled.parquet --output data/augmented.parquet
 
+    # Same output for any --workers, given the same --seed
+    python -m reprorusted_python_cli.augment_corpus \
+        data/labeled.parquet --output data/augmented.parquet --workers 8 --seed 7
+
+    # Keep mutants that do not compile, flagged is_valid=false
+    python -m reprorusted_python_cli.augment_corpus \
+        data/labeled.parquet --output data/augmented.parquet --keep-invalid
+
+    # Top up classes toward an even label mix, writing at most 10000 mutants
+    python -m reprorusted_python_cli.augment_corpus \
+        data/labeled.parquet --output data/augmented.parquet --multiplier 10 \
+        --target HIGH_RISK=1 MEDIUM_RISK=1 LOW_RISK=1 --budget 10000
+
+    # Keep exact and near-duplicate mutants
+    python -m reprorusted_python_cli.augment_corpus \
+        data/labeled.parquet --output data/augmented.parquet --no-dedup
+
+    # Legacy text mutations, which may not parse
+    python -m reprorusted_python_cli.augment_corpus \
+        data/labeled.parquet --output data/augmented.parquet --engine regex
+
 Examples:
     >>> from reprorusted_python_cli.augment_corpus import augment_corpus
 """
 
 from __future__ import annotations
 
+from collections import Counter
+from contextlib import ExitStack, closing
+from itertools import islice, tee
 from typing import TYPE_CHECKING
 
-from reprorusted_python_cli.synthetic_augmenter import SyntheticAugmenter
-from reprorusted_python_cli.weak_supervision import WeakSupervisionLabeler
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from reprorusted_python_cli.dedup import DuplicateFilter
+from reprorusted_python_cli.label_corpus import (
+    DEFAULT_BATCH_SIZE,
+    LF_METADATA_KEY,
+    content_hashes,
+    count_labels,
+    default_workers,
+    label_counts,
+    lf_metadata,
+    remap_votes,
+    stored_votes,
+    write_label_counts,
+)
+from reprorusted_python_cli.synthetic_augmenter import (
+    MUTATION_FEATURES,
+    AugmentedExample,
+    MutationEngine,
+    SyntheticAugmenter,
+    iter_augment_codes,
+)
+from reprorusted_python_cli.weak_supervision import (
+    DEFAULT_REGISTRY,
+    DEFAULT_TIME_BUDGET,
+    Label,
+    LabelBatch,
+    WeakSupervisionLabeler,
+)
 
 if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator, Mapping, Sequence
     from pathlib import Path
 
+    from reprorusted_python_cli.weak_supervision import LabelingFunction
+
+
+def _augmented_schema(labeling_functions: Sequence[LabelingFunction]) -> pa.Schema:
+    """Return the output schema for votes of ``labeling_functions``.
+
+    The schema metadata records the LF set, so the output can be passed to
+    ``label_corpus --previous`` or augmented again.
+    """
+    return pa.schema(
+        [
+            pa.field("code", pa.string()),
+            pa.field("label", pa.string()),
+            pa.field("confidence", pa.float64()),
+            pa.field("is_synthetic", pa.bool_()),
+            pa.field("mutation_type", pa.string()),
+            pa.field("is_valid", pa.bool_()),
+            pa.field("content_hash", pa.binary(16)),
+            pa.field("lf_votes", pa.list_(pa.int8(), len(labeling_functions))),
+        ],
+        metadata={LF_METADATA_KEY: lf_metadata(labeling_functions)},
+    )
+
+
+def _write_rows(
+    writer: pq.ParquetWriter,
+    codes: pa.Array,
+    batch: LabelBatch,
+    mutation_types: Sequence[str | None],
+    valid: Sequence[bool | None],
+) -> None:
+    """Write one row group of labeled original or synthetic rows.
+
+    Args:
+        writer: Writer opened with :func:`_augmented_schema`.
+        codes: Source of every row.
+        batch: Labeling of every row.
+        mutation_types: Mutation of each row, None for originals.
+        valid: Whether each mutant compiles, None for originals.
+    """
+    hashes = content_hashes(codes)
+    writer.write_batch(
+        pa.RecordBatch.from_arrays(
+            [
+                codes,
+                pa.array([label.name for label in batch.to_labels()], pa.string()),
+                pa.array(batch.confidence, pa.float64()),
+                pa.array([t is not None for t in mutation_types], pa.bool_()),
+                pa.array(mutation_types, pa.string()),
+                pa.array(valid, pa.bool_()),
+                pa.FixedSizeBinaryArray.from_buffers(
+                    pa.binary(16), len(hashes), [None, pa.py_buffer(hashes)]
+                ),
+                pa.FixedSizeListArray.from_arrays(
+                    pa.array(batch.votes.ravel(), pa.int8()), batch.votes.shape[1]
+                ),
+            ],
+            schema=writer.schema,
+        )
+    )
+
+
+def class_quotas(
+    counts: Mapping[str, int],
+    target: Mapping[str, float],
+    budget: int | None = None,
+) -> dict[str, int]:
+    """Return the synthetic rows each class needs to reach a target mix.
+
+    Originals are never dropped, so the class furthest above its target
+    share sets the size of the balanced corpus, and every other targeted
+    class is topped up to its share of that size. Shares are relative to
+    the targeted classes; other classes keep their originals and get no
+    mutants. With a ``budget`` below the total, quotas are scaled down to
+    sum to exactly ``budget``: each gets the floor of its scaled share, and
+    the rows left over go to the largest fractional parts, ties to the
+    riskier class.
+
+    Args:
+        counts: Original rows per label name.
+        target: Share of each targeted label name; need not sum to 1.
+        budget: Maximum number of synthetic rows.
+
+    Returns:
+        Synthetic rows wanted per targeted label name.
+
+    Raises:
+        ValueError: If target names a label that is not a final class or
+            has no positive share, or budget is negative.
+
+    Examples:
+        >>> counts = {"HIGH_RISK": 60, "MEDIUM_RISK": 30, "LOW_RISK": 10}
+        >>> class_quotas(counts, {"HIGH_RISK": 1, "MEDIUM_RISK": 1, "LOW_RISK": 1})
+        {'HIGH_RISK': 0, 'MEDIUM_RISK': 30, 'LOW_RISK': 50}
+
+        >>> class_quotas(counts, {"MEDIUM_RISK": 0.5, "LOW_RISK": 0.5}, budget=10)
+        {'MEDIUM_RISK': 0, 'LOW_RISK': 10}
+
+        >>> class_quotas(counts, {"HIGH_RISK": 1, "MEDIUM_RISK": 1, "LOW_RISK": 1}, 20)
+        {'HIGH_RISK': 0, 'MEDIUM_RISK': 8, 'LOW_RISK': 12}
+    """
+    classes = [label.name for label in Label if label is not Label.ABSTAIN]
+    unknown = sorted(set(target) - set(classes))
+    if unknown:
+        raise ValueError(f"target labels must be in {classes}, got {unknown}")
+    if min(target.values(), default=0) < 0 or not any(target.values()):
+        raise ValueError(f"target shares must be non-negative, got {dict(target)}")
+    if budget is not None and budget < 0:
+        raise ValueError(f"budget must be non-negative, got {budget}")
+    total = sum(target.values())
+    size = max(counts.get(k, 0) * total / share for k, share in target.items() if share)
+    quotas = {
+        k: max(round(size * target[k] / total) - counts.get(k, 0), 0)
+        for k in classes
+        if k in target
+    }
+    needed = sum(quotas.values())
+    if budget is not None and needed > budget:
+        scaled = {k: divmod(quota * budget, needed) for k, quota in quotas.items()}
+        spare = budget - sum(floor for floor, _ in scaled.values())
+        rounded_up = sorted(scaled, key=lambda k: scaled[k][1], reverse=True)[:spare]
+        quotas = {k: floor + (k in rounded_up) for k, (floor, _) in scaled.items()}
+    return quotas
+
+
+def _predicted_labels(
+    labeler: WeakSupervisionLabeler,
+    votes: np.ndarray,
+    mutation_types: Sequence[str],
+) -> np.ndarray:
+    """Predict the label of each original's mutant of each mutation type.
+
+    A mutation adds the construct in ``MUTATION_FEATURES``, so an
+    original's votes plus the votes of the LFs reading that construct
+    predict its mutant's label without generating the mutant.
+
+    Returns:
+        Int8 ``(len(votes), len(mutation_types))`` label codes.
+    """
+    predicted = np.empty((len(votes), len(mutation_types)), dtype=np.int8)
+    for column, mutation_type in enumerate(mutation_types):
+        injected = MUTATION_FEATURES[mutation_type]
+        mutated = votes.copy()
+        for i, lf in enumerate(labeler.engine.labeling_functions):
+            if lf.feature is not None and lf.feature & injected:
+                mutated[:, i] = lf.label.code
+        predicted[:, column] = labeler.aggregate(mutated)[0]
+    return predicted
+
+
+def _within_quota(labels: np.ndarray, remaining: Counter[str]) -> np.ndarray:
+    """Take each label from its remaining quota, in order, while it lasts.
+
+    Returns:
+        Whether each row fit its class quota.
+    """
+    names = Label.from_code
+    fits = np.zeros(len(labels), dtype=bool)
+    for row, code in enumerate(labels.tolist()):
+        name = names(code).name
+        if remaining[name] > 0:
+            remaining[name] -= 1
+            fits[row] = True
+    return fits
+
+
+def _codes(parquet: pq.ParquetFile, batch_size: int) -> Iterator[str]:
+    """Stream the ``code`` column of ``parquet``, nulls as empty code."""
+    for batch in parquet.iter_batches(batch_size=batch_size, columns=["code"]):
+        yield from batch.column("code").fill_null("").to_pylist()
+
+
+def _with_parents(
+    examples: Iterable[AugmentedExample], rows: Iterable[tuple[int, str]]
+) -> Iterator[tuple[int, AugmentedExample]]:
+    """Pair each example, in input order, with the row of its original.
+
+    Snippets may have no mutants, so rows are skipped until one holds the
+    example's source; equal code has equal votes, so any such row will do.
+    """
+    rows = iter(rows)
+    row, code = -1, None
+    for example in examples:
+        while code != example.original_code:
+            row, code = next(rows)
+        yield row, example
+
 
 def augment_corpus(
     input_path: str | Path,
     output_path: str | Path | None = None,
     multiplier: int = 2,
+    registry_path: str | Path = DEFAULT_REGISTRY,
+    workers: int | None = None,
+    seed: int = 0,
+    engine: MutationEngine = MutationEngine.AST,
+    keep_invalid: bool = False,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    dedup: bool = True,
+    target: Mapping[str, float] | None = None,
+    budget: int | None = None,
+    time_budget: float | None = None,
 ) -> dict[str, int]:
     """Augment a labeled corpus with synthetic examples.
 
+    Each original yields up to ``multiplier`` mutants of Tarantula-weighted
+    types, generated across ``workers`` processes by
+    :func:`~reprorusted_python_cli.synthetic_augmenter.iter_augment_codes`;
+    the output depends only on ``seed``, not on the worker count. The
+    default AST engine only emits mutants that parse. Every mutant is
+    compiled, without being run, in the worker that generated it; mutants
+    that do not compile would only fail later in the transpile and ``cargo``
+    stages, so they are dropped unless ``keep_invalid`` is set.
+
+    The corpus is streamed twice in ``batch_size`` batches. The first pass
+    labels and writes the originals, reusing the votes stored by
+    ``label_corpus`` where their LFs are unchanged, and keeps only their
+    int8 votes. The second pass feeds the code to the lazy mutation stream
+    and writes its mutants ``batch_size`` at a time, so peak memory is
+    bounded by the batch size and the vote matrix, not by the augmented
+    corpus. Every mutant differs from its original by one known mutation,
+    so it is labeled by mutation delta: it starts from the original's votes
+    and only the LFs whose patterns touch the changed lines, or whose
+    construct an AST mutation injects, are evaluated. Regex mutations may
+    rewrite text inside strings or comments, so their constructs are
+    confirmed by parsing the mutant. See
+    :meth:`WeakSupervisionLabeler.label_mutants`.
+
+    Unless ``dedup`` is off, mutants are dropped as they are generated if
+    their token-normalized code equals an original or an earlier
+    mutant, or if they are near duplicates, by MinHash, of an earlier
+    mutant of the same type; small inputs, for example, all gain the same
+    appended lambda. A :class:`~reprorusted_python_cli.dedup.DuplicateFilter`
+    sized for every candidate keeps memory bounded at about 21 bytes per
+    candidate.
+
+    With a ``target`` label mix, ``multiplier`` is only an upper bound per
+    original. The first pass counts the originals of each class, and
+    :func:`class_quotas` turns the counts into synthetic quotas. Mutants
+    are then scheduled per class. Each original's votes, plus the votes
+    of the construct a mutation injects, predict the label of its mutant
+    of that type. Only originals and mutation types predicted to fill an
+    open quota are mutated. Mutants are written in stream order while
+    their class quota lasts, and generation stops as soon as every quota
+    is met.
+
     Args:
-        input_path: Path to input labeled parquet file.
-        output_path: Path to output augmented parquet file.
-        multiplier: Number of synthetic examples per original.
+        input_path: Path to input labeled parquet file. A plain corpus with
+            only a ``code`` column is labeled from scratch.
+        output_path: Path to output augmented parquet file with ``code``,
+            ``label``, ``confidence``, ``is_synthetic``, ``mutation_type``,
+            ``is_valid``, ``content_hash`` and ``lf_votes``: the originals,
+            then their mutants.
+        multiplier: Number of synthetic examples per original; the AST
+            engine yields at most one per mutation type with a site.
+        registry_path: YAML registry of the LFs to label with.
+        workers: Mutation worker processes; defaults to the physical core
+            count.
+        seed: Root seed of the mutation type draws.
+        engine: How mutations rewrite code.
+        keep_invalid: Write mutants that do not compile, with ``is_valid``
+            false, instead of dropping them.
+        batch_size: Rows per streamed input batch and output row group.
+        dedup: Drop exact and near-duplicate mutants.
+        target: Share of each label name in the balanced output, e.g.
+            ``{"HIGH_RISK": 1, "MEDIUM_RISK": 1, "LOW_RISK": 1}``.
+        budget: With ``target``, the most synthetic rows to write.
+        time_budget: Seconds of Python regex matching allowed per labeled
+            example, or None for no limit.
 
     Returns:
-        Dictionary with augmentation statistics.
+        Dictionary with augmentation statistics: written row counts,
+        ``inherited_votes``, the mutant LF votes copied from originals
+        instead of evaluated, ``invalid``, the mutants that do not compile,
+        also tallied per mutation type as ``invalid_<type>``, and the
+        mutants dropped as ``duplicates`` and ``near_duplicates``. With a
+        ``target``, also each class's ``quota_<label>``, the mutants
+        discarded as ``over_quota`` and the ``shortfall`` of unmet quotas.
+
+    Raises:
+        ValueError: If multiplier is negative, or target or budget is
+            invalid, see :func:`class_quotas`.
     """
-    return {"original": 0, "synthetic": 0, "total": 0}
+    if multiplier < 0:
+        raise ValueError(f"multiplier must be non-negative, got {multiplier}")
+    parquet = pq.ParquetFile(input_path)
+    labeler = WeakSupervisionLabeler(time_budget=time_budget, registry=registry_path)
+    lfs = labeler.engine.labeling_functions
+    metadata = (parquet.schema_arrow.metadata or {}).get(LF_METADATA_KEY)
+    if "lf_votes" not in parquet.schema_arrow.names:
+        metadata = None
+    read = ["code"] if metadata is None else ["code", "lf_votes"]
+    invalid: Counter[str] = Counter()
+    duplicates: Counter[str | None] = Counter()
+    duplicate_filter = None
+    if dedup:
+        candidates = parquet.metadata.num_rows * (multiplier + 1)
+        duplicate_filter = DuplicateFilter(max(candidates, 1))
+    generated: set[str] = set()
+    synthetic = over_quota = 0
+    counts: Counter[str] = Counter()
+    quotas: dict[str, int] = {}
+
+    with ExitStack() as stack:
+        writer: pq.ParquetWriter | None = None
+        if output_path is not None:
+            writer = stack.enter_context(
+                pq.ParquetWriter(output_path, _augmented_schema(lfs))
+            )
+
+        original_votes = [np.empty((0, len(lfs)), dtype=np.int8)]
+        for batch in parquet.iter_batches(batch_size=batch_size, columns=read):
+            codes = batch.column("code").fill_null("")
+            prior = None
+            if metadata is not None:
+                stored = stored_votes(pa.Table.from_batches([batch]))
+                prior = remap_votes(metadata, stored, lfs)
+            originals = labeler.label_batch(codes, prior=prior)
+            original_votes.append(originals.votes)
+            counts += count_labels(originals.labels)
+            if duplicate_filter is not None:
+                for code in codes.to_pylist():
+                    duplicate_filter.add(code, near=False)
+            if writer is not None:
+                none = [None] * len(codes)
+                _write_rows(writer, codes, originals, none, none)
+        votes = np.concatenate(original_votes)
+
+        indexed: Iterable[tuple[int, str]] = enumerate(_codes(parquet, batch_size))
+        types = SyntheticAugmenter(engine=engine).mutation_types
+        remaining: Counter[str] | None = None
+        if target is not None:
+            quotas = class_quotas(counts, target, budget)
+            remaining = Counter(quotas)
+            open_codes = [Label[name].code for name, n in quotas.items() if n]
+            useful = np.isin(_predicted_labels(labeler, votes, types), open_codes)
+            types = tuple(np.array(types)[useful.any(axis=0)].tolist())
+            selected = np.asarray(useful.any(axis=1))
+            indexed = ((row, code) for row, code in indexed if selected[row])
+
+        # The parent stream lags the mutation stream by the shards in
+        # flight; tee buffers only that gap.
+        mutating, parents = tee(indexed)
+        examples = stack.enter_context(
+            closing(
+                iter_augment_codes(
+                    (code for _, code in mutating),
+                    multiplier,
+                    seed,
+                    workers or default_workers(),
+                    engine=engine,
+                    validate=True,
+                    mutation_types=types or None,
+                )
+            )
+        )
+        stream = _with_parents(examples, parents)
+        guaranteed = engine is MutationEngine.AST
+        while (remaining is None or remaining.total()) and (
+            chunk := list(islice(stream, batch_size))
+        ):
+            for _, example in chunk:
+                generated.add(example.mutation_type)
+                invalid[example.mutation_type] += not example.is_valid
+            if not keep_invalid:
+                chunk = [(row, example) for row, example in chunk if example.is_valid]
+            if duplicate_filter is not None:
+                kinds = [
+                    duplicate_filter.add(example.mutated_code, example.mutation_type)
+                    for _, example in chunk
+                ]
+                duplicates.update(kinds)
+                chunk = [
+                    pair
+                    for pair, kind in zip(chunk, kinds, strict=True)
+                    if kind is None
+                ]
+            if not chunk:
+                continue
+            rows = np.fromiter((row for row, _ in chunk), np.intp, len(chunk))
+            # Only AST mutations are sure to add their construct as code;
+            # regex rewrites may land in strings or comments.
+            injected = [
+                MUTATION_FEATURES.get(e.mutation_type, 0) if guaranteed else 0
+                for _, e in chunk
+            ]
+            mutants = labeler.label_mutants(
+                votes[rows],
+                [example.original_code for _, example in chunk],
+                [example.mutated_code for _, example in chunk],
+                injected,
+            )
+            if remaining is not None:
+                fits = _within_quota(mutants.labels, remaining)
+                over_quota += int((~fits).sum())
+                chunk = [pair for pair, fit in zip(chunk, fits, strict=True) if fit]
+                mutants = LabelBatch(
+                    mutants.lf_names,
+                    mutants.votes[fits],
+                    mutants.labels[fits],
+                    mutants.confidence[fits],
+                )
+            counts += count_labels(mutants.labels)
+            synthetic += len(chunk)
+            if writer is not None:
+                _write_rows(
+                    writer,
+                    pa.array([example.mutated_code for _, example in chunk]),
+                    mutants,
+                    [example.mutation_type for _, example in chunk],
+                    [example.is_valid for _, example in chunk],
+                )
+
+        if writer is not None:
+            write_label_counts(writer, counts)
+
+    stats = {
+        "original": len(votes),
+        "synthetic": synthetic,
+        "total": len(votes) + synthetic,
+        "inherited_votes": labeler.counters["inherited_votes"],
+        "invalid": invalid.total(),
+        "duplicates": duplicates["exact"],
+        "near_duplicates": duplicates["near"],
+        **{f"invalid_{t}": invalid[t] for t in sorted(generated)},
+    }
+    if target is not None:
+        stats |= {f"quota_{name}": quota for name, quota in quotas.items()}
+        stats["over_quota"] = over_quota
+        stats["shortfall"] = remaining.total() if remaining is not None else 0
+    return stats
 
 
 def main() -> None:
@@ -47,11 +515,113 @@ def main() -> None:
     parser.add_argument("input", help="Input labeled parquet file")
     parser.add_argument("--output", "-o", help="Output augmented parquet file")
     parser.add_argument("--multiplier", type=int, default=2)
+    parser.add_argument(
+        "--lfs",
+        default=DEFAULT_REGISTRY,
+        help="YAML registry of labeling functions (default: built-in)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Mutation worker processes (default: physical core count)",
+    )
+    parser.add_argument(
+        "--seed", type=int, default=0, help="Root seed; output is reproducible"
+    )
+    parser.add_argument(
+        "--engine",
+        choices=["ast", "regex"],
+        default="ast",
+        help="Mutation engine (default: ast, whose mutants always parse)",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help="Rows per streamed batch and output row group; bounds peak memory",
+    )
+    parser.add_argument(
+        "--keep-invalid",
+        action="store_true",
+        help="Write mutants that do not compile with is_valid=false "
+        "(default: drop them)",
+    )
+    parser.add_argument(
+        "--no-dedup",
+        dest="dedup",
+        action="store_false",
+        help="Keep exact and near-duplicate mutants (default: drop them)",
+    )
+    parser.add_argument(
+        "--target",
+        nargs="+",
+        metavar="LABEL=SHARE",
+        help="Generate mutants toward this label mix, e.g. HIGH_RISK=1 "
+        "MEDIUM_RISK=1 LOW_RISK=1; --multiplier caps mutants per original",
+    )
+    parser.add_argument(
+        "--budget",
+        type=int,
+        default=None,
+        help="With --target, the most synthetic rows to write",
+    )
+    parser.add_argument(
+        "--time-budget",
+        type=float,
+        default=DEFAULT_TIME_BUDGET,
+        help="Seconds of regex matching per example; 0 disables the limit",
+    )
     args = parser.parse_args()
+    if args.budget is not None and not args.target:
+        parser.error("--budget requires --target")
+
+    target = None
+    if args.target:
+        try:
+            target = {
+                label: float(share)
+                for label, share in (item.split("=", 1) for item in args.target)
+            }
+        except ValueError:
+            parser.error(f"--target expects LABEL=SHARE, got {args.target}")
 
-    _ = SyntheticAugmenter()
-    _ = WeakSupervisionLabeler()
-    augment_corpus(args.input, args.output, args.multiplier)
+    stats = augment_corpus(
+        args.input,
+        args.output,
+        args.multiplier,
+        args.lfs,
+        args.workers,
+        args.seed,
+        MutationEngine[args.engine.upper()],
+        args.keep_invalid,
+        args.batch_size,
+        args.dedup,
+        target,
+        args.budget,
+        args.time_budget or None,
+    )
+    print(
+        f"Augmented {stats['original']} examples with {stats['synthetic']} "
+        f"synthetic ({stats['inherited_votes']} LF votes inherited, "
+        f"{stats['invalid']} invalid {'kept' if args.keep_invalid else 'dropped'}, "
+        f"{stats['duplicates']} duplicate and {stats['near_duplicates']} near "
+        "duplicate dropped)"
+    )
+    for key, count in stats.items():
+        if key.startswith("invalid_") and count:
+            print(f"  {key.removeprefix('invalid_')}: {count} invalid")
+    if target is not None:
+        quotas = {k: v for k, v in stats.items() if k.startswith("quota_")}
+        print(
+            "Quotas "
+            + ", ".join(f"{k.removeprefix('quota_')}={v}" for k, v in quotas.items())
+            + f" ({stats['over_quota']} over quota dropped, "
+            f"{stats['shortfall']} short)"
+        )
+    if args.output is not None:
+        mix = label_counts(args.output)
+        print("Labels " + ", ".join(f"{k}={v}" for k, v in sorted(mix.items())))
 
 
 if __name__ == "__main__":
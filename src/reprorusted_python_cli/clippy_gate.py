@@ -3,26 +3,92 @@
 Runs cargo clippy on transpiled Rust examples and reports
 lint violations as a quality gate for corpus inclusion.
 
+Examples are linted concurrently with the ``measure_compile_rate``
+scheduler. An example violates the gate when clippy reports an error,
+which in strict mode includes every warning, or does not finish within
+the timeout. With a shared target directory, and optionally prewarmed
+shared dependencies, examples reuse dependency artifacts instead of
+checking them again for every example.
+
 Usage:
     python -m reprorusted_python_cli.clippy_gate --soft -v
     python -m reprorusted_python_cli.clippy_gate --strict
 
+    # Check shared dependencies once, then lint 8 examples at a time
+    python -m reprorusted_python_cli.clippy_gate --strict -j 8 \
+        --target-dir /tmp/reprorusted-target --prewarm
+
 Examples:
     >>> from reprorusted_python_cli.clippy_gate import run_clippy_gate
 """
 
 from __future__ import annotations
 
+import asyncio
+from pathlib import Path
 from typing import TYPE_CHECKING
 
+from reprorusted_python_cli.measure_compile_rate import (
+    DEFAULT_EXAMPLES_DIR,
+    DEFAULT_TIMEOUT,
+    default_jobs,
+    find_examples,
+    iter_compile_results,
+    prewarm,
+)
+
 if TYPE_CHECKING:
-    from pathlib import Path
+    from collections.abc import Sequence
+
+CLIPPY_COMMAND = ("cargo", "clippy", "--quiet", "--message-format=short")
+# Appended in strict mode so any warning fails the example.
+STRICT_ARGS = ("--", "-D", "warnings")
+
+
+async def _gate(
+    examples_dir: Path,
+    verbose: bool,
+    jobs: int,
+    timeout: float,
+    command: Sequence[str],
+    target_dir: str | Path | None,
+    prewarm_deps: bool,
+) -> dict[str, int | float | list[str]]:
+    """Lint every example, streaming results, and tally the violations."""
+    crates = find_examples(examples_dir)
+    prewarmed = 0
+    if prewarm_deps and target_dir is not None:
+        built = await prewarm(crates, target_dir, command, jobs, timeout)
+        prewarmed = sum(result.passed for result in built)
+    files = []
+    results = iter_compile_results(
+        crates, examples_dir, command, jobs, timeout, target_dir
+    )
+    async for result in results:
+        if not result.passed:
+            files.append(result.example)
+        if verbose:
+            status = "CLEAN" if result.passed else "LINT"
+            status = "TIMEOUT" if result.timed_out else status
+            print(f"{status:7} {result.example} ({result.duration:.1f}s)", flush=True)
+    return {
+        "total": len(crates),
+        "violations": len(files),
+        "rate": 1 - len(files) / len(crates) if crates else 1.0,
+        "prewarmed": prewarmed,
+        "files": sorted(files),
+    }
 
 
 def run_clippy_gate(
     strict: bool = False,
     verbose: bool = False,
     examples_dir: str | Path | None = None,
+    jobs: int | None = None,
+    timeout: float = DEFAULT_TIMEOUT,
+    target_dir: str | Path | None = None,
+    prewarm_deps: bool = False,
+    command: Sequence[str] = CLIPPY_COMMAND,
 ) -> dict[str, int | float | list[str]]:
     """Run clippy gate on transpiled examples.
 
@@ -30,11 +96,42 @@ def run_clippy_gate(
         strict: If True, fail on any clippy warning.
         verbose: If True, print detailed output.
         examples_dir: Path to examples directory.
+        jobs: Concurrent clippy runs (default: CPUs, capped by memory).
+        timeout: Seconds before a clippy run is killed and counted as a
+            violation.
+        target_dir: Root of cargo target directories shared by the
+            examples, one per concurrent run, kept across runs.
+        prewarm_deps: If True, first check the dependency sets shared by
+            several examples into ``target_dir``.
+        command: Clippy command run in each crate directory.
 
     Returns:
-        Dictionary with clippy results and violation counts.
+        Dictionary with total, violations, the clean rate, prewarmed
+        (dependency sets built) and the violating example files.
+
+    Raises:
+        ValueError: If jobs or timeout is not positive, or prewarm_deps is
+            set without a target_dir.
     """
-    return {"total": 0, "violations": 0, "rate": 1.0, "files": []}
+    if jobs is not None and jobs < 1:
+        raise ValueError(f"jobs must be positive, got {jobs}")
+    if timeout <= 0:
+        raise ValueError(f"timeout must be positive, got {timeout}")
+    if prewarm_deps and target_dir is None:
+        raise ValueError("prewarm_deps requires a target_dir")
+    root = Path(examples_dir if examples_dir is not None else DEFAULT_EXAMPLES_DIR)
+    command = [*command, *STRICT_ARGS] if strict else list(command)
+    return asyncio.run(
+        _gate(
+            root,
+            verbose,
+            jobs or default_jobs(),
+            timeout,
+            command,
+            target_dir,
+            prewarm_deps,
+        )
+    )
 
 
 def main() -> None:
@@ -47,9 +144,48 @@ def main() -> None:
     parser.add_argument("--strict", action="store_true", help="Fail on any warning")
     parser.add_argument("--soft", action="store_true", help="Report only, don't fail")
     parser.add_argument("-v", "--verbose", action="store_true", help="Verbose output")
+    parser.add_argument("--examples-dir", "-d", help="Examples directory")
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=None,
+        help="Concurrent clippy runs (default: CPUs, capped by available memory)",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=DEFAULT_TIMEOUT,
+        help=f"Seconds before a clippy run is killed (default: {DEFAULT_TIMEOUT:g})",
+    )
+    parser.add_argument(
+        "--target-dir", help="Cargo target directories shared across examples"
+    )
+    parser.add_argument(
+        "--prewarm",
+        action="store_true",
+        help="Check dependencies shared by examples once before linting them "
+        "(copies the checked slot to every job slot, using jobs times its size)",
+    )
     args = parser.parse_args()
-
-    run_clippy_gate(strict=args.strict, verbose=args.verbose)
+    if args.prewarm and args.target_dir is None:
+        parser.error("--prewarm requires --target-dir")
+
+    stats = run_clippy_gate(
+        strict=args.strict,
+        verbose=args.verbose,
+        examples_dir=args.examples_dir,
+        jobs=args.jobs,
+        timeout=args.timeout,
+        target_dir=args.target_dir,
+        prewarm_deps=args.prewarm,
+    )
+    print(
+        f"Clippy gate: {stats['violations']}/{stats['total']} examples with "
+        f"violations, clean rate {stats['rate']:.1%}"
+    )
+    if stats["violations"] and not args.soft:
+        raise SystemExit(1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,347 @@
+"""Content-addressed cache of example compile results.
+
+Caches the outcome of compiling each example crate under a hash of its
+Rust sources, ``Cargo.toml`` and ``Cargo.lock``, the sources of its path
+dependencies and a fingerprint of the toolchain, target and compile
+command, in a SQLite file that persists across ``measure_compile_rate``
+runs. An unchanged crate under an unchanged toolchain is never rebuilt.
+Crates with registry or git dependencies but no ``Cargo.lock`` are not
+cached, since cargo may resolve newer versions on the next build. The
+file is kept under a size budget by evicting the least recently used
+results.
+
+Usage:
+    python -m reprorusted_python_cli.measure_compile_rate \
+        --cache data/compile_cache.sqlite --cache-size 256
+
+Examples:
+    >>> cache = CompileCache(":memory:")
+    >>> cache.get(b"key") is None
+    True
+
+    >>> cache.put(b"key", b"result")
+    >>> cache.get(b"key")
+    b'result'
+
+    >>> cache.hits, cache.misses
+    (1, 1)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import shutil
+import sqlite3
+import subprocess
+import tomllib
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator, Sequence
+
+DEFAULT_MAX_BYTES = 256 * 1024**2
+# Environment that changes what cargo builds without touching the crate.
+TOOLCHAIN_ENV = ("CARGO_BUILD_TARGET", "RUSTFLAGS", "RUSTUP_TOOLCHAIN")
+# Manifest tables declaring dependencies, also nested under [target.*].
+DEPENDENCY_TABLES = ("dependencies", "dev-dependencies", "build-dependencies")
+
+SELECT_CHUNK = 500
+# Only placeholders are formatted in; keys are always bound parameters.
+_SELECT_MANY = "SELECT key, result FROM results WHERE key IN ({})".format(  # nosec B608
+    ", ".join(["?"] * SELECT_CHUNK)
+)
+
+
+def toolchain_fingerprint(command: Sequence[str]) -> bytes:
+    """Return a fingerprint of everything outside a crate its build depends on.
+
+    Covers the ``rustc -vV`` report (release, commit hash and host), the
+    target and flag environment in ``TOOLCHAIN_ENV`` and the compile
+    command itself.
+
+    Args:
+        command: Compile command run in each crate.
+
+    Returns:
+        16-byte BLAKE2b digest.
+
+    Examples:
+        >>> len(toolchain_fingerprint(["cargo", "build"]))
+        16
+
+        >>> toolchain_fingerprint(["cargo", "build"]) == toolchain_fingerprint(
+        ...     ["cargo", "check"]
+        ... )
+        False
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    rustc = shutil.which("rustc")
+    if rustc is not None:
+        version = subprocess.run([rustc, "-vV"], capture_output=True, check=False)
+        digest.update(version.stdout)
+    for name in TOOLCHAIN_ENV:
+        digest.update(f"{name}={os.environ.get(name, '')}".encode())
+    digest.update(chr(0).join(command).encode())
+    return digest.digest()
+
+
+def _dependency_specs(crate: Path) -> Iterator[object]:
+    """Yield every dependency spec of a crate's manifest, target tables too.
+
+    An unreadable manifest has no dependencies; its compile reports the
+    error.
+    """
+    try:
+        with (crate / "Cargo.toml").open("rb") as manifest:
+            parsed = tomllib.load(manifest)
+    except (OSError, tomllib.TOMLDecodeError):
+        return
+    tables = [parsed, *parsed.get("target", {}).values()]
+    for table in tables:
+        for name in DEPENDENCY_TABLES:
+            yield from table.get(name, {}).values()
+
+
+def crate_sources(crate: str | Path) -> tuple[list[Path], bool]:
+    """Return the files a crate's build reads and whether it resolves offline.
+
+    Files are ``Cargo.toml``, ``Cargo.lock`` and every ``.rs`` file outside
+    ``target`` directories, of the crate and of every path dependency it
+    reaches. A crate resolves offline when it has a ``Cargo.lock`` or no
+    registry or git dependencies, so its dependency versions cannot change
+    between builds.
+
+    Args:
+        crate: Crate directory.
+
+    Returns:
+        Existing source files, crate first, and the offline flag.
+
+    Examples:
+        >>> crate_sources("missing")
+        ([], True)
+    """
+    root = Path(crate).resolve()
+    pending, seen = [root], {root}
+    sources: list[Path] = []
+    pinned = True
+    while pending:
+        directory = pending.pop()
+        paths = [directory / "Cargo.toml", directory / "Cargo.lock"]
+        paths += sorted(
+            path
+            for path in directory.rglob("*.rs")
+            if "target" not in path.relative_to(directory).parts
+        )
+        sources += [path for path in paths if path.is_file()]
+        for spec in _dependency_specs(directory):
+            if isinstance(spec, dict) and "path" in spec:
+                dependency = (directory / spec["path"]).resolve()
+                if dependency not in seen:
+                    seen.add(dependency)
+                    pending.append(dependency)
+            else:
+                pinned = False
+    return sources, pinned or (root / "Cargo.lock").is_file()
+
+
+class CompileCache:
+    """Size-bounded SQLite cache mapping content keys to compile results.
+
+    Results are opaque bytes; ``measure_compile_rate`` stores them as JSON.
+
+    Attributes:
+        path: SQLite file backing the cache.
+        max_bytes: Budget for the stored keys and results; the least
+            recently used are evicted beyond it.
+        hits: Number of lookups answered from the cache.
+        misses: Number of lookups not found.
+
+    Examples:
+        >>> cache = CompileCache(":memory:", max_bytes=30)
+        >>> cache.put(b"a" * 16, b"1" * 4)
+        >>> cache.put(b"b" * 16, b"2" * 4)
+        >>> cache.get(b"a" * 16) is None, cache.nbytes
+        (True, 20)
+    """
+
+    def __init__(self, path: str | Path, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        """Open or create the cache file.
+
+        Args:
+            path: SQLite file for the cache.
+            max_bytes: Budget for the stored keys and results.
+
+        Raises:
+            ValueError: If max_bytes is not positive.
+        """
+        if max_bytes < 1:
+            raise ValueError(f"max_bytes must be positive, got {max_bytes}")
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._db = sqlite3.connect(path, timeout=60.0)
+        # Evicted pages are returned to the file system, so the file
+        # shrinks with the budget; only takes effect on a new file.
+        self._db.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS results (key BLOB PRIMARY KEY, "
+            "result BLOB NOT NULL, size INTEGER NOT NULL, used INTEGER NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS results_used ON results (used)")
+        self._db.commit()
+        # Logical clock ordering uses, so entries stored together still
+        # evict in a fixed order.
+        self._clock = int(
+            self._db.execute("SELECT COALESCE(MAX(used), 0) FROM results").fetchone()[0]
+        )
+        # Upper bound on nbytes, so puts only sum the table near the budget.
+        self._bound = self.nbytes
+
+    @staticmethod
+    def key(crate: str | Path, toolchain: bytes) -> bytes | None:
+        """Return the cache key of a crate's sources under a toolchain.
+
+        Hashes the files from :func:`crate_sources`, with their paths
+        relative to the crate, so path dependencies count as the crate's own
+        sources. Build inputs outside them, such as files read by
+        ``include_str!`` or a ``Cargo.lock`` of an enclosing workspace, are
+        not covered.
+
+        Args:
+            crate: Crate directory.
+            toolchain: Fingerprint from :func:`toolchain_fingerprint`.
+
+        Returns:
+            16-byte BLAKE2b digest, or None if the crate does not resolve
+            offline and must not be cached.
+        """
+        root = Path(crate).resolve()
+        sources, pinned = crate_sources(root)
+        if not pinned:
+            return None
+        digest = hashlib.blake2b(toolchain, digest_size=16)
+        for path in sources:
+            content = path.read_bytes()
+            name = Path(os.path.relpath(path, root)).as_posix()
+            digest.update(f"{name}{chr(0)}{len(content)}{chr(0)}".encode())
+            digest.update(content)
+        return digest.digest()
+
+    @property
+    def nbytes(self) -> int:
+        """Return the bytes of keys and results stored."""
+        row = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()
+        return int(row[0])
+
+    def __len__(self) -> int:
+        """Return the number of cached results."""
+        return int(self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0])
+
+    def get(self, key: bytes) -> bytes | None:
+        """Look up ``key``, marking a hit as recently used.
+
+        Args:
+            key: Cache key from :meth:`key`.
+
+        Returns:
+            Cached result, or None on a miss.
+        """
+        return self.get_many([key])[0]
+
+    def get_many(self, keys: Sequence[bytes]) -> list[bytes | None]:
+        """Look up many keys, ``SELECT_CHUNK`` per query, marking hits as used.
+
+        Args:
+            keys: Cache keys from :meth:`key`.
+
+        Returns:
+            Cached results or None, one per key.
+        """
+        stored: dict[bytes, bytes] = {}
+        for start in range(0, len(keys), SELECT_CHUNK):
+            chunk = list(keys[start : start + SELECT_CHUNK])
+            # Padding with a repeated key keeps one fixed, prepared statement.
+            chunk += chunk[-1:] * (SELECT_CHUNK - len(chunk))
+            stored.update(self._db.execute(_SELECT_MANY, chunk).fetchall())
+        found = [stored.get(key) for key in keys]
+        hit = [
+            (self._tick(), key)
+            for key, result in zip(keys, found, strict=True)
+            if result is not None
+        ]
+        with self._db:
+            self._db.executemany("UPDATE results SET used = ? WHERE key = ?", hit)
+        self.hits += len(hit)
+        self.misses += len(keys) - len(hit)
+        return found
+
+    def put(self, key: bytes, result: bytes) -> None:
+        """Store ``result`` under ``key``, evicting beyond the budget.
+
+        Args:
+            key: Cache key from :meth:`key`.
+            result: Serialized compile result.
+        """
+        self.put_many([(key, result)])
+
+    def put_many(self, items: Iterable[tuple[bytes, bytes]]) -> None:
+        """Store many results and evict the least recently used beyond budget.
+
+        Args:
+            items: ``(key, result)`` pairs.
+        """
+        rows = [
+            (key, result, len(key) + len(result), self._tick()) for key, result in items
+        ]
+        with self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO results (key, result, size, used) "
+                "VALUES (?, ?, ?, ?)",
+                rows,
+            )
+        self._bound += sum(row[2] for row in rows)
+        if self._bound > self.max_bytes:
+            self.evict()
+
+    def evict(self) -> int:
+        """Drop the least recently used results until the cache fits its budget.
+
+        Returns:
+            Number of results evicted.
+        """
+        self._bound = self.nbytes
+        if self._bound <= self.max_bytes:
+            return 0
+        with self._db:
+            evicted = self._db.execute(
+                "DELETE FROM results WHERE key IN (SELECT key FROM (SELECT key, "
+                "SUM(size) OVER (ORDER BY used DESC, key) AS kept FROM results) "
+                "WHERE kept > ?)",
+                (self.max_bytes,),
+            ).rowcount
+        self._db.execute("PRAGMA incremental_vacuum")
+        self._bound = self.nbytes
+        return evicted
+
+    def _tick(self) -> int:
+        """Advance and return the use clock."""
+        self._clock += 1
+        return self._clock
+
+    def close(self) -> None:
+        """Commit and close the cache file."""
+        self._db.commit()
+        self._db.close()
+
+    def __enter__(self) -> CompileCache:
+        """Return self for use as a context manager."""
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        """Close the cache on context exit."""
+        self.close()
@@ -0,0 +1,381 @@
+"""Bounded-memory exact and near-duplicate filtering of code snippets.
+
+A :class:`DuplicateFilter` drops snippets seen before, exactly or nearly,
+while holding only fixed-size Bloom filters: exact duplicates are caught by
+the hash of the token-normalized code, near duplicates by MinHash
+locality-sensitive hashing whose band keys are kept in a Bloom filter
+instead of a bucket index. Memory is set by the expected number of
+snippets and the false positive rate, never by the snippets themselves, so
+ten million candidates fit in about 200 MiB. A false positive drops a
+unique snippet; nothing is ever kept twice.
+
+Examples:
+    >>> dedup = DuplicateFilter(capacity=100)
+    >>> code = "def area(width, height):" + chr(10) + "    return width * height"
+    >>> dedup.add(code) is None
+    True
+
+    >>> dedup.add(code.replace("    ", "  "))
+    'exact'
+
+    >>> dedup.add(code + " + 1")
+    'near'
+
+    >>> dedup.exact_duplicates, dedup.near_duplicates
+    (1, 1)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import math
+import tokenize
+from functools import cache
+from typing import Literal
+
+import numpy as np
+
+DEFAULT_ERROR_RATE = 1e-3
+DEFAULT_NUM_PERM = 64
+DEFAULT_BANDS = 8
+DEFAULT_SHINGLE_SIZE = 5
+
+# Fixed odd multipliers: hashes are reproducible across runs and processes,
+# which Python's salted str hash is not.
+_PRIME = np.uint64(0x100000001B3)
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_EMPTY = np.iinfo(np.uint64).max
+_MIX = (np.uint64(0xBF58476D1CE4E5B9), np.uint64(0x94D049BB133111EB))
+_SHIFTS = (np.uint64(30), np.uint64(27), np.uint64(31))
+
+
+def _mix(hashes: np.ndarray) -> np.ndarray:
+    """Return the splitmix64 finalization of ``uint64`` hashes."""
+    hashes = (hashes ^ (hashes >> _SHIFTS[0])) * _MIX[0]
+    hashes = (hashes ^ (hashes >> _SHIFTS[1])) * _MIX[1]
+    return hashes ^ (hashes >> _SHIFTS[2])
+
+
+@cache
+def _probes(num_perm: int) -> np.ndarray:
+    """Return the fixed bins each of ``num_perm`` bins probes when empty."""
+    probes = np.random.default_rng(num_perm).integers(0, num_perm, (num_perm, 64))
+    probes[:, 0] = np.arange(num_perm)
+    return probes
+
+
+def normalize_code(code: str) -> str:
+    """Drop comments and insignificant whitespace, keeping block structure.
+
+    Tokens are joined by one space, one logical line per line, indented by
+    nesting depth rather than by the original indent width. String tokens
+    are kept verbatim, so whitespace inside them still counts. Code that
+    does not tokenize keeps its indentation and only loses trailing
+    whitespace and blank lines.
+
+    Args:
+        code: Python source code.
+
+    Returns:
+        Code compared by exact and near-duplicate filtering.
+
+    Examples:
+        >>> print(normalize_code("if x:  # set" + chr(10) + "  y  =  ' a '"))
+        if x :
+            y = ' a '
+    """
+    try:
+        tokens = list(tokenize.generate_tokens(io.StringIO(code).readline))
+    except (tokenize.TokenError, SyntaxError):
+        # SyntaxError: inconsistent dedents raise IndentationError.
+        return "\n".join(line.rstrip() for line in code.splitlines() if line.strip())
+    lines: list[str] = []
+    words: list[str] = []
+    depth = 0
+    for token in tokens:
+        if token.type == tokenize.INDENT:
+            depth += 1
+        elif token.type == tokenize.DEDENT:
+            depth -= 1
+        elif token.type == tokenize.NEWLINE:
+            lines.append("    " * depth + " ".join(words))
+            words = []
+        elif token.type != tokenize.COMMENT and token.string.strip():
+            words.append(token.string)
+    return "\n".join(lines)
+
+
+def minhash(
+    code: str,
+    num_perm: int = DEFAULT_NUM_PERM,
+    shingle_size: int = DEFAULT_SHINGLE_SIZE,
+) -> np.ndarray:
+    """Return the MinHash signature of the character shingles of ``code``.
+
+    One hash per shingle is split into ``num_perm`` bins, each keeping its
+    minimum (one-permutation hashing), and empty bins borrow a filled one
+    chosen by a fixed hash sequence; this costs one pass over the shingles
+    rather than one per signature entry. The fraction of equal entries in two signatures
+    estimates the Jaccard similarity of the snippets' normalized
+    ``shingle_size``-grams.
+
+    Args:
+        code: Python source code.
+        num_perm: Signature length.
+        shingle_size: Characters per shingle.
+
+    Returns:
+        ``uint64`` array of ``num_perm`` bin minimums.
+
+    Raises:
+        ValueError: If num_perm or shingle_size is not positive.
+
+    Examples:
+        >>> a = minhash("total = price * quantity + shipping_cost")
+        >>> b = minhash("total = price * quantity + handling_cost")
+        >>> 0.5 < float((a == b).mean()) < 1.0
+        True
+    """
+    if num_perm < 1 or shingle_size < 1:
+        raise ValueError(
+            f"num_perm and shingle_size must be positive, got {num_perm}, "
+            f"{shingle_size}"
+        )
+    data = np.frombuffer(
+        normalize_code(code).encode("utf-8", "surrogatepass"), np.uint8
+    ).astype(np.uint64)
+    width = max(len(data) - shingle_size + 1, 1)
+    hashes = np.zeros(width, np.uint64)
+    for offset in range(min(shingle_size, len(data))):
+        hashes = hashes * _PRIME + data[offset : offset + width]
+    hashes = _mix(hashes)
+    # Pack each hash behind its bin so one sort leads every bin with its
+    # minimum.
+    shift = np.uint64(64 - max((num_perm - 1).bit_length(), 1))
+    packed = np.sort(hashes % np.uint64(num_perm) << shift | hashes >> (64 - shift))
+    bins = packed >> shift
+    first = np.ones(len(packed), bool)
+    first[1:] = bins[1:] != bins[:-1]
+    filled = bins[first].astype(np.intp)
+    signature = np.full(num_perm, _EMPTY)
+    signature[filled] = packed[first] & (_EMPTY >> (64 - shift))
+    if len(filled) < num_perm:
+        # Optimal densification: each bin probes its own fixed sequence of
+        # bins, itself first, and takes the first filled one, so empty bins
+        # of two snippets only agree if their donors do. Bins whose probes
+        # all miss fall back to the next filled bin.
+        probes = _probes(num_perm)
+        hits = (signature != _EMPTY)[probes]
+        attempt = hits.argmax(axis=1)
+        bins = np.arange(num_perm)
+        donor = np.where(
+            hits[bins, attempt],
+            probes[bins, attempt],
+            filled[np.searchsorted(filled, bins) % len(filled)],
+        )
+        signature = signature[donor] + attempt.astype(np.uint64) * _GOLDEN
+    return signature
+
+
+class BloomFilter:
+    """Fixed-size set of hashed keys with false positives and no false negatives.
+
+    Keys are rows of two independent ``uint64`` hashes, combined by double
+    hashing into the bit positions of each key.
+
+    Attributes:
+        capacity: Number of keys the filter is sized for.
+        error_rate: False positive rate once ``capacity`` keys are added.
+        num_bits: Size of the bit array.
+        num_hashes: Bits set per key.
+
+    Examples:
+        >>> bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        >>> digest = hashlib.blake2b(b"x = 1", digest_size=16).digest()
+        >>> keys = np.frombuffer(digest, np.uint64).reshape(1, 2)
+        >>> bloom.contains(keys).tolist()
+        [False]
+
+        >>> bloom.add(keys)
+        >>> bloom.contains(keys).tolist()
+        [True]
+
+        >>> bloom.num_hashes, bloom.nbytes
+        (7, 1199)
+    """
+
+    def __init__(self, capacity: int, error_rate: float = DEFAULT_ERROR_RATE) -> None:
+        """Size the bit array for ``capacity`` keys at ``error_rate``.
+
+        Args:
+            capacity: Number of keys the filter is sized for.
+            error_rate: False positive rate once ``capacity`` keys are added.
+
+        Raises:
+            ValueError: If capacity is not positive or error_rate is not in
+                (0, 1).
+        """
+        if capacity < 1:
+            raise ValueError(f"capacity must be positive, got {capacity}")
+        if not 0 < error_rate < 1:
+            raise ValueError(f"error_rate must be in (0, 1), got {error_rate}")
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._bits = np.zeros((self.num_bits + 7) // 8, np.uint8)
+        self._steps = np.arange(self.num_hashes, dtype=np.uint64)
+
+    @property
+    def nbytes(self) -> int:
+        """Return the size of the bit array in bytes."""
+        return self._bits.nbytes
+
+    def _positions(self, keys: np.ndarray) -> np.ndarray:
+        """Return the ``(len(keys), num_hashes)`` bit positions of ``keys``."""
+        steps = keys[:, 1:] | np.uint64(1)
+        return (keys[:, :1] + self._steps * steps) % np.uint64(self.num_bits)
+
+    def contains(self, keys: np.ndarray) -> np.ndarray:
+        """Return whether each key was probably added.
+
+        Args:
+            keys: ``uint64`` array of shape ``(n, 2)``.
+
+        Returns:
+            Boolean array of length ``n``.
+        """
+        positions = self._positions(keys)
+        bits = self._bits[positions >> np.uint64(3)] >> (positions & np.uint64(7))
+        return (bits & 1).all(axis=1).astype(bool)
+
+    def add(self, keys: np.ndarray) -> None:
+        """Add every key.
+
+        Args:
+            keys: ``uint64`` array of shape ``(n, 2)``.
+        """
+        positions = self._positions(keys).ravel()
+        masks = np.left_shift(1, positions & np.uint64(7)).astype(np.uint8)
+        np.bitwise_or.at(self._bits, positions >> np.uint64(3), masks)
+
+
+class DuplicateFilter:
+    """Streaming filter of exact and near-duplicate snippets.
+
+    A snippet is an exact duplicate if its normalized code was added
+    before, and a near duplicate if one of the ``bands`` slices of its
+    MinHash signature equals that of a snippet added before under the same
+    namespace, which happens with probability ``1 - (1 - s**r)**bands`` for
+    Jaccard similarity ``s`` and ``r`` rows per band.
+
+    Attributes:
+        num_perm: MinHash signature length.
+        bands: LSH bands the signature is cut into.
+        exact_duplicates: Snippets dropped as exact duplicates.
+        near_duplicates: Snippets dropped as near duplicates.
+
+    Examples:
+        >>> dedup = DuplicateFilter(capacity=10)
+        >>> round(dedup.threshold, 2)
+        0.77
+
+        >>> dedup.add("x = 1", near=False), dedup.add("x = 1")
+        (None, 'exact')
+
+        >>> code = "values = [item.price for item in basket.items()]"
+        >>> dedup.add(code, namespace="lambda")
+        >>> edited = code.replace("basket", "cart")
+        >>> dedup.add(edited, namespace="walrus_operator")
+        >>> dedup.add(edited, namespace="lambda")
+        'exact'
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        error_rate: float = DEFAULT_ERROR_RATE,
+        num_perm: int = DEFAULT_NUM_PERM,
+        bands: int = DEFAULT_BANDS,
+    ) -> None:
+        """Size the filters for ``capacity`` snippets.
+
+        Args:
+            capacity: Expected number of snippets added.
+            error_rate: Rate at which a unique snippet is wrongly dropped,
+                for each of the exact and near lookups. The near filter is
+                checked once per band, so each band key gets
+                ``error_rate / bands``.
+            num_perm: MinHash signature length.
+            bands: LSH bands the signature is cut into.
+
+        Raises:
+            ValueError: If bands does not divide num_perm, or capacity or
+                error_rate is out of range.
+        """
+        if bands < 1 or num_perm % bands:
+            raise ValueError(f"bands must divide num_perm {num_perm}, got {bands}")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.exact_duplicates = 0
+        self.near_duplicates = 0
+        self._exact = BloomFilter(capacity, error_rate)
+        self._near = BloomFilter(capacity * bands, error_rate / bands)
+        self._band_seeds = _mix(np.arange(1, bands + 1, dtype=np.uint64))
+        self._row_weights = _mix(np.arange(num_perm // bands, dtype=np.uint64)) | 1
+
+    @property
+    def threshold(self) -> float:
+        """Return the Jaccard similarity caught as near duplicate half the time."""
+        return (1 / self.bands) ** (self.bands / self.num_perm)
+
+    @property
+    def nbytes(self) -> int:
+        """Return the memory held by both Bloom filters in bytes."""
+        return self._exact.nbytes + self._near.nbytes
+
+    def _band_keys(self, code: str, namespace: str) -> np.ndarray:
+        """Return the Bloom filter key of each band of the signature."""
+        salt = hashlib.blake2b(
+            namespace.encode("utf-8", "surrogatepass"), digest_size=8
+        )
+        signature = minhash(code, self.num_perm).reshape(self.bands, -1)
+        keys = _mix(
+            self._band_seeds
+            ^ np.frombuffer(salt.digest(), np.uint64)
+            ^ (signature * self._row_weights).sum(axis=1, dtype=np.uint64)
+        )
+        return np.stack([keys, _mix(keys ^ _GOLDEN)], axis=1)
+
+    def add(
+        self, code: str, namespace: str = "", near: bool = True
+    ) -> Literal["exact", "near"] | None:
+        """Add ``code`` unless it duplicates a snippet added before.
+
+        Args:
+            code: Python source code.
+            namespace: Near duplicates are only sought among snippets added
+                under the same namespace; exact ones are sought everywhere.
+            near: Whether to seek and index near duplicates; snippets added
+                without are only found by later exact lookups.
+
+        Returns:
+            ``"exact"`` or ``"near"`` for a duplicate, which is not added,
+            or None for a new snippet.
+        """
+        digest = hashlib.blake2b(
+            normalize_code(code).encode("utf-8", "surrogatepass"), digest_size=16
+        ).digest()
+        exact = np.frombuffer(digest, np.uint64).reshape(1, 2)
+        if self._exact.contains(exact)[0]:
+            self.exact_duplicates += 1
+            return "exact"
+        if near:
+            bands = self._band_keys(code, namespace)
+            if self._near.contains(bands).any():
+                self.near_duplicates += 1
+                return "near"
+            self._near.add(bands)
+        self._exact.add(exact)
+        return None
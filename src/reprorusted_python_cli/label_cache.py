@@ -0,0 +1,277 @@
+"""Content-addressed cache of labeling function votes.
+
+Caches the LF vote vector of each snippet under a hash of its code and a
+fingerprint of the LF set, in a bounded in-memory LRU with an optional
+SQLite tier that persists across ``label_corpus`` runs. Votes are cached
+rather than final labels, so Tarantula weights are applied after lookup and
+reweighting keeps the cache warm.
+
+Usage:
+    python -m reprorusted_python_cli.label_corpus data/corpus.parquet \
+        --output data/labeled.parquet --cache data/label_cache.sqlite
+
+Examples:
+    >>> cache = LabelCache(max_entries=2)
+    >>> key = LabelCache.key("x = 1", b"lfs-v1")
+    >>> cache.get(key) is None
+    True
+
+    >>> cache.put(key, b"votes")
+    >>> cache.get(key)
+    b'votes'
+
+    >>> cache.hits, cache.misses
+    (1, 1)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+from collections import OrderedDict
+from itertools import pairwise
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Sequence
+    from pathlib import Path
+
+# Keys looked up per query; SQLite allows 999 parameters before 3.32.
+SELECT_CHUNK = 500
+# Only placeholders are formatted in; keys are always bound parameters.
+_SELECT_MANY = "SELECT key, votes FROM votes WHERE key IN ({})".format(  # nosec B608
+    ", ".join(["?"] * SELECT_CHUNK)
+)
+
+
+class LabelCache:
+    """Two-tier LRU cache mapping content keys to packed LF votes.
+
+    Attributes:
+        max_entries: Maximum number of entries held in memory.
+        path: SQLite file backing the cache, or None for memory only.
+        hits: Number of lookups answered from either tier.
+        misses: Number of lookups found in neither tier.
+
+    Examples:
+        >>> cache = LabelCache(max_entries=1)
+        >>> cache.put(b"a", b"1")
+        >>> cache.put(b"b", b"2")
+        >>> cache.get(b"a") is None
+        True
+
+        >>> len(cache)
+        1
+    """
+
+    def __init__(
+        self, max_entries: int = 100_000, path: str | Path | None = None
+    ) -> None:
+        """Create the cache, opening or creating the SQLite tier if given.
+
+        Args:
+            max_entries: Maximum number of entries held in memory.
+            path: SQLite file for the persistent tier.
+
+        Raises:
+            ValueError: If max_entries is not positive.
+        """
+        if max_entries < 1:
+            raise ValueError(f"max_entries must be positive, got {max_entries}")
+        self.max_entries = max_entries
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._memory: OrderedDict[bytes, bytes] = OrderedDict()
+        self._db: sqlite3.Connection | None = None
+        if path is not None:
+            # WAL and short per-batch transactions let labeling worker
+            # processes share one cache file.
+            self._db = sqlite3.connect(path, timeout=60.0)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS votes "
+                "(key BLOB PRIMARY KEY, votes BLOB NOT NULL)"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def key(code: str, fingerprint: bytes) -> bytes:
+        """Return the cache key of ``code`` under an LF-set fingerprint.
+
+        Args:
+            code: Python source code.
+            fingerprint: Fingerprint of the LF set that votes on ``code``.
+
+        Returns:
+            16-byte BLAKE2b digest.
+
+        Examples:
+            >>> len(LabelCache.key("x = 1", b"v1"))
+            16
+
+            >>> LabelCache.key("x", b"v1") == LabelCache.key("x", b"v2")
+            False
+        """
+        digest = hashlib.blake2b(fingerprint, digest_size=16)
+        digest.update(code.encode("utf-8", "surrogatepass"))
+        return digest.digest()
+
+    @staticmethod
+    def keys(codes: pa.Array | pa.ChunkedArray, fingerprint: bytes) -> list[bytes]:
+        """Return the cache key of every snippet of an Arrow string column.
+
+        Each snippet's UTF-8 bytes are hashed straight from the column's
+        data buffer, so no Python strings are created.
+
+        Args:
+            codes: Arrow string column; nulls hash as empty code.
+            fingerprint: Fingerprint of the LF set that votes on ``codes``.
+
+        Returns:
+            16-byte BLAKE2b digests, equal to :meth:`key` of each snippet.
+
+        Examples:
+            >>> keys = LabelCache.keys(pa.array(["x = 1", None]), b"v1")
+            >>> keys == [LabelCache.key("x = 1", b"v1"), LabelCache.key("", b"v1")]
+            True
+        """
+        seed = hashlib.blake2b(fingerprint, digest_size=16)
+        chunks = codes.chunks if isinstance(codes, pa.ChunkedArray) else [codes]
+        keys: list[bytes] = []
+        for chunk in chunks:
+            if not pa.types.is_large_string(chunk.type):
+                chunk = chunk.cast(pa.string())
+            chunk = pc.fill_null(chunk, "")
+            width = 8 if pa.types.is_large_string(chunk.type) else 4
+            _, offsets, data = chunk.buffers()
+            bounds = np.frombuffer(
+                offsets,
+                dtype=f"<i{width}",
+                count=len(chunk) + 1,
+                offset=chunk.offset * width,
+            ).tolist()
+            view = memoryview(data if data is not None else b"")
+            for start, end in pairwise(bounds):
+                digest = seed.copy()
+                digest.update(view[start:end])
+                keys.append(digest.digest())
+        return keys
+
+    def __len__(self) -> int:
+        """Return the number of entries held in memory."""
+        return len(self._memory)
+
+    def get(self, key: bytes) -> bytes | None:
+        """Look up ``key``, promoting disk hits into memory.
+
+        Args:
+            key: Cache key from :meth:`key`.
+
+        Returns:
+            Cached votes, or None on a miss.
+        """
+        return self.get_many([key])[0]
+
+    def get_many(self, keys: Sequence[bytes]) -> list[bytes | None]:
+        """Look up many keys, querying the disk tier only for memory misses.
+
+        Args:
+            keys: Cache keys from :meth:`key`.
+
+        Returns:
+            Cached votes or None, one per key.
+        """
+        found: list[bytes | None] = [None] * len(keys)
+        pending: dict[bytes, list[int]] = {}
+        for i, key in enumerate(keys):
+            votes = self._memory.get(key)
+            if votes is None:
+                pending.setdefault(key, []).append(i)
+            else:
+                self._memory.move_to_end(key)
+                found[i] = votes
+        if pending and self._db is not None:
+            for key, votes in _select(self._db, list(pending)):
+                for i in pending.pop(key):
+                    found[i] = votes
+                self._remember(key, votes)
+        # A key repeated within one lookup counts as one miss, as if the
+        # first occurrence had been stored before the rest were looked up.
+        self.misses += len(pending)
+        self.hits += len(keys) - len(pending)
+        return found
+
+    def put(self, key: bytes, votes: bytes) -> None:
+        """Store ``votes`` under ``key`` in both tiers.
+
+        Args:
+            key: Cache key from :meth:`key`.
+            votes: Packed vote vector.
+        """
+        self.put_many([(key, votes)])
+
+    def put_many(self, items: Iterable[tuple[bytes, bytes]]) -> None:
+        """Store many entries in both tiers, committing them to disk.
+
+        Args:
+            items: ``(key, votes)`` pairs.
+        """
+        items = list(items)
+        for key, votes in items:
+            self._remember(key, votes)
+        if self._db is not None:
+            with self._db:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO votes (key, votes) VALUES (?, ?)", items
+                )
+
+    def flush(self) -> None:
+        """Commit pending writes to the disk tier."""
+        if self._db is not None:
+            self._db.commit()
+
+    def close(self) -> None:
+        """Flush and close the disk tier."""
+        if self._db is not None:
+            self.flush()
+            self._db.close()
+            self._db = None
+
+    def __enter__(self) -> LabelCache:
+        """Return self for use as a context manager."""
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        """Close the cache on context exit."""
+        self.close()
+
+    def _remember(self, key: bytes, votes: bytes) -> None:
+        """Insert into the memory tier, evicting the least recently used."""
+        self._memory[key] = votes
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+
+def _select(db: sqlite3.Connection, keys: list[bytes]) -> list[tuple[bytes, bytes]]:
+    """Fetch ``keys`` from the disk tier, ``SELECT_CHUNK`` keys per query.
+
+    Args:
+        db: Open cache database.
+        keys: Keys to fetch.
+
+    Returns:
+        ``(key, votes)`` rows for the keys present on disk.
+    """
+    rows: list[tuple[bytes, bytes]] = []
+    for start in range(0, len(keys), SELECT_CHUNK):
+        chunk = keys[start : start + SELECT_CHUNK]
+        # Padding with a repeated key keeps one fixed, prepared statement.
+        chunk += chunk[-1:] * (SELECT_CHUNK - len(chunk))
+        rows += db.execute(_SELECT_MANY, chunk).fetchall()
+    return rows
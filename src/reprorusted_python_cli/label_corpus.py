@@ -2,7 +2,16 @@
 
 Usage:
     python -m reprorusted_python_cli.label_corpus \
-        data/corpus.parquet --output data/labeled.parquet
+        data/corpus.parquet --output data/labeled.parquet --workers 32
+
+    # Relabel only rows whose code or LFs changed since the last run
+    python -m reprorusted_python_cli.label_corpus \
+        data/corpus.parquet --output data/labeled.parquet \
+        --previous data/labeled.parquet
+
+    # Label with the LFs of a custom YAML registry
+    python -m reprorusted_python_cli.label_corpus \
+        data/corpus.parquet --output data/labeled.parquet --lfs my_lfs.yaml
 
 Examples:
     >>> from reprorusted_python_cli.label_corpus import label_corpus
@@ -10,30 +19,681 @@ Examples:
 
 from __future__ import annotations
 
+import hashlib
+import json
+import os
+from collections import Counter, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from tempfile import TemporaryDirectory
 from typing import TYPE_CHECKING
 
-from reprorusted_python_cli.weak_supervision import WeakSupervisionLabeler
+import numpy as np
+import psutil
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from reprorusted_python_cli.label_cache import LabelCache
+from reprorusted_python_cli.label_model import LabelModel
+from reprorusted_python_cli.weak_supervision import (
+    DEFAULT_REGISTRY,
+    DEFAULT_TIME_BUDGET,
+    UNKNOWN_VOTE,
+    CompiledLFEngine,
+    Label,
+    LabelingFunction,
+    WeakSupervisionLabeler,
+)
 
 if TYPE_CHECKING:
-    from pathlib import Path
+    from collections.abc import Generator, Iterator, Sequence
+
+DEFAULT_BATCH_SIZE = 16_384
+
+# Vote aggregation strategies: fixed Tarantula weights or a fitted LabelModel.
+AGGREGATIONS = ("tarantula", "label-model")
+
+# Output schema metadata key holding the LF set the votes were computed with.
+LF_METADATA_KEY = b"weak_supervision.lfs"
+
+# Footer metadata key holding the row count of each final label, so class
+# distributions are read without scanning any data.
+LABEL_COUNTS_KEY = b"weak_supervision.label_counts"
+
+# Sorted content hashes and their votes, remapped to the current LF order.
+PreviousVotes = tuple[np.ndarray, np.ndarray]
+
+# Final label names indexed by Label.code, for vectorized decoding.
+_LABEL_NAMES = np.array([label.name for label in Label if label is not Label.ABSTAIN])
+
+# Per-process labeling settings, set by _init_worker.
+_worker_threshold = 0.5
+_worker_time_budget: float | None = None
+_worker_cache: LabelCache | None = None
+_worker_engine: CompiledLFEngine | None = None
+
+
+@dataclass
+class LabelResult:
+    """Labeling output for one batch of the ``code`` column.
+
+    Attributes:
+        labels: Final label codes.
+        confidence: Final label confidences.
+        votes: Per-LF vote matrix.
+        hashes: Content hash of each row, as an ``S16`` array.
+        reused: Rows whose votes were all copied from the previous output.
+        counters: Raw labeling counters for ``merge_stats``.
+    """
+
+    labels: np.ndarray
+    confidence: np.ndarray
+    votes: np.ndarray
+    hashes: np.ndarray
+    reused: int
+    counters: dict[str, int]
+
+
+def default_workers() -> int:
+    """Return the default worker count: the number of physical cores.
+
+    Returns:
+        Physical core count, or 1 if it cannot be determined.
+
+    Examples:
+        >>> default_workers() >= 1
+        True
+    """
+    return psutil.cpu_count(logical=False) or 1
+
+
+def content_hashes(codes: pa.Array) -> np.ndarray:
+    """Return the 16-byte BLAKE2b digest of each snippet.
+
+    Args:
+        codes: Arrow string array; nulls hash as empty code.
+
+    Returns:
+        ``S16`` array of digests.
+
+    Examples:
+        >>> hashes = content_hashes(pa.array(["x = 1", None, ""]))
+        >>> hashes.dtype, bool(hashes[1] == hashes[2]), bool(hashes[0] == hashes[1])
+        (dtype('S16'), True, False)
+    """
+    # A content hash is the vote cache key under an empty LF fingerprint.
+    return np.array(LabelCache.keys(codes, b""), dtype="S16")
+
+
+def lf_metadata(labeling_functions: Sequence[LabelingFunction]) -> bytes:
+    """Describe an LF set for the output schema metadata.
+
+    Args:
+        labeling_functions: LFs in vote-column order.
+
+    Returns:
+        JSON with the LF-set version and each LF's name and fingerprint.
+
+    Examples:
+        >>> lf = LabelingFunction("gen", 0.5, r"yield ")
+        >>> json.loads(lf_metadata([lf]))["lfs"][0]["name"]
+        'gen'
+    """
+    lfs = [
+        {"name": lf.name, "fingerprint": lf.fingerprint} for lf in labeling_functions
+    ]
+    version = hashlib.blake2b(json.dumps(lfs).encode(), digest_size=8).hexdigest()
+    return json.dumps({"version": version, "lfs": lfs}).encode()
+
+
+def count_labels(labels: np.ndarray) -> Counter[str]:
+    """Count final label codes by label name.
+
+    Args:
+        labels: Final label codes, e.g. ``LabelBatch.labels``.
+
+    Returns:
+        Rows per label name, for labels that occur.
+
+    Examples:
+        >>> count_labels(np.array([0, 2, 2], dtype=np.int8))
+        Counter({'LOW_RISK': 2, 'HIGH_RISK': 1})
+    """
+    names, counts = np.unique(_LABEL_NAMES[labels], return_counts=True)
+    return Counter(dict(zip(names.tolist(), counts.tolist(), strict=True)))
+
+
+def write_label_counts(writer: pq.ParquetWriter, counts: Counter[str]) -> None:
+    """Record the label counts of everything written in the file footer.
+
+    Args:
+        writer: Open writer, about to be closed.
+        counts: Rows per label name, see :func:`count_labels`.
+    """
+    writer.add_key_value_metadata(
+        {LABEL_COUNTS_KEY: json.dumps(dict(sorted(counts.items())))}
+    )
+
+
+def label_counts(path: str | Path) -> Counter[str]:
+    """Return the rows per label of a labeled parquet file.
+
+    Files written by ``label_corpus`` or ``augment_corpus`` record the
+    counts in their footer, so only the footer is read. Other files with a
+    ``label`` column are counted in one pass over that column alone.
+
+    Args:
+        path: Labeled parquet file.
+
+    Returns:
+        Rows per label name.
+
+    Raises:
+        ValueError: If the file has neither recorded counts nor a ``label``
+            column.
+    """
+    parquet = pq.ParquetFile(path)
+    stored = (parquet.metadata.metadata or {}).get(LABEL_COUNTS_KEY)
+    if stored is not None:
+        return Counter(json.loads(stored))
+    if "label" not in parquet.schema_arrow.names:
+        raise ValueError(f"{path} has no label column or label counts")
+    counts: Counter[str] = Counter()
+    for batch in parquet.iter_batches(columns=["label"]):
+        for entry in batch.column("label").drop_null().value_counts().to_pylist():
+            counts[entry["values"]] += entry["counts"]
+    return counts
+
+
+def remap_votes(
+    metadata: bytes,
+    stored: np.ndarray,
+    labeling_functions: Sequence[LabelingFunction],
+) -> np.ndarray:
+    """Align stored vote columns with the current LFs.
+
+    Columns of LFs whose name or fingerprint no longer matches, and columns
+    of new LFs, are set to ``UNKNOWN_VOTE`` so only they are recomputed.
+
+    Args:
+        metadata: :func:`lf_metadata` of the LFs the votes were stored with.
+        stored: Int8 vote matrix in the stored LF order.
+        labeling_functions: Current LFs in vote-column order.
+
+    Returns:
+        Int8 vote matrix in the current LF order.
+
+    Examples:
+        >>> old = LabelingFunction("gen", 0.5, r"yield ")
+        >>> new = LabelingFunction("lam", 0.5, r"lambda ")
+        >>> stored = np.array([[2], [-1]], dtype=np.int8)
+        >>> remap_votes(lf_metadata([old]), stored, [new, old]).tolist()
+        [[-2, 2], [-2, -1]]
+    """
+    columns = {
+        (lf["name"], lf["fingerprint"]): i
+        for i, lf in enumerate(json.loads(metadata)["lfs"])
+    }
+    votes = np.full((len(stored), len(labeling_functions)), UNKNOWN_VOTE, dtype=np.int8)
+    for j, lf in enumerate(labeling_functions):
+        i = columns.get((lf.name, lf.fingerprint))
+        if i is not None:
+            votes[:, j] = stored[:, i]
+    return votes
+
+
+def stored_votes(table: pa.Table) -> np.ndarray:
+    """Return the ``lf_votes`` column of a labeled table as a vote matrix.
+
+    Args:
+        table: Table with a fixed-size ``lf_votes`` list column.
+
+    Returns:
+        Int8 ``(num_rows, n_lfs)`` vote matrix in the stored LF order.
+    """
+    column = table.column("lf_votes")
+    return np.asarray(column.combine_chunks().flatten(), dtype=np.int8).reshape(
+        table.num_rows, column.type.list_size
+    )
+
+
+def load_previous(
+    path: str | Path, labeling_functions: Sequence[LabelingFunction]
+) -> PreviousVotes | None:
+    """Load the votes of a previous output, remapped to the current LFs.
+
+    See :func:`remap_votes`; weight changes keep every column valid.
+
+    Args:
+        path: Previous ``label_corpus`` output.
+        labeling_functions: Current LFs in vote-column order.
+
+    Returns:
+        Sorted unique content hashes and their remapped vote rows, or None if
+        the file is missing or predates incremental relabeling.
+    """
+    if not Path(path).exists():
+        return None
+    schema = pq.read_schema(path)
+    metadata = (schema.metadata or {}).get(LF_METADATA_KEY)
+    if metadata is None or not {"content_hash", "lf_votes"} <= set(schema.names):
+        return None
+    table = pq.read_table(path, columns=["content_hash", "lf_votes"])
+    hashes = np.frombuffer(
+        table.column("content_hash").combine_chunks().buffers()[1],
+        dtype="S16",
+        count=table.num_rows,
+    )
+    votes = remap_votes(metadata, stored_votes(table), labeling_functions)
+    hashes, first = np.unique(hashes, return_index=True)
+    return hashes, votes[first]
+
+
+def _init_worker(
+    threshold: float,
+    cache_path: str | Path | None,
+    time_budget: float | None = None,
+    engine: CompiledLFEngine | None = None,
+) -> None:
+    """Configure labeling for the current process.
+
+    Args:
+        threshold: Confidence threshold for labeling.
+        cache_path: SQLite vote cache shared by all workers, if any.
+        time_budget: Per-example regex time budget in seconds, or None.
+        engine: Compiled LF engine to label every batch with; None means
+            the built-in LFs.
+    """
+    global _worker_threshold, _worker_cache, _worker_time_budget, _worker_engine
+    _worker_threshold = threshold
+    _worker_time_budget = time_budget
+    _worker_engine = engine
+    if _worker_cache is not None:
+        _worker_cache.close()
+    _worker_cache = LabelCache(path=cache_path) if cache_path is not None else None
+
+
+def _batch_task(
+    batch: pa.RecordBatch, previous: PreviousVotes | None
+) -> tuple[pa.Array, np.ndarray | None, np.ndarray | None]:
+    """Return the :func:`_label_codes` arguments of one input batch.
+
+    Rows found in the previous output get their stored votes, looked up
+    here so a task carries only its own batch's rows of the previous
+    output.
+
+    Args:
+        batch: Input batch containing a ``code`` column.
+        previous: Votes from a previous output to copy forward, if any.
+
+    Returns:
+        The batch's code, and with ``previous`` its content hashes and
+        prior vote matrix.
+    """
+    codes = batch.column("code")
+    if previous is None:
+        return codes, None, None
+    known, known_votes = previous
+    hashes = content_hashes(codes)
+    pos = np.searchsorted(known, hashes).clip(max=max(len(known) - 1, 0))
+    found = known[pos] == hashes if len(known) else np.zeros(len(hashes), bool)
+    prior = np.full((len(hashes), known_votes.shape[1]), UNKNOWN_VOTE, dtype=np.int8)
+    prior[found] = known_votes[pos[found]]
+    return codes, hashes, prior
+
+
+def _label_codes(
+    codes: pa.Array, hashes: np.ndarray | None = None, prior: np.ndarray | None = None
+) -> LabelResult:
+    """Label one batch of the ``code`` column.
+
+    Rows with a ``prior`` start from those votes. Rows still holding
+    unknown votes, such as new code or rows of changed LFs, are looked up
+    in the vote cache, and only what it lacks is evaluated.
+
+    Args:
+        codes: Arrow string array of source snippets.
+        hashes: Content hashes of ``codes``, if already computed.
+        prior: Votes copied from a previous output, see :func:`_batch_task`.
+
+    Returns:
+        The batch's labeling result.
+    """
+    labeler = WeakSupervisionLabeler(
+        threshold=_worker_threshold,
+        cache=_worker_cache,
+        time_budget=_worker_time_budget,
+        engine=_worker_engine,
+    )
+    if hashes is None:
+        hashes = content_hashes(codes)
+    reused = 0
+    if prior is None:
+        batch = labeler.label_batch(codes)
+    else:
+        reused = int(np.count_nonzero((prior != UNKNOWN_VOTE).all(axis=1)))
+        batch = labeler.label_batch(codes, prior=prior)
+    return LabelResult(
+        batch.labels, batch.confidence, batch.votes, hashes, reused, labeler.counters
+    )
+
+
+def _rss_bytes(process: psutil.Process) -> int:
+    """Return the resident set size of ``process`` and its worker children.
+
+    Args:
+        process: Coordinating process.
+
+    Returns:
+        Combined RSS in bytes.
+    """
+    total = process.memory_info().rss
+    for child in process.children():
+        try:
+            total += child.memory_info().rss
+        except psutil.NoSuchProcess:
+            continue
+    return total
+
+
+def _write_labeled(
+    writer: pq.ParquetWriter,
+    batch: pa.RecordBatch,
+    keep: Sequence[str],
+    labels: np.ndarray,
+    confidence: np.ndarray,
+    hashes: np.ndarray,
+    votes: np.ndarray,
+) -> None:
+    """Write one input batch's pass-through columns with its labeling.
+
+    Args:
+        writer: Output writer whose schema ends with the labeling columns.
+        batch: Input batch holding the ``keep`` columns.
+        keep: Pass-through column names.
+        labels: Final label codes.
+        confidence: Final label confidences.
+        hashes: ``S16`` content hashes.
+        votes: Int8 per-LF vote matrix.
+    """
+    arrays = [batch.column(name) for name in keep]
+    arrays.append(pa.array(_LABEL_NAMES[labels], pa.string()))
+    arrays.append(pa.array(confidence, pa.float64()))
+    arrays.append(
+        pa.FixedSizeBinaryArray.from_buffers(
+            pa.binary(16), len(hashes), [None, pa.py_buffer(hashes)]
+        )
+    )
+    arrays.append(
+        pa.FixedSizeListArray.from_arrays(
+            pa.array(votes.ravel(), pa.int8()), votes.shape[1]
+        )
+    )
+    writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=writer.schema))
+
+
+def _count_patterns(patterns: Counter[bytes], votes: np.ndarray) -> None:
+    """Add the rows of a vote matrix to counts of distinct vote rows.
+
+    Args:
+        patterns: Rows seen so far, keyed by their int8 bytes.
+        votes: Int8 ``(n_examples, n_lfs)`` vote matrix.
+    """
+    distinct, counts = np.unique(votes, axis=0, return_counts=True)
+    patterns.update(
+        dict(zip((row.tobytes() for row in distinct), counts.tolist(), strict=True))
+    )
+
+
+def _fit_patterns(patterns: Counter[bytes], n_lfs: int) -> LabelModel:
+    """Fit a label model to counted vote rows, see :func:`_count_patterns`."""
+    votes = np.frombuffer(b"".join(patterns), np.int8).reshape(len(patterns), n_lfs)
+    counts = np.fromiter(patterns.values(), np.float64, len(patterns))
+    return LabelModel().fit(votes, counts)
+
+
+@contextmanager
+def _replace_on_success(path: str | Path) -> Generator[Path]:
+    """Yield a temporary path beside ``path`` that replaces it on success.
+
+    The file written there is moved onto ``path`` in one rename when the
+    block exits cleanly and deleted otherwise, so ``path`` always holds
+    either its old content or a complete new file.
+
+    Args:
+        path: Final output path.
+
+    Yields:
+        Path to write the new file to.
+    """
+    target = Path(path)
+    partial = target.with_name(f".{target.name}.{os.getpid()}.partial")
+    try:
+        yield partial
+        os.replace(partial, target)
+    finally:
+        partial.unlink(missing_ok=True)
+
+
+def _ordered_map(
+    pool: ProcessPoolExecutor,
+    batches: Iterator[pa.RecordBatch],
+    window: int,
+    previous: PreviousVotes | None = None,
+) -> Iterator[tuple[pa.RecordBatch, LabelResult]]:
+    """Label batches on ``pool`` in input order with at most ``window`` queued.
+
+    Args:
+        pool: Worker pool initialized by :func:`_init_worker`.
+        batches: Input batches containing a ``code`` column.
+        window: Maximum number of batches submitted but not yet yielded.
+        previous: Votes from a previous output to copy forward, if any.
+
+    Yields:
+        Each input batch with its labeling result.
+    """
+    pending: deque[tuple[pa.RecordBatch, Future[LabelResult]]] = deque()
+    for batch in batches:
+        task = _batch_task(batch, previous)
+        pending.append((batch, pool.submit(_label_codes, *task)))
+        if len(pending) >= window:
+            head, future = pending.popleft()
+            yield head, future.result()
+    while pending:
+        head, future = pending.popleft()
+        yield head, future.result()
 
 
 def label_corpus(
     input_path: str | Path,
     output_path: str | Path | None = None,
     threshold: float = 0.5,
+    cache_path: str | Path | None = None,
+    workers: int | None = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    columns: Sequence[str] | None = None,
+    previous_path: str | Path | None = None,
+    aggregation: str = "tarantula",
+    time_budget: float | None = None,
+    registry_path: str | Path = DEFAULT_REGISTRY,
 ) -> dict[str, int | float]:
     """Apply weak supervision labels to a corpus parquet file.
 
+    The input is streamed with ``ParquetFile.iter_batches`` and the output
+    written incrementally with a ``ParquetWriter``, so peak memory is bounded
+    by the batch size rather than the corpus size. Only ``code`` and the
+    pass-through columns are read. Batches are labeled across a process pool
+    with a bounded number in flight; each worker labels the ``code`` column
+    directly as Arrow data and returns its raw counters, which are merged
+    into corpus-wide statistics. Batches are written in input order, so the
+    output does not depend on the worker count.
+
+    Each output row records the content hash of its code and its per-LF
+    votes, and the schema metadata records the LF set. Given that output as
+    ``previous_path``, rows with unchanged code copy forward the votes of
+    unchanged LFs, so only new code and changed LFs are evaluated. Votes are
+    reaggregated on every run, so weight changes need no LF evaluation. The
+    previous hashes and votes, 16 bytes plus one per LF for each distinct
+    row, are held once by the calling process, which looks up each batch's
+    rows and sends a worker only those.
+
+    The LFs are loaded from ``registry_path`` into a :class:`CompiledLFEngine`
+    that is pickled to each worker once, when the pool starts. A worker
+    compiles the patterns again on unpickling, but never reloads the
+    registry or recompiles per batch.
+
+    With ``aggregation="label-model"`` labeled rows are first streamed to a
+    scratch file beside the output while the distinct vote rows are
+    counted. A :class:`LabelModel` is fitted to those counts, whose number
+    is bounded by the LF set rather than the corpus, and a second pass
+    streams the scratch file into the output with the model's labels. The
+    input is read and labeled once.
+
     Args:
         input_path: Path to input parquet file.
-        output_path: Path to output parquet file.
+        output_path: Path to output parquet file. The pass-through columns
+            are written followed by ``label``, ``confidence``,
+            ``content_hash`` and ``lf_votes``; the footer records the rows
+            per label, see :func:`label_counts`.
         threshold: Confidence threshold for labeling.
+        cache_path: SQLite vote cache reused across runs. Rows whose code
+            was labeled before under the same LF set skip LF evaluation.
+        workers: Worker processes; defaults to the physical core count.
+            With 1, labeling runs in the calling process.
+        batch_size: Rows per streamed batch.
+        columns: Input columns passed through to the output; defaults to
+            all columns.
+        previous_path: Earlier output to copy votes forward from. The output
+            is written to a temporary file beside ``output_path`` and moved
+            into place only once complete, so this may be ``output_path``
+            and a failed run leaves it intact. A missing or pre-incremental
+            file means a full relabel.
+        aggregation: One of ``AGGREGATIONS``.
+        time_budget: Seconds of Python regex matching allowed per example
+            before the LFs still running are recorded as ABSTAIN, or None
+            for no limit. Overruns are counted in the ``timeouts`` stat.
+        registry_path: YAML registry of the LFs to label with.
 
     Returns:
-        Dictionary with labeling statistics.
+        Dictionary with labeling statistics and ``peak_rss_mb``, the peak
+        resident memory of the labeling processes sampled after each batch.
+        With ``previous_path``, also ``reused_rows``: rows that needed no LF
+        evaluation.
+
+    Raises:
+        ValueError: If aggregation is unknown, or is ``"label-model"``
+            without an output_path for the model's labels.
     """
-    return {}
+    if aggregation not in AGGREGATIONS:
+        raise ValueError(
+            f"aggregation must be one of {AGGREGATIONS}, got {aggregation!r}"
+        )
+    if aggregation == "label-model" and output_path is None:
+        raise ValueError("aggregation 'label-model' requires an output_path")
+    workers = workers or default_workers()
+    parquet = pq.ParquetFile(input_path)
+    keep = list(parquet.schema_arrow.names if columns is None else columns)
+    if output_path is None:
+        keep = []
+    read = keep if "code" in keep else [*keep, "code"]
+    labeler = WeakSupervisionLabeler(
+        threshold=threshold, time_budget=time_budget, registry=registry_path
+    )
+    engine = labeler.engine.warm()
+    lfs = engine.labeling_functions
+    previous = None if previous_path is None else load_previous(previous_path, lfs)
+    reused = 0
+    process = psutil.Process()
+    peak_rss = _rss_bytes(process)
+
+    with ExitStack() as stack:
+        writer: pq.ParquetWriter | None = None
+        scratch: pq.ParquetWriter | None = None
+        if output_path is not None:
+            schema = pa.schema(
+                [
+                    *(parquet.schema_arrow.field(name) for name in keep),
+                    pa.field("label", pa.string()),
+                    pa.field("confidence", pa.float64()),
+                    pa.field("content_hash", pa.binary(16)),
+                    pa.field("lf_votes", pa.list_(pa.int8(), len(lfs))),
+                ],
+                metadata={LF_METADATA_KEY: lf_metadata(lfs)},
+            )
+            partial = stack.enter_context(_replace_on_success(output_path))
+            writer = stack.enter_context(pq.ParquetWriter(partial, schema))
+            if aggregation == "label-model":
+                scratch_dir = stack.enter_context(
+                    TemporaryDirectory(dir=partial.parent)
+                )
+                scratch = stack.enter_context(
+                    pq.ParquetWriter(Path(scratch_dir) / partial.name, schema)
+                )
+
+        batches = parquet.iter_batches(batch_size=batch_size, columns=read)
+        labeled: Iterator[tuple[pa.RecordBatch, LabelResult]]
+        if workers > 1:
+            pool = stack.enter_context(
+                ProcessPoolExecutor(
+                    max_workers=workers,
+                    initializer=_init_worker,
+                    initargs=(threshold, cache_path, time_budget, engine),
+                )
+            )
+            labeled = _ordered_map(pool, batches, 2 * workers, previous)
+        else:
+            _init_worker(threshold, cache_path, time_budget, engine)
+            stack.callback(_init_worker, 0.5, None)
+            labeled = ((b, _label_codes(*_batch_task(b, previous))) for b in batches)
+
+        first_pass = scratch or writer
+        patterns: Counter[bytes] = Counter()
+        counts: Counter[str] = Counter()
+        for batch, result in labeled:
+            labeler.merge_stats(result.counters)
+            reused += result.reused
+            if scratch is not None:
+                _count_patterns(patterns, result.votes)
+            if first_pass is not None:
+                counts += count_labels(result.labels)
+                _write_labeled(
+                    first_pass,
+                    batch,
+                    keep,
+                    result.labels,
+                    result.confidence,
+                    result.hashes,
+                    result.votes,
+                )
+            peak_rss = max(peak_rss, _rss_bytes(process))
+
+        if writer is not None and scratch is not None and patterns:
+            scratch.close()
+            model = _fit_patterns(patterns, len(lfs))
+            counts = Counter()
+            for batch in pq.ParquetFile(scratch.where).iter_batches(batch_size):
+                labels, confidence = model.predict(
+                    stored_votes(pa.Table.from_batches([batch]))
+                )
+                counts += count_labels(labels)
+                arrays = batch.columns
+                arrays[len(keep)] = pa.array(_LABEL_NAMES[labels], pa.string())
+                arrays[len(keep) + 1] = pa.array(confidence, pa.float64())
+                writer.write_batch(
+                    pa.RecordBatch.from_arrays(arrays, schema=writer.schema)
+                )
+                peak_rss = max(peak_rss, _rss_bytes(process))
+
+        if writer is not None:
+            write_label_counts(writer, counts)
+
+    stats = labeler.get_stats()
+    stats["peak_rss_mb"] = peak_rss / 2**20
+    if previous_path is not None:
+        stats["reused_rows"] = reused
+    return stats
 
 
 def main() -> None:
@@ -44,10 +704,69 @@ def main() -> None:
     parser.add_argument("input", help="Input parquet file")
     parser.add_argument("--output", "-o", help="Output parquet file")
     parser.add_argument("--threshold", type=float, default=0.5)
+    parser.add_argument("--cache", help="SQLite vote cache shared across runs")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes (default: physical core count)",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help="Rows per streamed batch; bounds peak memory",
+    )
+    parser.add_argument(
+        "--columns", nargs="+", help="Input columns to pass through (default: all)"
+    )
+    parser.add_argument(
+        "--previous",
+        help="Earlier output to copy unchanged votes from (may equal --output)",
+    )
+    parser.add_argument(
+        "--aggregation",
+        choices=AGGREGATIONS,
+        default="tarantula",
+        help="Combine votes with Tarantula weights or a fitted label model",
+    )
+    parser.add_argument(
+        "--time-budget",
+        type=float,
+        default=DEFAULT_TIME_BUDGET,
+        help="Seconds of regex matching per example; 0 disables the limit",
+    )
+    parser.add_argument(
+        "--lfs",
+        default=DEFAULT_REGISTRY,
+        help="YAML registry of labeling functions (default: built-in)",
+    )
     args = parser.parse_args()
+    if args.aggregation == "label-model" and args.output is None:
+        parser.error("--aggregation label-model requires --output")
 
-    _ = WeakSupervisionLabeler(threshold=args.threshold)
-    label_corpus(args.input, args.output, args.threshold)
+    stats = label_corpus(
+        args.input,
+        args.output,
+        args.threshold,
+        args.cache,
+        args.workers,
+        args.batch_size,
+        args.columns,
+        args.previous,
+        args.aggregation,
+        args.time_budget or None,
+        args.lfs,
+    )
+    if stats.get("timeouts"):
+        print(f"{stats['timeouts']} LF votes exceeded the time budget (ABSTAIN)")
+    if "reused_rows" in stats:
+        print(f"Reused {stats['reused_rows']} unchanged rows from {args.previous}")
+    print(
+        f"Labeled {stats['total_labeled']} examples "
+        f"(coverage {stats['coverage']:.1%}, conflicts {stats['conflicts']:.1%}, "
+        f"peak RSS {stats['peak_rss_mb']:.0f} MiB)"
+    )
 
 
 if __name__ == "__main__":
@@ -3,35 +3,609 @@
 Compiles each transpiled Rust example once and reports the
 overall and per-category compile success rates.
 
+Every directory under the examples directory that holds a ``Cargo.toml``
+is one example crate; crates nested in a subdirectory are grouped under
+its name as their category. Compiles run concurrently as asyncio
+subprocesses, capped by CPU count and available memory, and each result
+is reported as soon as its compile finishes. With a compile cache,
+examples whose sources and toolchain are unchanged since an earlier run
+are reported from the cache instead of rebuilt.
+
+Each crate otherwise builds its dependencies from scratch in its own
+``target`` directory. With a shared target directory, every concurrent
+compile slot reuses one cargo target directory across examples, and
+prewarming first builds each dependency set common to several examples
+once, so example builds compile only the example itself.
+
 Usage:
     python -m reprorusted_python_cli.measure_compile_rate -v
 
+    # 16 compiles at a time, killed after 2 minutes, streamed as JSON lines
+    python -m reprorusted_python_cli.measure_compile_rate \
+        --jobs 16 --timeout 120 --output results.jsonl
+
+    # Rebuild only examples changed since the last run
+    python -m reprorusted_python_cli.measure_compile_rate \
+        --cache data/compile_cache.sqlite
+
+    # Build shared dependencies once, then reuse them for every example
+    python -m reprorusted_python_cli.measure_compile_rate \
+        --target-dir /tmp/reprorusted-target --prewarm
+
 Examples:
     >>> from reprorusted_python_cli.measure_compile_rate import measure_compile_rate
 """
 
 from __future__ import annotations
 
+import asyncio
+import contextlib
+import json
+import os
+import re
+import shutil
+import time
+import tomllib
+from collections import Counter, deque
+from dataclasses import asdict, dataclass
+from itertools import islice
+from pathlib import Path
 from typing import TYPE_CHECKING
 
+import psutil
+
+from reprorusted_python_cli.compile_cache import (
+    DEFAULT_MAX_BYTES,
+    CompileCache,
+    toolchain_fingerprint,
+)
+
 if TYPE_CHECKING:
-    from pathlib import Path
+    from collections.abc import AsyncGenerator, Iterable, Mapping, Sequence
+
+DEFAULT_EXAMPLES_DIR = "examples"
+DEFAULT_COMMAND = ("cargo", "build", "--quiet", "--message-format=short")
+# Seconds before a compile is considered stuck and killed.
+DEFAULT_TIMEOUT = 300.0
+# Peak memory of one cargo build of a generated example, rustc included.
+DEFAULT_JOB_MEMORY = 2 * 1024**3
+DEFAULT_CATEGORY = "uncategorized"
+# Examples that must share a dependency set for prewarming to build it.
+DEFAULT_MIN_SHARED = 2
+
+_ERROR_CODE = re.compile(r"error\[(E\d{4})\]")
+
+
+@dataclass(frozen=True, slots=True)
+class CompileResult:
+    """Outcome of compiling one example crate.
+
+    Attributes:
+        example: Crate directory relative to the examples directory.
+        category: Subdirectory the crate is nested in, or
+            ``DEFAULT_CATEGORY`` for top-level crates.
+        passed: Whether the compile command exited 0 within the timeout.
+        returncode: Exit status, or None if the compile timed out.
+        duration: Wall-clock seconds from spawn to exit or kill.
+        error_codes: Distinct rustc error codes, in first-seen order.
+        cached: Whether the result was read from the compile cache; its
+            duration is then that of the original compile.
+    """
+
+    example: str
+    category: str
+    passed: bool
+    returncode: int | None
+    duration: float
+    error_codes: tuple[str, ...] = ()
+    cached: bool = False
+
+    @property
+    def timed_out(self) -> bool:
+        """Whether the compile was killed for exceeding the timeout."""
+        return self.returncode is None
+
+
+def find_examples(examples_dir: str | Path) -> list[Path]:
+    """Return every example crate under a directory, in path order.
+
+    Build output under ``target`` directories is skipped. A missing
+    directory has no examples.
+
+    Args:
+        examples_dir: Root of the examples tree.
+
+    Returns:
+        Directories holding a ``Cargo.toml``.
+    """
+    root = Path(examples_dir)
+    return sorted(
+        manifest.parent
+        for manifest in root.rglob("Cargo.toml")
+        if "target" not in manifest.relative_to(root).parts
+    )
+
+
+def default_jobs(job_memory: int = DEFAULT_JOB_MEMORY) -> int:
+    """Return how many compiles fit the CPUs and the memory available now.
+
+    Args:
+        job_memory: Bytes one compile is expected to need at peak.
+
+    Returns:
+        The smaller of the logical CPU count and the number of compiles
+        fitting in available memory, at least 1.
+    """
+    fits = psutil.virtual_memory().available // job_memory
+    return max(1, min(psutil.cpu_count() or 1, fits))
+
+
+def _example_name(crate: Path, examples_dir: str | Path) -> tuple[str, str]:
+    """Return the example name and category of a crate."""
+    parts = crate.relative_to(examples_dir).parts
+    category = parts[0] if len(parts) > 1 else DEFAULT_CATEGORY
+    return Path(*parts).as_posix(), category
+
+
+def _pack(result: CompileResult) -> bytes:
+    """Serialize the crate-independent part of a result for the cache."""
+    outcome = asdict(result)
+    for name in ("example", "category", "cached"):
+        del outcome[name]
+    return json.dumps(outcome).encode()
+
+
+def _unpack(crate: Path, examples_dir: str | Path, packed: bytes) -> CompileResult:
+    """Rebuild a cached result for a crate."""
+    outcome = json.loads(packed)
+    example, category = _example_name(crate, examples_dir)
+    return CompileResult(
+        example,
+        category,
+        outcome["passed"],
+        outcome["returncode"],
+        outcome["duration"],
+        tuple(outcome["error_codes"]),
+        cached=True,
+    )
+
+
+def _kill_tree(pid: int) -> None:
+    """Kill a process and everything it spawned, such as cargo's rustc."""
+    try:
+        parent = psutil.Process(pid)
+        processes = [parent, *parent.children(recursive=True)]
+    except psutil.NoSuchProcess:
+        return
+    for process in processes:
+        with contextlib.suppress(psutil.NoSuchProcess):
+            process.kill()
+
+
+def _dependencies(crate: Path) -> dict[str, object]:
+    """Return a crate's ``[dependencies]`` with path dependencies made absolute.
+
+    A missing, unreadable or malformed manifest has no dependencies; its
+    compile reports the error.
+    """
+    try:
+        with (crate / "Cargo.toml").open("rb") as manifest:
+            dependencies = tomllib.load(manifest).get("dependencies", {})
+    except (OSError, tomllib.TOMLDecodeError):
+        return {}
+    for spec in dependencies.values():
+        if isinstance(spec, dict) and "path" in spec:
+            spec["path"] = (crate / spec["path"]).resolve().as_posix()
+    return dependencies
+
+
+def _toml_value(value: object) -> str:
+    """Render a parsed TOML value back as an inline TOML value.
+
+    Examples:
+        >>> _toml_value({"version": "1", "features": ["derive"], "optional": False})
+        '{ "version" = "1", "features" = ["derive"], "optional" = false }'
+
+        >>> _toml_value([1, 2.5])
+        '[1, 2.5]'
+    """
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, dict):
+        pairs = ", ".join(
+            f"{json.dumps(k)} = {_toml_value(v)}" for k, v in value.items()
+        )
+        return "{ " + pairs + " }"
+    if isinstance(value, list):
+        return "[" + ", ".join(_toml_value(v) for v in value) + "]"
+    if isinstance(value, str):
+        return json.dumps(value)
+    return str(value)
+
+
+def shared_dependencies(
+    crates: Iterable[Path], min_examples: int = DEFAULT_MIN_SHARED
+) -> list[dict[str, object]]:
+    """Return the dependency sets declared by several crates, most shared first.
+
+    Two crates share a dependency set when their ``[dependencies]`` tables
+    are identical, path dependencies compared by absolute path. Only then
+    does cargo resolve the same features and reuse the same artifacts.
+
+    Args:
+        crates: Example crate directories.
+        min_examples: Crates that must declare a set for it to be returned.
+
+    Returns:
+        Non-empty ``[dependencies]`` tables.
+    """
+    counts = Counter(
+        json.dumps(_dependencies(crate), sort_keys=True) for crate in crates
+    )
+    return [
+        json.loads(table)
+        for table, count in counts.most_common()
+        if count >= min_examples and table != "{}"
+    ]
+
+
+def slot_dirs(target_dir: str | Path, jobs: int) -> list[Path]:
+    """Return the cargo target directory of each concurrent compile slot.
+
+    Cargo locks a target directory for the whole of a build, so
+    concurrent compiles sharing one would run one at a time. Each slot
+    instead reuses its own directory for every compile it runs.
+
+    Args:
+        target_dir: Root of the shared target directories.
+        jobs: Concurrent compiles.
+
+    Returns:
+        One directory per slot.
+
+    Examples:
+        >>> [path.name for path in slot_dirs("target", 2)]
+        ['slot-0', 'slot-1']
+    """
+    return [Path(target_dir) / f"slot-{slot}" for slot in range(jobs)]
+
+
+async def compile_example(
+    crate: Path,
+    examples_dir: str | Path,
+    command: Sequence[str] = DEFAULT_COMMAND,
+    timeout: float = DEFAULT_TIMEOUT,
+    env: Mapping[str, str] | None = None,
+) -> CompileResult:
+    """Compile one example crate, killing it and its children on timeout.
+
+    Args:
+        crate: Crate directory; the command runs with it as working
+            directory.
+        examples_dir: Root the example name and category are relative to.
+        command: Compile command and arguments.
+        timeout: Seconds before the compile is killed.
+        env: Environment of the command (default: inherited).
+
+    Returns:
+        The compile outcome.
+    """
+    example, category = _example_name(crate, examples_dir)
+    start = time.perf_counter()
+    process = await asyncio.create_subprocess_exec(
+        *command,
+        cwd=crate,
+        env=env,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    stderr = b""
+    try:
+        _, stderr = await asyncio.wait_for(process.communicate(), timeout)
+    except TimeoutError:
+        pass
+    finally:
+        # Also reached when the caller is cancelled mid-compile.
+        if process.returncode is None:
+            _kill_tree(process.pid)
+            await process.wait()
+            returncode = None
+        else:
+            returncode = process.returncode
+    codes = _ERROR_CODE.findall(stderr.decode(errors="replace"))
+    return CompileResult(
+        example=example,
+        category=category,
+        passed=returncode == 0,
+        returncode=returncode,
+        duration=time.perf_counter() - start,
+        error_codes=tuple(dict.fromkeys(codes)),
+    )
+
+
+async def iter_compile_results(
+    crates: Iterable[Path],
+    examples_dir: str | Path,
+    command: Sequence[str] = DEFAULT_COMMAND,
+    jobs: int | None = None,
+    timeout: float = DEFAULT_TIMEOUT,
+    target_dir: str | Path | None = None,
+) -> AsyncGenerator[CompileResult]:
+    """Compile crates ``jobs`` at a time, yielding each result as it finishes.
+
+    Crates are read from ``crates`` only as slots free up. Closing the
+    iterator early kills the compiles still running.
+
+    Args:
+        crates: Crate directories to compile.
+        examples_dir: Root the example names are relative to.
+        command: Compile command and arguments.
+        jobs: Concurrent compiles (default: :func:`default_jobs`).
+        timeout: Seconds before a compile is killed.
+        target_dir: Root of the shared cargo target directories, one per
+            slot from :func:`slot_dirs`; each crate otherwise builds into
+            its own ``target``.
+
+    Yields:
+        One result per crate, in completion order.
+    """
+    jobs = jobs or default_jobs()
+    free: deque[dict[str, str] | None] = deque([None] * jobs)
+    if target_dir is not None:
+        free = deque(
+            {**os.environ, "CARGO_TARGET_DIR": str(slot.resolve())}
+            for slot in slot_dirs(target_dir, jobs)
+        )
+    pending = iter(crates)
+    running: dict[asyncio.Task[CompileResult], dict[str, str] | None] = {}
+    try:
+        while True:
+            for crate in islice(pending, len(free)):
+                env = free.popleft()
+                task = asyncio.create_task(
+                    compile_example(crate, examples_dir, command, timeout, env)
+                )
+                running[task] = env
+            if not running:
+                return
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            free.extend(running.pop(task) for task in done)
+            for result in sorted(
+                (task.result() for task in done), key=lambda r: r.example
+            ):
+                yield result
+    finally:
+        for task in running:
+            task.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+
+
+async def prewarm(
+    crates: Sequence[Path],
+    target_dir: str | Path,
+    command: Sequence[str] = DEFAULT_COMMAND,
+    jobs: int = 1,
+    timeout: float = DEFAULT_TIMEOUT,
+    min_examples: int = DEFAULT_MIN_SHARED,
+) -> list[CompileResult]:
+    """Build the dependencies shared by several crates into every slot.
+
+    Each set from :func:`shared_dependencies` is compiled once as an empty
+    library crate under ``target_dir/prewarm`` into the first slot, with
+    the same command as the examples so the artifacts match. The first
+    slot is then copied to slots that do not exist yet; cargo keeps the
+    copied artifacts, as their fingerprints do not depend on where the
+    target directory lives.
+
+    The copies are full copies, so prewarming takes ``jobs`` times the
+    first slot's disk space, commonly hundreds of megabytes per dependency
+    set. They are not hard links because cargo rewrites fingerprint and
+    dep-info files in place, which would leak one slot's builds into the
+    slots compiling beside it. Lower ``jobs`` or skip prewarming where
+    ``target_dir`` is short on space.
+
+    Args:
+        crates: Example crate directories.
+        target_dir: Root of the shared target directories.
+        command: Compile command the examples will be built with.
+        jobs: Concurrent compile slots to seed.
+        timeout: Seconds before a dependency build is killed.
+        min_examples: Crates that must declare a set for it to be built.
+
+    Returns:
+        One result per dependency set built, named ``prewarm/deps-<n>``.
+    """
+    root = Path(target_dir)
+    stubs = []
+    for index, dependencies in enumerate(shared_dependencies(crates, min_examples)):
+        stub = root / "prewarm" / f"deps-{index}"
+        (stub / "src").mkdir(parents=True, exist_ok=True)
+        lines = ["[package]", f'name = "prewarm-deps-{index}"', 'version = "0.0.0"']
+        lines += ["", "[dependencies]"]
+        lines += [
+            f"{json.dumps(k)} = {_toml_value(v)}" for k, v in dependencies.items()
+        ]
+        (stub / "Cargo.toml").write_text("\n".join(lines) + "\n")
+        (stub / "src" / "lib.rs").write_text("")
+        stubs.append(stub)
+    slots = slot_dirs(root, jobs)
+    results = [
+        result
+        async for result in iter_compile_results(stubs, root, command, 1, timeout, root)
+    ]
+    if slots[0].exists():
+        for slot in slots[1:]:
+            if not slot.exists():
+                shutil.copytree(slots[0], slot, symlinks=True)
+    return results
+
+
+def _lookup(
+    crates: Sequence[Path],
+    examples_dir: Path,
+    command: Sequence[str],
+    cache: CompileCache,
+) -> tuple[list[CompileResult], dict[str, bytes | None]]:
+    """Return the cached results and the cache keys of the other crates.
+
+    Crates that cannot be cached are among the others, without a key.
+    """
+    toolchain = toolchain_fingerprint(command)
+    keys = [CompileCache.key(crate, toolchain) for crate in crates]
+    found = cache.get_many([key for key in keys if key is not None])
+    results = iter(found)
+    cached, missing = [], {}
+    for crate, key in zip(crates, keys, strict=True):
+        packed = None if key is None else next(results)
+        if packed is not None:
+            cached.append(_unpack(crate, examples_dir, packed))
+        else:
+            missing[_example_name(crate, examples_dir)[0]] = key
+    return cached, missing
+
+
+async def _measure(
+    examples_dir: Path,
+    verbose: bool,
+    jobs: int,
+    timeout: float,
+    command: Sequence[str],
+    output_path: str | Path | None,
+    cache: CompileCache | None,
+    target_dir: str | Path | None,
+    prewarm_deps: bool,
+) -> dict[str, int | float]:
+    """Compile every example, streaming results, and tally the rates.
+
+    Cached results are reported first. Timed out compiles are not cached,
+    since a loaded machine rather than the crate may be to blame, nor are
+    crates without a cache key.
+    """
+    total: Counter[str] = Counter()
+    passed: Counter[str] = Counter()
+    flags: Counter[str] = Counter()
+    with contextlib.ExitStack() as stack:
+        output = None
+        if output_path is not None:
+            output = stack.enter_context(Path(output_path).open("w", encoding="utf-8"))
+
+        def report(result: CompileResult) -> None:
+            total[result.category] += 1
+            passed[result.category] += result.passed
+            flags["timed_out"] += result.timed_out
+            flags["cached"] += result.cached
+            if output is not None:
+                output.write(json.dumps(asdict(result)) + "\n")
+                output.flush()
+            if verbose:
+                status = "PASS" if result.passed else "FAIL"
+                status = "TIMEOUT" if result.timed_out else status
+                source = "cached" if result.cached else f"{result.duration:.1f}s"
+                codes = " ".join(result.error_codes)
+                print(f"{status:7} {result.example} ({source}) {codes}", flush=True)
+
+        crates = find_examples(examples_dir)
+        keys: dict[str, bytes | None] = {}
+        if cache is not None:
+            cached, keys = _lookup(crates, examples_dir, command, cache)
+            for result in cached:
+                report(result)
+            crates = [c for c in crates if _example_name(c, examples_dir)[0] in keys]
+        if prewarm_deps and target_dir is not None:
+            built = await prewarm(crates, target_dir, command, jobs, timeout)
+            flags["prewarmed"] = sum(result.passed for result in built)
+            if verbose:
+                print(f"Prewarmed {flags['prewarmed']}/{len(built)} dependency sets")
+        results = iter_compile_results(
+            crates, examples_dir, command, jobs, timeout, target_dir
+        )
+        async for result in results:
+            key = keys.get(result.example)
+            if cache is not None and key is not None and not result.timed_out:
+                cache.put(key, _pack(result))
+            report(result)
+
+    count, ok = total.total(), passed.total()
+    return {
+        "total": count,
+        "passed": ok,
+        "failed": count - ok,
+        "timed_out": flags["timed_out"],
+        "cached": flags["cached"],
+        "prewarmed": flags["prewarmed"],
+        "rate": ok / count if count else 0.0,
+        **{f"rate_{c}": passed[c] / total[c] for c in sorted(total)},
+    }
 
 
 def measure_compile_rate(
     examples_dir: str | Path | None = None,
     verbose: bool = False,
+    jobs: int | None = None,
+    timeout: float = DEFAULT_TIMEOUT,
+    command: Sequence[str] = DEFAULT_COMMAND,
+    output_path: str | Path | None = None,
+    cache_path: str | Path | None = None,
+    cache_size: int = DEFAULT_MAX_BYTES,
+    target_dir: str | Path | None = None,
+    prewarm_deps: bool = False,
 ) -> dict[str, int | float]:
     """Measure single-shot compile rate across all examples.
 
     Args:
-        examples_dir: Path to examples directory.
-        verbose: If True, print per-example results.
+        examples_dir: Path to examples directory (default: ``examples``).
+        verbose: If True, print each result as its compile finishes.
+        jobs: Concurrent compiles (default: :func:`default_jobs`).
+        timeout: Seconds before a compile and its children are killed and
+            counted as failed.
+        command: Compile command run in each crate directory.
+        output_path: JSON lines file receiving each :class:`CompileResult`
+            as its compile finishes.
+        cache_path: SQLite compile cache reused across runs. Examples whose
+            sources, toolchain, target and command are unchanged are
+            reported from it, and only the rest are compiled.
+        cache_size: Bytes of results the cache keeps, evicting the least
+            recently used beyond it.
+        target_dir: Root of cargo target directories shared by the
+            examples, one per concurrent compile, kept across runs.
+        prewarm_deps: If True, first build the dependency sets shared by
+            several examples to be compiled into ``target_dir`` (see
+            :func:`prewarm`).
 
     Returns:
-        Dictionary with total, passed, failed, and rate.
+        Dictionary with total, passed, failed, timed_out, cached,
+        prewarmed (dependency sets built) and rate, plus
+        ``rate_<category>`` per category.
+
+    Raises:
+        ValueError: If jobs or timeout is not positive, or prewarm_deps is
+            set without a target_dir.
     """
-    return {"total": 0, "passed": 0, "failed": 0, "rate": 0.0}
+    if jobs is not None and jobs < 1:
+        raise ValueError(f"jobs must be positive, got {jobs}")
+    if timeout <= 0:
+        raise ValueError(f"timeout must be positive, got {timeout}")
+    if prewarm_deps and target_dir is None:
+        raise ValueError("prewarm_deps requires a target_dir")
+    jobs = jobs or default_jobs()
+    root = Path(examples_dir if examples_dir is not None else DEFAULT_EXAMPLES_DIR)
+    with contextlib.ExitStack() as stack:
+        cache = None
+        if cache_path is not None:
+            cache = stack.enter_context(CompileCache(cache_path, cache_size))
+        return asyncio.run(
+            _measure(
+                root,
+                verbose,
+                jobs,
+                timeout,
+                command,
+                output_path,
+                cache,
+                target_dir,
+                prewarm_deps,
+            )
+        )
 
 
 def main() -> None:
@@ -43,9 +617,63 @@ def main() -> None:
     )
     parser.add_argument("--examples-dir", "-d", help="Examples directory")
     parser.add_argument("-v", "--verbose", action="store_true", help="Verbose output")
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=None,
+        help="Concurrent compiles (default: CPUs, capped by available memory)",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=DEFAULT_TIMEOUT,
+        help=f"Seconds before a compile is killed (default: {DEFAULT_TIMEOUT:g})",
+    )
+    parser.add_argument(
+        "--output", "-o", help="Stream per-example results to a JSON lines file"
+    )
+    parser.add_argument("--cache", help="SQLite compile cache shared across runs")
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=DEFAULT_MAX_BYTES // 1024**2,
+        help="Compile cache size in MiB (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--target-dir", help="Cargo target directories shared across examples"
+    )
+    parser.add_argument(
+        "--prewarm",
+        action="store_true",
+        help="Build dependencies shared by examples once before compiling them "
+        "(copies the built slot to every job slot, using jobs times its size)",
+    )
     args = parser.parse_args()
+    if args.prewarm and args.target_dir is None:
+        parser.error("--prewarm requires --target-dir")
 
-    measure_compile_rate(args.examples_dir, args.verbose)
+    stats = measure_compile_rate(
+        args.examples_dir,
+        args.verbose,
+        args.jobs,
+        args.timeout,
+        output_path=args.output,
+        cache_path=args.cache,
+        cache_size=args.cache_size * 1024**2,
+        target_dir=args.target_dir,
+        prewarm_deps=args.prewarm,
+    )
+    print(
+        f"Compiled {stats['total']} examples: {stats['passed']} passed, "
+        f"{stats['failed']} failed ({stats['timed_out']} timed out, "
+        f"{stats['cached']} cached), rate {stats['rate']:.1%}"
+    )
+    if stats["prewarmed"]:
+        print(f"  prewarmed {stats['prewarmed']} shared dependency sets")
+    for key, rate in stats.items():
+        if key.startswith("rate_"):
+            print(f"  {key.removeprefix('rate_')}: {rate:.1%}")
 
 
 if __name__ == "__main__":
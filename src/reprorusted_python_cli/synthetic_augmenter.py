@@ -4,18 +4,35 @@ Uses Tarantula fault localization scores for targeted mutations.
 
 Usage:
     python -m reprorusted_python_cli.synthetic_augmenter corpus.parquet
+
+Examples:
+    >>> augmented = augment_codes(["def f(): return 1"], count=2, seed=7)
+    >>> augmented == augment_codes(["def f(): return 1"], count=2, seed=7)
+    True
 """
 
 from __future__ import annotations
 
-import random
 import re
+import warnings
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
 from dataclasses import dataclass, field
 from enum import Enum, auto
+from itertools import chain, islice
 from typing import TYPE_CHECKING
 
+import numpy as np
+
+from reprorusted_python_cli.ast_features import Feature
+from reprorusted_python_cli.ast_mutator import (
+    AST_MUTATION_TYPES,
+    ASTSnippet,
+    ast_mutants,
+)
+
 if TYPE_CHECKING:
-    pass
+    from collections.abc import Callable, Generator, Iterable, Iterator, Sequence
 
 TARANTULA_SCORES: dict[str, float] = {
     "async_await": 0.946,
@@ -32,6 +49,82 @@ TARANTULA_SCORES: dict[str, float] = {
     "function_definition": 0.500,
 }
 
+# Construct each mutation injects, so its labeling-function vote is known
+# without re-parsing the mutant.
+MUTATION_FEATURES: dict[str, Feature] = {
+    "async_await": Feature.ASYNC,
+    "generator": Feature.GENERATOR,
+    "lambda": Feature.LAMBDA,
+    "walrus_operator": Feature.WALRUS,
+    "context_manager": Feature.CONTEXT_MANAGER,
+    "exception_handling": Feature.EXCEPTION,
+}
+
+
+# Candidate mutation sites, precompiled once.
+_DEF_HEADER = re.compile(r"def (?P<name>\w+)\(")
+_RETURN_STATEMENT = re.compile(r"return (?P<expr>.+)")
+_ASSIGNMENT = re.compile(r"(?P<target>\w+) = (?P<value>.+)")
+_RETURN_KEYWORD = re.compile(r"return ")
+
+
+@dataclass(frozen=True, slots=True)
+class MutationSites:
+    """Leftmost candidate site of each mutation in one snippet.
+
+    Attributes:
+        def_header: ``def name(`` header rewritten by the async mutation.
+        return_statement: ``return <expr>`` rewritten by the generator
+            mutation.
+        return_keyword: ``return `` awaited by the async mutation.
+        assignment: ``name = value`` rewritten by the walrus mutation.
+    """
+
+    def_header: re.Match[str] | None = None
+    return_statement: re.Match[str] | None = None
+    return_keyword: re.Match[str] | None = None
+    assignment: re.Match[str] | None = None
+
+
+def find_mutation_sites(code: str) -> MutationSites:
+    """Locate every candidate mutation site of ``code`` once.
+
+    Each site has a literal anchor that any match must contain, so a C-level
+    ``str.find`` skips to the first anchor and the precompiled pattern only
+    runs from there. The assignment pattern starts with a word run, which
+    the regex engine would otherwise try at every position of the snippet.
+
+    Examples:
+        >>> sites = find_mutation_sites("def f(x): y = x; return y")
+        >>> sites.def_header.start(), sites.assignment.group(0)
+        (0, 'y = x; return y')
+
+        >>> find_mutation_sites("pass").return_keyword is None
+        True
+    """
+    def_at = code.find("def ")
+    return_at = code.find("return ")
+    assign_at = code.find(" = ")
+    return MutationSites(
+        def_header=None if def_at < 0 else _DEF_HEADER.search(code, def_at),
+        return_statement=(
+            None if return_at < 0 else _RETURN_STATEMENT.search(code, return_at)
+        ),
+        return_keyword=(
+            None if return_at < 0 else _RETURN_KEYWORD.match(code, return_at)
+        ),
+        # A match's word run is on the line of its " = ", never before it.
+        assignment=(
+            None
+            if assign_at < 0
+            else _ASSIGNMENT.search(code, code.rfind("\n", 0, assign_at) + 1)
+        ),
+    )
+
+
+# Snippets per shard; each shard draws from its own seeded generator.
+DEFAULT_SHARD_SIZE = 1024
+
 
 class MutationStrategy(Enum):
     """Strategy for selecting mutations."""
@@ -41,6 +134,20 @@ class MutationStrategy(Enum):
     TARGETED = auto()
 
 
+class MutationEngine(Enum):
+    """How mutations rewrite code.
+
+    ``REGEX`` rewrites the text at pattern sites and always yields a mutant,
+    which may not parse. ``AST`` applies
+    :func:`~reprorusted_python_cli.ast_mutator.ast_mutants` tree transforms,
+    whose mutants always parse, and yields none for a mutation without a
+    site.
+    """
+
+    REGEX = auto()
+    AST = auto()
+
+
 @dataclass
 class AugmentedExample:
     """Result of a code mutation."""
@@ -50,57 +157,227 @@ class AugmentedExample:
     mutation_type: str
     is_synthetic: bool = True
     metadata: dict[str, float] = field(default_factory=dict)
+    is_valid: bool | None = None
+
+
+def _example(code: str, mutated: str, mutation_type: str) -> AugmentedExample:
+    """Return the example of one mutation, scored by its Tarantula weight."""
+    return AugmentedExample(
+        original_code=code,
+        mutated_code=mutated,
+        mutation_type=mutation_type,
+        metadata={"tarantula_score": TARANTULA_SCORES[mutation_type]},
+    )
 
 
 class SyntheticAugmenter:
     """Generate synthetic error examples using targeted mutations."""
 
-    def __init__(self, strategy: MutationStrategy = MutationStrategy.TARANTULA) -> None:
-        """Initialize augmenter with mutation strategy."""
+    def __init__(
+        self,
+        strategy: MutationStrategy = MutationStrategy.TARANTULA,
+        seed: int | np.random.Generator | None = None,
+        engine: MutationEngine = MutationEngine.REGEX,
+        mutation_types: Sequence[str] | None = None,
+    ) -> None:
+        """Initialize augmenter with mutation strategy, random source and engine.
+
+        ``mutation_types`` restricts mutations to a subset of the engine's.
+
+        Raises:
+            ValueError: If mutation_types is empty or not the engine's.
+        """
         self.strategy = strategy
-        self._mutation_methods: dict[str, object] = {
+        self.engine = engine
+        self.rng = np.random.default_rng(seed)
+        self._mutation_methods: dict[
+            str, Callable[[str, MutationSites | None], AugmentedExample]
+        ] = {
             "async_await": self._inject_async_pattern,
             "generator": self._inject_generator_pattern,
             "lambda": self._inject_lambda_pattern,
             "walrus_operator": self._inject_walrus_pattern,
         }
+        available = (
+            AST_MUTATION_TYPES
+            if engine == MutationEngine.AST
+            else tuple(self._mutation_methods)
+        )
+        if mutation_types is not None:
+            unknown = set(mutation_types) - set(available)
+            if unknown or not mutation_types:
+                raise ValueError(
+                    f"mutation_types must be a non-empty subset of {available}, "
+                    f"got {list(mutation_types)}"
+                )
+            available = tuple(t for t in available if t in mutation_types)
+        self.mutation_types = available
+        weights = np.array([TARANTULA_SCORES.get(m, 0.5) for m in self.mutation_types])
+        self._weights = weights
+        # Cumulative Tarantula distribution, so draws are one searchsorted.
+        self._tarantula_cdf = np.cumsum(weights / weights.sum())
+        self._tarantula_cdf[-1] = 1.0
 
-    def mutate(self, code: str, mutation_type: str | None = None) -> AugmentedExample:
-        """Apply a mutation to the code."""
-        if mutation_type and mutation_type in self._mutation_methods:
-            method = self._mutation_methods[mutation_type]
-            return method(code)  # type: ignore[operator]
+    def mutate(
+        self, code: str, mutation_type: str | None = None
+    ) -> AugmentedExample | None:
+        """Apply a mutation to the code.
 
-        if self.strategy == MutationStrategy.TARANTULA:
-            mutation_type = self._select_by_tarantula()
-        elif self.strategy == MutationStrategy.RANDOM:
-            mutation_type = random.choice(list(self._mutation_methods.keys()))
-        else:
-            mutation_type = next(iter(self._mutation_methods.keys()))
+        Returns None when the AST engine finds no site for the mutation.
+        """
+        if mutation_type not in self.mutation_types:
+            mutation_type = self._select()
+        if self.engine == MutationEngine.AST:
+            examples = self._ast_examples(code, [mutation_type])
+            return examples[0] if examples else None
+        return self._mutation_methods[mutation_type](code, None)
 
-        method = self._mutation_methods[mutation_type]
-        return method(code)  # type: ignore[operator]
+    def _select(self) -> str:
+        """Select a mutation type according to the strategy."""
+        return self.mutation_types[self.select_mutation_types(1)[0]]
 
     def _select_by_tarantula(self) -> str:
         """Select mutation weighted by Tarantula scores."""
-        available = list(self._mutation_methods.keys())
-        weights = [TARANTULA_SCORES.get(m, 0.5) for m in available]
-        return random.choices(available, weights=weights, k=1)[0]
+        draw = self.rng.random()
+        return self.mutation_types[
+            int(np.searchsorted(self._tarantula_cdf, draw, side="right"))
+        ]
+
+    def select_mutation_types(self, n: int) -> np.ndarray:
+        """Draw ``n`` mutation types at once, as indices into ``mutation_types``.
+
+        Tarantula draws are one vectorized inverse-CDF lookup of ``n``
+        uniform samples against the precomputed cumulative weights.
+        """
+        if self.strategy == MutationStrategy.TARANTULA:
+            return np.searchsorted(
+                self._tarantula_cdf, self.rng.random(n), side="right"
+            )
+        if self.strategy == MutationStrategy.RANDOM:
+            return self.rng.integers(len(self.mutation_types), size=n)
+        return np.zeros(n, dtype=np.intp)
+
+    def select_applicable_types(self, applicable: np.ndarray, count: int) -> np.ndarray:
+        """Draw up to ``count`` distinct applicable mutation types per row.
+
+        ``applicable`` is a boolean matrix with one row per snippet and one
+        column per entry of ``mutation_types``. AST mutations are
+        deterministic, so a type is drawn at most once per row: draws are
+        without replacement, by the strategy's weights restricted to the
+        row's applicable types, as one weighted-key sort of the whole
+        matrix (each key ``log(u) / weight`` for a uniform ``u``). Targeted
+        rows take their applicable types in order. The result has
+        ``min(count, len(mutation_types))`` columns; slots past a row's
+        applicable types hold ``len(mutation_types)``.
+        """
+        n, width = applicable.shape
+        if self.strategy == MutationStrategy.TARGETED:
+            keys = -np.broadcast_to(np.arange(width, dtype=float), applicable.shape)
+        else:
+            weights = (
+                self._weights
+                if self.strategy == MutationStrategy.TARANTULA
+                else np.ones(width)
+            )
+            keys = np.log1p(-self.rng.random((n, width))) / weights
+        keys = np.where(applicable, keys, -np.inf)
+        order = np.argsort(-keys, axis=1, kind="stable")[:, : min(count, width)]
+        chosen = np.take_along_axis(applicable, order, axis=1)
+        return np.where(chosen, order, width)
 
     def generate_batch(self, code: str, count: int = 3) -> list[AugmentedExample]:
-        """Generate multiple mutations of the same code."""
+        """Generate multiple mutations of the same code from one site scan.
+
+        The AST engine yields each of its first ``count`` types at most once,
+        since repeating a deterministic mutation repeats its mutant.
+        """
+        if self.engine == MutationEngine.AST:
+            return self._ast_examples(code, self.mutation_types[:count])
+        sites = find_mutation_sites(code)
+        methods = [self._mutation_methods[t] for t in self.mutation_types]
+        return [methods[i % len(methods)](code, sites) for i in range(count)]
+
+    def augment_batch(
+        self, codes: Sequence[str], count: int = 2
+    ) -> list[AugmentedExample]:
+        """Generate ``count`` strategy-selected mutations of every snippet.
+
+        The AST engine yields at most one mutant per applicable type, so a
+        snippet may get fewer.
+        """
+        if self.engine == MutationEngine.AST:
+            return self._augment_ast(codes, count)
+        n = len(codes)
+        selected = self.select_mutation_types(n * count).reshape(n, count)
+        results: list[AugmentedExample] = []
+        methods = [self._mutation_methods[t] for t in self.mutation_types]
+        for code, row in zip(codes, selected.tolist(), strict=True):
+            sites = find_mutation_sites(code)
+            results.extend(methods[i](code, sites) for i in row)
+        return results
+
+    def iter_mutations(
+        self,
+        codes: Iterable[str],
+        count: int = 2,
+        chunk_size: int = DEFAULT_SHARD_SIZE,
+    ) -> Iterator[AugmentedExample]:
+        """Lazily yield ``count`` mutations of every snippet of a stream.
+
+        Snippets are read and mutated ``chunk_size`` at a time with
+        :meth:`augment_batch`, so mutation types are still drawn in bulk
+        while memory stays bounded by the chunk, not the stream.
+        """
+        for chunk in _shards(codes, chunk_size):
+            yield from self.augment_batch(chunk, count)
+
+    def _augment_ast(self, codes: Sequence[str], count: int) -> list[AugmentedExample]:
+        """Parse every snippet once and draw distinct applicable mutations."""
+        types = self.mutation_types
+        snippets = [ASTSnippet.parse(code) for code in codes]
+        applicable = np.zeros((len(codes), len(types)), dtype=bool)
+        for row, snippet in enumerate(snippets):
+            if snippet is not None:
+                applicable[row] = [t in snippet.mutation_types for t in types]
+        selected = self.select_applicable_types(applicable, count)
         results: list[AugmentedExample] = []
-        mutation_types = list(self._mutation_methods.keys())
-        for i in range(count):
-            mt = mutation_types[i % len(mutation_types)]
-            results.append(self.mutate(code, mutation_type=mt))
+        for snippet, row in zip(snippets, selected.tolist(), strict=True):
+            if snippet is None:
+                continue
+            results.extend(
+                _example(snippet.code, mutated, types[i])
+                for i in row
+                if i < len(types) and (mutated := snippet.mutate(types[i]))
+            )
         return results
 
-    def _inject_async_pattern(self, code: str) -> AugmentedExample:
+    def _ast_examples(
+        self, code: str, mutation_types: Sequence[str]
+    ) -> list[AugmentedExample]:
+        """Apply AST mutations from one parse, skipping those without a site."""
+        mutants = ast_mutants(code, dict.fromkeys(mutation_types))
+        return [_example(code, mutants[t], t) for t in mutation_types if t in mutants]
+
+    def _inject_async_pattern(
+        self, code: str, sites: MutationSites | None = None
+    ) -> AugmentedExample:
         """Inject async/await pattern."""
-        mutated = re.sub(r"def (\w+)\(", r"async def \1(", code, count=1)
-        if "return " in mutated:
-            mutated = mutated.replace("return ", "return await asyncio.sleep(0) or ", 1)
+        if sites is None:
+            sites = find_mutation_sites(code)
+        mutated = code
+        shift = 0
+        if sites.def_header is not None:
+            start = sites.def_header.start()
+            mutated = f"{code[:start]}async {code[start:]}"
+            shift = len("async ")
+        if sites.return_keyword is not None:
+            start = sites.return_keyword.start()
+            if sites.def_header is not None and start > sites.def_header.start():
+                start += shift
+            mutated = (
+                f"{mutated[:start]}return await asyncio.sleep(0) or "
+                f"{mutated[start + len('return ') :]}"
+            )
         return AugmentedExample(
             original_code=code,
             mutated_code=mutated,
@@ -108,9 +385,14 @@ class SyntheticAugmenter:
             metadata={"tarantula_score": TARANTULA_SCORES["async_await"]},
         )
 
-    def _inject_generator_pattern(self, code: str) -> AugmentedExample:
+    def _inject_generator_pattern(
+        self, code: str, sites: MutationSites | None = None
+    ) -> AugmentedExample:
         """Inject generator yield pattern."""
-        mutated = re.sub(r"return (.+)", r"yield \1", code, count=1)
+        site = (find_mutation_sites(code) if sites is None else sites).return_statement
+        mutated = code
+        if site is not None:
+            mutated = f"{code[: site.start()]}yield {site['expr']}{code[site.end() :]}"
         return AugmentedExample(
             original_code=code,
             mutated_code=mutated,
@@ -118,7 +400,9 @@ class SyntheticAugmenter:
             metadata={"tarantula_score": TARANTULA_SCORES["generator"]},
         )
 
-    def _inject_lambda_pattern(self, code: str) -> AugmentedExample:
+    def _inject_lambda_pattern(
+        self, code: str, sites: MutationSites | None = None
+    ) -> AugmentedExample:
         """Inject lambda pattern."""
         mutated = code + "\nprocess = lambda x: x * 2"
         return AugmentedExample(
@@ -128,9 +412,17 @@ class SyntheticAugmenter:
             metadata={"tarantula_score": TARANTULA_SCORES["lambda"]},
         )
 
-    def _inject_walrus_pattern(self, code: str) -> AugmentedExample:
+    def _inject_walrus_pattern(
+        self, code: str, sites: MutationSites | None = None
+    ) -> AugmentedExample:
         """Inject walrus operator pattern."""
-        mutated = re.sub(r"(\w+) = (.+)", r"if (\1 := \2):", code, count=1)
+        site = (find_mutation_sites(code) if sites is None else sites).assignment
+        mutated = code
+        if site is not None:
+            mutated = (
+                f"{code[: site.start()]}if ({site['target']} := {site['value']}):"
+                f"{code[site.end() :]}"
+            )
         return AugmentedExample(
             original_code=code,
             mutated_code=mutated,
@@ -139,6 +431,211 @@ class SyntheticAugmenter:
         )
 
 
+def compiles(code: str) -> bool:
+    """Return whether ``code`` compiles as a module, without running it.
+
+    A full ``compile`` also rejects code that parses but cannot be
+    compiled, such as ``return`` outside a function.
+
+    Examples:
+        >>> compiles("x = 1"), compiles("if (x := 1):"), compiles("return 1")
+        (True, False, False)
+    """
+    with warnings.catch_warnings():
+        # Invalid escapes and similar warnings do not make code invalid.
+        warnings.simplefilter("ignore")
+        try:
+            compile(code, "<mutant>", "exec", dont_inherit=True)
+        except (SyntaxError, ValueError, RecursionError, MemoryError):
+            # ValueError: null bytes; RecursionError/MemoryError: deep nesting.
+            return False
+    return True
+
+
+def shard_rng(seed: int, shard: int) -> np.random.Generator:
+    """Return the generator of one shard, derived from the root seed.
+
+    Examples:
+        >>> a, b = shard_rng(0, 1).random(), shard_rng(0, 1).random()
+        >>> a == b, a == shard_rng(0, 2).random()
+        (True, False)
+    """
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(shard,)))
+
+
+def _augment_shard(
+    strategy: MutationStrategy,
+    seed: int,
+    shard: int,
+    codes: Sequence[str],
+    count: int,
+    engine: MutationEngine,
+    validate: bool,
+    mutation_types: Sequence[str] | None,
+) -> list[AugmentedExample]:
+    """Augment one shard with its own generator (process pool task)."""
+    augmenter = SyntheticAugmenter(
+        strategy, shard_rng(seed, shard), engine, mutation_types
+    )
+    examples = augmenter.augment_batch(codes, count)
+    if validate:
+        for example in examples:
+            example.is_valid = compiles(example.mutated_code)
+    return examples
+
+
+def _shards(codes: Iterable[str], shard_size: int) -> Iterator[list[str]]:
+    """Cut a stream of snippets into consecutive shards, lazily."""
+    iterator = iter(codes)
+    while shard := list(islice(iterator, shard_size)):
+        yield shard
+
+
+def iter_augment_codes(
+    codes: Iterable[str],
+    count: int = 2,
+    seed: int = 0,
+    workers: int = 1,
+    strategy: MutationStrategy = MutationStrategy.TARANTULA,
+    shard_size: int = DEFAULT_SHARD_SIZE,
+    engine: MutationEngine = MutationEngine.REGEX,
+    validate: bool = False,
+    mutation_types: Sequence[str] | None = None,
+) -> Generator[AugmentedExample]:
+    """Augment a stream of snippets across a process pool, lazily.
+
+    Snippets are cut into fixed-size shards, and shard ``i`` mutates with
+    :func:`shard_rng` of ``(seed, i)``. Shards do not depend on the worker
+    count and results are yielded in input order, so the output is
+    identical for any number of workers. ``codes`` is read one shard at a
+    time and at most two shards per worker are in flight, so memory is
+    bounded by the shard size, not by the stream. Closing the iterator
+    early cancels the shards not yet started.
+
+    Args:
+        codes: Source snippets to mutate; may be a generator.
+        count: Mutations per snippet.
+        seed: Root seed of every shard's generator.
+        workers: Worker processes; with 1, shards run in this process.
+        strategy: How each mutation type is selected.
+        shard_size: Snippets per shard.
+        engine: How mutations rewrite code.
+        validate: Set each example's ``is_valid`` by :func:`compiles`, in
+            the worker that generated it.
+        mutation_types: Subset of the engine's mutation types to draw from;
+            defaults to all.
+
+    Returns:
+        Generator of ``count`` examples per snippet, in input order. The
+        AST engine yields none for snippets that do not parse or have no
+        site of ``mutation_types``.
+
+    Raises:
+        ValueError: If shard_size is not positive or mutation_types is
+            empty or not the engine's.
+
+    Examples:
+        >>> stream = iter_augment_codes(iter(["x = 1"] * 3), count=2)
+        >>> sum(1 for _ in stream)
+        6
+    """
+    if shard_size < 1:
+        raise ValueError(f"shard_size must be positive, got {shard_size}")
+    # Fail fast on bad mutation types instead of in the first shard.
+    SyntheticAugmenter(strategy, seed, engine, mutation_types)
+    return _iter_shards(
+        strategy,
+        seed,
+        _shards(codes, shard_size),
+        count,
+        engine,
+        validate,
+        mutation_types,
+        workers,
+    )
+
+
+def _iter_shards(
+    strategy: MutationStrategy,
+    seed: int,
+    shards: Iterator[list[str]],
+    count: int,
+    engine: MutationEngine,
+    validate: bool,
+    types: Sequence[str] | None,
+    workers: int,
+) -> Generator[AugmentedExample]:
+    """Yield the examples of every shard in order, on a pool if worthwhile."""
+    head = list(islice(shards, 2))
+    tasks = enumerate(chain(head, shards))
+    if workers <= 1 or len(head) < 2:
+        for shard, batch in tasks:
+            yield from _augment_shard(
+                strategy, seed, shard, batch, count, engine, validate, types
+            )
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending: deque[Future[list[AugmentedExample]]] = deque()
+        try:
+            for shard, batch in tasks:
+                pending.append(
+                    pool.submit(
+                        _augment_shard,
+                        strategy,
+                        seed,
+                        shard,
+                        batch,
+                        count,
+                        engine,
+                        validate,
+                        types,
+                    )
+                )
+                if len(pending) >= 2 * workers:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+        finally:
+            # Reached early when the consumer stops reading.
+            for future in pending:
+                future.cancel()
+
+
+def augment_codes(
+    codes: Iterable[str],
+    count: int = 2,
+    seed: int = 0,
+    workers: int = 1,
+    strategy: MutationStrategy = MutationStrategy.TARANTULA,
+    shard_size: int = DEFAULT_SHARD_SIZE,
+    engine: MutationEngine = MutationEngine.REGEX,
+    validate: bool = False,
+    mutation_types: Sequence[str] | None = None,
+) -> list[AugmentedExample]:
+    """Augment many snippets across a process pool, reproducibly.
+
+    Collects :func:`iter_augment_codes` into a list; see there for the
+    arguments.
+
+    Raises:
+        ValueError: If shard_size is not positive or mutation_types is
+            empty or not the engine's.
+    """
+    return list(
+        iter_augment_codes(
+            codes,
+            count,
+            seed,
+            workers,
+            strategy,
+            shard_size,
+            engine,
+            validate,
+            mutation_types,
+        )
+    )
+
+
 if __name__ == "__main__":
     import argparse
 
@@ -22,24 +22,50 @@ Examples:
 
 from __future__ import annotations
 
+import copy
+import hashlib
 import re
+import signal
+import threading
+import time
+from contextlib import contextmanager
 from dataclasses import dataclass, field
 from enum import Enum, auto
-from typing import TYPE_CHECKING
+from functools import cached_property, lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, cast
+
+import numpy as np
+import yaml
+
+from reprorusted_python_cli.ast_features import (
+    CONSTRUCT_PATTERN,
+    EXTRACTOR_VERSION,
+    FEATURE_DTYPE,
+    Feature,
+    extract_features,
+    feature_bitsets,
+)
+from reprorusted_python_cli.label_cache import LabelCache
 
 if TYPE_CHECKING:
-    pass
+    from collections.abc import Generator, Iterable, Mapping, Sequence
 
-# Tarantula-derived weights for labeling functions
-TARANTULA_WEIGHTS: dict[str, float] = {
-    "async_pattern": 0.946,
-    "generator_pattern": 0.927,
-    "walrus_pattern": 0.850,
-    "lambda_pattern": 0.783,
-    "context_manager_pattern": 0.652,
-    "class_pattern": 0.612,
-    "exception_pattern": 0.577,
-}
+    import pyarrow as pa
+
+    from reprorusted_python_cli.label_model import LabelModel
+
+# Columnar vote encoding: classes map to 0..2 in aggregation tie-break order.
+ABSTAIN_VOTE = -1
+# Placeholder in a prior vote matrix for cells that must be evaluated.
+UNKNOWN_VOTE = -2
+
+# Seconds one example may spend in Python regex matching before the LFs
+# still running on it are recorded as ABSTAIN.
+DEFAULT_TIME_BUDGET = 0.5
+
+# YAML registry of the built-in labeling functions.
+DEFAULT_REGISTRY = Path(__file__).with_name("labeling_functions.yaml")
 
 
 class Label(Enum):
@@ -61,16 +87,188 @@ class Label(Enum):
     LOW_RISK = auto()
     ABSTAIN = auto()
 
+    @property
+    def code(self) -> int:
+        """Int8 code of this label in vote matrices.
+
+        Examples:
+            >>> Label.HIGH_RISK.code
+            0
+
+            >>> Label.ABSTAIN.code
+            -1
+        """
+        return ABSTAIN_VOTE if self is Label.ABSTAIN else self.value - 1
+
+    @classmethod
+    def from_code(cls, code: int) -> Label:
+        """Inverse of :attr:`code`.
+
+        Examples:
+            >>> Label.from_code(2).name
+            'LOW_RISK'
+
+            >>> Label.from_code(-1).name
+            'ABSTAIN'
+        """
+        return cls.ABSTAIN if code == ABSTAIN_VOTE else cls(code + 1)
+
+
+_CLASSES: tuple[Label, ...] = (Label.HIGH_RISK, Label.MEDIUM_RISK, Label.LOW_RISK)
+
+_DEFAULT_FLAGS = re.compile("").flags
+
+# A quantified group that itself contains a quantifier, like "(a+b)+", can
+# backtrack exponentially on a near-miss. Possessive inner quantifiers and
+# atomic groups cannot. Only innermost groups are checked.
+_NESTED_QUANTIFIER = re.compile(
+    r"\((?!\?>)(?:[^()\\]|\\.)*(?<![*+}])(?:[*+]|\{\d*,\d*\})(?!\+)"
+    r"(?:[^()\\]|\\.)*\)(?:[*+]|\{\d*,\d*\})"
+)
+
+# A quantified innermost group with alternatives, like "(a|ab)*".
+_REPEATED_ALTERNATION = re.compile(
+    r"\((?!\?>)(?:\?:)?(?P<body>(?:[^()\\]|\\.)*\|(?:[^()\\]|\\.)*)\)"
+    r"(?:[*+]|\{\d*,\d*\})"
+)
+
+# One regex atom: an escape, a character class or a single character.
+_ATOM = re.compile(r"\\.|\[\^?\]?(?:[^\]\\]|\\.)*\]|.", re.DOTALL)
+
+# "(R+)+" and friends around a single atom R: one char, escape or class.
+_REDUNDANT_NESTING = re.compile(
+    r"\((?:\?:)?(?P<atom>[^()|\\\[\]*+?{}]|\\.|\[\^?\]?(?:[^\]\\]|\\.)*\])"
+    r"(?P<inner>[*+])\)(?P<outer>[*+])(?![*+?{])"
+)
+
+# Rows longer than this run RE2-portable LFs on Arrow's linear-time RE2
+# kernels even on the Python path, so a backtracking scan of Python re is
+# only ever quadratic in a bounded length.
+_RE2_MIN_LENGTH = 4096
+
+
+def _collapse_nesting(pattern: str) -> str:
+    """Collapse nested quantifiers around a single atom into one.
+
+    ``(a+)+`` matches the same strings as ``(?:a)+`` but can backtrack
+    exponentially: every split of a run of ``a`` into groups is tried. The
+    inner group is never read by LFs, so dropping its capture is safe.
+
+    Args:
+        pattern: Regex pattern.
+
+    Returns:
+        Pattern with ``(R+)+`` rewritten to ``(?:R)+`` and ``(R*)*``,
+        ``(R+)*`` and ``(R*)+`` to ``(?:R)*``.
+
+    Examples:
+        >>> _collapse_nesting("x(a+)+y")
+        'x(?:a)+y'
+
+        >>> _collapse_nesting("(?:[ab]*)+:")
+        '(?:[ab])*:'
+
+        >>> _collapse_nesting("(ab+)+")
+        '(ab+)+'
+    """
+
+    def collapse(match: re.Match[str]) -> str:
+        plus = match["inner"] == match["outer"] == "+"
+        return f"(?:{match['atom']}){'+' if plus else '*'}"
+
+    return _REDUNDANT_NESTING.sub(collapse, pattern)
+
+
+def _overlapping_alternation(pattern: str) -> bool:
+    """Return whether a repeated alternation has two branches starting alike.
+
+    ``(a|ab)*`` can split a run of ``a`` between its branches in
+    exponentially many ways. Branches are compared by their first atom as
+    written, so this is a heuristic: ``(a|.)*`` overlaps but passes.
+
+    Examples:
+        >>> _overlapping_alternation("(a|ab)*c"), _overlapping_alternation("(a|b)*c")
+        (True, False)
+    """
+    for match in _REPEATED_ALTERNATION.finditer(pattern):
+        heads: list[str] = []
+        branch: list[str] = []
+        for atom in [*_ATOM.findall(match["body"]), "|"]:
+            if atom != "|":
+                branch.append(atom)
+            elif branch:
+                heads.append(branch[0])
+                branch = []
+        if len(set(heads)) < len(heads):
+            return True
+    return False
+
+
+class _BudgetExceededError(Exception):
+    """Raised by the SIGALRM handler when an example overruns its budget."""
+
+
+def _raise_budget_exceeded(signum: int, frame: object) -> None:
+    """SIGALRM handler interrupting the regex match in progress."""
+    raise _BudgetExceededError
+
+
+@contextmanager
+def _alarm_budget() -> Generator[bool]:
+    """Install the budget SIGALRM handler for the duration of a scan.
+
+    Python's regex engine checks for signals while matching, so a timer
+    interrupts even a runaway backtracking match. Timers can only be used
+    from the main thread of a POSIX process; elsewhere budgets are not
+    enforced. A timer armed by someone else is paused and then re-armed.
+
+    Yields:
+        Whether budgets can be enforced.
+    """
+    if (
+        not hasattr(signal, "setitimer")
+        or threading.current_thread() is not threading.main_thread()
+    ):
+        yield False
+        return
+    started = time.monotonic()
+    outer_delay, outer_interval = signal.setitimer(signal.ITIMER_REAL, 0)
+    outer_handler = signal.signal(signal.SIGALRM, _raise_budget_exceeded)
+    try:
+        yield True
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, outer_handler)
+        if outer_delay:
+            remaining = outer_delay - (time.monotonic() - started)
+            signal.setitimer(signal.ITIMER_REAL, max(remaining, 1e-6), outer_interval)
+
 
 @dataclass
 class LabelingFunction:
     """A programmatic labeling function with Tarantula weight.
 
+    Patterns are checked when the LF is created: nested quantifiers around a
+    single atom, such as ``(a+)+``, are collapsed into one, and any other
+    nested quantifiers, which can backtrack exponentially, are rejected, as
+    are repeated alternations whose branches start with the same atom, such
+    as ``(a|ab)*``. The check is a syntactic heuristic, not a proof of
+    safety: quantifiers nested more than one group deep and branches that
+    overlap without starting alike, such as ``(a|.)*``, pass. The time
+    budget of :class:`CompiledLFEngine` bounds what it misses.
+
+    An LF with a ``feature`` votes on the AST instead: code that parses gets
+    ``label`` if :func:`extract_features` finds the feature, and only code
+    that does not parse falls back to ``pattern``.
+
     Attributes:
         name: Identifier for this labeling function.
         weight: Tarantula-derived weight (0.0 to 1.0).
         pattern: Regex pattern to match against code.
         label: Label to assign when pattern matches.
+        feature: AST feature to vote on, or None for a regex-only LF.
+        safe_pattern: Backtracking-safe rewrite of ``pattern`` that is
+            actually compiled and run.
 
     Examples:
         >>> lf = LabelingFunction("test", 0.5, r"async def", Label.HIGH_RISK)
@@ -82,12 +280,83 @@ class LabelingFunction:
 
         >>> lf.weight
         0.5
+
+        >>> ast_lf = LabelingFunction("gen", 0.9, r"yield ", feature=Feature.GENERATOR)
+        >>> ast_lf.apply("s = 'yield x'").name
+        'ABSTAIN'
     """
 
     name: str
     weight: float
     pattern: str
     label: Label = Label.HIGH_RISK
+    feature: Feature | None = None
+    safe_pattern: str = field(init=False, repr=False, compare=False)
+    regex: re.Pattern[str] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        """Validate and compile the pattern once for all later applies.
+
+        Raises:
+            ValueError: If the pattern nests quantifiers or repeats
+                overlapping alternatives.
+
+        Examples:
+            >>> LabelingFunction("dup", 0.5, r"(a+)+:").safe_pattern
+            '(?:a)+:'
+
+            >>> LabelingFunction("bad", 0.5, r"(a+ ?)+:")
+            Traceback (most recent call last):
+            ...
+            ValueError: LF 'bad' pattern nests quantifiers, ...
+        """
+        self.safe_pattern = _collapse_nesting(self.pattern)
+        if _NESTED_QUANTIFIER.search(self.safe_pattern):
+            raise ValueError(
+                f"LF {self.name!r} pattern nests quantifiers, which can "
+                f"backtrack exponentially: {self.pattern!r}"
+            )
+        if _overlapping_alternation(self.safe_pattern):
+            raise ValueError(
+                f"LF {self.name!r} pattern repeats overlapping alternatives, "
+                f"which can backtrack exponentially: {self.pattern!r}"
+            )
+        self.regex = re.compile(self.safe_pattern)
+
+    @property
+    def signature(self) -> str:
+        """Text of everything that determines this LF's votes.
+
+        The weight is excluded: it only affects aggregation. AST LFs include
+        :data:`EXTRACTOR_VERSION`, so changing the extractor invalidates
+        their cached and stored votes.
+
+        Examples:
+            >>> LabelingFunction("a", 0.5, r"yield ").signature.startswith("yield ")
+            True
+
+            >>> gen = LabelingFunction("g", 0.5, "yield ", feature=Feature.GENERATOR)
+            >>> gen.signature.endswith("ast1:GENERATOR")
+            True
+        """
+        signature = f"{self.pattern}\0{self.label.name}"
+        if self.feature is not None:
+            signature += f"\0ast{EXTRACTOR_VERSION}:{self.feature.name}"
+        return signature
+
+    @property
+    def fingerprint(self) -> str:
+        """Hex digest of :attr:`signature`.
+
+        Examples:
+            >>> a = LabelingFunction("a", 0.5, r"yield ")
+            >>> a.fingerprint == LabelingFunction("a", 0.9, r"yield ").fingerprint
+            True
+
+            >>> a.fingerprint == LabelingFunction("a", 0.5, r"yield").fingerprint
+            False
+        """
+        return hashlib.blake2b(self.signature.encode(), digest_size=8).hexdigest()
 
     def apply(self, code: str) -> Label:
         """Apply LF to code, return label or ABSTAIN.
@@ -109,11 +378,994 @@ class LabelingFunction:
             >>> lf.apply("").name
             'ABSTAIN'
         """
-        if re.search(self.pattern, code):
+        if self.feature is not None:
+            bits = extract_features(code)
+            if not bits & Feature.UNPARSABLE:
+                return self.label if bits & self.feature else Label.ABSTAIN
+        if self.regex.search(code):
             return self.label
         return Label.ABSTAIN
 
 
+# Inline flags only parse at the start of a pattern, and backreferences and
+# named groups are renumbered or collide once patterns are merged, so LFs
+# using them are evaluated on their own.
+_UNMERGEABLE = re.compile(r"\\[1-9]|\(\?P[<=]")
+
+# RE2 accepts these but gives them different semantics than Python re:
+# shorthand classes and word boundaries are ASCII-only, "$" does not match
+# before a trailing newline and POSIX classes are literal brackets in re.
+_RE2_DIVERGENT = re.compile(r"\\[wWdDsSbB]|(?<!\\)\$|\[\[:")
+
+
+def _match_regex(
+    codes: pa.Array | pa.ChunkedArray, pattern: str
+) -> pa.Array | pa.ChunkedArray:
+    """Run Arrow's ``match_substring_regex`` kernel over ``codes``.
+
+    Args:
+        codes: Arrow string array or chunked array.
+        pattern: RE2 pattern to search for.
+
+    Returns:
+        Boolean array, true where ``pattern`` matches.
+    """
+    import pyarrow.compute as pc
+
+    options = pc.MatchSubstringOptions(pattern)
+    return pc.call_function("match_substring_regex", [codes], options)
+
+
+def _is_re2_portable(lf: LabelingFunction) -> bool:
+    """Return True if ``lf`` matches identically under RE2 and Python re.
+
+    Args:
+        lf: Labeling function to check.
+
+    Returns:
+        Whether the pattern can run on Arrow's RE2 regex kernels.
+
+    Examples:
+        >>> _is_re2_portable(LabelingFunction("ctx", 0.6, r"with .+:"))
+        True
+
+        >>> _is_re2_portable(LabelingFunction("eol", 0.6, r"pass$"))
+        False
+
+        >>> _is_re2_portable(LabelingFunction("la", 0.6, r"(?<=x)y"))
+        False
+    """
+    import pyarrow as pa
+
+    if lf.regex.flags != _DEFAULT_FLAGS or _RE2_DIVERGENT.search(
+        lf.pattern.replace("\\\\", "")
+    ):
+        return False
+    try:
+        _match_regex(pa.array([""], pa.string()), lf.pattern)
+    except pa.ArrowInvalid:
+        return False
+    return True
+
+
+# Pattern syntax that can match a newline: escapes of it or of classes
+# containing it, negated sets and the inline DOTALL flag.
+_LINE_SPANNING = re.compile(r"\\[nsSWDZxuUN0]|\[\^|\(\?[a-zA-Z]*s|\n")
+
+
+def _spans_lines(lf: LabelingFunction) -> bool:
+    """Return True if a match of ``lf`` may cross a line break.
+
+    Conservative: patterns are flagged on syntax alone, so some flagged
+    patterns never actually match a newline.
+
+    Args:
+        lf: Labeling function to check.
+
+    Returns:
+        Whether ``lf`` must be rescanned on any change to the code.
+
+    Examples:
+        >>> _spans_lines(LabelingFunction("ctx", 0.6, r"with .+:"))
+        False
+
+        >>> _spans_lines(LabelingFunction("def", 0.6, r"def [^:]+:"))
+        True
+    """
+    return bool(lf.regex.flags & re.DOTALL) or (
+        _LINE_SPANNING.search(lf.pattern.replace("\\\\", "")) is not None
+    )
+
+
+def _common_prefix(a: str, b: str) -> int:
+    """Return the length of the longest common prefix of ``a`` and ``b``.
+
+    Binary search over slice comparisons, so the work is done in C.
+
+    Examples:
+        >>> _common_prefix("def f(): pass", "def g(): pass")
+        4
+
+        >>> _common_prefix("abc", "abc")
+        3
+    """
+    lo, hi = 0, min(len(a), len(b))
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[:mid] == b[:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def _changed_lines(original: str, mutated: str) -> tuple[str, str]:
+    """Return the whole lines of each snippet that differ between them.
+
+    Args:
+        original: Code before the mutation.
+        mutated: Code after the mutation.
+
+    Returns:
+        The changed lines of ``original`` and of ``mutated``. Everything
+        outside them is identical in both snippets.
+
+    Examples:
+        >>> before = chr(10).join(["a = 1", "def f(): pass", "b = 2"])
+        >>> _changed_lines(before, before.replace("f()", "g()"))
+        ('def f(): pass', 'def g(): pass')
+
+        >>> _changed_lines("x = 1", "x = 1; f = lambda: 0")
+        ('x = 1', 'x = 1; f = lambda: 0')
+    """
+    prefix = _common_prefix(original, mutated)
+    limit = min(len(original), len(mutated)) - prefix
+    suffix = min(_common_prefix(original[::-1], mutated[::-1]), limit)
+    start = original.rfind("\n", 0, prefix) + 1
+    windows = []
+    for code in (original, mutated):
+        end = code.find("\n", len(code) - suffix)
+        windows.append(code[start : len(code) if end < 0 else end])
+    return windows[0], windows[1]
+
+
+def load_labeling_functions(
+    path: str | Path = DEFAULT_REGISTRY,
+) -> list[LabelingFunction]:
+    """Load labeling functions from a YAML registry.
+
+    The registry is a mapping with a ``labeling_functions`` list; each entry
+    has a ``name``, ``weight``, ``pattern`` and ``label`` (a :class:`Label`
+    name) and optionally a ``feature`` (a :class:`Feature` name). Files are
+    parsed and compiled once per modification time, so constructing many
+    labelers from one registry is cheap.
+
+    Args:
+        path: Registry file; defaults to the built-in LFs.
+
+    Returns:
+        LFs in registry order, which is their vote-column order.
+
+    Raises:
+        ValueError: If the registry is malformed, names an unknown label or
+            feature, or repeats an LF name.
+
+    Examples:
+        >>> lfs = load_labeling_functions()
+        >>> [lf.name for lf in lfs][:2]
+        ['async_pattern', 'generator_pattern']
+
+        >>> lfs[0].weight
+        0.946
+    """
+    path = Path(path)
+    return list(_load_registry(path.resolve(), path.stat().st_mtime_ns))
+
+
+@lru_cache(maxsize=16)
+def _load_registry(path: Path, mtime_ns: int) -> tuple[LabelingFunction, ...]:
+    """Parse and validate a registry file; cached by path and mtime.
+
+    Args:
+        path: Resolved registry path.
+        mtime_ns: Modification time, so edited files are reloaded.
+
+    Returns:
+        The registry's LFs.
+
+    Raises:
+        ValueError: If the registry is invalid.
+    """
+    with path.open(encoding="utf-8") as fh:
+        registry = yaml.safe_load(fh)
+    entries = registry.get("labeling_functions") if isinstance(registry, dict) else None
+    if not isinstance(entries, list):
+        raise ValueError(f"{path}: expected a 'labeling_functions' list")
+    lfs = tuple(_registry_entry(path, entry) for entry in entries)
+    names = [lf.name for lf in lfs]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"{path}: duplicate LF names {duplicates}")
+    return lfs
+
+
+def _registry_entry(path: Path, entry: Any) -> LabelingFunction:
+    """Build one LF from a registry entry.
+
+    Args:
+        path: Registry path, for error messages.
+        entry: Parsed YAML entry.
+
+    Returns:
+        The labeling function.
+
+    Raises:
+        ValueError: If the entry is invalid.
+    """
+    required = ("name", "weight", "pattern", "label")
+    if not isinstance(entry, dict) or not all(key in entry for key in required):
+        raise ValueError(f"{path}: LF entries need {', '.join(required)}: {entry!r}")
+    try:
+        label = Label[entry["label"]]
+        feature = None if entry.get("feature") is None else Feature[entry["feature"]]
+    except KeyError as exc:
+        raise ValueError(
+            f"{path}: LF {entry['name']!r} has unknown label or feature {exc}"
+        ) from None
+    return LabelingFunction(
+        name=str(entry["name"]),
+        weight=float(entry["weight"]),
+        pattern=str(entry["pattern"]),
+        label=label,
+        feature=feature,
+    )
+
+
+# Tarantula-derived weights of the built-in LFs, read from their registry.
+TARANTULA_WEIGHTS: dict[str, float] = {
+    lf.name: lf.weight for lf in load_labeling_functions()
+}
+
+
+@dataclass
+class LFProfile:
+    """Cumulative evaluation cost of one labeling function.
+
+    Attributes:
+        calls: Examples the LF was evaluated on.
+        matches: Examples the LF fired on.
+        bytes_scanned: UTF-8 bytes of code the LF was evaluated on.
+        time_ns: Wall time spent evaluating the LF, in nanoseconds.
+
+    Examples:
+        >>> profile = LFProfile(calls=4, matches=1, time_ns=2_000_000)
+        >>> profile.seconds, profile.match_rate
+        (0.002, 0.25)
+    """
+
+    calls: int = 0
+    matches: int = 0
+    bytes_scanned: int = 0
+    time_ns: int = 0
+
+    @property
+    def seconds(self) -> float:
+        """Evaluation time in seconds."""
+        return self.time_ns / 1e9
+
+    @property
+    def match_rate(self) -> float:
+        """Fraction of evaluated examples the LF fired on."""
+        return self.matches / self.calls if self.calls else 0.0
+
+
+class CompiledLFEngine:
+    """Evaluate a fixed list of labeling functions in a single scan.
+
+    Mergeable regex LFs are joined into one alternation of named groups.
+    A search reports the leftmost position where any remaining LF matches,
+    and no other LF can match before it, so resuming from that position with
+    the winner removed yields exactly the votes of per-LF ``re.search``.
+    Each example is scanned once plus once per firing LF, instead of once
+    per registered LF.
+
+    AST LFs share one :func:`extract_features` parse per example and read
+    their vote from its bitset; they join the regex scan only on examples
+    that do not parse.
+
+    Long examples run RE2-portable LFs on Arrow's linear-time RE2 kernels.
+    With a ``time_budget``, Python regex matching on one example is cut off
+    after that many seconds and each LF is then retried alone under the same
+    budget; LFs that overrun again are recorded as ABSTAIN. So no example
+    costs more than ``(n_lfs + 1) * time_budget`` of Python matching, however
+    adversarial its code.
+
+    With ``profile`` set, every LF is evaluated on its own and timed, and
+    its counters accumulate in :attr:`profiles`. This gives up the merged
+    scan, so it is meant for finding slow LFs, not for production runs.
+
+    Attributes:
+        labeling_functions: LFs evaluated by this engine, in vote order.
+        time_budget: Seconds of Python regex matching allowed per example,
+            or None for no limit.
+        timeouts: Number of LF votes recorded as ABSTAIN for overrunning the
+            budget.
+        profile: Whether to collect per-LF evaluation counters.
+        profiles: Per-LF counters, in ``labeling_functions`` order.
+        inherited: Number of LF votes :meth:`delta_vote_matrix` copied from
+            the original instead of evaluating.
+
+    Examples:
+        >>> engine = CompiledLFEngine([
+        ...     LabelingFunction("async", 0.9, r"async def", Label.HIGH_RISK),
+        ...     LabelingFunction("lambda", 0.7, r"lambda ", Label.MEDIUM_RISK),
+        ... ])
+        >>> [v.name for v in engine.votes("f = lambda x: x")]
+        ['ABSTAIN', 'MEDIUM_RISK']
+
+        >>> [v.name for v in engine.votes("async def f(): return lambda x: x")]
+        ['HIGH_RISK', 'MEDIUM_RISK']
+    """
+
+    def __init__(
+        self,
+        labeling_functions: Sequence[LabelingFunction],
+        time_budget: float | None = None,
+        profile: bool = False,
+    ) -> None:
+        """Partition LFs into mergeable and standalone groups.
+
+        Args:
+            labeling_functions: LFs to evaluate, in vote order.
+            time_budget: Seconds of Python regex matching allowed per
+                example, or None for no limit.
+            profile: Whether to collect per-LF evaluation counters.
+        """
+        self.labeling_functions: tuple[LabelingFunction, ...] = tuple(
+            labeling_functions
+        )
+        self.time_budget = time_budget
+        self.timeouts = 0
+        self.inherited = 0
+        self.profile = profile
+        self.profiles = [LFProfile() for _ in self.labeling_functions]
+        self._enforce = False
+        self._merged: list[int] = []
+        self._standalone: list[int] = []
+        self._ast: list[tuple[int, Feature]] = []
+        for i, lf in enumerate(self.labeling_functions):
+            if lf.regex.flags != _DEFAULT_FLAGS or _UNMERGEABLE.search(lf.pattern):
+                self._standalone.append(i)
+            else:
+                self._merged.append(i)
+            if lf.feature is not None:
+                self._ast.append((i, lf.feature))
+        ast_lfs = {i for i, _ in self._ast}
+        # Regex LFs scanned on every example, and all LFs on unparsable ones.
+        self._regex_only = [
+            i for i in range(len(self.labeling_functions)) if i not in ast_lfs
+        ]
+        self._full_mask = sum(1 << i for i in self._merged if i not in ast_lfs)
+        self._fallback_mask = sum(1 << i for i in self._merged)
+        self._spans_lines = [_spans_lines(lf) for lf in self.labeling_functions]
+        self._re2_portable: list[bool] | None = None
+        self._scanners: dict[int, tuple[re.Pattern[str], dict[int | None, int]]] = {}
+
+    def __getstate__(self) -> dict[str, Any]:
+        """Pickle the engine without its per-run counters.
+
+        ``re.Pattern`` objects pickle as their source, so unpickling
+        compiles every LF pattern and merged scanner again, and a worker
+        should receive the engine once, through its pool initializer, rather
+        than with every task. RE2 portability checks and the fingerprint of
+        a :meth:`warm` engine are kept as plain values.
+        """
+        state = self.__dict__.copy()
+        state["timeouts"] = 0
+        state["inherited"] = 0
+        state["profiles"] = [LFProfile() for _ in self.labeling_functions]
+        state["_enforce"] = False
+        return state
+
+    def warm(self) -> CompiledLFEngine:
+        """Compile everything the engine would otherwise build on first use.
+
+        Returns:
+            This engine, ready to be pickled to workers, which then rebuild
+            only its compiled patterns.
+
+        Examples:
+            >>> import pickle
+            >>> engine = CompiledLFEngine(load_labeling_functions()).warm()
+            >>> clone = pickle.loads(pickle.dumps(engine))
+            >>> clone.fingerprint == engine.fingerprint
+            True
+        """
+        if self._re2_portable is None:
+            self._re2_portable = [
+                _is_re2_portable(lf) for lf in self.labeling_functions
+            ]
+        for mask in {self._full_mask, self._fallback_mask} - {0}:
+            self._scanner(mask)
+        _ = self.fingerprint
+        return self
+
+    @cached_property
+    def fingerprint(self) -> bytes:
+        """Digest of the LF set that determines the vote vector.
+
+        Weights are excluded because they only affect aggregation, so cached
+        votes stay valid when weights are tuned.
+
+        Examples:
+            >>> lfs = WeakSupervisionLabeler().labeling_functions
+            >>> CompiledLFEngine(lfs).fingerprint == CompiledLFEngine(lfs).fingerprint
+            True
+
+            >>> full = CompiledLFEngine(lfs).fingerprint
+            >>> CompiledLFEngine(lfs[:1]).fingerprint == full
+            False
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        for lf in self.labeling_functions:
+            digest.update(f"{lf.name}\0{lf.signature}\0".encode())
+        return digest.digest()
+
+    def _scanner(self, mask: int) -> tuple[re.Pattern[str], dict[int | None, int]]:
+        """Return the merged regex for the LFs in ``mask`` and its group owners.
+
+        Args:
+            mask: Bitmask of LF indices still to be resolved.
+
+        Returns:
+            Compiled alternation and a map from group index to LF index.
+        """
+        cached = self._scanners.get(mask)
+        if cached is None:
+            members = [i for i in self._merged if mask >> i & 1]
+            lfs = self.labeling_functions
+            regex = re.compile(
+                "|".join(f"(?P<lf{i}>{lfs[i].safe_pattern})" for i in members)
+            )
+            owners: dict[int | None, int] = {
+                regex.groupindex[f"lf{i}"]: i for i in members
+            }
+            cached = self._scanners[mask] = (regex, owners)
+        return cached
+
+    def votes(self, code: str) -> list[Label]:
+        """Return the vote of every LF on ``code``.
+
+        Args:
+            code: Python source code to check.
+
+        Returns:
+            One label per LF, in ``labeling_functions`` order.
+
+        Examples:
+            >>> engine = CompiledLFEngine(WeakSupervisionLabeler().labeling_functions)
+            >>> {v.name for v in engine.votes("x = 1")}
+            {'ABSTAIN'}
+        """
+        if len(code) > _RE2_MIN_LENGTH:
+            return [Label.from_code(c) for c in self.vote_matrix([code])[0].tolist()]
+        lfs = self.labeling_functions
+        result = [Label.ABSTAIN] * len(lfs)
+        fired_in = self._fired_profiled if self.profile else self._fired_within_budget
+        with self._budget():
+            for i in fired_in(code):
+                result[i] = lfs[i].label
+        return result
+
+    def vote_matrix(self, codes: Sequence[str]) -> np.ndarray:
+        """Return the int8 ``(len(codes), n_lfs)`` vote matrix.
+
+        Args:
+            codes: Python source snippets to check.
+
+        Returns:
+            Matrix of :attr:`Label.code` values, ``ABSTAIN_VOTE`` where an LF
+            did not fire.
+
+        Examples:
+            >>> engine = CompiledLFEngine(WeakSupervisionLabeler().labeling_functions)
+            >>> engine.vote_matrix(["x = 1", "yield lambda x: x"]).tolist()
+            [[-1, -1, -1, -1, -1, -1, -1], [-1, 0, -1, 1, -1, -1, -1]]
+        """
+        import pyarrow as pa
+
+        lfs = self.labeling_functions
+        matrix = np.full((len(codes), len(lfs)), ABSTAIN_VOTE, dtype=np.int8)
+        lf_codes = [lf.label.code for lf in lfs]
+        long_rows: list[int] = []
+        fired_in = self._fired_profiled if self.profile else self._fired_within_budget
+        with self._budget():
+            for row, code in enumerate(codes):
+                if len(code) > _RE2_MIN_LENGTH:
+                    long_rows.append(row)
+                    continue
+                for i in fired_in(code):
+                    matrix[row, i] = lf_codes[i]
+        if long_rows:
+            long_codes = pa.array([codes[row] for row in long_rows], pa.string())
+            matrix[long_rows] = self.vote_matrix_arrow(long_codes)
+        return matrix
+
+    def vote_matrix_arrow(self, codes: pa.Array | pa.ChunkedArray) -> np.ndarray:
+        """Return the vote matrix of an Arrow string column.
+
+        RE2-portable LFs run as ``pyarrow.compute.match_substring_regex``
+        kernels over whole chunks, so no per-row Python strings are created.
+        Only the remaining LFs fall back to Python ``re`` on materialized rows,
+        and AST LFs materialize and parse only the rows an RE2 prefilter finds
+        spelling a construct keyword or their fallback pattern.
+
+        Args:
+            codes: Arrow string array or chunked array. Nulls count as "".
+
+        Returns:
+            Same matrix as :meth:`vote_matrix` on the equivalent strings.
+
+        Examples:
+            >>> import pyarrow as pa
+            >>> engine = CompiledLFEngine(WeakSupervisionLabeler().labeling_functions)
+            >>> engine.vote_matrix_arrow(pa.array(["x = 1", "yield 1"]))[:, :3].tolist()
+            [[-1, -1, -1], [-1, 0, -1]]
+        """
+        import pyarrow.compute as pc
+
+        re2_portable = cast("list[bool]", self.warm()._re2_portable)
+        codes = pc.fill_null(codes, "")
+        lfs = self.labeling_functions
+        matrix = np.full((len(codes), len(lfs)), ABSTAIN_VOTE, dtype=np.int8)
+        rows: list[str] | None = None
+        size = 0
+        if self.profile:
+            lengths = pc.call_function("binary_length", [codes])
+            size = pc.call_function("sum", [lengths]).as_py() or 0
+        features = np.zeros(len(codes), dtype=FEATURE_DTYPE)
+        fallback = np.empty(0, dtype=np.intp)
+        parse_share = 0
+        if self._ast:
+            started = time.perf_counter_ns()
+            parsed = np.flatnonzero(self._may_have_features(codes, re2_portable))
+            features[parsed] = feature_bitsets(codes.take(parsed).to_pylist())
+            fallback = parsed[(features[parsed] & Feature.UNPARSABLE) != 0]
+            parse_share = (time.perf_counter_ns() - started) // len(self._ast)
+        for i, (lf, portable) in enumerate(zip(lfs, re2_portable, strict=True)):
+            started = time.perf_counter_ns()
+            if lf.feature is None:
+                if not portable and rows is None:
+                    rows = codes.to_pylist()
+                fired = self._column_fired(lf, portable, codes, rows)
+            else:
+                fired = (features & lf.feature) != 0
+                if len(fallback):
+                    unparsed = codes.take(fallback)
+                    fired[fallback] = self._column_fired(
+                        lf,
+                        portable,
+                        unparsed,
+                        None if portable else unparsed.to_pylist(),
+                    )
+                started -= parse_share
+            if self.profile:
+                profile = self.profiles[i]
+                profile.calls += len(codes)
+                profile.matches += int(fired.sum())
+                profile.bytes_scanned += size
+                profile.time_ns += time.perf_counter_ns() - started
+            matrix[fired, i] = lf.label.code
+        return matrix
+
+    def _may_have_features(
+        self, codes: pa.Array | pa.ChunkedArray, re2_portable: Sequence[bool]
+    ) -> np.ndarray:
+        """Return which rows of a column need parsing for the AST LFs.
+
+        A row spelling no construct keyword has no feature bit; if it also
+        matches no AST LF's fallback pattern, it cannot fire any AST LF,
+        parsed or not. Both checks run as RE2 kernels.
+
+        Args:
+            codes: Arrow string column without nulls.
+            re2_portable: Whether each LF's pattern can run on RE2.
+
+        Returns:
+            Boolean array, one entry per row.
+        """
+        if not all(re2_portable[i] for i, _ in self._ast):
+            return np.ones(len(codes), dtype=bool)
+        patterns = [CONSTRUCT_PATTERN]
+        patterns += [self.labeling_functions[i].pattern for i, _ in self._ast]
+        hits = _match_regex(codes, "|".join(f"(?:{p})" for p in patterns))
+        return np.asarray(hits.to_numpy(zero_copy_only=False), dtype=bool)
+
+    def delta_vote_matrix(
+        self,
+        votes: np.ndarray,
+        originals: Sequence[str],
+        mutants: Sequence[str],
+        injected: Sequence[int],
+    ) -> np.ndarray:
+        """Return the vote matrix of mutants, derived from their originals'.
+
+        A mutant differs from its original only in a few lines. An LF is
+        evaluated on the mutant only if its pattern matches the changed
+        lines of either snippet, or its pattern may span lines; every other
+        LF keeps the original's vote, which the change cannot have altered.
+        AST LFs whose feature the mutation injected are evaluated too, so
+        ``injected`` must hold every construct the mutation is known to
+        have added as code, as the AST engine guarantees; pass 0 for
+        rewrites that may land in strings or comments. Each changed mutant
+        is parsed once. If it no longer parses, every AST LF falls back to
+        its regex on the whole mutant, as a full labeling pass would.
+
+        Args:
+            votes: Int8 vote matrix of ``originals``.
+            originals: Code each mutant was derived from.
+            mutants: Mutated code, one per original.
+            injected: :class:`Feature` bits each mutation is known to
+                have added as code.
+
+        Returns:
+            Int8 vote matrix of ``mutants``; evaluated cells are counted out
+            of :attr:`inherited`, copied ones into it.
+
+        Examples:
+            >>> engine = CompiledLFEngine(load_labeling_functions())
+            >>> votes = engine.vote_matrix(["class A: pass"])
+            >>> mutant = "class A: pass; f = lambda x: x"
+            >>> engine.delta_vote_matrix(
+            ...     votes, ["class A: pass"], [mutant], [Feature.LAMBDA]
+            ... ).tolist()
+            [[-1, -1, -1, 1, -1, 1, -1]]
+
+            >>> engine.inherited
+            5
+        """
+        result = np.array(votes, dtype=np.int8, copy=True)
+        with self._budget():
+            for row, (original, mutant, bits) in enumerate(
+                zip(originals, mutants, injected, strict=True)
+            ):
+                if mutant != original:
+                    self._delta_votes(result[row], original, mutant, bits)
+                else:
+                    self.inherited += len(self.labeling_functions)
+        return result
+
+    def _delta_votes(
+        self, votes: np.ndarray, original: str, mutant: str, injected: int
+    ) -> None:
+        """Update one original's vote row in place to the mutant's votes.
+
+        Args:
+            votes: Int8 vote row of ``original``.
+            original: Code before the mutation.
+            mutant: Code after the mutation.
+            injected: :class:`Feature` bits the mutation introduced.
+        """
+        old, new = _changed_lines(original, mutant)
+        lfs = self.labeling_functions
+        # The original's AST votes came from a parse the mutant may have lost.
+        bits = extract_features(mutant)
+        unparsable = bool(bits & Feature.UNPARSABLE)
+        touched = [
+            i
+            for i, lf in enumerate(lfs)
+            if self._spans_lines[i]
+            or (lf.feature is not None and (unparsable or lf.feature & injected))
+            or lf.regex.search(old) is not None
+            or lf.regex.search(new) is not None
+        ]
+        self.inherited += len(lfs) - len(touched)
+        for i in touched:
+            lf = lfs[i]
+            if lf.feature is None or unparsable:
+                fired = self._search_within_budget(lf.regex, mutant)
+            else:
+                fired = bool(bits & lf.feature)
+            votes[i] = lf.label.code if fired else ABSTAIN_VOTE
+
+    def _column_fired(
+        self,
+        lf: LabelingFunction,
+        portable: bool,
+        codes: pa.Array | pa.ChunkedArray,
+        rows: list[str] | None,
+    ) -> np.ndarray:
+        """Return where ``lf``'s pattern matches a non-null string column.
+
+        Args:
+            lf: LF whose pattern to run.
+            portable: Whether the pattern can run on Arrow's RE2 kernels.
+            codes: Arrow string column.
+            rows: ``codes`` as Python strings; only read if not portable.
+
+        Returns:
+            Boolean array, one entry per row.
+        """
+        if portable:
+            hits = _match_regex(codes, lf.pattern)
+            return np.asarray(hits.to_numpy(zero_copy_only=False), dtype=bool)
+        rows = cast("list[str]", rows)
+        with self._budget():
+            return np.fromiter(
+                (self._search_within_budget(lf.regex, code) for code in rows),
+                dtype=bool,
+                count=len(rows),
+            )
+
+    @contextmanager
+    def _budget(self) -> Generator[None]:
+        """Enforce :attr:`time_budget` on the scans run inside the block."""
+        if self.time_budget is None:
+            yield
+            return
+        with _alarm_budget() as enforce:
+            self._enforce = enforce
+            try:
+                yield
+            finally:
+                self._enforce = False
+
+    def _fired_within_budget(self, code: str) -> list[int]:
+        """Return :meth:`_fired`, retrying LFs alone if the scan overruns.
+
+        Args:
+            code: Python source code to check.
+
+        Returns:
+            Indices of the LFs that matched within the budget.
+        """
+        if not self._enforce:
+            return self._fired(code)
+        # The timer is disarmed inside the try, so an alarm that lands just
+        # after the scan finishes is still caught here.
+        try:
+            signal.setitimer(signal.ITIMER_REAL, cast("float", self.time_budget))
+            try:
+                return self._fired(code)
+            finally:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+        except _BudgetExceededError:
+            pass
+        parsed, fired = self._ast_fired(code)
+        lfs = self.labeling_functions
+        fired.extend(
+            i
+            for i in self._regex_lfs(parsed)
+            if self._search_within_budget(lfs[i].regex, code)
+        )
+        return fired
+
+    def _fired_profiled(self, code: str) -> list[int]:
+        """Return the LFs matching ``code``, timing each LF on its own.
+
+        Args:
+            code: Python source code to check.
+
+        Returns:
+            Indices of the LFs that matched within the budget.
+        """
+        size = len(code.encode("utf-8", "surrogatepass"))
+        started = time.perf_counter_ns()
+        parsed, fired = self._ast_fired(code)
+        if self._ast:
+            # AST LFs share one parse, so its cost is split evenly.
+            share = (time.perf_counter_ns() - started) // len(self._ast)
+            for i, _ in self._ast:
+                profile = self.profiles[i]
+                profile.time_ns += share
+                profile.calls += 1
+                profile.bytes_scanned += size
+                profile.matches += int(i in fired)
+        lfs = self.labeling_functions
+        for i in self._regex_lfs(parsed):
+            profile = self.profiles[i]
+            started = time.perf_counter_ns()
+            hit = self._search_within_budget(lfs[i].regex, code)
+            profile.time_ns += time.perf_counter_ns() - started
+            if lfs[i].feature is None:
+                profile.calls += 1
+                profile.bytes_scanned += size
+            if hit:
+                profile.matches += 1
+                fired.append(i)
+        return fired
+
+    def _search_within_budget(self, regex: re.Pattern[str], code: str) -> bool:
+        """Return whether ``regex`` matches ``code`` within the budget.
+
+        Args:
+            regex: Compiled LF pattern.
+            code: Python source code to check.
+
+        Returns:
+            True on a match; False on no match or when the budget ran out,
+            which is counted in :attr:`timeouts`.
+        """
+        if not self._enforce:
+            return regex.search(code) is not None
+        try:
+            signal.setitimer(signal.ITIMER_REAL, cast("float", self.time_budget))
+            try:
+                return regex.search(code) is not None
+            finally:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+        except _BudgetExceededError:
+            self.timeouts += 1
+            return False
+
+    def _ast_fired(self, code: str) -> tuple[bool, list[int]]:
+        """Parse ``code`` once and return the AST LFs whose feature it has.
+
+        Args:
+            code: Python source code to check.
+
+        Returns:
+            Whether the AST LFs were resolved, False when ``code`` does not
+            parse, and the indices of the AST LFs that fired. Without AST
+            LFs nothing is parsed and they count as resolved.
+        """
+        if not self._ast:
+            return True, []
+        bits = extract_features(code)
+        if bits & Feature.UNPARSABLE:
+            return False, []
+        return True, [i for i, feature in self._ast if bits & feature]
+
+    def _regex_lfs(self, parsed: bool) -> Sequence[int]:
+        """Return the LFs voting by regex on code that did or did not parse."""
+        return self._regex_only if parsed else range(len(self.labeling_functions))
+
+    def _fired(self, code: str) -> list[int]:
+        """Return the indices of LFs that vote on ``code``.
+
+        Args:
+            code: Python source code to check.
+
+        Returns:
+            LF indices: AST LFs, then mergeable LFs in match order, then
+            standalone LFs.
+        """
+        parsed, fired = self._ast_fired(code)
+        remaining = self._full_mask if parsed else self._fallback_mask
+        pos = 0
+        while remaining:
+            regex, owners = self._scanner(remaining)
+            match = regex.search(code, pos)
+            if match is None:
+                break
+            # The wrapping group closes last, so lastindex always names it.
+            i = owners[match.lastindex]
+            fired.append(i)
+            remaining &= ~(1 << i)
+            pos = match.start()
+        lfs = self.labeling_functions
+        fired.extend(
+            i
+            for i in self._standalone
+            if (not parsed or lfs[i].feature is None) and lfs[i].regex.search(code)
+        )
+        return fired
+
+
+@dataclass
+class LabelBatch:
+    """Columnar result of labeling many examples at once.
+
+    Attributes:
+        lf_names: LF names, one per vote matrix column.
+        votes: Int8 ``(n_examples, n_lfs)`` matrix of :attr:`Label.code`.
+        labels: Int8 final label code per example.
+        confidence: Float64 confidence per example.
+
+    Examples:
+        >>> batch = WeakSupervisionLabeler().label_batch(["x = 1", "await g()"])
+        >>> len(batch)
+        2
+
+        >>> [label.name for label in batch.to_labels()]
+        ['LOW_RISK', 'HIGH_RISK']
+
+        >>> batch.votes.dtype.name
+        'int8'
+    """
+
+    lf_names: tuple[str, ...]
+    votes: np.ndarray
+    labels: np.ndarray
+    confidence: np.ndarray
+
+    def __len__(self) -> int:
+        """Return the number of labeled examples."""
+        return len(self.labels)
+
+    def to_labels(self) -> list[Label]:
+        """Decode the final label codes into :class:`Label` members.
+
+        Returns:
+            One label per example.
+        """
+        return [Label.from_code(code) for code in self.labels.tolist()]
+
+    def to_examples(
+        self, codes: Sequence[str] | None = None
+    ) -> list[CompactLabeledExample]:
+        """Convert the batch into compact per-example results.
+
+        Args:
+            codes: Labeled source strings to keep with each example, or None
+                to drop them.
+
+        Returns:
+            One :class:`CompactLabeledExample` per example, all sharing this
+            batch's ``lf_names``.
+
+        Examples:
+            >>> batch = WeakSupervisionLabeler().label_batch(["yield 1"])
+            >>> example = batch.to_examples()[0]
+            >>> example.label.name, example.lf_votes["generator_pattern"].name
+            ('HIGH_RISK', 'HIGH_RISK')
+        """
+        packed = pack_votes(self.votes)
+        keep: Iterable[str | None] = [None] * len(self) if codes is None else codes
+        return [
+            CompactLabeledExample(
+                _OUTCOME_LABELS[code + 1], confidence, votes, self.lf_names, text
+            )
+            for code, confidence, votes, text in zip(
+                self.labels.tolist(),
+                self.confidence.tolist(),
+                packed,
+                keep,
+                strict=True,
+            )
+        ]
+
+
+# Vote outcomes in packed order: ABSTAIN, then classes by Label.code.
+_OUTCOME_LABELS: tuple[Label, ...] = (Label.ABSTAIN, *_CLASSES)
+_OUTCOME_BITS = 2
+# Vote columns packed per int64 matrix product before moving to Python ints.
+_PACK_CHUNK = 31
+
+
+def pack_votes(votes: np.ndarray) -> list[int]:
+    """Pack each row of a vote matrix into one integer, two bits per LF.
+
+    LF ``j`` occupies bits ``2j`` and ``2j + 1`` and holds its vote code
+    plus one, so ABSTAIN packs to zero.
+
+    Args:
+        votes: Int8 ``(n_examples, n_lfs)`` vote matrix.
+
+    Returns:
+        One non-negative integer per row.
+
+    Examples:
+        >>> import numpy as np
+        >>> pack_votes(np.array([[-1, -1], [0, 2]], dtype=np.int8))
+        [0, 13]
+
+        >>> pack_votes(np.full((1, 40), 2, dtype=np.int8))[0] == 4**40 - 1
+        True
+    """
+    outcomes = votes.astype(np.int64) - ABSTAIN_VOTE
+    packed = [0] * len(votes)
+    for start in range(0, votes.shape[1], _PACK_CHUNK):
+        chunk = outcomes[:, start : start + _PACK_CHUNK]
+        place = np.int64(1 << _OUTCOME_BITS) ** np.arange(chunk.shape[1])
+        shift = _OUTCOME_BITS * start
+        packed = [
+            total | value << shift
+            for total, value in zip(packed, (chunk @ place).tolist(), strict=True)
+        ]
+    return packed
+
+
 @dataclass
 class LabeledExample:
     """Result of weak supervision labeling.
@@ -141,6 +1393,77 @@ class LabeledExample:
     confidence: float
     lf_votes: dict[str, Label] = field(default_factory=dict)
 
+    def to_compact(self, lf_names: Sequence[str]) -> CompactLabeledExample:
+        """Return the compact equivalent of this example.
+
+        Args:
+            lf_names: LF names to pack votes against, normally the
+                labeler's LF order. LFs missing from :attr:`lf_votes` pack
+                as ABSTAIN.
+
+        Returns:
+            Compact example keeping the code.
+
+        Examples:
+            >>> labeler = WeakSupervisionLabeler()
+            >>> names = [lf.name for lf in labeler.labeling_functions]
+            >>> example = labeler.label("f = lambda: 0")
+            >>> example.to_compact(names).lf_votes == example.lf_votes
+            True
+        """
+        packed = 0
+        for j, name in enumerate(lf_names):
+            vote = self.lf_votes.get(name, Label.ABSTAIN)
+            packed |= (vote.code - ABSTAIN_VOTE) << (_OUTCOME_BITS * j)
+        return CompactLabeledExample(
+            self.label, self.confidence, packed, tuple(lf_names), self.code
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class CompactLabeledExample:
+    """Slotted :class:`LabeledExample` with votes bit-packed into one integer.
+
+    Examples retained in bulk, e.g. for reporting, share one ``lf_names``
+    tuple and need not keep their code. :attr:`lf_votes` is rebuilt on
+    every access, so it costs nothing until read.
+
+    Attributes:
+        label: Assigned risk label.
+        confidence: Confidence score (0.0 to 1.0).
+        packed_votes: Votes packed as by :func:`pack_votes`.
+        lf_names: LF names, one per packed vote.
+        code: The labeled source code, or None if not kept.
+
+    Examples:
+        >>> ex = CompactLabeledExample(Label.MEDIUM_RISK, 0.8, 0b1000, ("a", "b"))
+        >>> [vote.name for vote in ex.lf_votes.values()]
+        ['ABSTAIN', 'MEDIUM_RISK']
+
+        >>> ex.code is None
+        True
+
+        >>> hasattr(ex, "__dict__")
+        False
+    """
+
+    label: Label
+    confidence: float
+    packed_votes: int
+    lf_names: tuple[str, ...]
+    code: str | None = None
+
+    @property
+    def lf_votes(self) -> dict[str, Label]:
+        """Per-LF vote mapping, unpacked on access."""
+        packed = self.packed_votes
+        mask = (1 << _OUTCOME_BITS) - 1
+        votes: dict[str, Label] = {}
+        for name in self.lf_names:
+            votes[name] = _OUTCOME_LABELS[packed & mask]
+            packed >>= _OUTCOME_BITS
+        return votes
+
 
 class WeakSupervisionLabeler:
     """Label code using programmatic labeling functions.
@@ -148,7 +1471,7 @@ class WeakSupervisionLabeler:
     Examples:
         >>> labeler = WeakSupervisionLabeler()
         >>> len(labeler.labeling_functions)
-        4
+        7
 
         >>> result = labeler.label("def simple(): return 1")
         >>> result.label.name
@@ -159,45 +1482,89 @@ class WeakSupervisionLabeler:
         'HIGH_RISK'
     """
 
-    def __init__(self, threshold: float = 0.5) -> None:
-        """Initialize with built-in Tarantula-weighted LFs.
+    def __init__(
+        self,
+        threshold: float = 0.5,
+        cache: LabelCache | None = None,
+        label_model: LabelModel | None = None,
+        time_budget: float | None = None,
+        profile: bool = False,
+        registry: str | Path = DEFAULT_REGISTRY,
+        engine: CompiledLFEngine | None = None,
+    ) -> None:
+        """Initialize with Tarantula-weighted LFs from a YAML registry.
 
         Args:
             threshold: Confidence threshold for labeling.
+            cache: Optional vote cache consulted before evaluating LFs.
+            label_model: Optional fitted label model that replaces the
+                Tarantula-weighted aggregation of votes.
+            time_budget: Seconds of Python regex matching allowed per
+                example, or None for no limit. Enforcing it installs a
+                SIGALRM handler and interval timer around each scan, so it
+                is off by default; the CLIs default to
+                ``DEFAULT_TIME_BUDGET``. See :class:`CompiledLFEngine`.
+            profile: Whether to collect per-LF evaluation counters, reported
+                by :meth:`lf_profiles` and :meth:`get_stats`.
+            registry: YAML file of LFs, see :func:`load_labeling_functions`.
+                Defaults to the built-in LFs.
+            engine: Compiled engine to label with instead of compiling the
+                registry, e.g. one shipped to a worker process. Its LFs
+                become :attr:`labeling_functions`.
 
         Examples:
             >>> labeler = WeakSupervisionLabeler(threshold=0.7)
             >>> labeler.threshold
             0.7
+
+            >>> shared = WeakSupervisionLabeler(engine=labeler.engine)
+            >>> shared.engine is labeler.engine
+            True
         """
         self.threshold = threshold
-        self._stats: dict[str, int] = {"labeled": 0, "conflicts": 0, "abstentions": 0}
-        self.labeling_functions: list[LabelingFunction] = [
-            LabelingFunction(
-                name="async_pattern",
-                weight=TARANTULA_WEIGHTS["async_pattern"],
-                pattern=r"async def|await ",
-                label=Label.HIGH_RISK,
+        self.cache = cache
+        self.label_model = label_model
+        self.time_budget = time_budget
+        self.profile = profile
+        self._engine: CompiledLFEngine | None = None
+        self._stats: dict[str, int] = dict.fromkeys(
+            (
+                "labeled",
+                "conflicts",
+                "abstentions",
+                "cache_hits",
+                "cache_misses",
+                "timeouts",
+                "inherited_votes",
             ),
-            LabelingFunction(
-                name="generator_pattern",
-                weight=TARANTULA_WEIGHTS["generator_pattern"],
-                pattern=r"yield ",
-                label=Label.HIGH_RISK,
-            ),
-            LabelingFunction(
-                name="lambda_pattern",
-                weight=TARANTULA_WEIGHTS["lambda_pattern"],
-                pattern=r"lambda ",
-                label=Label.MEDIUM_RISK,
-            ),
-            LabelingFunction(
-                name="context_manager_pattern",
-                weight=TARANTULA_WEIGHTS["context_manager_pattern"],
-                pattern=r"with .+:",
-                label=Label.MEDIUM_RISK,
-            ),
-        ]
+            0,
+        )
+        self.labeling_functions: list[LabelingFunction]
+        if engine is not None:
+            self.labeling_functions = list(engine.labeling_functions)
+            self._engine = engine
+        else:
+            # Copies, so tuning one labeler's weights leaves the cached
+            # registry and other labelers alone.
+            self.labeling_functions = [
+                copy.copy(lf) for lf in load_labeling_functions(registry)
+            ]
+
+    @property
+    def engine(self) -> CompiledLFEngine:
+        """Compiled engine for the current LF list, rebuilt when it changes.
+
+        Examples:
+            >>> labeler = WeakSupervisionLabeler()
+            >>> labeler.engine is labeler.engine
+            True
+        """
+        lfs = tuple(self.labeling_functions)
+        if self._engine is None or self._engine.labeling_functions != lfs:
+            self._engine = CompiledLFEngine(lfs, self.time_budget)
+        self._engine.time_budget = self.time_budget
+        self._engine.profile = self.profile
+        return self._engine
 
     def label(self, code: str) -> LabeledExample:
         """Apply all LFs and aggregate labels.
@@ -229,11 +1596,12 @@ class WeakSupervisionLabeler:
             Label.LOW_RISK: 0.0,
         }
 
-        for lf in self.labeling_functions:
-            vote = lf.apply(code)
+        engine = self.engine
+        for lf, vote in zip(engine.labeling_functions, self._votes(code), strict=True):
             votes[lf.name] = vote
             if vote != Label.ABSTAIN:
                 weighted_scores[vote] += lf.weight
+        self._collect(engine)
 
         non_abstain = [v for v in votes.values() if v != Label.ABSTAIN]
         if not non_abstain:
@@ -241,11 +1609,17 @@ class WeakSupervisionLabeler:
             confidence = 1.0
             self._stats["abstentions"] += 1
         else:
-            final_label = max(weighted_scores, key=lambda k: weighted_scores[k])
-            total_weight = sum(weighted_scores.values())
-            confidence = (
-                weighted_scores[final_label] / total_weight if total_weight else 0.5
-            )
+            if self.label_model is not None:
+                row = np.array([[v.code for v in votes.values()]], dtype=np.int8)
+                codes, confidences = self.label_model.predict(row)
+                final_label = Label.from_code(int(codes[0]))
+                confidence = float(confidences[0])
+            else:
+                final_label = max(weighted_scores, key=lambda k: weighted_scores[k])
+                total_weight = sum(weighted_scores.values())
+                confidence = (
+                    weighted_scores[final_label] / total_weight if total_weight else 0.5
+                )
             if len(set(non_abstain)) > 1:
                 self._stats["conflicts"] += 1
 
@@ -254,11 +1628,358 @@ class WeakSupervisionLabeler:
             code=code, label=final_label, confidence=confidence, lf_votes=votes
         )
 
+    def label_batch(
+        self, codes: Iterable[str | None], prior: np.ndarray | None = None
+    ) -> LabelBatch:
+        """Label many examples into columnar arrays.
+
+        Votes are collected into one int8 matrix and the aggregation of
+        :meth:`label`, Tarantula weights or the label model, is applied to the
+        whole matrix at once, so no per-row result objects are allocated.
+
+        Pyarrow input is matched with Arrow's RE2 kernels, see
+        :meth:`CompiledLFEngine.vote_matrix_arrow`.
+
+        Args:
+            codes: A pandas Series, pyarrow array or any iterable of source
+                strings. Missing values are labeled as empty code.
+            prior: Optional vote matrix from an earlier run, aligned with the
+                current LFs. Only cells set to ``UNKNOWN_VOTE`` are evaluated,
+                each LF only on the rows that need it; rows with such cells
+                are looked up in the cache first.
+
+        Returns:
+            LabelBatch with the vote matrix, final labels and confidences.
+
+        Examples:
+            >>> labeler = WeakSupervisionLabeler()
+            >>> batch = labeler.label_batch(["def f(): return 1", "lambda x: x"])
+            >>> batch.labels.tolist()
+            [2, 1]
+
+            >>> batch.confidence.tolist()
+            [1.0, 1.0]
+
+            >>> labeler.get_stats()["total_labeled"]
+            2
+        """
+        engine = self.engine
+        if hasattr(codes, "to_pylist"):
+            source: list[str] | pa.Array = cast("pa.Array", codes)
+        else:
+            # A pandas Series converts to a list far faster than it iterates.
+            to_list = getattr(codes, "tolist", None)
+            source = [
+                code or "" for code in (to_list() if callable(to_list) else codes)
+            ]
+        if prior is not None and self.cache is not None:
+            votes = self._cached_complete_votes(self.cache, source, prior)
+        elif prior is not None:
+            votes = self._complete_votes(source, prior)
+        elif self.cache is not None:
+            votes = self._cached_vote_matrix(self.cache, source)
+        elif isinstance(source, list):
+            votes = engine.vote_matrix(source)
+        else:
+            votes = engine.vote_matrix_arrow(source)
+        self._collect(engine)
+        labels, confidence = self._aggregate(votes)
+        return LabelBatch(
+            lf_names=tuple(lf.name for lf in engine.labeling_functions),
+            votes=votes,
+            labels=labels,
+            confidence=confidence,
+        )
+
+    def label_mutants(
+        self,
+        votes: np.ndarray,
+        originals: Sequence[str],
+        mutants: Sequence[str],
+        injected: Sequence[int],
+    ) -> LabelBatch:
+        """Label mutants of already-labeled code by mutation delta.
+
+        Each mutant starts from its original's votes and only the LFs the
+        mutation can have changed are evaluated; see
+        :meth:`CompiledLFEngine.delta_vote_matrix`. The cache is bypassed.
+
+        Args:
+            votes: Int8 vote matrix of ``originals``, aligned with the
+                current LFs, e.g. ``LabelBatch.votes``.
+            originals: Code each mutant was derived from.
+            mutants: Mutated code, one per original.
+            injected: :class:`Feature` bits each mutation is known to
+                have added as code; 0 where it may have rewritten a string
+                or comment.
+
+        Returns:
+            LabelBatch of the mutants.
+
+        Examples:
+            >>> labeler = WeakSupervisionLabeler()
+            >>> original = labeler.label_batch(["def f(): return 1"])
+            >>> mutants = labeler.label_mutants(
+            ...     original.votes,
+            ...     ["def f(): return 1"],
+            ...     ["def f(): yield 1"],
+            ...     [Feature.GENERATOR],
+            ... )
+            >>> [label.name for label in mutants.to_labels()]
+            ['HIGH_RISK']
+
+            >>> labeler.get_stats()["inherited_votes"]
+            6
+        """
+        engine = self.engine
+        mutant_votes = engine.delta_vote_matrix(votes, originals, mutants, injected)
+        self._collect(engine)
+        labels, confidence = self._aggregate(mutant_votes)
+        return LabelBatch(
+            lf_names=tuple(lf.name for lf in engine.labeling_functions),
+            votes=mutant_votes,
+            labels=labels,
+            confidence=confidence,
+        )
+
+    def _collect(self, engine: CompiledLFEngine) -> None:
+        """Move the counters and LF profiles of ``engine`` into the stats.
+
+        Profile counters are kept under ``lf.<name>.<counter>`` keys so that
+        :meth:`merge_stats` sums them across workers like any other counter.
+        """
+        self._stats["timeouts"] += engine.timeouts
+        self._stats["inherited_votes"] += engine.inherited
+        engine.timeouts = engine.inherited = 0
+        if not engine.profile:
+            return
+        for lf, profile in zip(engine.labeling_functions, engine.profiles, strict=True):
+            if not profile.calls:
+                continue
+            for counter, value in vars(profile).items():
+                key = f"lf.{lf.name}.{counter}"
+                self._stats[key] = self._stats.get(key, 0) + value
+        engine.profiles = [LFProfile() for _ in engine.labeling_functions]
+
+    def _votes(self, code: str) -> list[Label]:
+        """Return the vote vector of ``code``, consulting the cache if set.
+
+        Args:
+            code: Python source code to check.
+
+        Returns:
+            One label per LF, in engine order.
+        """
+        engine = self.engine
+        if self.cache is None:
+            return engine.votes(code)
+        key = LabelCache.key(code, engine.fingerprint)
+        packed = self.cache.get(key)
+        if packed is None:
+            self._stats["cache_misses"] += 1
+            votes = engine.votes(code)
+            self.cache.put(key, bytes(vote.code & 0xFF for vote in votes))
+            return votes
+        self._stats["cache_hits"] += 1
+        return [Label.from_code(c) for c in np.frombuffer(packed, np.int8).tolist()]
+
+    def _cached_vote_matrix(
+        self, cache: LabelCache, codes: list[str] | pa.Array
+    ) -> np.ndarray:
+        """Build a vote matrix, evaluating LFs only on cache misses.
+
+        Args:
+            cache: Vote cache to consult and fill.
+            codes: Source strings, or an Arrow string column.
+
+        Returns:
+            Int8 vote matrix, one row per code.
+        """
+        engine = self.engine
+        fingerprint = engine.fingerprint
+        if isinstance(codes, list):
+            keys = [LabelCache.key(code or "", fingerprint) for code in codes]
+        else:
+            keys = LabelCache.keys(codes, fingerprint)
+        cached = cache.get_many(keys)
+        votes = np.full(
+            (len(keys), len(engine.labeling_functions)), ABSTAIN_VOTE, dtype=np.int8
+        )
+        first_row: dict[bytes, int] = {}
+        for i, packed in enumerate(cached):
+            if packed is None:
+                first_row.setdefault(keys[i], i)
+            else:
+                votes[i] = np.frombuffer(packed, np.int8)
+        self._stats["cache_misses"] += len(first_row)
+        self._stats["cache_hits"] += len(keys) - len(first_row)
+        if first_row:
+            # Evaluate each distinct missing snippet once.
+            missing = list(first_row.values())
+            if isinstance(codes, list):
+                fresh = engine.vote_matrix([codes[i] for i in missing])
+            else:
+                fresh = engine.vote_matrix_arrow(codes.take(missing))
+            cache.put_many(
+                (keys[i], row.tobytes()) for i, row in zip(missing, fresh, strict=True)
+            )
+            slot = {key: j for j, key in enumerate(first_row)}
+            unresolved = [i for i, packed in enumerate(cached) if packed is None]
+            votes[unresolved] = fresh[[slot[keys[i]] for i in unresolved]]
+        return votes
+
+    def _cached_complete_votes(
+        self, cache: LabelCache, codes: list[str] | pa.Array, prior: np.ndarray
+    ) -> np.ndarray:
+        """Complete a prior vote matrix, taking incomplete rows from the cache.
+
+        Rows with ``UNKNOWN_VOTE`` cells are looked up whole; the rest of
+        their unknown cells are evaluated, and those rows are cached.
+
+        Args:
+            cache: Vote cache to consult and fill.
+            codes: Source strings, or an Arrow string column.
+            prior: Vote matrix aligned with the current LFs.
+
+        Returns:
+            Completed int8 vote matrix.
+        """
+        incomplete = np.flatnonzero((prior == UNKNOWN_VOTE).any(axis=1))
+        if not len(incomplete):
+            return self._complete_votes(codes, prior)
+        fingerprint = self.engine.fingerprint
+        if isinstance(codes, list):
+            keys = [LabelCache.key(codes[i] or "", fingerprint) for i in incomplete]
+        else:
+            keys = LabelCache.keys(codes.take(incomplete), fingerprint)
+        cached = cache.get_many(keys)
+        prior = prior.copy()
+        missed: dict[bytes, int] = {}
+        for row, key, packed in zip(incomplete.tolist(), keys, cached, strict=True):
+            if packed is None:
+                missed.setdefault(key, row)
+            else:
+                prior[row] = np.frombuffer(packed, np.int8)
+        self._stats["cache_misses"] += len(missed)
+        self._stats["cache_hits"] += len(keys) - len(missed)
+        votes = self._complete_votes(codes, prior)
+        cache.put_many((key, votes[row].tobytes()) for key, row in missed.items())
+        return votes
+
+    def _complete_votes(
+        self, codes: list[str] | pa.Array, prior: np.ndarray
+    ) -> np.ndarray:
+        """Evaluate the ``UNKNOWN_VOTE`` cells of a prior vote matrix.
+
+        Rows are grouped by which LFs they are missing, and each group runs
+        an engine over just those LFs on just those rows.
+
+        Args:
+            codes: Source strings, or an Arrow string column.
+            prior: Vote matrix aligned with the current LFs.
+
+        Returns:
+            Completed int8 vote matrix.
+        """
+        lfs = self.engine.labeling_functions
+        votes = prior.astype(np.int8, copy=True)
+        missing = votes == UNKNOWN_VOTE
+        if not missing.any():
+            return votes
+        patterns, group = np.unique(missing, axis=0, return_inverse=True)
+        for index, pattern in enumerate(patterns):
+            cols = np.flatnonzero(pattern)
+            if not len(cols):
+                continue
+            rows = np.flatnonzero(group.ravel() == index)
+            engine = CompiledLFEngine(
+                [lfs[c] for c in cols], self.time_budget, self.profile
+            )
+            if isinstance(codes, list):
+                fresh = engine.vote_matrix([codes[r] for r in rows])
+            else:
+                fresh = engine.vote_matrix_arrow(codes.take(rows))
+            votes[np.ix_(rows, cols)] = fresh
+            self._collect(engine)
+        return votes
+
+    def aggregate(self, votes: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Aggregate a vote matrix without counting it in the statistics.
+
+        Lets callers predict the labels of hypothetical votes, such as an
+        original's votes plus the vote a mutation would add.
+
+        Args:
+            votes: Int8 ``(n_examples, n_lfs)`` vote matrix.
+
+        Returns:
+            Final label codes and confidences, one per row.
+
+        Examples:
+            >>> labeler = WeakSupervisionLabeler()
+            >>> votes = labeler.label_batch(["x = 1"]).votes
+            >>> votes[0, 0] = Label.HIGH_RISK.code
+            >>> labeler.aggregate(votes)[0].tolist()
+            [0]
+
+            >>> labeler.get_stats()["total_labeled"]
+            1
+        """
+        return self._aggregate(votes, count=False)
+
+    def _aggregate(
+        self, votes: np.ndarray, count: bool = True
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Vectorized aggregation of a vote matrix.
+
+        Uses the label model if one is set, else Tarantula weights.
+
+        Args:
+            votes: Int8 ``(n_examples, n_lfs)`` vote matrix.
+            count: Whether to add the rows to the statistics.
+
+        Returns:
+            Final label codes and confidences, one per row.
+        """
+        weights = np.array(
+            [lf.weight for lf in self.engine.labeling_functions], dtype=np.float64
+        )
+        hits = np.stack([votes == label.code for label in _CLASSES], axis=1)
+        scores = np.where(hits, weights, 0.0).sum(axis=2)
+        present = hits.any(axis=2)
+        n_present = present.sum(axis=1)
+        abstained = n_present == 0
+
+        # argmax keeps the first maximum, matching max() over _CLASSES order.
+        if self.label_model is not None:
+            labels, confidence = self.label_model.predict(votes)
+        else:
+            labels = scores.argmax(axis=1).astype(np.int8)
+            total = scores.sum(axis=1)
+            best = np.take_along_axis(scores, labels[:, None].astype(np.intp), 1)
+            confidence = np.full(len(votes), 0.5)
+            np.divide(best[:, 0], total, out=confidence, where=total != 0)
+        labels[abstained] = Label.LOW_RISK.code
+        confidence[abstained] = 1.0
+
+        if not count:
+            return labels, confidence
+        self._stats["labeled"] += len(votes)
+        self._stats["abstentions"] += int(abstained.sum())
+        self._stats["conflicts"] += int((n_present > 1).sum())
+        return labels, confidence
+
     def get_stats(self) -> dict[str, int | float]:
         """Return labeling statistics.
 
         Returns:
-            Dict with total_labeled, coverage, conflicts, abstentions.
+            Dict with total_labeled, coverage, conflicts, abstentions,
+            cache_hits and cache_misses when a cache was used, and timeouts
+            (LF votes recorded as ABSTAIN for overrunning the time budget)
+            when a budget is set, and inherited_votes (mutant LF votes
+            copied from the original) after :meth:`label_mutants`. With
+            profiling, also ``lf.<name>.calls``,
+            ``.matches``, ``.bytes_scanned`` and ``.seconds`` for every LF.
 
         Examples:
             >>> labeler = WeakSupervisionLabeler()
@@ -268,23 +1989,167 @@ class WeakSupervisionLabeler:
             1
         """
         total = self._stats["labeled"] or 1
-        return {
+        stats: dict[str, int | float] = {
             "total_labeled": self._stats["labeled"],
             "coverage": (total - self._stats["abstentions"]) / total,
             "conflicts": self._stats["conflicts"] / total,
             "abstentions": self._stats["abstentions"],
         }
+        if (
+            self.cache is not None
+            or self._stats["cache_hits"] + self._stats["cache_misses"]
+        ):
+            stats["cache_hits"] = self._stats["cache_hits"]
+            stats["cache_misses"] = self._stats["cache_misses"]
+        if self.time_budget is not None or self._stats["timeouts"]:
+            stats["timeouts"] = self._stats["timeouts"]
+        if self._stats["inherited_votes"]:
+            stats["inherited_votes"] = self._stats["inherited_votes"]
+        for name, profile in self.lf_profiles().items():
+            stats[f"lf.{name}.calls"] = profile.calls
+            stats[f"lf.{name}.matches"] = profile.matches
+            stats[f"lf.{name}.bytes_scanned"] = profile.bytes_scanned
+            stats[f"lf.{name}.seconds"] = profile.seconds
+        return stats
 
+    def lf_profiles(self) -> dict[str, LFProfile]:
+        """Return the cumulative per-LF evaluation counters.
 
-if __name__ == "__main__":
+        Returns:
+            Profile per LF name, empty unless profiling was enabled here or
+            in a labeler whose counters were merged in.
+
+        Examples:
+            >>> labeler = WeakSupervisionLabeler(profile=True)
+            >>> _ = labeler.label_batch(["yield 1", "x = 1"])
+            >>> profile = labeler.lf_profiles()["generator_pattern"]
+            >>> profile.calls, profile.matches, profile.bytes_scanned
+            (2, 1, 12)
+        """
+        profiles: dict[str, LFProfile] = {}
+        for key, value in self._stats.items():
+            if key.startswith("lf."):
+                name, counter = key[3:].rsplit(".", 1)
+                setattr(profiles.setdefault(name, LFProfile()), counter, value)
+        return profiles
+
+    @property
+    def counters(self) -> dict[str, int]:
+        """Raw labeling counters behind :meth:`get_stats`.
+
+        Counters from labelers that processed disjoint shards can be summed
+        with :meth:`merge_stats` to get corpus-wide rates.
+
+        Examples:
+            >>> labeler = WeakSupervisionLabeler()
+            >>> _ = labeler.label("yield 1")
+            >>> labeler.counters["labeled"]
+            1
+        """
+        return dict(self._stats)
+
+    def merge_stats(self, counters: Mapping[str, int]) -> None:
+        """Add another labeler's :attr:`counters` into this labeler's stats.
+
+        Args:
+            counters: Raw counters, typically from a worker process.
+
+        Examples:
+            >>> total = WeakSupervisionLabeler()
+            >>> worker = WeakSupervisionLabeler()
+            >>> _ = worker.label("x = 1")
+            >>> _ = total.label("await g()")
+            >>> total.merge_stats(worker.counters)
+            >>> total.get_stats()["coverage"]
+            0.5
+        """
+        for key, value in counters.items():
+            self._stats[key] = self._stats.get(key, 0) + value
+
+
+def format_profile(profiles: Mapping[str, LFProfile]) -> str:
+    """Render per-LF profiles as a table, slowest LF first.
+
+    Args:
+        profiles: Profile per LF name, as from
+            :meth:`WeakSupervisionLabeler.lf_profiles`.
+
+    Returns:
+        Fixed-width table with time, share of total time, throughput and
+        match rate per LF.
+
+    Examples:
+        >>> fast = LFProfile(calls=10, matches=5, bytes_scanned=10**6, time_ns=10**6)
+        >>> slow = LFProfile(calls=10, bytes_scanned=10**6, time_ns=3 * 10**6)
+        >>> table = format_profile({"fast": fast, "slow": slow})
+        >>> table.splitlines()[1].split()
+        ['slow', '3.0', '75.0%', '333.3', '0.0%']
+    """
+    total = sum(profile.time_ns for profile in profiles.values()) or 1
+    lines = [
+        f"{'labeling function':<32} {'time ms':>9} {'share':>8} "
+        f"{'MB/s':>10} {'match':>9}"
+    ]
+    ranked = sorted(profiles.items(), key=lambda item: -item[1].time_ns)
+    for name, profile in ranked:
+        seconds = profile.seconds
+        throughput = profile.bytes_scanned / 1e6 / seconds if seconds else 0.0
+        lines.append(
+            f"{name:<32} {seconds * 1e3:>9.1f} {profile.time_ns / total:>8.1%} "
+            f"{throughput:>10.1f} {profile.match_rate:>9.1%}"
+        )
+    return "\n".join(lines)
+
+
+def main() -> None:
+    """CLI entry point for weak_supervision."""
     import argparse
 
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
     parser = argparse.ArgumentParser(description="Weak Supervision Labeling")
     parser.add_argument("input", help="Input parquet file")
     parser.add_argument("--output", "-o", help="Output parquet file")
-    parser.add_argument("--stats", action="store_true", help="Show LF statistics")
+    parser.add_argument(
+        "--stats", action="store_true", help="Show per-LF evaluation statistics"
+    )
     parser.add_argument("--threshold", type=float, default=0.5)
+    parser.add_argument(
+        "--time-budget",
+        type=float,
+        default=DEFAULT_TIME_BUDGET,
+        help="Seconds of regex matching per example; 0 disables the limit",
+    )
+    parser.add_argument(
+        "--lfs",
+        default=DEFAULT_REGISTRY,
+        help="YAML registry of labeling functions (default: built-in)",
+    )
     args = parser.parse_args()
 
-    labeler = WeakSupervisionLabeler(threshold=args.threshold)
+    labeler = WeakSupervisionLabeler(
+        threshold=args.threshold,
+        time_budget=args.time_budget or None,
+        profile=args.stats,
+        registry=args.lfs,
+    )
     print(f"Labeler initialized with {len(labeler.labeling_functions)} LFs")
+    table = pq.read_table(args.input)
+    batch = labeler.label_batch(table.column("code"))
+    if args.output:
+        table = table.append_column(
+            "label", pa.array([label.name for label in batch.to_labels()])
+        ).append_column("confidence", pa.array(batch.confidence))
+        pq.write_table(table, args.output)
+    stats = labeler.get_stats()
+    print(
+        f"Labeled {stats['total_labeled']} examples "
+        f"(coverage {stats['coverage']:.1%}, conflicts {stats['conflicts']:.1%})"
+    )
+    if args.stats:
+        print(format_profile(labeler.lf_profiles()))
+
+
+if __name__ == "__main__":
+    main()
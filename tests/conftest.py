@@ -2,13 +2,73 @@
 
 from __future__ import annotations
 
+import sys
 from typing import TYPE_CHECKING
 
+import pyarrow as pa
+import pyarrow.parquet as pq
 import pytest
 
 if TYPE_CHECKING:
+    from collections.abc import Callable
     from pathlib import Path
 
+CORPUS_CODES = [
+    "def hello(): return 42",
+    "async def fetch(): await get()",
+    "def gen(): yield 1",
+    "f = lambda x: x + 1",
+    "with open('f') as fp: pass",
+    "async def f(): return lambda x: x",
+    "x = 1",
+    "",
+]
+
+# Stands in for cargo and cargo clippy: the crate's main.rs says how the run
+# goes, and every run logs its pid, start/end times and target directory to
+# the directory in argv[1]. A shared target directory gets a marker per
+# crate. "error" and "deny" always fail; "warn" fails only under -D warnings.
+FAKE_CARGO = """
+import json, os, pathlib, subprocess, sys, time
+log = pathlib.Path(sys.argv[1]) / f"{os.getpid()}.json"
+start = time.monotonic()
+main = pathlib.Path("src/main.rs")
+source = main.read_text() if main.exists() else ""
+target = os.environ.get("CARGO_TARGET_DIR")
+log.with_suffix(".target").write_text(target or "")
+if target:
+    pathlib.Path(target).mkdir(parents=True, exist_ok=True)
+    (pathlib.Path(target) / pathlib.Path.cwd().name).touch()
+if "spawn" in source:
+    child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+    log.with_suffix(".child").write_text(str(child.pid))
+if "sleep" in source:
+    time.sleep(float(source.split()[-1]))
+log.write_text(json.dumps([start, time.monotonic()]))
+if "error" in source:
+    print("error[E0308]: mismatched types", file=sys.stderr)
+    print("error[E0425]: unresolved name", file=sys.stderr)
+    print("error[E0308]: mismatched types", file=sys.stderr)
+if any(word in source for word in ("error", "deny")) or (
+    "warn" in source and "warnings" in sys.argv
+):
+    sys.exit(101)
+"""
+
+
+def _write_crate(
+    root: Path, name: str, source: str = "fn main() {}", dependencies: str = ""
+) -> Path:
+    """Write an example crate whose main.rs tells the fake cargo what to do."""
+    crate = root / name
+    (crate / "src").mkdir(parents=True)
+    manifest = f'[package]\nname = "{crate.name}"\n'
+    if dependencies:
+        manifest += f"\n[dependencies]\n{dependencies}\n"
+    (crate / "Cargo.toml").write_text(manifest)
+    (crate / "src" / "main.rs").write_text(source)
+    return crate
+
 
 @pytest.fixture
 def tmp_corpus_dir(tmp_path: Path) -> Path:
@@ -34,3 +94,39 @@ def sample_async_code() -> str:
     """Fetch data from URL."""
     return await get(url)
 '''
+
+
+@pytest.fixture
+def corpus_parquet(tmp_path: Path) -> Path:
+    """Write a small corpus parquet with a code and a pass-through column.
+
+    Rows are split into three row groups so parallel paths see several shards.
+    """
+    path = tmp_path / "corpus.parquet"
+    table = pa.table(
+        {
+            "example_id": [f"ex{i}" for i in range(len(CORPUS_CODES))],
+            "code": CORPUS_CODES,
+        }
+    )
+    pq.write_table(table, path, row_group_size=3)
+    return path
+
+
+@pytest.fixture
+def make_crate() -> Callable[..., Path]:
+    """Return a factory writing example crates for the fake cargo.
+
+    The factory takes the examples root, the crate's relative name, its
+    main.rs source and an optional ``[dependencies]`` body, and returns the
+    crate directory.
+    """
+    return _write_crate
+
+
+@pytest.fixture
+def fake_cargo(tmp_path: Path) -> list[str]:
+    """Return a fake cargo command logging every run to ``tmp_path / "log"``."""
+    log = tmp_path / "log"
+    log.mkdir()
+    return [sys.executable, "-c", FAKE_CARGO, str(log)]
@@ -0,0 +1,74 @@
+"""Tests for ast_features module."""
+
+from __future__ import annotations
+
+import pytest
+
+from reprorusted_python_cli.ast_features import (
+    FEATURE_DTYPE,
+    Feature,
+    extract_features,
+    feature_bitsets,
+)
+
+
+class TestExtractFeatures:
+    """Tests for extract_features()."""
+
+    @pytest.mark.parametrize(
+        ("code", "feature"),
+        [
+            ("async def f(): pass", Feature.ASYNC),
+            ("def f(): yield 1", Feature.GENERATOR),
+            ("def f(): yield from g()", Feature.GENERATOR),
+            ("print(y := 2)", Feature.WALRUS),
+            ("f = lambda: 0", Feature.LAMBDA),
+            ("with a: pass", Feature.CONTEXT_MANAGER),
+            ("class A: pass", Feature.CLASS),
+            ("try: pass\nexcept E: pass", Feature.EXCEPTION),
+            ("try: pass\nexcept* E: pass", Feature.EXCEPTION),
+            ("raise E", Feature.EXCEPTION),
+        ],
+    )
+    def test_single_construct(self, code: str, feature: Feature) -> None:
+        """Each construct sets exactly its own bit."""
+        assert extract_features(code) == feature
+
+    def test_async_constructs(self) -> None:
+        """Await, async for and async with all count as async."""
+        code = "async def f():\n    async for x in y: await x\n    async with z: pass"
+        assert extract_features(code) == Feature.ASYNC | Feature.CONTEXT_MANAGER
+
+    def test_strings_and_comments_do_not_fire(self) -> None:
+        """Keywords inside strings and comments are not constructs."""
+        code = "s = 'async def yield lambda :='  # class A: with x: raise"
+        assert extract_features(code) == 0
+
+    def test_every_construct(self) -> None:
+        """A snippet with every construct sets every bit but UNPARSABLE."""
+        code = (
+            "class A:\n"
+            "    async def f(self):\n"
+            "        with x: yield (y := lambda: 0)\n"
+            "        try: raise E\n"
+            "        finally: pass\n"
+            "    z = 1\n"
+        )
+        assert extract_features(code) == ~Feature.UNPARSABLE
+
+    @pytest.mark.parametrize(
+        "code", ["def f(:", "with open(p) as f:", "x = 1\0", "(" * 1000]
+    )
+    def test_unparsable(self, code: str) -> None:
+        """Code that does not parse sets only UNPARSABLE."""
+        assert extract_features(code) == Feature.UNPARSABLE
+
+
+class TestFeatureBitsets:
+    """Tests for feature_bitsets()."""
+
+    def test_one_bitset_per_snippet(self) -> None:
+        """Bitsets line up with the input snippets."""
+        bitsets = feature_bitsets(iter(["lambda: 0", "", "def"]))
+        assert bitsets.dtype == FEATURE_DTYPE
+        assert bitsets.tolist() == [Feature.LAMBDA, 0, Feature.UNPARSABLE]
@@ -0,0 +1,170 @@
+"""Tests for ast_mutator module."""
+
+from __future__ import annotations
+
+import pytest
+from hypothesis import given
+from hypothesis import strategies as st
+
+from reprorusted_python_cli.ast_features import Feature, extract_features
+from reprorusted_python_cli.ast_mutator import (
+    AST_MUTATION_TYPES,
+    ASTSnippet,
+    ast_mutants,
+)
+from reprorusted_python_cli.synthetic_augmenter import MUTATION_FEATURES
+
+# Snippets with sites nested, decorated, annotated, non-ASCII and on shared
+# lines.
+SNIPPETS = [
+    "def f(x):\n    y = x  # keep\n    return y\n",
+    "@cache\ndef f(a: int, /, *args: str, b: int = 1, **kw: int) -> int:\n"
+    "    return a\n",
+    "class A:\n    n = 0\n\n    def m(self):\n        if self.n:\n"
+    "            return 'é' + str(self.n)\n        return None\n",
+    "def g():\n    yield 1\n    return 2\n\ndef h():\n    return 3\n",
+    "def outer():\n    def inner():\n        return 1\n    return inner\n",
+    "async def a():\n    return await b()\n\nx = 1; y = 2\n",
+    "try:\n    pass\nexcept E as e:\n    z = e\nelse:\n    w = 1\n",
+    "match p:\n    case 1:\n        q = 2\n",
+    "s = '☃'; t = s\r\ndef f(): return t  # é\r\n",
+]
+
+# Fragments that create, nest and break mutation sites.
+_FRAGMENTS = ["def f(x):", "\n", "    ", "return x", "yield x", "x = y", ";"]
+_FRAGMENTS += ["async ", "@d", "class A:", "pass", "  # c", "if x:", "é"]
+
+
+class TestAstMutants:
+    """Tests for ast_mutants()."""
+
+    @pytest.mark.parametrize(
+        ("code", "mutation_type", "mutant"),
+        [
+            (
+                "def f(x):\n    return x + 1\n",
+                "async_await",
+                "async def f(x):\n    return await asyncio.sleep(0) or x + 1\n",
+            ),
+            ("def f():\n    pass\n", "async_await", "async def f():\n    pass\n"),
+            (
+                "def f(x):\n    if x:\n        return x\n",
+                "generator",
+                "def f(x):\n    if x:\n        yield x\n",
+            ),
+            ("def f(x: int) -> int: return x", "lambda", "f = lambda x: x"),
+            ("x = 1\n", "lambda", "x = 1\nprocess = lambda x: x * 2"),
+            ("x = 1", "lambda", "x = 1\nprocess = lambda x: x * 2"),
+            ("", "lambda", "process = lambda x: x * 2"),
+            ("a = b = 1\nc = 2", "walrus_operator", "a = b = 1\n(c := 2)"),
+            (
+                "def f():\n    return 1\n",
+                "context_manager",
+                "def f():\n    with contextlib.nullcontext():\n        return 1\n",
+            ),
+            (
+                "def f():\n    return 1\n",
+                "exception_handling",
+                "def f():\n    try:\n        return 1\n"
+                "    except Exception:\n        raise\n",
+            ),
+        ],
+    )
+    def test_mutation(self, code: str, mutation_type: str, mutant: str) -> None:
+        """Each mutation rewrites its first site as a tree transform."""
+        assert ast_mutants(code, [mutation_type]) == {mutation_type: mutant}
+
+    @pytest.mark.parametrize(
+        ("code", "missing"),
+        [
+            ("x = 1", "async_await"),
+            ("def g():\n    yield 1\n", "async_await"),
+            ("def f():\n    return\n", "generator"),
+            ("async def f():\n    return 1\n", "generator"),
+            ("self.x = 1\nx: int = 1\n", "walrus_operator"),
+            ("x = 1", "context_manager"),
+            ("x = 1", "exception_handling"),
+        ],
+    )
+    def test_no_site(self, code: str, missing: str) -> None:
+        """Mutations without a valid site yield no mutant."""
+        assert missing not in ast_mutants(code)
+
+    def test_rest_of_snippet_kept(self) -> None:
+        """Only the replaced statement changes; other lines keep comments."""
+        code = "# head\nx = 1  # one\n\n\ndef f():  # note\n    return x\n"
+        mutant = ast_mutants(code, ["walrus_operator"])["walrus_operator"]
+        assert mutant == "# head\n(x := 1)  # one\n\n\ndef f():  # note\n    return x\n"
+
+    def test_decorators_and_indentation_kept(self) -> None:
+        """Replaced methods keep their decorators and indentation."""
+        code = "class A:\n    @property\n    def v(self):\n        return 1\n"
+        mutant = ast_mutants(code, ["async_await"])["async_await"]
+        assert mutant == (
+            "class A:\n    @property\n    async def v(self):\n"
+            "        return await asyncio.sleep(0) or 1\n"
+        )
+
+    def test_shared_tree_is_restored(self) -> None:
+        """A mutation leaves no trace on the tree the next one unparses."""
+        snippet = ASTSnippet.parse("def f():\n    return 1\n")
+        assert snippet is not None
+        async_mutant = snippet.mutate("async_await")
+        assert snippet.mutate("generator") == "def f():\n    yield 1\n"
+        assert snippet.mutate("async_await") == async_mutant
+
+    @pytest.mark.parametrize("code", SNIPPETS)
+    def test_mutants_parse_with_their_feature(self, code: str) -> None:
+        """Every mutant parses and contains the construct it injects."""
+        mutants = ast_mutants(code)
+        assert mutants
+        for mutation_type, mutant in mutants.items():
+            compile(mutant, "<mutant>", "exec")
+            assert extract_features(mutant) & MUTATION_FEATURES[mutation_type]
+
+    @given(
+        st.lists(
+            st.sampled_from(_FRAGMENTS),
+            max_size=12,
+        ).map("".join)
+    )
+    def test_any_parsable_code_gives_parsable_mutants(self, code: str) -> None:
+        """Mutants of any code that parses parse too."""
+        for mutant in ast_mutants(code).values():
+            assert not extract_features(mutant) & Feature.UNPARSABLE
+
+    @pytest.mark.parametrize("code", ["def f(:", "x = 1\0"])
+    def test_unparsable_has_no_mutants(self, code: str) -> None:
+        """Code that does not parse has no mutants."""
+        assert ast_mutants(code) == {}
+
+    def test_unknown_type_rejected(self) -> None:
+        """Unknown mutation types raise ValueError."""
+        with pytest.raises(ValueError, match="unknown mutation types"):
+            ast_mutants("x = 1", ["rename"])
+
+
+class TestASTSnippet:
+    """Tests for ASTSnippet."""
+
+    def test_applicable_types(self) -> None:
+        """Only mutations with a site are applicable; lambda always is."""
+        snippet = ASTSnippet.parse("x = 1")
+        assert snippet is not None
+        assert snippet.mutation_types == ("lambda", "walrus_operator")
+        full = ASTSnippet.parse("def f():\n    x = 1\n    return x\n")
+        assert full is not None
+        assert full.mutation_types == AST_MUTATION_TYPES
+
+    def test_inapplicable_mutation(self) -> None:
+        """Mutations without a site return None."""
+        snippet = ASTSnippet.parse("pass")
+        assert snippet is not None
+        assert snippet.mutate("generator") is None
+
+    def test_unknown_mutation(self) -> None:
+        """Unknown mutation types raise ValueError."""
+        snippet = ASTSnippet.parse("pass")
+        assert snippet is not None
+        with pytest.raises(ValueError, match="unknown mutation type"):
+            snippet.mutate("rename")
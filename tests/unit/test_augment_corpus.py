@@ -0,0 +1,356 @@
+"""Tests for augment_corpus module."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, ClassVar
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from hypothesis import given
+from hypothesis import strategies as st
+
+from reprorusted_python_cli.ast_features import Feature, feature_bitsets
+from reprorusted_python_cli.augment_corpus import augment_corpus, class_quotas
+from reprorusted_python_cli.dedup import normalize_code
+from reprorusted_python_cli.label_corpus import (
+    LF_METADATA_KEY,
+    content_hashes,
+    label_corpus,
+    label_counts,
+)
+from reprorusted_python_cli.synthetic_augmenter import (
+    MUTATION_FEATURES,
+    MutationEngine,
+)
+from reprorusted_python_cli.weak_supervision import (
+    TARANTULA_WEIGHTS,
+    WeakSupervisionLabeler,
+)
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+class TestAugmentCorpus:
+    """Tests for augment_corpus()."""
+
+    @pytest.fixture
+    def labeled_parquet(self, corpus_parquet: Path, tmp_path: Path) -> Path:
+        """Label the shared corpus as label_corpus would for augmentation."""
+        path = tmp_path / "labeled.parquet"
+        label_corpus(corpus_parquet, output_path=path, workers=1)
+        return path
+
+    def test_returns_stats(self, labeled_parquet: Path) -> None:
+        """Counts originals and up to multiplier distinct mutants per original."""
+        stats = augment_corpus(labeled_parquet, multiplier=3, dedup=False)
+        assert stats["original"] == 8
+        # Snippets with fewer applicable AST mutations get fewer mutants.
+        assert stats["synthetic"] == 18
+        assert stats["total"] == 26
+        assert 0 < stats["inherited_votes"] < 18 * len(TARANTULA_WEIGHTS)
+        assert stats["invalid"] == 0
+        assert (stats["duplicates"], stats["near_duplicates"]) == (0, 0)
+
+    def test_writes_originals_then_mutants(
+        self, labeled_parquet: Path, tmp_path: Path
+    ) -> None:
+        """Output holds originals first, then their mutants, with votes."""
+        out = tmp_path / "augmented.parquet"
+        augment_corpus(labeled_parquet, output_path=out, dedup=False)
+        table = pq.read_table(out)
+        assert table.column_names == [
+            "code",
+            "label",
+            "confidence",
+            "is_synthetic",
+            "mutation_type",
+            "is_valid",
+            "content_hash",
+            "lf_votes",
+        ]
+        assert LF_METADATA_KEY in table.schema.metadata
+        synthetic = table.column("is_synthetic").to_pylist()
+        assert synthetic == [False] * 8 + [True] * 14
+        assert table.column("is_valid").to_pylist() == [None] * 8 + [True] * 14
+        assert set(table.column("mutation_type").to_pylist()[8:]) <= set(
+            MUTATION_FEATURES
+        )
+        assert table.column("content_hash").to_pylist() == list(
+            content_hashes(table.column("code").combine_chunks())
+        )
+
+    @pytest.mark.parametrize("engine", list(MutationEngine))
+    def test_matches_full_relabel(
+        self, labeled_parquet: Path, tmp_path: Path, engine: MutationEngine
+    ) -> None:
+        """Delta labels of mutants equal labeling every row from scratch."""
+        out = tmp_path / "augmented.parquet"
+        augment_corpus(labeled_parquet, output_path=out, multiplier=4, engine=engine)
+        table = pq.read_table(out)
+        expected = WeakSupervisionLabeler().label_batch(table.column("code"))
+        assert table.column("lf_votes").to_pylist() == expected.votes.tolist()
+        assert table.column("label").to_pylist() == [
+            label.name for label in expected.to_labels()
+        ]
+
+    def test_string_and_comment_sites_relabeled(self, tmp_path: Path) -> None:
+        """Regex rewrites inside strings and comments inject no construct."""
+        corpus, out = tmp_path / "corpus.parquet", tmp_path / "augmented.parquet"
+        codes = ['s = "def f(x): pass"', "# return total" + chr(10) + "x = 1"]
+        pq.write_table(pa.table({"code": codes}), corpus)
+        augment_corpus(
+            corpus, out, multiplier=12, engine=MutationEngine.REGEX, dedup=False
+        )
+        table = pq.read_table(out)
+        codes = table.column("code").to_pylist()
+        labels = dict(zip(codes, table.column("label").to_pylist(), strict=True))
+        assert labels['s = "async def f(x): pass"'] == "LOW_RISK"
+        assert labels["# yield total" + chr(10) + "x = 1"] == "LOW_RISK"
+        expected = WeakSupervisionLabeler().label_batch(table.column("code"))
+        assert table.column("lf_votes").to_pylist() == expected.votes.tolist()
+
+    def test_ast_mutants_parse(self, labeled_parquet: Path, tmp_path: Path) -> None:
+        """The default AST engine only writes mutants that parse."""
+        out = tmp_path / "augmented.parquet"
+        augment_corpus(labeled_parquet, output_path=out, multiplier=4, dedup=False)
+        bits = feature_bitsets(pq.read_table(out).column("code").to_pylist()[8:])
+        assert len(bits) == 19
+        assert not (bits & Feature.UNPARSABLE).any()
+
+    def test_invalid_mutants_dropped(
+        self, labeled_parquet: Path, tmp_path: Path
+    ) -> None:
+        """Mutants that do not compile are dropped and tallied per type.
+
+        With one mutant per chunk, chunks of only invalid mutants occur.
+        """
+        out = tmp_path / "augmented.parquet"
+        stats = augment_corpus(
+            labeled_parquet,
+            out,
+            multiplier=4,
+            engine=MutationEngine.REGEX,
+            batch_size=1,
+            dedup=False,
+        )
+        tallies = {k: v for k, v in stats.items() if k.startswith("invalid_")}
+        assert set(tallies) <= {f"invalid_{t}" for t in MUTATION_FEATURES}
+        assert sum(tallies.values()) == stats["invalid"] > 0
+        assert stats["synthetic"] == 32 - stats["invalid"]
+        table = pq.read_table(out)
+        assert set(table.column("is_valid").to_pylist()[8:]) == {True}
+        assert len(table) == stats["total"]
+
+    def test_invalid_mutants_kept(self, labeled_parquet: Path, tmp_path: Path) -> None:
+        """With keep_invalid, mutants that do not compile are flagged."""
+        out = tmp_path / "augmented.parquet"
+        stats = augment_corpus(
+            labeled_parquet,
+            out,
+            multiplier=4,
+            engine=MutationEngine.REGEX,
+            keep_invalid=True,
+            dedup=False,
+        )
+        assert stats["synthetic"] == 32
+        valid = pq.read_table(out).column("is_valid").to_pylist()[8:]
+        assert valid.count(False) == stats["invalid"] > 0
+
+    def test_plain_corpus_is_labeled(
+        self, corpus_parquet: Path, labeled_parquet: Path, tmp_path: Path
+    ) -> None:
+        """Input without stored votes is labeled first, with the same output."""
+        plain = tmp_path / "plain.parquet"
+        stored = tmp_path / "stored.parquet"
+        augment_corpus(corpus_parquet, output_path=plain)
+        augment_corpus(labeled_parquet, output_path=stored)
+        assert pq.read_table(plain).equals(pq.read_table(stored))
+
+    def test_output_can_be_augmented_again(
+        self, labeled_parquet: Path, tmp_path: Path
+    ) -> None:
+        """Augmented output carries the votes and metadata of labeled input."""
+        once = tmp_path / "once.parquet"
+        augment_corpus(labeled_parquet, output_path=once, multiplier=1, dedup=False)
+        stats = augment_corpus(once, multiplier=1)
+        assert stats["original"] == 16
+
+    def test_seeded_output_independent_of_workers(
+        self, labeled_parquet: Path, tmp_path: Path
+    ) -> None:
+        """The same seed gives the same file for any worker count."""
+        serial, parallel = tmp_path / "serial.parquet", tmp_path / "parallel.parquet"
+        augment_corpus(labeled_parquet, serial, multiplier=3, workers=1, seed=5)
+        augment_corpus(labeled_parquet, parallel, multiplier=3, workers=2, seed=5)
+        assert pq.read_table(serial).equals(pq.read_table(parallel))
+
+    def test_streams_in_row_groups(self, labeled_parquet: Path, tmp_path: Path) -> None:
+        """Small batches stream the same rows as one batch, in row groups."""
+        whole, streamed = tmp_path / "whole.parquet", tmp_path / "streamed.parquet"
+        augment_corpus(labeled_parquet, whole, multiplier=3, workers=1, dedup=False)
+        stats = augment_corpus(
+            labeled_parquet,
+            streamed,
+            multiplier=3,
+            workers=1,
+            batch_size=3,
+            dedup=False,
+        )
+        assert pq.read_table(streamed).equals(pq.read_table(whole))
+        assert pq.ParquetFile(streamed).metadata.num_row_groups == 3 + 6
+        assert stats["total"] == 26
+
+    @pytest.mark.parametrize("engine", list(MutationEngine))
+    def test_duplicates_dropped(
+        self, labeled_parquet: Path, tmp_path: Path, engine: MutationEngine
+    ) -> None:
+        """No written row repeats the normalized code of an earlier row."""
+        out = tmp_path / "augmented.parquet"
+        stats = augment_corpus(
+            labeled_parquet, out, multiplier=4, engine=engine, keep_invalid=True
+        )
+        dropped = stats["duplicates"] + stats["near_duplicates"]
+        assert dropped > 0
+        assert stats["synthetic"] + dropped == (
+            32 if engine is MutationEngine.REGEX else 19
+        )
+        codes = pq.read_table(out).column("code").to_pylist()
+        normalized = {normalize_code(code) for code in codes[8:]}
+        assert len(normalized) == stats["synthetic"]
+        assert not normalized & {normalize_code(code) for code in codes[:8]}
+
+    def test_appended_lambda_is_near_duplicate(self, tmp_path: Path) -> None:
+        """Small snippets that only differ by the same appended line collapse."""
+        corpus = tmp_path / "corpus.parquet"
+        pq.write_table(pa.table({"code": [f"x{i} = {i}" for i in range(20)]}), corpus)
+        stats = augment_corpus(corpus, multiplier=1, engine=MutationEngine.REGEX)
+        assert stats["near_duplicates"] > 0
+
+    def test_target_quotas_met(self, labeled_parquet: Path, tmp_path: Path) -> None:
+        """Mutants are written only while their class quota lasts."""
+        out = tmp_path / "augmented.parquet"
+        target = {"HIGH_RISK": 3, "LOW_RISK": 1}
+        stats = augment_corpus(labeled_parquet, out, multiplier=4, target=target)
+        assert (stats["quota_HIGH_RISK"], stats["quota_LOW_RISK"]) == (6, 0)
+        assert "quota_MEDIUM_RISK" not in stats
+        assert (stats["synthetic"], stats["shortfall"]) == (6, 0)
+        assert stats["over_quota"] > 0
+        labels = pq.read_table(out).column("label").to_pylist()
+        assert labels[8:] == ["HIGH_RISK"] * 6
+        assert label_counts(out) == {"HIGH_RISK": 9, "LOW_RISK": 3, "MEDIUM_RISK": 2}
+
+    def test_generation_stops_when_quotas_met(self, labeled_parquet: Path) -> None:
+        """Generation stops at the first batch that fills the last quota."""
+        target = {"HIGH_RISK": 1, "MEDIUM_RISK": 1, "LOW_RISK": 1}
+        full = augment_corpus(labeled_parquet, multiplier=4, batch_size=1)
+        stats = augment_corpus(
+            labeled_parquet, multiplier=4, batch_size=1, target=target
+        )
+        assert (stats["synthetic"], stats["shortfall"]) == (1, 0)
+        assert stats["inherited_votes"] < full["inherited_votes"]
+
+    def test_unreachable_quota_is_short(self, labeled_parquet: Path) -> None:
+        """Classes no mutant reaches are reported as shortfall."""
+        target = {"LOW_RISK": 3, "HIGH_RISK": 1, "MEDIUM_RISK": 1}
+        stats = augment_corpus(labeled_parquet, multiplier=4, target=target)
+        assert stats["quota_LOW_RISK"] == 6
+        assert stats["shortfall"] == stats["quota_LOW_RISK"] + 1 - stats["synthetic"]
+
+    def test_met_target_generates_nothing(self, labeled_parquet: Path) -> None:
+        """A corpus already at its target mix is not mutated."""
+        stats = augment_corpus(labeled_parquet, target={"HIGH_RISK": 1, "LOW_RISK": 1})
+        assert (stats["synthetic"], stats["inherited_votes"]) == (0, 0)
+
+    def test_budget_caps_synthetic_rows(self, labeled_parquet: Path) -> None:
+        """A budget scales every quota down."""
+        target = {"HIGH_RISK": 3, "LOW_RISK": 1}
+        stats = augment_corpus(labeled_parquet, multiplier=4, target=target, budget=2)
+        assert stats["quota_HIGH_RISK"] == stats["synthetic"] == 2
+
+    def test_zero_multiplier(self, labeled_parquet: Path) -> None:
+        """No mutants are generated with a zero multiplier."""
+        stats = augment_corpus(labeled_parquet, multiplier=0)
+        assert (stats["synthetic"], stats["inherited_votes"]) == (0, 0)
+
+    def test_negative_multiplier_rejected(self, labeled_parquet: Path) -> None:
+        """Negative multipliers raise ValueError."""
+        with pytest.raises(ValueError, match="multiplier"):
+            augment_corpus(labeled_parquet, multiplier=-1)
+
+
+class TestClassQuotas:
+    """Tests for class_quotas()."""
+
+    COUNTS: ClassVar[dict[str, int]] = {
+        "HIGH_RISK": 60,
+        "MEDIUM_RISK": 30,
+        "LOW_RISK": 10,
+    }
+
+    def test_tops_up_to_largest_class(self) -> None:
+        """The class furthest above its share sets the balanced size."""
+        quotas = class_quotas(self.COUNTS, {"HIGH_RISK": 1, "LOW_RISK": 2})
+        assert quotas == {"HIGH_RISK": 0, "LOW_RISK": 110}
+
+    def test_missing_class_counts_as_empty(self) -> None:
+        """Classes absent from the corpus get their whole share."""
+        quotas = class_quotas({"HIGH_RISK": 4}, {"HIGH_RISK": 1, "LOW_RISK": 1})
+        assert quotas == {"HIGH_RISK": 0, "LOW_RISK": 4}
+
+    def test_budget_scales_down(self) -> None:
+        """Quotas over budget shrink to sum to it; under budget they do not."""
+        target = {"HIGH_RISK": 1, "MEDIUM_RISK": 1, "LOW_RISK": 1}
+        assert class_quotas(self.COUNTS, target, budget=20) == {
+            "HIGH_RISK": 0,
+            "MEDIUM_RISK": 8,
+            "LOW_RISK": 12,
+        }
+        assert class_quotas(self.COUNTS, target, budget=1000) == {
+            "HIGH_RISK": 0,
+            "MEDIUM_RISK": 30,
+            "LOW_RISK": 50,
+        }
+
+    @given(
+        st.dictionaries(
+            st.sampled_from(["HIGH_RISK", "MEDIUM_RISK", "LOW_RISK"]),
+            st.integers(0, 500),
+        ),
+        st.dictionaries(
+            st.sampled_from(["HIGH_RISK", "MEDIUM_RISK", "LOW_RISK"]),
+            st.integers(1, 5),
+            min_size=1,
+        ),
+        st.integers(0, 200),
+    )
+    def test_budget_fully_spent(
+        self, counts: dict[str, int], target: dict[str, int], budget: int
+    ) -> None:
+        """Scaled quotas sum to the budget, each within one row of its share."""
+        needed = class_quotas(counts, target)
+        quotas = class_quotas(counts, target, budget)
+        assert sum(quotas.values()) == min(budget, sum(needed.values()))
+        if sum(needed.values()) > budget:
+            for label, quota in quotas.items():
+                share = needed[label] * budget / sum(needed.values())
+                assert abs(quota - share) < 1
+
+    @pytest.mark.parametrize(
+        ("target", "budget", "match"),
+        [
+            ({"ABSTAIN": 1}, None, "target labels"),
+            ({"low": 1}, None, "target labels"),
+            ({"LOW_RISK": -1, "HIGH_RISK": 2}, None, "non-negative"),
+            ({"LOW_RISK": 0}, None, "non-negative"),
+            ({}, None, "non-negative"),
+            ({"LOW_RISK": 1}, -1, "budget"),
+        ],
+    )
+    def test_invalid_arguments(
+        self, target: dict[str, float], budget: int | None, match: str
+    ) -> None:
+        """Unknown labels, bad shares and negative budgets are rejected."""
+        with pytest.raises(ValueError, match=match):
+            class_quotas(self.COUNTS, target, budget)
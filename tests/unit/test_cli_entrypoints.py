@@ -6,8 +6,11 @@ We test these by mocking sys.argv.
 
 from __future__ import annotations
 
+from typing import TYPE_CHECKING
 from unittest.mock import patch
 
+import pytest
+
 from reprorusted_python_cli import augment_corpus as augment_mod
 from reprorusted_python_cli import category_diff as category_mod
 from reprorusted_python_cli import check_test_lib_crates as check_mod
@@ -20,22 +23,104 @@ from reprorusted_python_cli import hitl_sampler as hitl_mod
 from reprorusted_python_cli import label_corpus as label_mod
 from reprorusted_python_cli import measure_compile_rate as compile_mod
 from reprorusted_python_cli import verify_qa_checklist as qa_mod
+from reprorusted_python_cli import weak_supervision as weak_mod
 from reprorusted_python_cli import zero_success_analyzer as zero_mod
 
+if TYPE_CHECKING:
+    from pathlib import Path
+
 
 class TestAugmentCorpusMain:
     """Tests for augment_corpus main()."""
 
-    def test_main_runs(self) -> None:
-        """Main function runs with required args."""
-        with patch("sys.argv", ["prog", "input.parquet"]):
+    def test_main_runs(
+        self, corpus_parquet: Path, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        """Main function runs with required args and reports counts."""
+        with patch("sys.argv", ["prog", str(corpus_parquet)]):
+            augment_mod.main()
+        report = capsys.readouterr().out
+        assert "Augmented 8 examples with 13 synthetic" in report
+        assert "0 duplicate and 1 near duplicate dropped" in report
+
+    def test_main_with_options(
+        self,
+        corpus_parquet: Path,
+        tmp_path: Path,
+        capsys: pytest.CaptureFixture[str],
+    ) -> None:
+        """Main function runs with all options and reports invalid mutants."""
+        out = tmp_path / "out.parquet"
+        argv = ["prog", str(corpus_parquet), "-o", str(out), "--multiplier", "3"]
+        argv += ["--workers", "1", "--seed", "3", "--engine", "regex", "--keep-invalid"]
+        argv += ["--no-dedup"]
+        with patch("sys.argv", [*argv, "--lfs", str(weak_mod.DEFAULT_REGISTRY)]):
+            augment_mod.main()
+        assert out.exists()
+        report = capsys.readouterr().out
+        assert "invalid kept, 0 duplicate" in report
+        assert "async_await:" in report
+
+    @pytest.mark.parametrize(
+        ("option", "budget"), [([], weak_mod.DEFAULT_TIME_BUDGET), (["0"], None)]
+    )
+    def test_main_time_budget(
+        self, corpus_parquet: Path, option: list[str], budget: float | None
+    ) -> None:
+        """The CLI enforces the default budget unless --time-budget is 0."""
+        argv = ["prog", str(corpus_parquet), "--multiplier", "1"]
+        argv += ["--time-budget", *option] if option else []
+        with (
+            patch("sys.argv", argv),
+            patch.object(
+                augment_mod,
+                "WeakSupervisionLabeler",
+                wraps=weak_mod.WeakSupervisionLabeler,
+            ) as labeler,
+        ):
+            augment_mod.main()
+        assert labeler.call_args.kwargs["time_budget"] == budget
+
+    def test_main_with_target(
+        self, corpus_parquet: Path, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        """Main function parses a target mix and reports the quotas."""
+        argv = ["prog", str(corpus_parquet), "--multiplier", "4", "--budget", "3"]
+        with patch("sys.argv", [*argv, "--target", "HIGH_RISK=3", "LOW_RISK=1"]):
+            augment_mod.main()
+        report = capsys.readouterr().out
+        assert "with 3 synthetic" in report
+        assert "Quotas HIGH_RISK=3, LOW_RISK=0 (" in report
+
+    def test_main_reports_output_labels(
+        self, corpus_parquet: Path, tmp_path: Path, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        """With --output, the written label mix is read back from its footer."""
+        out = tmp_path / "augmented.parquet"
+        argv = ["prog", str(corpus_parquet), "--multiplier", "0", "-o", str(out)]
+        with patch("sys.argv", argv):
             augment_mod.main()
+        expected = label_mod.label_counts(out)
+        assert expected.total() == 8
+        mix = ", ".join(f"{k}={v}" for k, v in sorted(expected.items()))
+        assert f"Labels {mix}" in capsys.readouterr().out
+
+    def test_main_rejects_budget_without_target(
+        self, corpus_parquet: Path, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        """--budget only caps a --target mix, so alone it is a usage error."""
+        with (
+            patch("sys.argv", ["prog", str(corpus_parquet), "--budget", "3"]),
+            pytest.raises(SystemExit),
+        ):
+            augment_mod.main()
+        assert "--budget requires --target" in capsys.readouterr().err
 
-    def test_main_with_options(self) -> None:
-        """Main function runs with all options."""
-        with patch(
-            "sys.argv",
-            ["prog", "input.parquet", "-o", "out.parquet", "--multiplier", "3"],
+    def test_main_rejects_malformed_target(self, corpus_parquet: Path) -> None:
+        """Targets without a share exit with a usage error."""
+        with (
+            patch("sys.argv", ["prog", str(corpus_parquet), "--target", "HIGH_RISK"]),
+            pytest.raises(SystemExit),
         ):
             augment_mod.main()
 
@@ -89,6 +174,38 @@ class TestClippyGateMain:
         with patch("sys.argv", ["prog", "-v"]):
             clippy_mod.main()
 
+    def test_main_with_options(self, tmp_path: Path) -> None:
+        """Main function passes the scheduling and target options through."""
+        argv = ["prog", "-d", str(tmp_path), "-j", "2", "--timeout", "5"]
+        argv += ["--target-dir", str(tmp_path / "target"), "--prewarm"]
+        with patch("sys.argv", argv):
+            clippy_mod.main()
+
+    def test_main_prewarm_requires_target_dir(self) -> None:
+        """Prewarming without a target directory is a usage error."""
+        with patch("sys.argv", ["prog", "--prewarm"]), pytest.raises(SystemExit):
+            clippy_mod.main()
+
+    @pytest.mark.parametrize(("soft", "code"), [(False, 1), (True, None)])
+    def test_main_violations(
+        self, capsys: pytest.CaptureFixture[str], soft: bool, code: int | None
+    ) -> None:
+        """Violations fail the gate unless it is soft."""
+        stats = {"total": 4, "violations": 1, "rate": 0.75, "files": ["a"]}
+        argv = ["prog", "--soft"] if soft else ["prog"]
+        with (
+            patch("sys.argv", argv),
+            patch.object(clippy_mod, "run_clippy_gate", return_value=stats),
+        ):
+            if code is None:
+                clippy_mod.main()
+            else:
+                with pytest.raises(SystemExit, match=str(code)):
+                    clippy_mod.main()
+        assert (
+            "1/4 examples with violations, clean rate 75.0%" in capsys.readouterr().out
+        )
+
 
 class TestCorpusQualityReportMain:
     """Tests for corpus_quality_report main()."""
@@ -181,18 +298,74 @@ class TestHitlSamplerMain:
 class TestLabelCorpusMain:
     """Tests for label_corpus main()."""
 
-    def test_main_runs(self) -> None:
+    def test_main_runs(self, corpus_parquet: Path) -> None:
         """Main function runs with required args."""
-        with patch("sys.argv", ["prog", "input.parquet"]):
+        with patch("sys.argv", ["prog", str(corpus_parquet)]):
             label_mod.main()
 
-    def test_main_with_options(self) -> None:
+    def test_main_with_options(self, corpus_parquet: Path, tmp_path: Path) -> None:
         """Main function runs with all options."""
+        out = tmp_path / "out.parquet"
         with patch(
             "sys.argv",
-            ["prog", "input.parquet", "-o", "out.parquet", "--threshold", "0.7"],
+            [
+                "prog",
+                str(corpus_parquet),
+                "-o",
+                str(out),
+                "--threshold",
+                "0.7",
+                "--workers",
+                "2",
+                "--batch-size",
+                "2",
+                "--columns",
+                "code",
+            ],
+        ):
+            label_mod.main()
+        assert out.exists()
+
+    def test_main_label_model_requires_output(
+        self, corpus_parquet: Path, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        """A fitted model's labels need somewhere to go."""
+        argv = ["prog", str(corpus_parquet), "--aggregation", "label-model"]
+        with patch("sys.argv", argv), pytest.raises(SystemExit):
+            label_mod.main()
+        assert "requires --output" in capsys.readouterr().err
+
+    def test_main_previous(
+        self, corpus_parquet: Path, tmp_path: Path, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        """Main reports rows reused from a previous output."""
+        out = tmp_path / "out.parquet"
+        argv = ["prog", str(corpus_parquet), "-o", str(out), "--previous", str(out)]
+        with patch("sys.argv", argv):
+            label_mod.main()
+            label_mod.main()
+        assert "Reused 8 unchanged rows" in capsys.readouterr().out
+
+    def test_main_reports_timeouts(
+        self, corpus_parquet: Path, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        """Main passes --time-budget through and reports budget overruns."""
+        stats = {
+            "total_labeled": 8,
+            "coverage": 1.0,
+            "conflicts": 0.0,
+            "peak_rss_mb": 1.0,
+            "timeouts": 3,
+        }
+        argv = ["prog", str(corpus_parquet), "--time-budget", "0"]
+        with (
+            patch("sys.argv", argv),
+            patch.object(label_mod, "label_corpus", return_value=stats) as run,
         ):
             label_mod.main()
+        assert run.call_args.args[-2] is None
+        assert run.call_args.args[-1] == weak_mod.DEFAULT_REGISTRY
+        assert "3 LF votes exceeded the time budget" in capsys.readouterr().out
 
 
 class TestMeasureCompileRateMain:
@@ -213,6 +386,38 @@ class TestMeasureCompileRateMain:
         with patch("sys.argv", ["prog", "-d", "/tmp/examples"]):
             compile_mod.main()
 
+    def test_main_with_options(
+        self, tmp_path: Path, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        """Main function streams results to a file and reports the rate."""
+        out = tmp_path / "results.jsonl"
+        argv = ["prog", "-d", str(tmp_path), "-j", "2", "--timeout", "5"]
+        argv += ["-o", str(out), "--cache", str(tmp_path / "cache.sqlite")]
+        with patch("sys.argv", [*argv, "--cache-size", "1"]):
+            compile_mod.main()
+        assert out.read_text() == ""
+        assert "Compiled 0 examples: 0 passed" in capsys.readouterr().out
+
+    def test_main_prewarm_requires_target_dir(self) -> None:
+        """Prewarming without a target directory is a usage error."""
+        with patch("sys.argv", ["prog", "--prewarm"]), pytest.raises(SystemExit):
+            compile_mod.main()
+
+    def test_main_reports_categories(self, capsys: pytest.CaptureFixture[str]) -> None:
+        """Main function prints each category's rate."""
+        stats: dict[str, int | float] = {"total": 4, "passed": 3, "failed": 1}
+        stats |= {"timed_out": 1, "cached": 2, "prewarmed": 3, "rate": 0.75}
+        stats |= {"rate_cli": 0.5, "rate_uncategorized": 1.0}
+        with (
+            patch("sys.argv", ["prog"]),
+            patch.object(compile_mod, "measure_compile_rate", return_value=stats),
+        ):
+            compile_mod.main()
+        report = capsys.readouterr().out
+        assert "3 passed, 1 failed (1 timed out, 2 cached), rate 75.0%" in report
+        assert "  cli: 50.0%" in report
+        assert "  prewarmed 3 shared dependency sets" in report
+
 
 class TestVerifyQaChecklistMain:
     """Tests for verify_qa_checklist main()."""
@@ -233,6 +438,73 @@ class TestVerifyQaChecklistMain:
             qa_mod.main()
 
 
+class TestWeakSupervisionMain:
+    """Tests for weak_supervision main()."""
+
+    def test_main_runs(
+        self, corpus_parquet: Path, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        """Main labels the corpus and prints a summary without a profile."""
+        with patch("sys.argv", ["prog", str(corpus_parquet)]):
+            weak_mod.main()
+        out = capsys.readouterr().out
+        assert "Labeled 8 examples" in out
+        assert "labeling function" not in out
+
+    @pytest.mark.parametrize(
+        ("option", "budget"), [([], weak_mod.DEFAULT_TIME_BUDGET), (["0"], None)]
+    )
+    def test_main_time_budget(
+        self, corpus_parquet: Path, option: list[str], budget: float | None
+    ) -> None:
+        """The CLI enforces the default budget unless --time-budget is 0."""
+        argv = ["prog", str(corpus_parquet)]
+        argv += ["--time-budget", *option] if option else []
+        with (
+            patch("sys.argv", argv),
+            patch.object(
+                weak_mod,
+                "WeakSupervisionLabeler",
+                wraps=weak_mod.WeakSupervisionLabeler,
+            ) as labeler,
+        ):
+            weak_mod.main()
+        assert labeler.call_args.kwargs["time_budget"] == budget
+
+    def test_main_stats(
+        self, corpus_parquet: Path, tmp_path: Path, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        """--stats prints the per-LF profile and -o writes labels."""
+        import pyarrow.parquet as pq
+
+        out = tmp_path / "out.parquet"
+        argv = ["prog", str(corpus_parquet), "--stats", "-o", str(out)]
+        with patch("sys.argv", argv):
+            weak_mod.main()
+        report = capsys.readouterr().out
+        assert "labeling function" in report
+        assert "generator_pattern" in report
+        assert pq.read_table(out).column_names == [
+            "example_id",
+            "code",
+            "label",
+            "confidence",
+        ]
+
+    def test_main_lfs(
+        self, corpus_parquet: Path, tmp_path: Path, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        """--lfs labels with the LFs of a YAML registry."""
+        registry = tmp_path / "lfs.yaml"
+        registry.write_text(
+            "labeling_functions:\n"
+            "  - {name: prints, weight: 0.3, pattern: print, label: LOW_RISK}\n"
+        )
+        with patch("sys.argv", ["prog", str(corpus_parquet), "--lfs", str(registry)]):
+            weak_mod.main()
+        assert "Labeler initialized with 1 LFs" in capsys.readouterr().out
+
+
 class TestZeroSuccessMain:
     """Tests for zero_success_analyzer main()."""
 
@@ -0,0 +1,121 @@
+"""Tests for clippy_gate module."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import pytest
+
+from reprorusted_python_cli.clippy_gate import run_clippy_gate
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from pathlib import Path
+
+
+class TestRunClippyGate:
+    """Tests for run_clippy_gate()."""
+
+    @pytest.fixture
+    def examples(self, tmp_path: Path, make_crate: Callable[..., Path]) -> Path:
+        """Write a clean, a warning and a denied example."""
+        root = tmp_path / "examples"
+        make_crate(root, "clean")
+        make_crate(root, "cli/warned", "warn")
+        make_crate(root, "denied", "deny")
+        return root
+
+    @staticmethod
+    def _gate(
+        examples: Path,
+        command: list[str],
+        strict: bool = False,
+        verbose: bool = False,
+        target_dir: Path | None = None,
+        prewarm_deps: bool = False,
+    ) -> dict[str, int | float | list[str]]:
+        """Run the gate with the fake clippy, two runs at a time."""
+        return run_clippy_gate(
+            strict,
+            verbose,
+            examples,
+            jobs=2,
+            target_dir=target_dir,
+            prewarm_deps=prewarm_deps,
+            command=command,
+        )
+
+    def test_default_fails_errors_only(
+        self, examples: Path, fake_cargo: list[str]
+    ) -> None:
+        """Without strict, only examples clippy rejects violate the gate."""
+        stats = self._gate(examples, fake_cargo)
+        assert stats == {
+            "total": 3,
+            "violations": 1,
+            "rate": pytest.approx(2 / 3),
+            "prewarmed": 0,
+            "files": ["denied"],
+        }
+
+    def test_strict_fails_warnings(
+        self,
+        examples: Path,
+        fake_cargo: list[str],
+        capsys: pytest.CaptureFixture[str],
+    ) -> None:
+        """Strict mode denies warnings too."""
+        stats = self._gate(examples, fake_cargo, strict=True, verbose=True)
+        assert stats["files"] == ["cli/warned", "denied"]
+        report = capsys.readouterr().out
+        assert "CLEAN   clean" in report
+        assert "LINT    cli/warned" in report
+
+    def test_shared_prewarmed_target(
+        self, tmp_path: Path, make_crate: Callable[..., Path], fake_cargo: list[str]
+    ) -> None:
+        """Shared dependencies are checked once into per-slot target dirs."""
+        root = tmp_path / "examples"
+        for name in ("a", "b"):
+            make_crate(root, name, dependencies='regex = "1"')
+        target = tmp_path / "target"
+        stats = self._gate(root, fake_cargo, target_dir=target, prewarm_deps=True)
+        assert (stats["violations"], stats["prewarmed"]) == (0, 1)
+        targets = {log.read_text() for log in (tmp_path / "log").glob("*.target")}
+        assert targets <= {str((target / f"slot-{i}").resolve()) for i in range(2)}
+
+    def test_no_examples(self, tmp_path: Path) -> None:
+        """An empty tree passes the gate."""
+        stats = run_clippy_gate(examples_dir=tmp_path)
+        assert stats == {
+            "total": 0,
+            "violations": 0,
+            "rate": 1.0,
+            "prewarmed": 0,
+            "files": [],
+        }
+
+    @pytest.mark.parametrize(
+        ("jobs", "timeout", "prewarm_deps", "match"),
+        [
+            (0, 1.0, False, "jobs"),
+            (None, 0.0, False, "timeout"),
+            (None, 1.0, True, "target_dir"),
+        ],
+    )
+    def test_invalid_arguments(
+        self,
+        tmp_path: Path,
+        jobs: int | None,
+        timeout: float,
+        prewarm_deps: bool,
+        match: str,
+    ) -> None:
+        """Bad jobs, timeouts and prewarming without a target are rejected."""
+        with pytest.raises(ValueError, match=match):
+            run_clippy_gate(
+                examples_dir=tmp_path,
+                jobs=jobs,
+                timeout=timeout,
+                prewarm_deps=prewarm_deps,
+            )
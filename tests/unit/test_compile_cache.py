@@ -0,0 +1,182 @@
+"""Tests for compile_cache module."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import pytest
+
+from reprorusted_python_cli import compile_cache as cache_mod
+from reprorusted_python_cli.compile_cache import (
+    SELECT_CHUNK,
+    CompileCache,
+    toolchain_fingerprint,
+)
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+TOOLCHAIN = b"rustc 1.80.0"
+
+
+@pytest.fixture
+def crate(tmp_path: Path) -> Path:
+    """Write a crate with a manifest, lock file and two modules."""
+    root = tmp_path / "crate"
+    (root / "src").mkdir(parents=True)
+    (root / "Cargo.toml").write_text('[package]\nname = "crate"\n')
+    (root / "Cargo.lock").write_text("version = 3\n")
+    (root / "src" / "main.rs").write_text("mod util;\nfn main() {}\n")
+    (root / "src" / "util.rs").write_text("pub fn f() {}\n")
+    return root
+
+
+class TestToolchainFingerprint:
+    """Tests for toolchain_fingerprint()."""
+
+    def test_environment_sensitive(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Target and flag environment variables change the fingerprint."""
+        before = toolchain_fingerprint(["cargo", "build"])
+        monkeypatch.setenv("CARGO_BUILD_TARGET", "wasm32-unknown-unknown")
+        assert toolchain_fingerprint(["cargo", "build"]) != before
+
+    def test_without_rustc(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """A missing rustc still gives a command-specific fingerprint."""
+        monkeypatch.setattr(cache_mod.shutil, "which", lambda _: None)
+        assert toolchain_fingerprint(["a"]) != toolchain_fingerprint(["b"])
+
+
+class TestCompileCacheKey:
+    """Tests for CompileCache.key()."""
+
+    def test_deterministic(self, crate: Path) -> None:
+        """Unchanged sources give the same key."""
+        assert CompileCache.key(crate, TOOLCHAIN) == CompileCache.key(crate, TOOLCHAIN)
+
+    @pytest.mark.parametrize(
+        "path", ["Cargo.toml", "Cargo.lock", "src/util.rs", "src/new.rs"]
+    )
+    def test_source_sensitive(self, crate: Path, path: str) -> None:
+        """Editing or adding a manifest, lock file or module changes the key."""
+        before = CompileCache.key(crate, TOOLCHAIN)
+        with (crate / path).open("a") as source:
+            source.write("// edit\n")
+        assert CompileCache.key(crate, TOOLCHAIN) != before
+
+    def test_renamed_module_changes_key(self, crate: Path) -> None:
+        """Paths are hashed with contents."""
+        before = CompileCache.key(crate, TOOLCHAIN)
+        (crate / "src" / "util.rs").rename(crate / "src" / "helpers.rs")
+        assert CompileCache.key(crate, TOOLCHAIN) != before
+
+    def test_build_output_and_other_files_ignored(self, crate: Path) -> None:
+        """Files under target and non-Rust files do not change the key."""
+        before = CompileCache.key(crate, TOOLCHAIN)
+        (crate / "target" / "debug").mkdir(parents=True)
+        (crate / "target" / "debug" / "out.rs").write_text("generated")
+        (crate / "example.py").write_text("print(1)")
+        assert CompileCache.key(crate, TOOLCHAIN) == before
+
+    def test_toolchain_sensitive(self, crate: Path) -> None:
+        """The same sources under another toolchain get another key."""
+        assert CompileCache.key(crate, TOOLCHAIN) != CompileCache.key(crate, b"other")
+
+    def test_path_dependency_sources_hashed(self, crate: Path) -> None:
+        """Editing a path dependency, or one it depends on, changes the key."""
+        for name, manifest in (
+            ("shared", '[dependencies]\nbase = { path = "../base" }\n'),
+            ("base", '[dependencies]\nshared = { path = "../shared" }\n'),
+        ):
+            (crate.parent / name / "src").mkdir(parents=True)
+            (crate.parent / name / "Cargo.toml").write_text(manifest)
+            (crate.parent / name / "src" / "lib.rs").write_text("pub fn g() {}\n")
+        with (crate / "Cargo.toml").open("a") as manifest:
+            manifest.write("\n[target.x86_64-unknown-linux-gnu.dependencies]\n")
+            manifest.write('shared = { path = "../shared" }\n')
+        before = CompileCache.key(crate, TOOLCHAIN)
+        assert CompileCache.key(crate, TOOLCHAIN) == before
+        (crate.parent / "base" / "src" / "lib.rs").write_text("pub fn h() {}\n")
+        assert CompileCache.key(crate, TOOLCHAIN) != before
+
+    def test_unlocked_registry_dependencies_not_keyed(self, crate: Path) -> None:
+        """Without a lock file, registry or git dependencies may float."""
+        with (crate / "Cargo.toml").open("a") as manifest:
+            manifest.write('\n[dev-dependencies]\nregex = "1"\n')
+        assert CompileCache.key(crate, TOOLCHAIN) is not None
+        (crate / "Cargo.lock").unlink()
+        assert CompileCache.key(crate, TOOLCHAIN) is None
+
+    def test_unreadable_manifest_keyed(self, crate: Path) -> None:
+        """A manifest that does not parse is hashed like any other source."""
+        (crate / "Cargo.lock").unlink()
+        (crate / "Cargo.toml").write_text("[package\n")
+        assert CompileCache.key(crate, TOOLCHAIN) is not None
+
+
+class TestCompileCache:
+    """Tests for CompileCache storage and eviction."""
+
+    def test_invalid_size(self, tmp_path: Path) -> None:
+        """A non-positive budget is rejected."""
+        with pytest.raises(ValueError, match="max_bytes"):
+            CompileCache(tmp_path / "cache.sqlite", max_bytes=0)
+
+    def test_survives_reopen(self, tmp_path: Path) -> None:
+        """Results written before close are found by a new cache."""
+        path = tmp_path / "cache.sqlite"
+        with CompileCache(path) as cache:
+            cache.put_many([(b"a", b"1"), (b"b", b"2")])
+        with CompileCache(path) as cache:
+            assert cache.get_many([b"a", b"b", b"c"]) == [b"1", b"2", None]
+            assert (cache.hits, cache.misses) == (2, 1)
+            assert len(cache) == 2
+
+    def test_lookups_batched(self, tmp_path: Path) -> None:
+        """More keys than one query holds are fetched in chunks, duplicates too."""
+        keys = [i.to_bytes(4, "big") for i in range(SELECT_CHUNK * 2 + 1)]
+        with CompileCache(tmp_path / "cache.sqlite") as cache:
+            cache.put_many((key, key) for key in keys[::2])
+            found = cache.get_many([*keys, keys[0]])
+            assert found == [
+                key if i % 2 == 0 else None for i, key in enumerate(keys)
+            ] + [keys[0]]
+            assert (cache.hits, cache.misses) == (SELECT_CHUNK + 2, SELECT_CHUNK)
+
+    def test_replace(self, tmp_path: Path) -> None:
+        """Storing a key again replaces its result."""
+        with CompileCache(tmp_path / "cache.sqlite") as cache:
+            cache.put(b"a", b"1")
+            cache.put(b"a", b"22")
+            assert cache.get(b"a") == b"22"
+            assert cache.nbytes == 3
+
+    def test_evicts_least_recently_used(self, tmp_path: Path) -> None:
+        """Beyond the budget, results not used longest are evicted first."""
+        with CompileCache(tmp_path / "cache.sqlite", max_bytes=30) as cache:
+            cache.put_many([(b"a" * 8, b"1"), (b"b" * 8, b"2"), (b"c" * 8, b"3")])
+            assert cache.get(b"a" * 8) == b"1"
+            cache.put(b"d" * 8, b"4")
+            assert cache.get_many([b"a" * 8, b"b" * 8, b"c" * 8, b"d" * 8]) == [
+                b"1",
+                None,
+                b"3",
+                b"4",
+            ]
+            assert cache.nbytes <= 30
+
+    def test_use_order_survives_reopen(self, tmp_path: Path) -> None:
+        """Recency carries over to the next run's evictions."""
+        path = tmp_path / "cache.sqlite"
+        with CompileCache(path, max_bytes=20) as cache:
+            cache.put_many([(b"a" * 9, b"1"), (b"b" * 9, b"2")])
+            cache.get(b"a" * 9)
+        with CompileCache(path, max_bytes=20) as cache:
+            cache.put(b"c" * 9, b"3")
+            assert cache.get_many([b"a" * 9, b"b" * 9]) == [b"1", None]
+
+    def test_evict_within_budget(self, tmp_path: Path) -> None:
+        """Nothing is evicted while the cache fits its budget."""
+        with CompileCache(tmp_path / "cache.sqlite") as cache:
+            cache.put(b"a", b"1")
+            assert cache.evict() == 0
+            assert len(cache) == 1
@@ -0,0 +1,191 @@
+"""Tests for dedup module."""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from reprorusted_python_cli.dedup import (
+    BloomFilter,
+    DuplicateFilter,
+    minhash,
+    normalize_code,
+)
+
+CODE = "def total(items):\n    return sum(item.price for item in items)\n"
+
+
+def _jaccard(a: str, b: str, size: int = 5) -> float:
+    """Return the exact Jaccard similarity of normalized character shingles."""
+    a, b = normalize_code(a), normalize_code(b)
+    left = {a[i : i + size] for i in range(len(a) - size + 1)}
+    right = {b[i : i + size] for i in range(len(b) - size + 1)}
+    return len(left & right) / len(left | right)
+
+
+class TestNormalizeCode:
+    """Tests for normalize_code()."""
+
+    def test_insignificant_whitespace_dropped(self) -> None:
+        """Indent width, blank lines, line endings and comments do not matter."""
+        assert normalize_code("if x:\r\n\n\t  y = 1  # one\n") == normalize_code(
+            "if x:\n    y  =  1"
+        )
+
+    def test_block_structure_kept(self) -> None:
+        """Statements at different depths stay distinct."""
+        inner = "if x:\n        g()\n        h()"
+        outer = "if x:\n        g()\n    h()"
+        assert normalize_code("def f():\n    " + inner) != normalize_code(
+            "def f():\n    " + outer
+        )
+
+    def test_string_whitespace_kept(self) -> None:
+        """Whitespace and hashes inside strings are part of the code."""
+        assert normalize_code("s = 'a  b'") != normalize_code("s = 'a b'")
+        assert normalize_code('s = """a\n  # b"""') != normalize_code('s = """a"""')
+
+    @pytest.mark.parametrize(
+        ("code", "normalized"),
+        [
+            ("(1,\n  2  ", "(1,\n  2"),
+            ("if x:\n    a\n\n  b\n", "if x:\n    a\n  b"),
+        ],
+    )
+    def test_untokenizable_keeps_indentation(self, code: str, normalized: str) -> None:
+        """Code that does not tokenize only loses trailing and blank lines."""
+        assert normalize_code(code) == normalized
+
+
+class TestMinhash:
+    """Tests for minhash()."""
+
+    def test_deterministic(self) -> None:
+        """Signatures are equal across calls, so filtering is reproducible."""
+        assert minhash(CODE).tolist() == minhash(CODE).tolist()
+        assert minhash(CODE).dtype == np.uint64
+
+    @pytest.mark.parametrize("cut", [0.1, 0.3, 0.6])
+    def test_estimates_jaccard(self, cut: float) -> None:
+        """Signature agreement tracks the shingle Jaccard similarity."""
+        code = CODE * 8
+        edited = code[: int(len(code) * cut)] + "pass"
+        estimate = float((minhash(code, 256) == minhash(edited, 256)).mean())
+        assert estimate == pytest.approx(_jaccard(code, edited), abs=0.1)
+
+    @pytest.mark.parametrize("code", ["", "x", "\ud800"])
+    def test_short_code(self, code: str) -> None:
+        """Code shorter than a shingle still has a full signature."""
+        assert len(minhash(code, 16)) == 16
+
+    def test_single_bin(self) -> None:
+        """A one-entry signature is the minimum shingle hash."""
+        assert len(minhash(CODE, 1)) == 1
+
+    def test_invalid_arguments(self) -> None:
+        """Non-positive sizes are rejected."""
+        with pytest.raises(ValueError, match="positive"):
+            minhash(CODE, num_perm=0)
+
+
+class TestBloomFilter:
+    """Tests for BloomFilter."""
+
+    def test_no_false_negatives(self) -> None:
+        """Every added key is found."""
+        bloom = BloomFilter(capacity=1000)
+        keys = np.random.default_rng(0).integers(0, 2**63, (1000, 2), np.uint64)
+        bloom.add(keys)
+        assert bloom.contains(keys).all()
+
+    def test_false_positive_rate(self) -> None:
+        """At capacity, unseen keys are found at about the error rate."""
+        bloom = BloomFilter(capacity=10_000, error_rate=0.01)
+        rng = np.random.default_rng(0)
+        bloom.add(rng.integers(0, 2**63, (10_000, 2), np.uint64))
+        unseen = rng.integers(0, 2**63, (100_000, 2), np.uint64)
+        assert bloom.contains(unseen).mean() < 0.02
+
+    def test_size_is_fixed(self) -> None:
+        """Memory depends on capacity and error rate only."""
+        bloom = BloomFilter(capacity=1_000_000, error_rate=1e-3)
+        assert bloom.nbytes == pytest.approx(1_000_000 * 1.8, rel=0.01)
+        assert bloom.num_hashes == 10
+
+    @pytest.mark.parametrize(
+        ("capacity", "error_rate", "match"),
+        [(0, 0.1, "capacity"), (10, 0.0, "error_rate"), (10, 1.0, "error_rate")],
+    )
+    def test_invalid_arguments(
+        self, capacity: int, error_rate: float, match: str
+    ) -> None:
+        """Out-of-range sizes are rejected."""
+        with pytest.raises(ValueError, match=match):
+            BloomFilter(capacity, error_rate)
+
+
+class TestDuplicateFilter:
+    """Tests for DuplicateFilter."""
+
+    def test_exact_duplicate(self) -> None:
+        """Code equal up to whitespace is an exact duplicate."""
+        dedup = DuplicateFilter(capacity=10)
+        assert dedup.add(CODE) is None
+        assert dedup.add(CODE.replace("    ", "\t")) == "exact"
+        assert dedup.exact_duplicates == 1
+
+    def test_near_duplicate(self) -> None:
+        """Code differing in a few characters is a near duplicate."""
+        dedup = DuplicateFilter(capacity=10)
+        dedup.add(CODE * 4)
+        assert dedup.add(CODE * 4 + "x = 1") == "near"
+        assert dedup.near_duplicates == 1
+
+    def test_distinct_code_kept(self) -> None:
+        """Unrelated snippets are kept after many templated ones."""
+        dedup = DuplicateFilter(capacity=100)
+        codes = [f"def f{i}(a{i}):\n    return a{i} * {i * 7919}\n" for i in range(50)]
+        codes += [CODE, "import os\nprint(os.getcwd())\n"]
+        assert [dedup.add(code) for code in codes][50:] == [None, None]
+
+    def test_namespaces_separate_near_duplicates(self) -> None:
+        """Near duplicates are only sought within a namespace."""
+        dedup = DuplicateFilter(capacity=10)
+        dedup.add(CODE * 4, namespace="lambda")
+        assert dedup.add(CODE * 4 + "x = 1", namespace="generator") is None
+        assert dedup.add(CODE * 4 + "x = 2", namespace="lambda") == "near"
+
+    def test_exact_only_snippets(self) -> None:
+        """Snippets added without near lookup only match exactly."""
+        dedup = DuplicateFilter(capacity=10)
+        dedup.add(CODE * 4, near=False)
+        assert dedup.add(CODE * 4 + "x = 1") is None
+        assert dedup.add(CODE * 4, near=False) == "exact"
+
+    def test_memory_is_bounded(self) -> None:
+        """Ten million candidates need a fixed ~21 bytes each."""
+        dedup = DuplicateFilter(capacity=10_000_000)
+        assert dedup.nbytes < 10_000_000 * 21
+
+    def test_false_drop_rate(self) -> None:
+        """At capacity, unique snippets are dropped at about the error rate."""
+        rng = np.random.default_rng(0)
+        letters = np.array(list("abcdefghijklmnopqrstuvwxyz_=+() "))
+        codes = ["".join(rng.choice(letters, 80)) for _ in range(2500)]
+        dedup = DuplicateFilter(capacity=2500, error_rate=0.01)
+        for code in codes[:2000]:
+            dedup.add(code)
+        # Exact and near lookups may each drop a snippet at the error rate.
+        dropped = sum(dedup.add(code) is not None for code in codes[2000:])
+        assert dropped < 500 * 0.01 * 2
+
+    def test_threshold(self) -> None:
+        """The half-detection similarity follows the band shape."""
+        assert DuplicateFilter(10).threshold == pytest.approx(0.7711, abs=1e-4)
+        narrow = DuplicateFilter(10, num_perm=16, bands=16)
+        assert narrow.threshold == pytest.approx(1 / 16)
+
+    def test_bands_must_divide_signature(self) -> None:
+        """Uneven bands are rejected."""
+        with pytest.raises(ValueError, match="bands"):
+            DuplicateFilter(capacity=10, num_perm=64, bands=6)
@@ -0,0 +1,130 @@
+"""Tests for label_cache module."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import pyarrow as pa
+import pytest
+
+from reprorusted_python_cli.label_cache import SELECT_CHUNK, LabelCache
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+class TestLabelCacheKey:
+    """Tests for LabelCache.key()."""
+
+    def test_deterministic(self) -> None:
+        """The same code and fingerprint give the same key."""
+        assert LabelCache.key("x = 1", b"v1") == LabelCache.key("x = 1", b"v1")
+
+    def test_code_sensitive(self) -> None:
+        """Different code gives a different key."""
+        assert LabelCache.key("x = 1", b"v1") != LabelCache.key("x = 2", b"v1")
+
+    def test_surrogates(self) -> None:
+        """Lone surrogates from corrupt sources can still be hashed."""
+        assert len(LabelCache.key("\ud800", b"v1")) == 16
+
+
+class TestLabelCacheKeys:
+    """Tests for LabelCache.keys()."""
+
+    @pytest.mark.parametrize("string_type", [pa.string(), pa.large_string()])
+    def test_matches_key(self, string_type: pa.DataType) -> None:
+        """Column keys equal per-string keys, nulls hashed as empty code."""
+        codes = ["x = 1", None, "", "déf f(): pass"]
+        column = pa.chunked_array([codes[:1], codes[1:]], string_type)
+        assert LabelCache.keys(column, b"v1") == [
+            LabelCache.key(code or "", b"v1") for code in codes
+        ]
+
+    def test_sliced_array(self) -> None:
+        """Slices are hashed from their own offsets."""
+        codes = pa.array(["a", "bb", "ccc", "dddd"])
+        assert LabelCache.keys(codes.slice(1, 2), b"v1") == [
+            LabelCache.key("bb", b"v1"),
+            LabelCache.key("ccc", b"v1"),
+        ]
+
+    def test_all_empty(self) -> None:
+        """A column without string data hashes every row as empty code."""
+        assert LabelCache.keys(pa.array(["", ""]), b"") == [LabelCache.key("", b"")] * 2
+
+
+class TestLabelCacheMemory:
+    """Tests for the in-memory LRU tier."""
+
+    def test_invalid_size(self) -> None:
+        """A non-positive size is rejected."""
+        with pytest.raises(ValueError, match="max_entries"):
+            LabelCache(max_entries=0)
+
+    def test_lru_eviction(self) -> None:
+        """The least recently used entry is evicted first."""
+        cache = LabelCache(max_entries=2)
+        cache.put(b"a", b"1")
+        cache.put(b"b", b"2")
+        assert cache.get(b"a") == b"1"
+        cache.put(b"c", b"3")
+        assert cache.get(b"b") is None
+        assert cache.get(b"a") == b"1"
+        assert cache.get(b"c") == b"3"
+        assert len(cache) == 2
+
+    def test_counters(self) -> None:
+        """A key repeated within one lookup misses only once."""
+        cache = LabelCache()
+        cache.put(b"a", b"1")
+        assert cache.get_many([b"a", b"b", b"a", b"b"]) == [b"1", None, b"1", None]
+        assert (cache.hits, cache.misses) == (3, 1)
+
+    def test_close_without_disk(self) -> None:
+        """Flushing and closing a memory-only cache are no-ops."""
+        with LabelCache() as cache:
+            cache.put(b"a", b"1")
+            cache.flush()
+        assert cache.get(b"a") == b"1"
+
+
+class TestLabelCacheDisk:
+    """Tests for the persistent SQLite tier."""
+
+    def test_survives_reopen(self, tmp_path: Path) -> None:
+        """Entries written before close are found by a new cache."""
+        path = tmp_path / "cache.sqlite"
+        with LabelCache(path=path) as cache:
+            cache.put_many([(b"a", b"1"), (b"b", b"2")])
+        with LabelCache(path=path) as cache:
+            assert cache.get_many([b"a", b"b", b"c"]) == [b"1", b"2", None]
+            assert (cache.hits, cache.misses) == (2, 1)
+
+    def test_disk_hit_promoted(self, tmp_path: Path) -> None:
+        """Disk hits are promoted into the memory tier."""
+        path = tmp_path / "cache.sqlite"
+        with LabelCache(path=path) as cache:
+            cache.put(b"a", b"1")
+        reopened = LabelCache(path=path)
+        assert len(reopened) == 0
+        assert reopened.get(b"a") == b"1"
+        assert len(reopened) == 1
+        reopened.close()
+
+    def test_lookups_batched(self, tmp_path: Path) -> None:
+        """More keys than one query holds are fetched in chunks."""
+        path = tmp_path / "cache.sqlite"
+        keys = [i.to_bytes(4, "big") for i in range(SELECT_CHUNK * 2 + 1)]
+        with LabelCache(path=path) as cache:
+            cache.put_many((key, key) for key in keys[::2])
+        with LabelCache(path=path) as cache:
+            found = cache.get_many(keys)
+        assert found == [key if i % 2 == 0 else None for i, key in enumerate(keys)]
+
+    def test_evicted_entry_served_from_disk(self, tmp_path: Path) -> None:
+        """Entries evicted from memory are still found on disk."""
+        with LabelCache(max_entries=1, path=tmp_path / "c.sqlite") as cache:
+            cache.put(b"a", b"1")
+            cache.put(b"b", b"2")
+            assert cache.get(b"a") == b"1"
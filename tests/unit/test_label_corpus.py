@@ -0,0 +1,563 @@
+"""Tests for label_corpus module."""
+
+from __future__ import annotations
+
+from collections import Counter
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import TYPE_CHECKING, Any
+from unittest.mock import MagicMock
+
+import numpy as np
+import psutil
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from reprorusted_python_cli import label_corpus as label_corpus_module
+from reprorusted_python_cli.label_corpus import (
+    AGGREGATIONS,
+    LABEL_COUNTS_KEY,
+    LF_METADATA_KEY,
+    _rss_bytes,
+    content_hashes,
+    count_labels,
+    default_workers,
+    label_corpus,
+    label_counts,
+    load_previous,
+)
+from reprorusted_python_cli.label_model import LabelModel
+from reprorusted_python_cli.weak_supervision import (
+    DEFAULT_REGISTRY,
+    TARANTULA_WEIGHTS,
+    CompiledLFEngine,
+    Label,
+    WeakSupervisionLabeler,
+)
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+# Columns label_corpus appends after the pass-through columns.
+LABEL_COLUMNS = ["label", "confidence", "content_hash", "lf_votes"]
+
+
+def _without_rss(stats: dict[str, int | float]) -> dict[str, int | float]:
+    """Drop the run-dependent peak RSS from labeling stats."""
+    return {key: value for key, value in stats.items() if key != "peak_rss_mb"}
+
+
+class TestLabelCorpus:
+    """Tests for label_corpus()."""
+
+    def test_returns_stats(self, corpus_parquet: Path) -> None:
+        """Returns labeling statistics for every row."""
+        stats = label_corpus(corpus_parquet)
+        assert stats["total_labeled"] == 8
+        assert 0.0 < stats["coverage"] < 1.0
+        assert stats["peak_rss_mb"] > 0
+
+    def test_no_output_written_without_path(self, corpus_parquet: Path) -> None:
+        """Nothing is written when output_path is omitted."""
+        label_corpus(corpus_parquet)
+        assert sorted(p.name for p in corpus_parquet.parent.iterdir()) == [
+            "corpus.parquet"
+        ]
+
+    def test_writes_labels(self, corpus_parquet: Path, tmp_path: Path) -> None:
+        """Output keeps input columns and adds label and confidence."""
+        out = tmp_path / "labeled.parquet"
+        label_corpus(corpus_parquet, output_path=out, threshold=0.7)
+        table = pq.read_table(out)
+        assert table.column_names == ["example_id", "code", *LABEL_COLUMNS]
+        assert table.column("label").to_pylist()[:4] == [
+            "LOW_RISK",
+            "HIGH_RISK",
+            "HIGH_RISK",
+            "MEDIUM_RISK",
+        ]
+
+    def test_matches_python_labeler(self, corpus_parquet: Path, tmp_path: Path) -> None:
+        """Arrow-native labels equal per-example Python labels."""
+        out = tmp_path / "labeled.parquet"
+        label_corpus(corpus_parquet, output_path=out)
+        table = pq.read_table(out).to_pydict()
+        labeler = WeakSupervisionLabeler()
+        for code, label, confidence in zip(
+            table["code"], table["label"], table["confidence"], strict=True
+        ):
+            expected = labeler.label(code)
+            assert label == expected.label.name
+            assert confidence == expected.confidence
+
+    def test_cache_reused_across_runs(
+        self, corpus_parquet: Path, tmp_path: Path
+    ) -> None:
+        """A second run with the same cache evaluates no LFs."""
+        cache = tmp_path / "votes.sqlite"
+        first = label_corpus(corpus_parquet, tmp_path / "a.parquet", cache_path=cache)
+        second = label_corpus(corpus_parquet, tmp_path / "b.parquet", cache_path=cache)
+        assert first["cache_misses"] == 8
+        assert (second["cache_hits"], second["cache_misses"]) == (8, 0)
+
+        assert pq.read_table(tmp_path / "a.parquet").equals(
+            pq.read_table(tmp_path / "b.parquet")
+        )
+
+
+class TestParallelLabelCorpus:
+    """Tests for process-pool labeling."""
+
+    def test_default_workers(self) -> None:
+        """The default worker count is at least one."""
+        assert default_workers() >= 1
+
+    def test_output_independent_of_workers(
+        self, corpus_parquet: Path, tmp_path: Path
+    ) -> None:
+        """Output rows and stats are identical for any worker count."""
+        serial = label_corpus(corpus_parquet, tmp_path / "serial.parquet", workers=1)
+        parallel = label_corpus(
+            corpus_parquet, tmp_path / "parallel.parquet", workers=3
+        )
+        assert _without_rss(serial) == _without_rss(parallel)
+        assert pq.read_table(tmp_path / "serial.parquet").equals(
+            pq.read_table(tmp_path / "parallel.parquet")
+        )
+
+    def test_merged_stats_are_corpus_wide(self, corpus_parquet: Path) -> None:
+        """Merged worker stats equal labeling the whole corpus at once."""
+        codes = pq.read_table(corpus_parquet).column("code")
+        whole = WeakSupervisionLabeler()
+        whole.label_batch(codes)
+        stats = label_corpus(corpus_parquet, workers=2, batch_size=3)
+        assert _without_rss(stats) == whole.get_stats()
+
+    def test_shared_cache_across_workers(
+        self, corpus_parquet: Path, tmp_path: Path
+    ) -> None:
+        """Workers share one SQLite cache file."""
+        cache = tmp_path / "votes.sqlite"
+        first = label_corpus(corpus_parquet, cache_path=cache, workers=2)
+        second = label_corpus(corpus_parquet, cache_path=cache, workers=2)
+        assert first["cache_misses"] == 8
+        assert (second["cache_hits"], second["cache_misses"]) == (8, 0)
+
+    def test_workers_label_with_registry(
+        self, corpus_parquet: Path, tmp_path: Path
+    ) -> None:
+        """Workers label with the registry's compiled engine, not the defaults."""
+        registry = _extended_registry(tmp_path)
+        out = tmp_path / "labeled.parquet"
+        label_corpus(corpus_parquet, out, workers=2, registry_path=registry)
+        votes = pq.read_table(out).column("lf_votes")
+        assert votes.type.list_size == len(TARANTULA_WEIGHTS) + 1
+        expected = WeakSupervisionLabeler(registry=registry).label_batch(
+            pq.read_table(corpus_parquet).column("code")
+        )
+        stored = np.asarray(votes.combine_chunks().flatten(), dtype=np.int8)
+        assert stored.reshape(expected.votes.shape).tolist() == expected.votes.tolist()
+
+
+class TestStreamingLabelCorpus:
+    """Tests for streaming, bounded-memory labeling."""
+
+    def test_batch_size_does_not_change_output(
+        self, corpus_parquet: Path, tmp_path: Path
+    ) -> None:
+        """Small streamed batches produce the same file as one big batch."""
+        label_corpus(corpus_parquet, tmp_path / "one.parquet", batch_size=1000)
+        label_corpus(corpus_parquet, tmp_path / "many.parquet", batch_size=2)
+        many = pq.ParquetFile(tmp_path / "many.parquet")
+        assert many.num_row_groups == 4
+        assert pq.read_table(tmp_path / "one.parquet").equals(many.read())
+
+    def test_pass_through_projection(
+        self, corpus_parquet: Path, tmp_path: Path
+    ) -> None:
+        """Only the requested pass-through columns are written."""
+        out = tmp_path / "labeled.parquet"
+        label_corpus(corpus_parquet, out, columns=["example_id"])
+        table = pq.read_table(out)
+        assert table.column_names == ["example_id", *LABEL_COLUMNS]
+        assert table.num_rows == 8
+
+    def test_empty_corpus(self, tmp_path: Path) -> None:
+        """An empty corpus writes an empty labeled file."""
+        src = tmp_path / "empty.parquet"
+        pq.write_table(pa.table({"code": pa.array([], pa.string())}), src)
+        out = tmp_path / "labeled.parquet"
+        assert label_corpus(src, out)["total_labeled"] == 0
+        assert pq.read_table(out).column_names == ["code", *LABEL_COLUMNS]
+
+    def test_rss_skips_exited_workers(self) -> None:
+        """Workers that exit while being sampled are skipped."""
+        gone = MagicMock()
+        gone.memory_info.side_effect = psutil.NoSuchProcess(pid=1)
+        alive = MagicMock()
+        alive.memory_info.return_value.rss = 5
+        process = MagicMock()
+        process.memory_info.return_value.rss = 10
+        process.children.return_value = [gone, alive]
+        assert _rss_bytes(process) == 15
+
+
+def _extended_registry(tmp_path: Path) -> Path:
+    """Write the built-in LF registry with one LF added."""
+    path = tmp_path / "lfs.yaml"
+    extra = '  - {name: print, weight: 0.4, pattern: "print[(]", label: LOW_RISK}\n'
+    path.write_text(DEFAULT_REGISTRY.read_text() + extra)
+    return path
+
+
+class TestIncrementalLabelCorpus:
+    """Tests for relabeling only what changed since a previous output."""
+
+    @staticmethod
+    def _evaluated_rows(monkeypatch: pytest.MonkeyPatch) -> list[int]:
+        """Record the number of rows each LF engine evaluates."""
+        evaluated: list[int] = []
+        original = CompiledLFEngine.vote_matrix_arrow
+
+        def spy(self: CompiledLFEngine, codes: pa.Array) -> object:
+            evaluated.append(len(codes) * len(self.labeling_functions))
+            return original(self, codes)
+
+        monkeypatch.setattr(CompiledLFEngine, "vote_matrix_arrow", spy)
+        return evaluated
+
+    def test_output_records_hashes_votes_and_lf_set(
+        self, corpus_parquet: Path, tmp_path: Path
+    ) -> None:
+        """Output stores content hashes, LF votes and the LF set metadata."""
+        out = tmp_path / "labeled.parquet"
+        label_corpus(corpus_parquet, out)
+        table = pq.read_table(out)
+        hashes = content_hashes(pq.read_table(corpus_parquet).column("code"))
+        assert table.column("content_hash").to_pylist() == hashes.tolist()
+        assert table.column("lf_votes").type.list_size == len(TARANTULA_WEIGHTS)
+        assert LF_METADATA_KEY in table.schema.metadata
+
+    def test_unchanged_corpus_reuses_every_row(
+        self, corpus_parquet: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Relabeling in place evaluates no LFs and writes the same labels."""
+        out = tmp_path / "labeled.parquet"
+        label_corpus(corpus_parquet, out)
+        first = pq.read_table(out)
+        evaluated = self._evaluated_rows(monkeypatch)
+        stats = label_corpus(corpus_parquet, out, previous_path=out)
+        assert stats["reused_rows"] == 8
+        assert sum(evaluated) == 0
+        assert pq.read_table(out).equals(first)
+
+    def test_changed_code_is_relabeled(
+        self, corpus_parquet: Path, tmp_path: Path
+    ) -> None:
+        """Only rows whose code changed are evaluated again."""
+        out = tmp_path / "labeled.parquet"
+        label_corpus(corpus_parquet, out)
+        table = pq.read_table(corpus_parquet)
+        codes = table.column("code").to_pylist()
+        codes[6] = "def gen(): yield 2"
+        edited = tmp_path / "edited.parquet"
+        pq.write_table(table.set_column(1, "code", pa.array(codes)), edited)
+        stats = label_corpus(edited, tmp_path / "next.parquet", previous_path=out)
+        assert stats["reused_rows"] == 7
+        labels = pq.read_table(tmp_path / "next.parquet").column("label")
+        assert labels.to_pylist()[6] == "HIGH_RISK"
+
+    def test_weight_change_reuses_votes(
+        self, corpus_parquet: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Reweighting reaggregates stored votes without evaluating LFs."""
+        out = tmp_path / "labeled.parquet"
+        label_corpus(corpus_parquet, out)
+        before = pq.read_table(out).column("confidence")
+        registry = tmp_path / "lfs.yaml"
+        registry.write_text(
+            DEFAULT_REGISTRY.read_text().replace("weight: 0.783", "weight: 0.3")
+        )
+        fresh = tmp_path / "fresh.parquet"
+        label_corpus(corpus_parquet, fresh, registry_path=registry)
+        evaluated = self._evaluated_rows(monkeypatch)
+        stats = label_corpus(
+            corpus_parquet, out, previous_path=out, registry_path=registry
+        )
+        assert stats["reused_rows"] == 8
+        assert sum(evaluated) == 0
+        relabeled = pq.read_table(out)
+        assert relabeled.equals(pq.read_table(fresh))
+        assert not relabeled.column("confidence").equals(before)
+
+    def test_new_lf_evaluates_only_its_column(
+        self, corpus_parquet: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """An LF added to the registry is evaluated on every row, and no other LF is."""
+        out = tmp_path / "labeled.parquet"
+        label_corpus(corpus_parquet, out)
+        evaluated = self._evaluated_rows(monkeypatch)
+        stats = label_corpus(
+            corpus_parquet,
+            out,
+            previous_path=out,
+            registry_path=_extended_registry(tmp_path),
+        )
+        assert stats["reused_rows"] == 0
+        assert sum(evaluated) == 8
+        votes = pq.read_table(out).column("lf_votes")
+        assert votes.type.list_size == len(TARANTULA_WEIGHTS) + 1
+
+    def test_missing_or_legacy_previous_relabels_everything(
+        self, corpus_parquet: Path, tmp_path: Path
+    ) -> None:
+        """A missing file or one without stored votes means a full relabel."""
+        lfs = WeakSupervisionLabeler().labeling_functions
+        assert load_previous(tmp_path / "missing.parquet", lfs) is None
+        assert load_previous(corpus_parquet, lfs) is None
+        stats = label_corpus(
+            corpus_parquet,
+            tmp_path / "labeled.parquet",
+            previous_path=tmp_path / "missing.parquet",
+        )
+        assert stats["reused_rows"] == 0
+
+    def test_failed_relabel_keeps_previous_output(
+        self, corpus_parquet: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """A run that fails mid-write leaves the previous output untouched."""
+        out = tmp_path / "labeled.parquet"
+        label_corpus(corpus_parquet, out)
+        first = pq.read_table(out)
+
+        def crash(*args: object) -> None:
+            raise RuntimeError("crash")
+
+        monkeypatch.setattr(label_corpus_module, "_write_labeled", crash)
+        with pytest.raises(RuntimeError, match="crash"):
+            label_corpus(corpus_parquet, out, previous_path=out)
+        assert pq.read_table(out).equals(first)
+        assert not list(tmp_path.glob("*.partial"))
+
+    def test_unknown_votes_read_from_cache(
+        self, corpus_parquet: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Rows with votes missing from the previous output hit the cache."""
+        registry = _extended_registry(tmp_path)
+        cache = tmp_path / "votes.sqlite"
+        label_corpus(corpus_parquet, cache_path=cache, registry_path=registry)
+        out = tmp_path / "labeled.parquet"
+        label_corpus(corpus_parquet, out)
+        evaluated = self._evaluated_rows(monkeypatch)
+        stats = label_corpus(
+            corpus_parquet,
+            out,
+            previous_path=out,
+            cache_path=cache,
+            registry_path=registry,
+        )
+        assert (stats["cache_hits"], stats["cache_misses"]) == (8, 0)
+        assert sum(evaluated) == 0
+        fresh = tmp_path / "fresh.parquet"
+        label_corpus(corpus_parquet, fresh, registry_path=registry)
+        assert pq.read_table(out).equals(pq.read_table(fresh))
+
+    def test_cache_misses_filled_after_completion(
+        self, corpus_parquet: Path, tmp_path: Path
+    ) -> None:
+        """Incomplete rows missing from the cache are cached once completed."""
+        registry = _extended_registry(tmp_path)
+        cache = tmp_path / "votes.sqlite"
+        out = tmp_path / "labeled.parquet"
+        label_corpus(corpus_parquet, out, cache_path=cache)
+        stats = label_corpus(
+            corpus_parquet,
+            tmp_path / "next.parquet",
+            previous_path=out,
+            cache_path=cache,
+            registry_path=registry,
+        )
+        assert (stats["cache_hits"], stats["cache_misses"]) == (0, 8)
+        second = label_corpus(corpus_parquet, cache_path=cache, registry_path=registry)
+        assert (second["cache_hits"], second["cache_misses"]) == (8, 0)
+
+    def test_complete_previous_skips_cache(
+        self, corpus_parquet: Path, tmp_path: Path
+    ) -> None:
+        """Rows fully covered by the previous output are not looked up."""
+        cache = tmp_path / "votes.sqlite"
+        out = tmp_path / "labeled.parquet"
+        label_corpus(corpus_parquet, out)
+        stats = label_corpus(corpus_parquet, out, previous_path=out, cache_path=cache)
+        assert stats["reused_rows"] == 8
+        assert "cache_hits" not in stats
+
+    def test_parallel_workers_reuse_previous(
+        self, corpus_parquet: Path, tmp_path: Path
+    ) -> None:
+        """Workers receive the previous votes and match a serial run."""
+        out = tmp_path / "labeled.parquet"
+        label_corpus(corpus_parquet, out)
+        stats = label_corpus(
+            corpus_parquet,
+            tmp_path / "parallel.parquet",
+            workers=2,
+            batch_size=2,
+            previous_path=out,
+        )
+        assert stats["reused_rows"] == 8
+        assert pq.read_table(tmp_path / "parallel.parquet").equals(pq.read_table(out))
+
+    def test_workers_get_only_their_batch(
+        self, corpus_parquet: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Each task carries its batch's previous votes; worker setup none."""
+        payloads: list[tuple[object, ...]] = []
+
+        class RecordingPool(ProcessPoolExecutor):
+            def __init__(self, **kwargs: Any) -> None:
+                payloads.append(kwargs["initargs"])
+                super().__init__(**kwargs)
+
+            def submit(self, fn: Any, /, *args: Any, **kwargs: Any) -> Future[Any]:
+                payloads.append(args)
+                return super().submit(fn, *args, **kwargs)
+
+        monkeypatch.setattr(label_corpus_module, "ProcessPoolExecutor", RecordingPool)
+        out = tmp_path / "labeled.parquet"
+        label_corpus(corpus_parquet, out)
+        label_corpus(corpus_parquet, out, workers=2, batch_size=3, previous_path=out)
+        initargs, *tasks = payloads
+        assert not any(isinstance(arg, np.ndarray | tuple) for arg in initargs)
+        rows = []
+        for codes, hashes, prior in tasks:
+            assert isinstance(codes, pa.Array)
+            assert isinstance(hashes, np.ndarray)
+            assert isinstance(prior, np.ndarray)
+            assert len(hashes) == len(prior) == len(codes)
+            rows.append(len(codes))
+        assert rows == [3, 3, 2]
+
+
+class TestLabelModelAggregation:
+    """Tests for label_corpus with a fitted label model."""
+
+    def test_unknown_aggregation(self, corpus_parquet: Path) -> None:
+        """Unknown aggregation strategies are rejected."""
+        with pytest.raises(ValueError, match="aggregation"):
+            label_corpus(corpus_parquet, aggregation="vote")
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_labels_from_fitted_model(
+        self, corpus_parquet: Path, tmp_path: Path, workers: int
+    ) -> None:
+        """Output labels equal a model fitted to the corpus vote matrix."""
+        out = tmp_path / "labeled.parquet"
+        label_corpus(
+            corpus_parquet,
+            out,
+            workers=workers,
+            batch_size=3,
+            aggregation="label-model",
+        )
+        table = pq.read_table(out)
+        assert table.column_names == ["example_id", "code", *LABEL_COLUMNS]
+        assert table.column("example_id").to_pylist() == [f"ex{i}" for i in range(8)]
+        votes = np.asarray(
+            table.column("lf_votes").combine_chunks().flatten(), dtype=np.int8
+        ).reshape(8, -1)
+        labels, confidence = LabelModel().fit(votes).predict(votes)
+        assert table.column("confidence").to_pylist() == confidence.tolist()
+        assert table.column("label").to_pylist() == [
+            Label.from_code(int(code)).name for code in labels
+        ]
+
+    def test_fitted_on_distinct_votes(
+        self, corpus_parquet: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """The model sees each distinct vote row once, with its count."""
+        fits: list[tuple[np.ndarray, np.ndarray | None]] = []
+        fit = LabelModel.fit
+
+        def spy(
+            self: LabelModel, votes: np.ndarray, counts: np.ndarray | None = None
+        ) -> LabelModel:
+            fits.append((votes, counts))
+            return fit(self, votes, counts)
+
+        monkeypatch.setattr(LabelModel, "fit", spy)
+        out = tmp_path / "labeled.parquet"
+        label_corpus(
+            corpus_parquet, out, workers=1, batch_size=3, aggregation="label-model"
+        )
+        [(votes, counts)] = fits
+        assert counts is not None
+        assert counts.sum() == 8
+        assert len(np.unique(votes, axis=0)) == len(votes) < 8
+        assert sorted(p.name for p in tmp_path.iterdir()) == [
+            "corpus.parquet",
+            "labeled.parquet",
+        ]
+        assert label_counts(out).total() == 8
+
+    def test_empty_corpus(self, tmp_path: Path) -> None:
+        """An empty corpus writes an empty output without fitting."""
+        corpus = tmp_path / "empty.parquet"
+        pq.write_table(pa.table({"code": pa.array([], pa.string())}), corpus)
+        out = tmp_path / "labeled.parquet"
+        label_corpus(corpus, out, workers=1, aggregation="label-model")
+        assert pq.read_table(out).num_rows == 0
+        assert label_counts(out) == {}
+
+    def test_requires_output(self, corpus_parquet: Path) -> None:
+        """Without an output there is nothing to write the model's labels to."""
+        with pytest.raises(ValueError, match="output_path"):
+            label_corpus(corpus_parquet, aggregation="label-model")
+
+    def test_stats_independent_of_aggregation(
+        self, corpus_parquet: Path, tmp_path: Path
+    ) -> None:
+        """Coverage and conflicts do not depend on the aggregation."""
+        stats = {
+            name: _without_rss(
+                label_corpus(
+                    corpus_parquet, tmp_path / f"{name}.parquet", aggregation=name
+                )
+            )
+            for name in AGGREGATIONS
+        }
+        assert stats["tarantula"] == stats["label-model"]
+
+
+class TestLabelCounts:
+    """Tests for count_labels() and label_counts()."""
+
+    def test_count_labels(self) -> None:
+        """Codes are counted by label name."""
+        codes = np.array([Label.HIGH_RISK.code, Label.LOW_RISK.code] * 2, np.int8)
+        assert count_labels(codes) == {"HIGH_RISK": 2, "LOW_RISK": 2}
+        assert count_labels(np.empty(0, np.int8)) == {}
+
+    @pytest.mark.parametrize("aggregation", AGGREGATIONS)
+    def test_footer_matches_label_column(
+        self, corpus_parquet: Path, tmp_path: Path, aggregation: str
+    ) -> None:
+        """label_corpus records the counts of the labels it wrote."""
+        out = tmp_path / "labeled.parquet"
+        label_corpus(corpus_parquet, output_path=out, aggregation=aggregation)
+        assert LABEL_COUNTS_KEY in pq.ParquetFile(out).metadata.metadata
+        labels = pq.read_table(out).column("label").to_pylist()
+        assert label_counts(out) == Counter(labels)
+        assert label_counts(out).total() == 8
+
+    def test_counts_label_column_without_footer(self, tmp_path: Path) -> None:
+        """Files without recorded counts are counted from their label column."""
+        path = tmp_path / "labels.parquet"
+        labels = ["LOW_RISK", "HIGH_RISK", None, "LOW_RISK"]
+        pq.write_table(pa.table({"label": labels}), path, row_group_size=2)
+        assert label_counts(path) == {"LOW_RISK": 2, "HIGH_RISK": 1}
+
+    def test_unlabeled_file_rejected(self, corpus_parquet: Path) -> None:
+        """Files with neither counts nor labels raise ValueError."""
+        with pytest.raises(ValueError, match="no label column"):
+            label_counts(corpus_parquet)
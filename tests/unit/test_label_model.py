@@ -0,0 +1,128 @@
+"""Tests for label_model module."""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from reprorusted_python_cli.label_model import N_CLASSES, LabelModel, _compress
+from reprorusted_python_cli.weak_supervision import ABSTAIN_VOTE, Label
+
+
+def _synthetic_votes(
+    n: int, accuracies: list[float], coverage: float, seed: int = 0
+) -> tuple[np.ndarray, np.ndarray]:
+    """Sample true classes and LF votes with known per-LF accuracies."""
+    rng = np.random.default_rng(seed)
+    truth = rng.integers(0, N_CLASSES, n)
+    k = len(accuracies)
+    fires = rng.random((n, k)) < coverage
+    correct = rng.random((n, k)) < np.array(accuracies)
+    wrong = (truth[:, None] + rng.integers(1, N_CLASSES, (n, k))) % N_CLASSES
+    votes = np.where(fires, np.where(correct, truth[:, None], wrong), ABSTAIN_VOTE)
+    return votes.astype(np.int8), truth
+
+
+class TestCompress:
+    """Tests for vote pattern compression."""
+
+    def test_roundtrip(self) -> None:
+        """Patterns indexed by the inverse rebuild the input."""
+        votes = np.array([[0, -1], [2, 1], [0, -1]], dtype=np.int8)
+        patterns, counts, inverse = _compress(votes)
+        assert len(patterns) == 2
+        assert counts.sum() == 3
+        assert (patterns[inverse] + ABSTAIN_VOTE == votes).all()
+
+    def test_many_lfs(self) -> None:
+        """More LFs than fit one packed key still compress exactly."""
+        votes = np.full((4, 40), ABSTAIN_VOTE, dtype=np.int8)
+        votes[1, 39] = 0
+        votes[3, 39] = 0
+        patterns, counts, inverse = _compress(votes)
+        assert counts.tolist() == [2.0, 2.0]
+        assert (patterns[inverse] + ABSTAIN_VOTE == votes).all()
+
+    def test_rejects_unknown_votes(self) -> None:
+        """Only class codes and abstentions are valid votes."""
+        with pytest.raises(ValueError, match="class codes"):
+            _compress(np.array([[-2]], dtype=np.int8))
+
+
+class TestLabelModel:
+    """Tests for LabelModel fitting and prediction."""
+
+    def test_invalid_parameters(self) -> None:
+        """Non-positive iterations and negative smoothing are rejected."""
+        with pytest.raises(ValueError, match="max_iter"):
+            LabelModel(max_iter=0)
+        with pytest.raises(ValueError, match="smoothing"):
+            LabelModel(smoothing=-1.0)
+
+    def test_empty_votes(self) -> None:
+        """Fitting needs at least one row."""
+        with pytest.raises(ValueError, match="empty"):
+            LabelModel().fit(np.empty((0, 2), dtype=np.int8))
+
+    def test_counts_weight_rows(self) -> None:
+        """Distinct rows with counts fit like the rows they stand for."""
+        rng = np.random.default_rng(0)
+        votes = rng.integers(-1, 3, (200, 4)).astype(np.int8)
+        distinct, counts = np.unique(votes, axis=0, return_counts=True)
+        expanded = LabelModel().fit(votes)
+        counted = LabelModel().fit(distinct, counts)
+        assert np.allclose(expanded.accuracies, counted.accuracies)
+        assert np.allclose(expanded.predict_proba(votes), counted.predict_proba(votes))
+        with pytest.raises(ValueError, match="counts"):
+            LabelModel().fit(distinct, counts[1:])
+
+    def test_unfitted_and_mismatched(self) -> None:
+        """Prediction needs a model fitted to the same LFs."""
+        votes = np.zeros((2, 2), dtype=np.int8)
+        with pytest.raises(ValueError, match="not fitted"):
+            LabelModel().predict(votes)
+        model = LabelModel().fit(votes)
+        with pytest.raises(ValueError, match="2 LF columns"):
+            model.predict(np.zeros((2, 3), dtype=np.int8))
+
+    def test_recovers_accuracies(self) -> None:
+        """EM recovers the accuracies the votes were sampled with."""
+        accuracies = [0.95, 0.8, 0.65, 0.9]
+        votes, _ = _synthetic_votes(50_000, accuracies, coverage=0.5)
+        model = LabelModel().fit(votes)
+        assert np.allclose(model.accuracies, accuracies, atol=0.02)
+        assert model.n_iter < model.max_iter
+
+    def test_beats_majority_vote(self) -> None:
+        """Learned accuracies outvote a majority of weak LFs."""
+        votes, truth = _synthetic_votes(20_000, [0.98, 0.55, 0.55], coverage=0.9)
+        labels, confidence = LabelModel().fit(votes).predict(votes)
+        voted = (votes != ABSTAIN_VOTE).any(axis=1)
+        hits = np.stack([(votes == c).sum(axis=1) for c in range(N_CLASSES)], 1)
+        majority = (hits.argmax(axis=1) == truth)[voted].mean()
+        assert (labels == truth)[voted].mean() > majority + 0.05
+        assert ((confidence > 0) & (confidence <= 1)).all()
+
+    def test_duplicate_lfs_are_discounted(self) -> None:
+        """Copies of one LF are detected as correlated and not double counted."""
+        votes, truth = _synthetic_votes(20_000, [0.9, 0.8, 0.6], coverage=0.6)
+        copies = np.concatenate([votes, votes[:, [2, 2]]], axis=1)
+        model = LabelModel().fit(copies)
+        assert model.correlations[2, 3] > 0.99
+        assert abs(model.correlations[0, 1]) < 0.05
+        single = LabelModel().fit(votes).predict(votes)[0]
+        duplicated = model.predict(copies)[0]
+        assert (duplicated == truth).mean() >= (single == truth).mean() - 0.01
+
+    def test_no_votes_get_default_class(self) -> None:
+        """Rows without votes are assigned the default class with certainty."""
+        votes = np.array([[0, -1], [-1, -1], [1, 1]], dtype=np.int8)
+        labels, confidence = LabelModel().fit(votes).predict(votes)
+        assert labels[1] == Label.LOW_RISK.code
+        assert confidence[1] == 1.0
+
+    def test_predict_empty(self) -> None:
+        """Predicting zero rows returns empty arrays."""
+        model = LabelModel().fit(np.zeros((1, 2), dtype=np.int8))
+        labels, confidence = model.predict(np.empty((0, 2), dtype=np.int8))
+        assert labels.shape == confidence.shape == (0,)
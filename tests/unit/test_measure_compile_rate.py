@@ -0,0 +1,537 @@
+"""Tests for measure_compile_rate module."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import subprocess
+import sys
+import time
+import tomllib
+from types import SimpleNamespace
+from typing import TYPE_CHECKING
+
+import psutil
+import pytest
+
+from reprorusted_python_cli import measure_compile_rate as compile_mod
+from reprorusted_python_cli.measure_compile_rate import (
+    DEFAULT_CATEGORY,
+    CompileResult,
+    _kill_tree,
+    default_jobs,
+    find_examples,
+    iter_compile_results,
+    measure_compile_rate,
+    prewarm,
+    shared_dependencies,
+    slot_dirs,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from pathlib import Path
+
+
+def _killed(pid: int, wait: float = 5) -> bool:
+    """Return whether a process is, within a wait, gone or awaiting its reaper."""
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        try:
+            if psutil.Process(pid).status() == psutil.STATUS_ZOMBIE:
+                return True
+        except psutil.NoSuchProcess:
+            return True
+        time.sleep(0.05)
+    return False
+
+
+class TestFindExamples:
+    """Tests for find_examples()."""
+
+    def test_finds_crates_in_path_order(
+        self, tmp_path: Path, make_crate: Callable[..., Path]
+    ) -> None:
+        """Top-level and nested crates are found; build output is not."""
+        nested = make_crate(tmp_path, "cli/b")
+        top = make_crate(tmp_path, "a")
+        make_crate(tmp_path, "a/target/debug/build/dep")
+        assert find_examples(tmp_path) == [top, nested]
+
+    def test_missing_directory(self, tmp_path: Path) -> None:
+        """A missing examples directory has no examples."""
+        assert find_examples(tmp_path / "missing") == []
+
+
+class TestDefaultJobs:
+    """Tests for default_jobs()."""
+
+    @pytest.mark.parametrize(
+        ("cpus", "available", "jobs"),
+        [(8, 64 * 2**30, 8), (8, 5 * 2**30, 2), (8, 2**20, 1), (None, 64 * 2**30, 1)],
+    )
+    def test_capped_by_cpu_and_memory(
+        self,
+        monkeypatch: pytest.MonkeyPatch,
+        cpus: int | None,
+        available: int,
+        jobs: int,
+    ) -> None:
+        """Jobs are the CPUs, fewer if their memory is not available."""
+        memory = SimpleNamespace(available=available)
+        monkeypatch.setattr(compile_mod.psutil, "cpu_count", lambda: cpus)
+        monkeypatch.setattr(compile_mod.psutil, "virtual_memory", lambda: memory)
+        assert default_jobs(job_memory=2 * 2**30) == jobs
+
+
+class TestIterCompileResults:
+    """Tests for the asyncio compile scheduler."""
+
+    @staticmethod
+    def _collect(
+        crates: list[Path],
+        root: Path,
+        command: list[str],
+        jobs: int,
+        timeout: float = 30,
+        target_dir: Path | None = None,
+    ) -> list[CompileResult]:
+        """Run the scheduler with the fake cargo and collect its results."""
+
+        async def collect() -> list[CompileResult]:
+            results = iter_compile_results(
+                crates, root, command, jobs, timeout, target_dir
+            )
+            return [result async for result in results]
+
+        return asyncio.run(collect())
+
+    def test_results_stream_in_completion_order(
+        self, tmp_path: Path, make_crate: Callable[..., Path], fake_cargo: list[str]
+    ) -> None:
+        """A fast compile is reported before a slower one started first."""
+        slow = make_crate(tmp_path, "a", "sleep 0.5")
+        fast = make_crate(tmp_path, "b")
+        results = self._collect([slow, fast], tmp_path, fake_cargo, jobs=2)
+        assert [result.example for result in results] == ["b", "a"]
+        assert all(result.passed for result in results)
+
+    def test_concurrency_is_capped(
+        self, tmp_path: Path, make_crate: Callable[..., Path], fake_cargo: list[str]
+    ) -> None:
+        """No more than jobs compiles overlap, and that many do."""
+        crates = [make_crate(tmp_path, f"c{i}", "sleep 0.2") for i in range(6)]
+        assert len(self._collect(crates, tmp_path, fake_cargo, jobs=2)) == 6
+        spans = [json.loads(p.read_text()) for p in (tmp_path / "log").glob("*.json")]
+        overlap = max(sum(s <= t < e for s, e in spans) for t, _ in spans)
+        assert overlap == 2
+
+    def test_own_target_by_default(
+        self, tmp_path: Path, make_crate: Callable[..., Path], fake_cargo: list[str]
+    ) -> None:
+        """Without a shared target directory cargo's default is left alone."""
+        self._collect([make_crate(tmp_path, "a")], tmp_path, fake_cargo, jobs=1)
+        [target] = (tmp_path / "log").glob("*.target")
+        assert target.read_text() == ""
+
+    def test_shared_target_per_slot(
+        self, tmp_path: Path, make_crate: Callable[..., Path], fake_cargo: list[str]
+    ) -> None:
+        """Each slot reuses its own target directory; overlapping runs never share."""
+        crates = [make_crate(tmp_path, f"c{i}", "sleep 0.2") for i in range(6)]
+        self._collect(
+            crates, tmp_path, fake_cargo, jobs=2, target_dir=tmp_path / "target"
+        )
+        runs = [
+            (*json.loads(span.read_text()), span.with_suffix(".target").read_text())
+            for span in (tmp_path / "log").glob("*.json")
+        ]
+        assert {target for _, _, target in runs} == {
+            str(slot.resolve()) for slot in slot_dirs(tmp_path / "target", 2)
+        }
+        for start, end, target in runs:
+            assert not any(
+                s < end and start < e and t == target
+                for s, e, t in runs
+                if (s, e) != (start, end)
+            )
+        assert len(list((tmp_path / "target").glob("slot-*/c*"))) == 6
+
+    def test_failure_records_error_codes(
+        self, tmp_path: Path, make_crate: Callable[..., Path], fake_cargo: list[str]
+    ) -> None:
+        """Failed compiles keep their distinct rustc error codes."""
+        crate = make_crate(tmp_path, "cli/bad", "error")
+        [result] = self._collect([crate], tmp_path, fake_cargo, jobs=1)
+        assert result == CompileResult(
+            example="cli/bad",
+            category="cli",
+            passed=False,
+            returncode=101,
+            duration=result.duration,
+            error_codes=("E0308", "E0425"),
+        )
+
+    def test_timeout_kills_process_tree(
+        self, tmp_path: Path, make_crate: Callable[..., Path], fake_cargo: list[str]
+    ) -> None:
+        """Stuck compiles are killed with their children and reported."""
+        crate = make_crate(tmp_path, "stuck", "spawn sleep 60")
+        start = time.monotonic()
+        [result] = self._collect([crate], tmp_path, fake_cargo, jobs=1, timeout=1)
+        assert time.monotonic() - start < 10
+        assert result.timed_out
+        assert not result.passed
+        assert result.category == DEFAULT_CATEGORY
+        [child] = (tmp_path / "log").glob("*.child")
+        assert _killed(int(child.read_text()))
+
+    def test_closing_early_kills_running_compiles(
+        self, tmp_path: Path, make_crate: Callable[..., Path], fake_cargo: list[str]
+    ) -> None:
+        """Compiles still running when the consumer stops are killed."""
+        crates = [
+            make_crate(tmp_path, "a"),
+            make_crate(tmp_path, "b", "spawn sleep 60"),
+        ]
+
+        async def first() -> CompileResult:
+            results = iter_compile_results(crates, tmp_path, fake_cargo, jobs=2)
+            result = await anext(results)
+            while not list((tmp_path / "log").glob("*.child")):
+                await asyncio.sleep(0.05)
+            await results.aclose()
+            return result
+
+        assert asyncio.run(first()).example == "a"
+        [child] = (tmp_path / "log").glob("*.child")
+        assert _killed(int(child.read_text()))
+
+
+class TestSharedDependencies:
+    """Tests for shared_dependencies()."""
+
+    def test_counts_identical_tables(
+        self, tmp_path: Path, make_crate: Callable[..., Path]
+    ) -> None:
+        """Tables declared by enough crates are returned, most shared first."""
+        serde = 'serde = { version = "1", features = ["derive"] }'
+        crates = [make_crate(tmp_path, f"s{i}", dependencies=serde) for i in range(3)]
+        crates += [
+            make_crate(tmp_path, f"r{i}", dependencies='regex = "1"') for i in range(2)
+        ]
+        crates += [make_crate(tmp_path, "once", dependencies='rand = "0.8"')]
+        crates += [make_crate(tmp_path, "none"), make_crate(tmp_path, "none2")]
+        assert shared_dependencies(crates) == [
+            {"serde": {"version": "1", "features": ["derive"]}},
+            {"regex": "1"},
+        ]
+        assert shared_dependencies(crates, min_examples=3) == [
+            {"serde": {"version": "1", "features": ["derive"]}}
+        ]
+
+    def test_path_dependencies_resolved(
+        self, tmp_path: Path, make_crate: Callable[..., Path]
+    ) -> None:
+        """Different relative paths to one library are the same dependency."""
+        top = make_crate(tmp_path, "a", dependencies='lib = { path = "../lib" }')
+        nested = make_crate(
+            tmp_path, "cli/b", dependencies='lib = { path = "../../lib" }'
+        )
+        lib = (tmp_path / "lib").resolve().as_posix()
+        assert shared_dependencies([top, nested]) == [{"lib": {"path": lib}}]
+
+    def test_malformed_manifest(
+        self, tmp_path: Path, make_crate: Callable[..., Path]
+    ) -> None:
+        """Unparsable manifests declare nothing."""
+        crates = [make_crate(tmp_path, "a"), make_crate(tmp_path, "b")]
+        for crate in crates:
+            (crate / "Cargo.toml").write_text("[dependencies\n")
+        assert shared_dependencies(crates) == []
+
+    def test_missing_manifest(
+        self, tmp_path: Path, make_crate: Callable[..., Path], fake_cargo: list[str]
+    ) -> None:
+        """Crates without a readable manifest declare nothing, even when prewarming."""
+        crates = [make_crate(tmp_path, name, dependencies='x = "1"') for name in "abcd"]
+        (crates[0] / "Cargo.toml").unlink()
+        (crates[1] / "Cargo.toml").unlink()
+        (crates[1] / "Cargo.toml").mkdir()
+        assert shared_dependencies(crates, min_examples=3) == []
+        assert shared_dependencies(crates) == [{"x": "1"}]
+        results = asyncio.run(prewarm(crates, tmp_path / "target", fake_cargo, 2))
+        assert [result.example for result in results] == ["prewarm/deps-0"]
+
+    def test_numeric_values_kept(
+        self, tmp_path: Path, make_crate: Callable[..., Path], fake_cargo: list[str]
+    ) -> None:
+        """Numbers in dependency tables are written back to the stub as numbers."""
+        spec = 'x = { version = "1", retries = 3, ratio = 0.5 }'
+        crates = [make_crate(tmp_path, name, dependencies=spec) for name in "ab"]
+        asyncio.run(prewarm(crates, tmp_path / "target", fake_cargo, 1))
+        manifest = tmp_path / "target" / "prewarm" / "deps-0" / "Cargo.toml"
+        with manifest.open("rb") as stub:
+            assert tomllib.load(stub)["dependencies"] == {
+                "x": {"version": "1", "retries": 3, "ratio": 0.5}
+            }
+
+
+class TestPrewarm:
+    """Tests for prewarm()."""
+
+    @staticmethod
+    def _prewarm(
+        crates: list[Path], root: Path, command: list[str], jobs: int
+    ) -> list[CompileResult]:
+        """Prewarm with the fake cargo into ``root/target``."""
+        return asyncio.run(prewarm(crates, root / "target", command, jobs))
+
+    def test_builds_shared_sets_into_every_slot(
+        self, tmp_path: Path, make_crate: Callable[..., Path], fake_cargo: list[str]
+    ) -> None:
+        """Each shared set is built once and copied to the other slots."""
+        serde = 'serde = { version = "1", features = ["derive"], optional = false }'
+        crates = [make_crate(tmp_path, f"s{i}", dependencies=serde) for i in range(2)]
+        crates += [
+            make_crate(tmp_path, f"r{i}", dependencies='regex = "1"') for i in range(2)
+        ]
+        results = self._prewarm(crates, tmp_path, fake_cargo, jobs=3)
+        assert [r.example for r in results] == ["prewarm/deps-0", "prewarm/deps-1"]
+        assert all(result.passed for result in results)
+        assert len(list((tmp_path / "log").glob("*.json"))) == 2
+        manifest = tmp_path / "target" / "prewarm" / "deps-0" / "Cargo.toml"
+        with manifest.open("rb") as stub:
+            assert tomllib.load(stub)["dependencies"] == {
+                "serde": {"version": "1", "features": ["derive"], "optional": False}
+            }
+        for slot in slot_dirs(tmp_path / "target", 3):
+            assert sorted(p.name for p in slot.iterdir()) == ["deps-0", "deps-1"]
+
+    def test_existing_slots_kept(
+        self, tmp_path: Path, make_crate: Callable[..., Path], fake_cargo: list[str]
+    ) -> None:
+        """Slots from an earlier run are not overwritten."""
+        crates = [
+            make_crate(tmp_path, f"s{i}", dependencies='regex = "1"') for i in range(2)
+        ]
+        slot = tmp_path / "target" / "slot-1"
+        slot.mkdir(parents=True)
+        self._prewarm(crates, tmp_path, fake_cargo, jobs=2)
+        assert list(slot.iterdir()) == []
+
+    def test_nothing_shared(
+        self, tmp_path: Path, make_crate: Callable[..., Path], fake_cargo: list[str]
+    ) -> None:
+        """Without shared dependencies nothing is built or copied."""
+        crates = [
+            make_crate(tmp_path, "a"),
+            make_crate(tmp_path, "b", dependencies='x = "1"'),
+        ]
+        assert self._prewarm(crates, tmp_path, fake_cargo, jobs=2) == []
+        assert not (tmp_path / "target" / "slot-1").exists()
+
+
+class TestKillTree:
+    """Tests for _kill_tree()."""
+
+    def test_exited_process(self) -> None:
+        """Processes that already exited are ignored."""
+        process = subprocess.Popen([sys.executable, "-c", "pass"])
+        process.wait()
+        _kill_tree(process.pid)
+
+
+class TestMeasureCompileRate:
+    """Tests for measure_compile_rate()."""
+
+    @pytest.fixture
+    def examples(self, tmp_path: Path, make_crate: Callable[..., Path]) -> Path:
+        """Write two categorized crates, one failing, and a top-level one."""
+        root = tmp_path / "examples"
+        make_crate(root, "cli/ok")
+        make_crate(root, "cli/bad", "error")
+        make_crate(root, "top")
+        return root
+
+    @staticmethod
+    def _measure(
+        examples: Path,
+        command: list[str],
+        verbose: bool = False,
+        timeout: float = 30,
+        output_path: Path | None = None,
+        cache_path: Path | None = None,
+        target_dir: Path | None = None,
+        prewarm_deps: bool = False,
+    ) -> dict[str, int | float]:
+        """Measure with the fake cargo, two compiles at a time."""
+        return measure_compile_rate(
+            examples,
+            verbose,
+            2,
+            timeout,
+            command,
+            output_path,
+            cache_path,
+            target_dir=target_dir,
+            prewarm_deps=prewarm_deps,
+        )
+
+    def test_rates(self, examples: Path, fake_cargo: list[str]) -> None:
+        """Overall and per-category rates are reported."""
+        stats = self._measure(examples, fake_cargo)
+        assert stats == {
+            "total": 3,
+            "passed": 2,
+            "failed": 1,
+            "timed_out": 0,
+            "cached": 0,
+            "prewarmed": 0,
+            "rate": pytest.approx(2 / 3),
+            "rate_cli": 0.5,
+            f"rate_{DEFAULT_CATEGORY}": 1.0,
+        }
+
+    def test_streams_results(
+        self,
+        examples: Path,
+        tmp_path: Path,
+        capsys: pytest.CaptureFixture[str],
+        fake_cargo: list[str],
+    ) -> None:
+        """Every result is printed and written as one JSON line."""
+        out = tmp_path / "results.jsonl"
+        self._measure(examples, fake_cargo, verbose=True, output_path=out)
+        lines = [json.loads(line) for line in out.read_text().splitlines()]
+        assert sorted(line["example"] for line in lines) == ["cli/bad", "cli/ok", "top"]
+        assert {tuple(line["error_codes"]) for line in lines} == {
+            (),
+            ("E0308", "E0425"),
+        }
+        report = capsys.readouterr().out
+        assert "FAIL    cli/bad" in report
+        assert "PASS    top" in report
+
+    def test_timeouts_reported(
+        self,
+        tmp_path: Path,
+        capsys: pytest.CaptureFixture[str],
+        make_crate: Callable[..., Path],
+        fake_cargo: list[str],
+    ) -> None:
+        """Timed out compiles count as failed and are flagged."""
+        root = tmp_path / "examples"
+        make_crate(root, "slow", "sleep 30")
+        stats = self._measure(root, fake_cargo, verbose=True, timeout=0.5)
+        assert (stats["failed"], stats["timed_out"]) == (1, 1)
+        assert "TIMEOUT slow" in capsys.readouterr().out
+
+    def test_cache_skips_unchanged_examples(
+        self,
+        examples: Path,
+        tmp_path: Path,
+        capsys: pytest.CaptureFixture[str],
+        fake_cargo: list[str],
+    ) -> None:
+        """A rerun compiles only examples whose sources changed."""
+        cache = tmp_path / "compile_cache.sqlite"
+        first = self._measure(examples, fake_cargo, cache_path=cache)
+        assert len(list((tmp_path / "log").glob("*.json"))) == 3
+        (examples / "top" / "src" / "main.rs").write_text("error")
+        out = tmp_path / "results.jsonl"
+        second = self._measure(
+            examples, fake_cargo, True, output_path=out, cache_path=cache
+        )
+        assert len(list((tmp_path / "log").glob("*.json"))) == 4
+        assert second["cached"] == 2
+        assert (first["failed"], second["failed"]) == (1, 2)
+        lines = [json.loads(line) for line in out.read_text().splitlines()]
+        bad = next(line for line in lines if line["example"] == "cli/bad")
+        assert bad["cached"]
+        assert bad["error_codes"] == ["E0308", "E0425"]
+        assert "FAIL    cli/bad (cached) E0308 E0425" in capsys.readouterr().out
+
+    def test_timeouts_not_cached(
+        self, tmp_path: Path, make_crate: Callable[..., Path], fake_cargo: list[str]
+    ) -> None:
+        """Timed out compiles are retried on the next run."""
+        root = tmp_path / "examples"
+        make_crate(root, "slow", "sleep 30")
+        cache = tmp_path / "compile_cache.sqlite"
+        self._measure(root, fake_cargo, timeout=0.5, cache_path=cache)
+        stats = self._measure(root, fake_cargo, timeout=0.5, cache_path=cache)
+        assert (stats["timed_out"], stats["cached"]) == (1, 0)
+
+    def test_prewarmed_shared_target(
+        self,
+        tmp_path: Path,
+        capsys: pytest.CaptureFixture[str],
+        make_crate: Callable[..., Path],
+        fake_cargo: list[str],
+    ) -> None:
+        """Shared dependencies are built first, then examples reuse the slots."""
+        root = tmp_path / "examples"
+        for name in ("a", "b", "cli/c"):
+            make_crate(root, name, dependencies='regex = "1"')
+        target = tmp_path / "target"
+        stats = self._measure(
+            root, fake_cargo, True, target_dir=target, prewarm_deps=True
+        )
+        assert (stats["passed"], stats["prewarmed"]) == (3, 1)
+        assert "Prewarmed 1/1 dependency sets" in capsys.readouterr().out
+        assert sorted(p.name for p in target.glob("slot-*/*")) == [
+            "a",
+            "b",
+            "c",
+            "deps-0",
+            "deps-0",
+        ]
+
+    def test_cached_examples_not_prewarmed(
+        self, tmp_path: Path, make_crate: Callable[..., Path], fake_cargo: list[str]
+    ) -> None:
+        """Dependencies only cached examples share are not built."""
+        root = tmp_path / "examples"
+        for name in ("a", "b"):
+            crate = make_crate(root, name, dependencies='regex = "1"')
+            (crate / "Cargo.lock").write_text("version = 3\n")
+        cache = tmp_path / "compile_cache.sqlite"
+        self._measure(root, fake_cargo, cache_path=cache)
+        target = tmp_path / "target"
+        stats = self._measure(
+            root, fake_cargo, cache_path=cache, target_dir=target, prewarm_deps=True
+        )
+        assert (stats["cached"], stats["prewarmed"]) == (2, 0)
+
+    def test_unlocked_registry_dependencies_not_cached(
+        self, tmp_path: Path, make_crate: Callable[..., Path], fake_cargo: list[str]
+    ) -> None:
+        """Crates whose dependencies may resolve differently are rebuilt."""
+        root = tmp_path / "examples"
+        make_crate(root, "unlocked", dependencies='regex = "1"')
+        make_crate(root, "local")
+        cache = tmp_path / "compile_cache.sqlite"
+        self._measure(root, fake_cargo, cache_path=cache)
+        stats = self._measure(root, fake_cargo, cache_path=cache)
+        assert (stats["total"], stats["cached"]) == (2, 1)
+
+    def test_no_examples(self, tmp_path: Path) -> None:
+        """An empty tree has a zero rate."""
+        stats = measure_compile_rate(tmp_path)
+        assert (stats["total"], stats["rate"]) == (0, 0.0)
+
+    @pytest.mark.parametrize(
+        ("jobs", "timeout", "match"), [(0, 1.0, "jobs"), (None, 0.0, "timeout")]
+    )
+    def test_invalid_arguments(
+        self, tmp_path: Path, jobs: int | None, timeout: float, match: str
+    ) -> None:
+        """Non-positive jobs and timeouts are rejected."""
+        with pytest.raises(ValueError, match=match):
+            measure_compile_rate(tmp_path, jobs=jobs, timeout=timeout)
+
+    def test_prewarm_requires_target_dir(self, tmp_path: Path) -> None:
+        """Prewarming needs somewhere to keep the dependencies."""
+        with pytest.raises(ValueError, match="target_dir"):
+            measure_compile_rate(tmp_path, prewarm_deps=True)
@@ -7,51 +7,17 @@ expected types.
 
 from __future__ import annotations
 
-from reprorusted_python_cli.augment_corpus import augment_corpus
 from reprorusted_python_cli.category_diff import compute_category_diff
 from reprorusted_python_cli.check_test_lib_crates import check_test_lib_crates
-from reprorusted_python_cli.clippy_gate import run_clippy_gate
 from reprorusted_python_cli.corpus_quality_report import generate_quality_report
 from reprorusted_python_cli.export_hf_corpus import export_hf_corpus
 from reprorusted_python_cli.generate_insights import generate_insights
 from reprorusted_python_cli.golden_traces_analyzer import analyze_golden_traces
 from reprorusted_python_cli.hitl_sampler import generate_report, sample_for_review
-from reprorusted_python_cli.label_corpus import label_corpus
-from reprorusted_python_cli.measure_compile_rate import measure_compile_rate
 from reprorusted_python_cli.verify_qa_checklist import verify_qa_checklist
 from reprorusted_python_cli.zero_success_analyzer import analyze_zero_success
 
 
-class TestAugmentCorpus:
-    """Tests for augment_corpus stub."""
-
-    def test_returns_dict(self) -> None:
-        """Returns a dict with expected keys."""
-        result = augment_corpus("input.parquet")
-        assert isinstance(result, dict)
-
-    def test_default_params(self) -> None:
-        """Works with default parameters."""
-        result = augment_corpus("input.parquet")
-        assert "original" in result
-        assert "synthetic" in result
-        assert "total" in result
-
-    def test_custom_params(self) -> None:
-        """Works with custom output_path and multiplier."""
-        result = augment_corpus(
-            "input.parquet", output_path="out.parquet", multiplier=3
-        )
-        assert isinstance(result, dict)
-
-    def test_return_values_are_ints(self) -> None:
-        """Return values are integers."""
-        result = augment_corpus("input.parquet")
-        assert result["original"] == 0
-        assert result["synthetic"] == 0
-        assert result["total"] == 0
-
-
 class TestCategoryDiff:
     """Tests for compute_category_diff stub."""
 
@@ -99,38 +65,6 @@ class TestCheckTestLibCrates:
         assert isinstance(result, dict)
 
 
-class TestClippyGate:
-    """Tests for run_clippy_gate stub."""
-
-    def test_returns_dict(self) -> None:
-        """Returns a dict with expected keys."""
-        result = run_clippy_gate()
-        assert isinstance(result, dict)
-
-    def test_has_expected_keys(self) -> None:
-        """Result has total, violations, rate, files keys."""
-        result = run_clippy_gate()
-        assert "total" in result
-        assert "violations" in result
-        assert "rate" in result
-        assert "files" in result
-
-    def test_strict_mode(self) -> None:
-        """Works with strict=True."""
-        result = run_clippy_gate(strict=True)
-        assert isinstance(result, dict)
-
-    def test_verbose_mode(self) -> None:
-        """Works with verbose=True."""
-        result = run_clippy_gate(verbose=True)
-        assert isinstance(result, dict)
-
-    def test_with_examples_dir(self) -> None:
-        """Works with optional examples_dir."""
-        result = run_clippy_gate(examples_dir="/tmp/examples")
-        assert isinstance(result, dict)
-
-
 class TestCorpusQualityReport:
     """Tests for generate_quality_report stub."""
 
@@ -243,51 +177,6 @@ class TestHitlSampler:
         assert isinstance(result, dict)
 
 
-class TestLabelCorpus:
-    """Tests for label_corpus stub."""
-
-    def test_returns_dict(self) -> None:
-        """Returns an empty dict."""
-        result = label_corpus("input.parquet")
-        assert isinstance(result, dict)
-
-    def test_empty_result(self) -> None:
-        """Result is empty."""
-        result = label_corpus("input.parquet")
-        assert result == {}
-
-    def test_with_params(self) -> None:
-        """Works with all optional parameters."""
-        result = label_corpus(
-            "input.parquet",
-            output_path="labeled.parquet",
-            threshold=0.7,
-        )
-        assert isinstance(result, dict)
-
-
-class TestMeasureCompileRate:
-    """Tests for measure_compile_rate stub."""
-
-    def test_returns_dict(self) -> None:
-        """Returns a dict with expected keys."""
-        result = measure_compile_rate()
-        assert isinstance(result, dict)
-
-    def test_has_expected_keys(self) -> None:
-        """Result has total, passed, failed, rate keys."""
-        result = measure_compile_rate()
-        assert "total" in result
-        assert "passed" in result
-        assert "failed" in result
-        assert "rate" in result
-
-    def test_with_params(self) -> None:
-        """Works with optional parameters."""
-        result = measure_compile_rate(examples_dir="/tmp/examples", verbose=True)
-        assert isinstance(result, dict)
-
-
 class TestVerifyQaChecklist:
     """Tests for verify_qa_checklist stub."""
 
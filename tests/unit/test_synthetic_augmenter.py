@@ -2,14 +2,42 @@
 
 from __future__ import annotations
 
+import re
+from collections.abc import Iterator
+
+import numpy as np
+import pytest
+from hypothesis import given
+from hypothesis import strategies as st
+
+from reprorusted_python_cli import synthetic_augmenter
+from reprorusted_python_cli.ast_features import Feature, extract_features
+from reprorusted_python_cli.ast_mutator import AST_MUTATION_TYPES
 from reprorusted_python_cli.synthetic_augmenter import (
+    MUTATION_FEATURES,
     TARANTULA_SCORES,
     AugmentedExample,
+    MutationEngine,
+    MutationSites,
     MutationStrategy,
     SyntheticAugmenter,
+    augment_codes,
+    compiles,
+    find_mutation_sites,
+    iter_augment_codes,
+    shard_rng,
 )
 
 
+def _mutate(
+    augmenter: SyntheticAugmenter, code: str, mutation_type: str | None = None
+) -> AugmentedExample:
+    """Apply a mutation that is known to have a site."""
+    example = augmenter.mutate(code, mutation_type)
+    assert example is not None
+    return example
+
+
 class TestMutationStrategy:
     """Tests for the MutationStrategy enum."""
 
@@ -112,6 +140,25 @@ class TestSyntheticAugmenter:
         aug = SyntheticAugmenter(strategy=MutationStrategy.RANDOM)
         assert aug.strategy == MutationStrategy.RANDOM
 
+    def test_mutation_types_subset(self) -> None:
+        """Batches draw only from the chosen mutation types."""
+        aug = SyntheticAugmenter(seed=0, mutation_types=["lambda", "walrus_operator"])
+        assert aug.mutation_types == ("lambda", "walrus_operator")
+        types = {e.mutation_type for e in aug.augment_batch(["x = 1"] * 20, 2)}
+        assert types == {"lambda", "walrus_operator"}
+        assert len(aug.generate_batch("x = 1", 4)) == 4
+
+    @pytest.mark.parametrize("mutation_types", [[], ["rename"]])
+    def test_invalid_mutation_types(self, mutation_types: list[str]) -> None:
+        """Empty or unknown mutation types are rejected."""
+        with pytest.raises(ValueError, match="mutation_types"):
+            SyntheticAugmenter(mutation_types=mutation_types)
+
+    def test_iter_augment_codes_validates_types_eagerly(self) -> None:
+        """Unknown types fail before the stream is read."""
+        with pytest.raises(ValueError, match="mutation_types"):
+            iter_augment_codes(["x = 1"], mutation_types=["rename"])
+
     def test_mutation_methods_exist(self) -> None:
         """All 4 mutation methods are registered."""
         aug = SyntheticAugmenter()
@@ -131,7 +178,7 @@ class TestSyntheticAugmenter:
     def test_mutate_async(self) -> None:
         """Async mutation injects async/await pattern."""
         aug = SyntheticAugmenter()
-        result = aug.mutate("def hello(): return 1", mutation_type="async_await")
+        result = _mutate(aug, "def hello(): return 1", mutation_type="async_await")
         assert isinstance(result, AugmentedExample)
         assert "async def" in result.mutated_code
         assert result.mutation_type == "async_await"
@@ -140,52 +187,52 @@ class TestSyntheticAugmenter:
     def test_mutate_generator(self) -> None:
         """Generator mutation injects yield pattern."""
         aug = SyntheticAugmenter()
-        result = aug.mutate("def gen(): return 1", mutation_type="generator")
+        result = _mutate(aug, "def gen(): return 1", mutation_type="generator")
         assert "yield" in result.mutated_code
         assert result.mutation_type == "generator"
 
     def test_mutate_lambda(self) -> None:
         """Lambda mutation appends lambda expression."""
         aug = SyntheticAugmenter()
-        result = aug.mutate("x = 1", mutation_type="lambda")
+        result = _mutate(aug, "x = 1", mutation_type="lambda")
         assert "lambda" in result.mutated_code
         assert result.mutation_type == "lambda"
 
     def test_mutate_walrus(self) -> None:
         """Walrus mutation injects walrus operator."""
         aug = SyntheticAugmenter()
-        result = aug.mutate("x = 42", mutation_type="walrus_operator")
+        result = _mutate(aug, "x = 42", mutation_type="walrus_operator")
         assert ":=" in result.mutated_code
         assert result.mutation_type == "walrus_operator"
 
     def test_mutate_has_metadata(self) -> None:
         """Mutation results include tarantula_score metadata."""
         aug = SyntheticAugmenter()
-        result = aug.mutate("def f(): return 1", mutation_type="async_await")
+        result = _mutate(aug, "def f(): return 1", mutation_type="async_await")
         assert "tarantula_score" in result.metadata
 
     def test_mutate_is_synthetic(self) -> None:
         """All mutations are marked as synthetic."""
         aug = SyntheticAugmenter()
-        result = aug.mutate("x = 1", mutation_type="lambda")
+        result = _mutate(aug, "x = 1", mutation_type="lambda")
         assert result.is_synthetic is True
 
     def test_mutate_tarantula_strategy(self) -> None:
         """Tarantula strategy selects a valid mutation type."""
         aug = SyntheticAugmenter(strategy=MutationStrategy.TARANTULA)
-        result = aug.mutate("def f(): return 1")
+        result = _mutate(aug, "def f(): return 1")
         assert result.mutation_type in aug._mutation_methods
 
     def test_mutate_random_strategy(self) -> None:
         """Random strategy selects a valid mutation type."""
         aug = SyntheticAugmenter(strategy=MutationStrategy.RANDOM)
-        result = aug.mutate("def f(): return 1")
+        result = _mutate(aug, "def f(): return 1")
         assert result.mutation_type in aug._mutation_methods
 
     def test_mutate_targeted_strategy(self) -> None:
         """Targeted strategy uses the first mutation method."""
         aug = SyntheticAugmenter(strategy=MutationStrategy.TARGETED)
-        result = aug.mutate("def f(): return 1")
+        result = _mutate(aug, "def f(): return 1")
         first_key = next(iter(aug._mutation_methods.keys()))
         assert result.mutation_type == first_key
 
@@ -265,3 +312,395 @@ class TestSyntheticAugmenter:
         aug = SyntheticAugmenter()
         result = aug._inject_walrus_pattern("print('hello')")
         assert result.mutated_code == "print('hello')"
+
+
+class TestMutationFeatures:
+    """Tests for the MUTATION_FEATURES constant."""
+
+    def test_every_mutation_has_a_feature(self) -> None:
+        """Each mutation of either engine declares the construct it injects."""
+        regex = set(SyntheticAugmenter()._mutation_methods)
+        assert set(MUTATION_FEATURES) == regex | set(AST_MUTATION_TYPES)
+
+    def test_mutants_have_their_feature(self) -> None:
+        """Mutants that parse contain the construct their mutation declares."""
+        code = "def f(x):\n    y = x\n    return y\n"
+        for example in SyntheticAugmenter().generate_batch(code, 4):
+            feature = MUTATION_FEATURES[example.mutation_type]
+            bits = extract_features(example.mutated_code)
+            assert bits & (feature | Feature.UNPARSABLE)
+
+
+def _reference_mutants(code: str) -> list[str]:
+    """Mutate ``code`` with the original per-call ``re.sub`` mutations."""
+    async_code = re.sub(r"def (\w+)\(", r"async def \1(", code, count=1)
+    if "return " in async_code:
+        async_code = async_code.replace(
+            "return ", "return await asyncio.sleep(0) or ", 1
+        )
+    return [
+        async_code,
+        re.sub(r"return (.+)", r"yield \1", code, count=1),
+        code + "\nprocess = lambda x: x * 2",
+        re.sub(r"(\w+) = (.+)", r"if (\1 := \2):", code, count=1),
+    ]
+
+
+# Fragments that create, split and overlap mutation sites.
+_FRAGMENTS = st.sampled_from(
+    ["def ", "f(", "return ", "x", " = ", "1", "\n", "    ", "(", ":", "re", "turn"]
+)
+
+
+class TestMutationSites:
+    """Tests for find_mutation_sites() and the site-indexed mutations."""
+
+    def test_sites_found(self) -> None:
+        """Each site is the leftmost match of its own pattern."""
+        sites = find_mutation_sites("x = 1\ndef f(a):\n    return a\n")
+        assert sites.assignment is not None
+        assert sites.assignment.group(0) == "x = 1"
+        assert sites.def_header is not None
+        assert sites.def_header["name"] == "f"
+        assert sites.return_statement is not None
+        assert sites.return_statement["expr"] == "a"
+        assert sites.return_keyword is not None
+        assert sites.return_keyword.start() == sites.return_statement.start()
+
+    def test_no_sites(self) -> None:
+        """Code without candidate sites has none."""
+        assert find_mutation_sites("pass") == MutationSites()
+
+    def test_bare_return_is_only_a_keyword(self) -> None:
+        """A return with nothing after it on its line is not a statement site."""
+        sites = find_mutation_sites("return \nreturn y")
+        assert sites.return_keyword is not None
+        assert sites.return_keyword.start() == 0
+        assert sites.return_statement is not None
+        assert sites.return_statement["expr"] == "y"
+
+    @given(st.lists(_FRAGMENTS, max_size=12).map("".join))
+    def test_matches_reference_mutations(self, code: str) -> None:
+        """Site-indexed mutations equal the original per-call regex rewrites."""
+        mutants = SyntheticAugmenter().generate_batch(code, 4)
+        assert [m.mutated_code for m in mutants] == _reference_mutants(code)
+
+    def test_batch_scans_once(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """A batch locates its sites with a single scan of the code."""
+        calls: list[str] = []
+
+        def counting(code: str) -> MutationSites:
+            calls.append(code)
+            return find_mutation_sites(code)
+
+        monkeypatch.setattr(synthetic_augmenter, "find_mutation_sites", counting)
+        SyntheticAugmenter().generate_batch("def f(): return 1", count=8)
+        assert calls == ["def f(): return 1"]
+
+
+class TestAugmentCodes:
+    """Tests for seeded, sharded batch augmentation."""
+
+    CODES = tuple(f"def f{i}(x):\n    y = x\n    return y\n" for i in range(10))
+
+    def test_count_per_snippet_in_order(self) -> None:
+        """Every snippet yields count examples, in input order."""
+        examples = augment_codes(self.CODES, count=3, shard_size=4)
+        assert len(examples) == 30
+        assert [e.original_code for e in examples[::3]] == list(self.CODES)
+
+    def test_seed_reproducible(self) -> None:
+        """The same seed reproduces the same mutation types."""
+        first = augment_codes(self.CODES, count=5, seed=11)
+        assert first == augment_codes(self.CODES, count=5, seed=11)
+        other = augment_codes(self.CODES, count=5, seed=12)
+        assert [e.mutation_type for e in first] != [e.mutation_type for e in other]
+
+    def test_identical_for_any_worker_count(self) -> None:
+        """Output does not depend on how shards are spread over workers."""
+        serial = augment_codes(self.CODES, count=4, seed=3, shard_size=3)
+        parallel = augment_codes(self.CODES, count=4, seed=3, workers=3, shard_size=3)
+        assert parallel == serial
+
+    def test_shards_use_own_generators(self) -> None:
+        """Each shard draws from the generator of its own index."""
+        examples = augment_codes(self.CODES[:2], count=8, seed=9, shard_size=1)
+        expected = SyntheticAugmenter(seed=shard_rng(9, 1)).augment_batch(
+            self.CODES[1:2], 8
+        )
+        assert examples[8:] == expected
+
+    def test_strategy_applies(self) -> None:
+        """Targeted augmentation always applies the first mutation."""
+        examples = augment_codes(
+            self.CODES, count=2, strategy=MutationStrategy.TARGETED
+        )
+        assert {e.mutation_type for e in examples} == {"async_await"}
+
+    def test_stream_is_read_lazily(self) -> None:
+        """Only the shards needed so far are read from the input stream."""
+        pulled: list[str] = []
+
+        def codes() -> Iterator[str]:
+            for code in self.CODES:
+                pulled.append(code)
+                yield code
+
+        stream = iter_augment_codes(codes(), count=1, shard_size=2)
+        assert pulled == []
+        next(stream)
+        assert len(pulled) == 4
+        assert list(stream)[-1].original_code == self.CODES[-1]
+
+    def test_pool_window_keeps_order(self) -> None:
+        """More shards than the pool window still come back in order."""
+        codes = [f"x{i} = {i}" for i in range(40)]
+        examples = augment_codes(codes, count=1, seed=6, workers=2, shard_size=3)
+        assert [e.original_code for e in examples] == codes
+        assert examples == augment_codes(codes, count=1, seed=6, shard_size=3)
+
+    def test_closing_stream_cancels_pending_shards(self) -> None:
+        """A consumer that stops early leaves no shards queued in the pool."""
+        codes = [f"x{i} = {i}" for i in range(40)]
+        stream = iter_augment_codes(codes, count=1, workers=2, shard_size=3)
+        assert next(stream).original_code == codes[0]
+        stream.close()
+        assert list(stream) == []
+
+    def test_validate_flags_each_example(self) -> None:
+        """With validate, every example records whether it compiles."""
+        codes = ["x = 1", "def f(): return 1"]
+        examples = augment_codes(codes, count=4, seed=1, validate=True)
+        assert [e.is_valid for e in examples] == [
+            compiles(e.mutated_code) for e in examples
+        ]
+        assert augment_codes(codes, count=1)[0].is_valid is None
+
+    def test_invalid_shard_size(self) -> None:
+        """Non-positive shard sizes raise ValueError."""
+        with pytest.raises(ValueError, match="shard_size"):
+            augment_codes(self.CODES, shard_size=0)
+
+    def test_seeded_augmenter_is_deterministic(self) -> None:
+        """Augmenters with the same seed select the same mutations."""
+        a = SyntheticAugmenter(strategy=MutationStrategy.RANDOM, seed=1)
+        b = SyntheticAugmenter(strategy=MutationStrategy.RANDOM, seed=1)
+        assert [_mutate(a, "x = 1").mutation_type for _ in range(20)] == [
+            _mutate(b, "x = 1").mutation_type for _ in range(20)
+        ]
+
+
+# Chi-square critical value for 3 degrees of freedom (4 mutation types) at
+# significance 0.001.
+_CHI2_CRITICAL_3DF = 16.266
+
+
+def _chi_square(draws: np.ndarray, probabilities: np.ndarray) -> float:
+    """Return Pearson's chi-square statistic of draws against probabilities."""
+    observed = np.bincount(draws, minlength=len(probabilities))
+    expected = probabilities * len(draws)
+    return float(((observed - expected) ** 2 / expected).sum())
+
+
+class TestSelectMutationTypes:
+    """Tests for vectorized mutation type selection."""
+
+    def _tarantula_probabilities(self, augmenter: SyntheticAugmenter) -> np.ndarray:
+        """Return the normalized Tarantula weights of the mutation types."""
+        weights = np.array([TARANTULA_SCORES[t] for t in augmenter.mutation_types])
+        return weights / weights.sum()
+
+    def test_tarantula_distribution(self) -> None:
+        """Bulk draws follow the normalized Tarantula scores."""
+        augmenter = SyntheticAugmenter(seed=0)
+        draws = augmenter.select_mutation_types(100_000)
+        probabilities = self._tarantula_probabilities(augmenter)
+        assert _chi_square(draws, probabilities) < _CHI2_CRITICAL_3DF
+
+    def test_scalar_draws_match_distribution(self) -> None:
+        """Single draws follow the same distribution as bulk draws."""
+        augmenter = SyntheticAugmenter(seed=1)
+        index = {t: i for i, t in enumerate(augmenter.mutation_types)}
+        draws = np.array(
+            [index[augmenter._select_by_tarantula()] for _ in range(20_000)]
+        )
+        probabilities = self._tarantula_probabilities(augmenter)
+        assert _chi_square(draws, probabilities) < _CHI2_CRITICAL_3DF
+
+    def test_random_distribution(self) -> None:
+        """Random strategy draws are uniform over mutation types."""
+        augmenter = SyntheticAugmenter(strategy=MutationStrategy.RANDOM, seed=2)
+        draws = augmenter.select_mutation_types(100_000)
+        assert _chi_square(draws, np.full(4, 0.25)) < _CHI2_CRITICAL_3DF
+
+    def test_targeted_always_first(self) -> None:
+        """Targeted strategy always selects the first mutation type."""
+        augmenter = SyntheticAugmenter(strategy=MutationStrategy.TARGETED)
+        assert augmenter.select_mutation_types(5).tolist() == [0] * 5
+
+    def test_draws_are_valid_indices(self) -> None:
+        """Draws index mutation_types, even at the top of the distribution."""
+        augmenter = SyntheticAugmenter(seed=3)
+        draws = augmenter.select_mutation_types(10_000)
+        assert draws.min() >= 0
+        assert draws.max() < len(augmenter.mutation_types)
+        assert augmenter._tarantula_cdf[-1] == 1.0
+
+    def test_batch_uses_bulk_draws(self) -> None:
+        """augment_batch applies the bulk-drawn types row by row."""
+        codes = ["def f(): return 1", "x = 2"]
+        expected = SyntheticAugmenter(seed=4).select_mutation_types(6)
+        examples = SyntheticAugmenter(seed=4).augment_batch(codes, 3)
+        types = SyntheticAugmenter().mutation_types
+        assert [e.mutation_type for e in examples] == [types[i] for i in expected]
+
+
+class TestIterMutations:
+    """Tests for SyntheticAugmenter.iter_mutations()."""
+
+    def test_matches_batch(self) -> None:
+        """Within one chunk, lazy mutations equal augment_batch."""
+        codes = ["def f(): return 1", "x = 2", "y = 3"]
+        lazy = SyntheticAugmenter(seed=8).iter_mutations(iter(codes), 2)
+        assert list(lazy) == SyntheticAugmenter(seed=8).augment_batch(codes, 2)
+
+    def test_chunks_are_pulled_on_demand(self) -> None:
+        """A chunk is only read when its mutations are needed."""
+        codes = iter(["x = 1"] * 5)
+        stream = SyntheticAugmenter(seed=0).iter_mutations(codes, 1, chunk_size=2)
+        assert next(stream).original_code == "x = 1"
+        assert len(list(codes)) == 3
+        assert len(list(stream)) == 1
+
+
+class TestASTEngine:
+    """Tests for SyntheticAugmenter with the AST mutation engine."""
+
+    def _augmenter(
+        self,
+        strategy: MutationStrategy = MutationStrategy.TARANTULA,
+        seed: int | None = 0,
+    ) -> SyntheticAugmenter:
+        """Return an AST-engine augmenter."""
+        return SyntheticAugmenter(strategy, seed=seed, engine=MutationEngine.AST)
+
+    def test_mutation_types(self) -> None:
+        """The AST engine draws from every AST mutation."""
+        assert self._augmenter().mutation_types == AST_MUTATION_TYPES
+
+    def test_mutate(self) -> None:
+        """Requested mutations apply their tree transform."""
+        example = _mutate(self._augmenter(), "def f(): return 1", "generator")
+        assert example.mutated_code == "def f(): yield 1"
+        assert example.metadata == {"tarantula_score": TARANTULA_SCORES["generator"]}
+
+    def test_mutate_without_site(self) -> None:
+        """A requested mutation without a site yields no example."""
+        assert self._augmenter().mutate("x = 1", "generator") is None
+
+    def test_mutate_selects_type(self) -> None:
+        """Without a valid type, mutate draws one."""
+        example = _mutate(self._augmenter(seed=1), "def f(): return 1")
+        assert example.mutation_type in AST_MUTATION_TYPES
+
+    def test_generate_batch_skips_missing_sites(self) -> None:
+        """Round-robin batches only hold mutations with a site."""
+        examples = self._augmenter().generate_batch("x = 1", 6)
+        assert [e.mutation_type for e in examples] == ["lambda", "walrus_operator"]
+
+    def test_generate_batch_without_repeats(self) -> None:
+        """Asking for more mutants than types yields each type once."""
+        examples = self._augmenter().generate_batch("def f(): return 1", 12)
+        assert [e.mutation_type for e in examples] == [
+            t for t in AST_MUTATION_TYPES if t != "walrus_operator"
+        ]
+
+    def test_augment_batch_draws_applicable_types(self) -> None:
+        """Parsable snippets get up to count distinct applicable mutants."""
+        codes = ["x = 1", "def f(:", "def f(): return 1", ""]
+        examples = self._augmenter().augment_batch(codes, 4)
+        assert [e.original_code for e in examples] == [codes[0]] * 2 + [
+            codes[2]
+        ] * 4 + [codes[3]]
+        assert {e.mutation_type for e in examples[:2]} == {
+            "lambda",
+            "walrus_operator",
+        }
+        assert len({e.mutation_type for e in examples[2:6]}) == 4
+        assert examples[6].mutation_type == "lambda"
+        assert len({e.mutated_code for e in examples}) == len(examples)
+        for example in examples:
+            compile(example.mutated_code, "<mutant>", "exec")
+
+    def test_applicable_distribution(self) -> None:
+        """First draws follow the Tarantula weights of applicable types."""
+        augmenter = self._augmenter()
+        applicable = np.zeros((20000, len(AST_MUTATION_TYPES)), dtype=bool)
+        applicable[:, [0, 2, 4, 5]] = True
+        draws = augmenter.select_applicable_types(applicable, 1).ravel()
+        weights = np.array([TARANTULA_SCORES[t] for t in AST_MUTATION_TYPES])
+        probabilities = (
+            np.where(applicable[0], weights, 0) / weights[[0, 2, 4, 5]].sum()
+        )
+        assert set(np.unique(draws)) == {0, 2, 4, 5}
+        keep = applicable[0]
+        assert (
+            _chi_square(
+                np.searchsorted(np.flatnonzero(keep), draws), probabilities[keep]
+            )
+            < _CHI2_CRITICAL_3DF
+        )
+
+    def test_applicable_without_replacement(self) -> None:
+        """Each row draws distinct applicable types, padded past them."""
+        applicable = np.array([[False, True, False, True, False, False], [False] * 6])
+        for strategy in (MutationStrategy.TARANTULA, MutationStrategy.RANDOM):
+            draws = self._augmenter(strategy).select_applicable_types(applicable, 50)
+            assert draws.shape == (2, 6)
+            assert sorted(draws[0, :2]) == [1, 3]
+            assert set(draws[0, 2:]) | set(draws[1]) == {6}
+        targeted = self._augmenter(MutationStrategy.TARGETED)
+        assert targeted.select_applicable_types(applicable, 3).tolist() == [
+            [1, 3, 6],
+            [6, 6, 6],
+        ]
+
+    def test_restricted_types(self) -> None:
+        """Only the chosen types are drawn; snippets without one are skipped."""
+        augmenter = SyntheticAugmenter(
+            seed=0, engine=MutationEngine.AST, mutation_types=["generator"]
+        )
+        examples = augmenter.augment_batch(["x = 1", "def f(): return 1"], 3)
+        assert [e.mutation_type for e in examples] == ["generator"]
+        assert {e.original_code for e in examples} == {"def f(): return 1"}
+
+    def test_augment_codes_independent_of_workers(self) -> None:
+        """AST augmentation is reproducible for any worker count."""
+        codes = [f"def f{i}(x):\n    y = x\n    return y\n" for i in range(6)]
+        serial = augment_codes(
+            codes, count=3, seed=2, shard_size=2, engine=MutationEngine.AST
+        )
+        parallel = augment_codes(
+            codes, count=3, seed=2, workers=3, shard_size=2, engine=MutationEngine.AST
+        )
+        assert parallel == serial
+        assert len(serial) == 18
+
+
+class TestCompiles:
+    """Tests for compiles()."""
+
+    @pytest.mark.parametrize(
+        "code", ["", "x = 1", "def f():\n    return 1", "s = '\\d'"]
+    )
+    def test_valid(self, code: str) -> None:
+        """Code that compiles is valid, warnings notwithstanding."""
+        assert compiles(code)
+
+    @pytest.mark.parametrize(
+        "code",
+        ["if (x := 1):", "return 1", "def f():\n    await g()", "x = 1\0", "(" * 1000],
+    )
+    def test_invalid(self, code: str) -> None:
+        """Syntax, compile-time and null-byte errors are invalid."""
+        assert not compiles(code)
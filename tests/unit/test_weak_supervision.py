@@ -2,14 +2,52 @@
 
 from __future__ import annotations
 
+import os
+import pickle
+import re
+import signal
+import threading
+import time
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+from hypothesis import given
+from hypothesis import strategies as st
+
+from reprorusted_python_cli import weak_supervision
+from reprorusted_python_cli.ast_features import Feature, feature_bitsets
+from reprorusted_python_cli.label_cache import LabelCache
+from reprorusted_python_cli.label_model import LabelModel
+from reprorusted_python_cli.synthetic_augmenter import (
+    MUTATION_FEATURES,
+    SyntheticAugmenter,
+)
 from reprorusted_python_cli.weak_supervision import (
+    _RE2_MIN_LENGTH,
+    ABSTAIN_VOTE,
+    DEFAULT_REGISTRY,
+    DEFAULT_TIME_BUDGET,
     TARANTULA_WEIGHTS,
+    UNKNOWN_VOTE,
+    CompactLabeledExample,
+    CompiledLFEngine,
     Label,
+    LabelBatch,
     LabeledExample,
     LabelingFunction,
+    LFProfile,
     WeakSupervisionLabeler,
+    format_profile,
+    load_labeling_functions,
+    pack_votes,
 )
 
+if TYPE_CHECKING:
+    from pathlib import Path
+
 
 class TestLabel:
     """Tests for the Label enum."""
@@ -109,6 +147,15 @@ class TestLabelingFunction:
         assert lf.apply("def gen(): yield 1") == Label.HIGH_RISK
         assert lf.apply("def normal(): return 1") == Label.ABSTAIN
 
+    def test_fingerprint_ignores_name_and_weight(self) -> None:
+        """Only the pattern and label determine the fingerprint."""
+        lf = LabelingFunction("a", 0.5, r"yield ", Label.HIGH_RISK)
+        assert lf.fingerprint == LabelingFunction("b", 0.1, r"yield ").fingerprint
+        assert (
+            lf.fingerprint
+            != LabelingFunction("a", 0.5, r"yield ", Label.LOW_RISK).fingerprint
+        )
+
     def test_apply_multiline(self) -> None:
         """Apply works with multiline code."""
         lf = LabelingFunction("lambda", 0.7, r"lambda ", Label.MEDIUM_RISK)
@@ -146,6 +193,55 @@ class TestLabeledExample:
         assert "test" not in ex2.lf_votes
 
 
+class TestCompactLabeledExample:
+    """Tests for the slotted, bit-packed example representation."""
+
+    CODES = ("yield 1", "x = 1", "f = lambda: (n := 0)", "with open(p) as f:")
+
+    def test_batch_examples_match_label(self) -> None:
+        """Compact examples expose the same results as label()."""
+        labeler = WeakSupervisionLabeler()
+        examples = labeler.label_batch(list(self.CODES)).to_examples(self.CODES)
+        for code, compact in zip(self.CODES, examples, strict=True):
+            full = labeler.label(code)
+            assert compact.code == code
+            assert (compact.label, compact.confidence) == (full.label, full.confidence)
+            assert compact.lf_votes == full.lf_votes
+
+    def test_code_is_optional_and_names_shared(self) -> None:
+        """Examples need not keep code and share one LF name tuple."""
+        examples = WeakSupervisionLabeler().label_batch(self.CODES).to_examples()
+        assert all(example.code is None for example in examples)
+        assert len({id(example.lf_names) for example in examples}) == 1
+
+    def test_to_compact_roundtrip(self) -> None:
+        """Converting a full example keeps its votes, code and label."""
+        labeler = WeakSupervisionLabeler()
+        names = [lf.name for lf in labeler.labeling_functions]
+        full = labeler.label(self.CODES[2])
+        compact = full.to_compact(names)
+        assert compact.lf_votes == full.lf_votes
+        assert (compact.code, compact.label) == (full.code, full.label)
+        assert LabeledExample("x", Label.LOW_RISK, 1.0).to_compact(["a"]).lf_votes == {
+            "a": Label.ABSTAIN
+        }
+
+    def test_slotted_and_frozen(self) -> None:
+        """Instances have no per-instance dict and cannot be mutated."""
+        example = CompactLabeledExample(Label.LOW_RISK, 1.0, 0, ("a",))
+        assert not hasattr(example, "__dict__")
+        with pytest.raises(AttributeError):
+            example.label = Label.HIGH_RISK  # type: ignore
+
+    def test_pack_votes(self) -> None:
+        """Packing is two bits per LF, including past one int64 of LFs."""
+        votes = np.full((3, 40), ABSTAIN_VOTE, dtype=np.int8)
+        votes[1, 0] = Label.LOW_RISK.code
+        votes[2, 39] = Label.HIGH_RISK.code
+        assert pack_votes(votes) == [0, 3, 1 << 78]
+        assert pack_votes(np.empty((0, 4), dtype=np.int8)) == []
+
+
 class TestWeakSupervisionLabeler:
     """Tests for the WeakSupervisionLabeler class."""
 
@@ -160,21 +256,15 @@ class TestWeakSupervisionLabeler:
         assert labeler.threshold == 0.7
 
     def test_default_labeling_functions(self) -> None:
-        """Has 4 built-in labeling functions."""
+        """Has one built-in labeling function per Tarantula pattern."""
         labeler = WeakSupervisionLabeler()
-        assert len(labeler.labeling_functions) == 4
+        assert len(labeler.labeling_functions) == len(TARANTULA_WEIGHTS)
 
     def test_lf_names(self) -> None:
         """Built-in LFs have expected names."""
         labeler = WeakSupervisionLabeler()
         names = {lf.name for lf in labeler.labeling_functions}
-        expected = {
-            "async_pattern",
-            "generator_pattern",
-            "lambda_pattern",
-            "context_manager_pattern",
-        }
-        assert names == expected
+        assert names == set(TARANTULA_WEIGHTS)
 
     def test_label_simple_code(self) -> None:
         """Simple code without patterns returns LOW_RISK."""
@@ -217,7 +307,7 @@ class TestWeakSupervisionLabeler:
         """Labeled result includes votes from all LFs."""
         labeler = WeakSupervisionLabeler()
         result = labeler.label("async def f(): pass")
-        assert len(result.lf_votes) == 4
+        assert len(result.lf_votes) == len(TARANTULA_WEIGHTS)
 
     def test_label_confidence_range(self) -> None:
         """Confidence is always between 0 and 1."""
@@ -296,3 +386,963 @@ class TestWeakSupervisionLabeler:
         assert isinstance(result.label, Label)
         assert isinstance(result.confidence, float)
         assert isinstance(result.lf_votes, dict)
+
+
+class TestCompiledLFEngine:
+    """Tests for the single-pass CompiledLFEngine."""
+
+    _fragments = st.sampled_from(
+        [
+            "async def ",
+            "await ",
+            "yield ",
+            "lambda ",
+            "with ",
+            ":",
+            "\n",
+            "x",
+            " ",
+            "aa",
+            "ab",
+        ]
+    )
+
+    @staticmethod
+    def _per_lf(lfs: list[LabelingFunction], code: str) -> list[Label]:
+        return [lf.apply(code) for lf in lfs]
+
+    def test_matches_per_lf_builtin(self) -> None:
+        """Engine votes equal per-LF apply for the built-in LFs."""
+        lfs = WeakSupervisionLabeler().labeling_functions
+        engine = CompiledLFEngine(lfs)
+        for code in [
+            "",
+            "x = 1",
+            "async def f(): return lambda x: x",
+            "with open('f') as fp: yield 1",
+            "def gen(): yield 1\nwith a:\n    await b",
+        ]:
+            assert engine.votes(code) == self._per_lf(lfs, code)
+
+    def test_overlapping_matches(self) -> None:
+        """LFs whose matches overlap at the same position all fire."""
+        lfs = [
+            LabelingFunction("ab", 0.5, r"ab", Label.HIGH_RISK),
+            LabelingFunction("a", 0.5, r"a", Label.MEDIUM_RISK),
+            LabelingFunction("b", 0.5, r"b", Label.LOW_RISK),
+        ]
+        engine = CompiledLFEngine(lfs)
+        assert engine.votes("ab") == [
+            Label.HIGH_RISK,
+            Label.MEDIUM_RISK,
+            Label.LOW_RISK,
+        ]
+
+    def test_anchors_and_lookbehind(self) -> None:
+        """Resuming mid-string keeps anchor and lookbehind semantics."""
+        lfs = [
+            LabelingFunction("x", 0.5, r"x", Label.HIGH_RISK),
+            LabelingFunction("start", 0.5, r"^y", Label.MEDIUM_RISK),
+            LabelingFunction("after_x", 0.5, r"(?<=x)y", Label.LOW_RISK),
+        ]
+        engine = CompiledLFEngine(lfs)
+        assert engine.votes("xy") == self._per_lf(lfs, "xy")
+        assert engine.votes("xy")[1] == Label.ABSTAIN
+
+    def test_standalone_patterns(self) -> None:
+        """Inline flags, backreferences and named groups are still honored."""
+        lfs = [
+            LabelingFunction("flag", 0.5, r"(?i)ASYNC", Label.HIGH_RISK),
+            LabelingFunction("backref", 0.5, r"(\w)\1", Label.MEDIUM_RISK),
+            LabelingFunction("named", 0.5, r"(?P<n>lambda)", Label.MEDIUM_RISK),
+            LabelingFunction("plain", 0.5, r"yield", Label.HIGH_RISK),
+        ]
+        engine = CompiledLFEngine(lfs)
+        code = "async def f(): aa = lambda: (yield)"
+        assert engine.votes(code) == self._per_lf(lfs, code)
+        assert all(v != Label.ABSTAIN for v in engine.votes(code))
+
+    def test_empty_engine(self) -> None:
+        """An engine without LFs returns no votes."""
+        assert CompiledLFEngine([]).votes("async def f(): pass") == []
+
+    def test_labeler_rebuilds_engine(self) -> None:
+        """Appending an LF to the labeler rebuilds its engine."""
+        labeler = WeakSupervisionLabeler()
+        first = labeler.engine
+        labeler.labeling_functions.append(
+            LabelingFunction("walrus", 0.85, r":=", Label.HIGH_RISK)
+        )
+        assert labeler.engine is not first
+        assert labeler.label("if (n := 1): pass").lf_votes["walrus"] == (
+            Label.HIGH_RISK
+        )
+
+    @given(st.lists(_fragments, max_size=12).map("".join))
+    def test_property_identical_to_per_lf(self, code: str) -> None:
+        """Engine votes equal per-LF apply on arbitrary fragment mixes."""
+        lfs = [
+            *WeakSupervisionLabeler().labeling_functions,
+            LabelingFunction("ab", 0.5, r"(a)+b", Label.LOW_RISK),
+            LabelingFunction("colon_end", 0.5, r":$", Label.LOW_RISK),
+            LabelingFunction("empty", 0.5, r"x*", Label.LOW_RISK),
+        ]
+        assert CompiledLFEngine(lfs).votes(code) == self._per_lf(lfs, code)
+
+
+class TestLabelBatch:
+    """Tests for columnar batch labeling."""
+
+    _codes = (
+        "x = 1",
+        "async def f(): await g()",
+        "def g(): yield 1",
+        "f = lambda x: x",
+        "with open('f') as fp: pass",
+        "async def f(): return lambda x: x",
+        "",
+    )
+
+    def test_label_codes_roundtrip(self) -> None:
+        """Label codes decode back to the same label."""
+        for label in Label:
+            assert Label.from_code(label.code) is label
+        assert Label.ABSTAIN.code == ABSTAIN_VOTE
+
+    def test_shapes_and_dtypes(self) -> None:
+        """Batch arrays have one row per example and compact dtypes."""
+        batch = WeakSupervisionLabeler().label_batch(self._codes)
+        assert isinstance(batch, LabelBatch)
+        assert len(batch) == len(self._codes)
+        assert batch.votes.shape == (len(self._codes), len(TARANTULA_WEIGHTS))
+        assert batch.votes.dtype == np.int8
+        assert batch.labels.dtype == np.int8
+        assert batch.confidence.dtype == np.float64
+
+    def test_matches_label(self) -> None:
+        """Batch results equal per-example label() results."""
+        labeler = WeakSupervisionLabeler()
+        batch = labeler.label_batch(self._codes)
+        for row, code in enumerate(self._codes):
+            expected = labeler.label(code)
+            assert batch.to_labels()[row] == expected.label
+            assert batch.confidence[row] == expected.confidence
+            decoded = {
+                name: Label.from_code(int(vote))
+                for name, vote in zip(batch.lf_names, batch.votes[row], strict=True)
+            }
+            assert decoded == expected.lf_votes
+
+    def test_stats_match_label(self) -> None:
+        """Batch stats equal the stats of labeling one by one."""
+        batch_labeler = WeakSupervisionLabeler()
+        batch_labeler.label_batch(self._codes)
+        row_labeler = WeakSupervisionLabeler()
+        for code in self._codes:
+            row_labeler.label(code)
+        assert batch_labeler.get_stats() == row_labeler.get_stats()
+
+    def test_accepts_pandas_series(self) -> None:
+        """A pandas Series is accepted."""
+        batch = WeakSupervisionLabeler().label_batch(pd.Series(self._codes))
+        assert len(batch) == len(self._codes)
+
+    def test_accepts_pyarrow_arrays(self) -> None:
+        """Pyarrow arrays and chunked arrays are accepted."""
+        labeler = WeakSupervisionLabeler()
+        flat = labeler.label_batch(pa.array(list(self._codes)))
+        chunked = labeler.label_batch(
+            pa.chunked_array([list(self._codes[:3]), list(self._codes[3:])])
+        )
+        assert flat.labels.tolist() == chunked.labels.tolist()
+
+    def test_accepts_generator_and_nulls(self) -> None:
+        """Generators work and missing values are labeled as empty code."""
+        batch = WeakSupervisionLabeler().label_batch(c for c in [None, "yield 1"])
+        assert batch.to_labels() == [Label.LOW_RISK, Label.HIGH_RISK]
+
+    def test_empty_batch(self) -> None:
+        """An empty input yields empty arrays."""
+        batch = WeakSupervisionLabeler().label_batch([])
+        assert len(batch) == 0
+        assert batch.votes.shape == (0, len(TARANTULA_WEIGHTS))
+
+    def test_prior_votes_are_kept(self) -> None:
+        """Known prior cells are copied as-is, even if LFs would disagree."""
+        labeler = WeakSupervisionLabeler()
+        prior = np.full((2, len(TARANTULA_WEIGHTS)), ABSTAIN_VOTE, dtype=np.int8)
+        prior[0, 0] = Label.HIGH_RISK.code
+        batch = labeler.label_batch(["x = 1", "def g(): yield 1"], prior=prior)
+        assert batch.votes.tolist() == prior.tolist()
+        assert batch.to_labels() == [Label.HIGH_RISK, Label.LOW_RISK]
+
+    def test_prior_unknown_cells_are_evaluated(self) -> None:
+        """Unknown prior cells are filled with fresh votes for list and Arrow input."""
+        labeler = WeakSupervisionLabeler()
+        codes = list(self._codes)
+        full = labeler.label_batch(codes)
+        prior = full.votes.copy()
+        prior[::2, 1] = UNKNOWN_VOTE
+        prior[1, :] = UNKNOWN_VOTE
+        for source in (codes, pa.array(codes)):
+            batch = labeler.label_batch(source, prior=prior)
+            assert batch.votes.tolist() == full.votes.tolist()
+            assert batch.labels.tolist() == full.labels.tolist()
+        assert (prior[1] == UNKNOWN_VOTE).all()
+
+    def test_prior_without_unknowns(self) -> None:
+        """A complete prior skips LF evaluation entirely."""
+        labeler = WeakSupervisionLabeler()
+        full = labeler.label_batch(list(self._codes))
+        batch = labeler.label_batch([""] * len(self._codes), prior=full.votes)
+        assert batch.labels.tolist() == full.labels.tolist()
+
+    def test_zero_weight_confidence(self) -> None:
+        """Votes with zero total weight fall back to 0.5 like label()."""
+        labeler = WeakSupervisionLabeler()
+        labeler.labeling_functions = [
+            LabelingFunction("zero", 0.0, r"x", Label.MEDIUM_RISK)
+        ]
+        batch = labeler.label_batch(["x"])
+        assert batch.confidence.tolist() == [labeler.label("x").confidence]
+        assert batch.to_labels() == [labeler.label("x").label]
+
+    def test_aggregate_predicts_without_counting(self) -> None:
+        """aggregate() labels hypothetical votes and leaves stats untouched."""
+        labeler = WeakSupervisionLabeler()
+        batch = labeler.label_batch(list(self._codes))
+        stats = labeler.get_stats()
+        labels, confidence = labeler.aggregate(batch.votes)
+        assert labels.tolist() == batch.labels.tolist()
+        assert confidence.tolist() == batch.confidence.tolist()
+        assert labeler.get_stats() == stats
+
+
+class TestArrowEngine:
+    """Tests for Arrow-native LF evaluation."""
+
+    def test_matches_python_path(self) -> None:
+        """Arrow votes equal Python votes for portable and fallback LFs."""
+        lfs = [
+            *WeakSupervisionLabeler().labeling_functions,
+            LabelingFunction("walrus", 0.85, r"\w+ := ", Label.HIGH_RISK),
+            LabelingFunction("colon_eol", 0.5, r":$", Label.LOW_RISK),
+            LabelingFunction("after_def", 0.5, r"(?<=def )f", Label.LOW_RISK),
+        ]
+        codes = [
+            "async def f(): return lambda x: x",
+            "if (n := 1):",
+            "with a:\n",
+            "déf",
+            "",
+            None,
+        ]
+        engine = CompiledLFEngine(lfs)
+        arrow = engine.vote_matrix_arrow(pa.chunked_array([codes[:2], codes[2:]]))
+        python = engine.vote_matrix([code or "" for code in codes])
+        assert arrow.tolist() == python.tolist()
+
+    def test_parses_only_rows_spelling_constructs(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Rows without construct keywords or AST LF patterns are not parsed."""
+        parsed: list[str] = []
+
+        def spy(codes: list[str]) -> np.ndarray:
+            parsed.extend(codes)
+            return feature_bitsets(codes)
+
+        monkeypatch.setattr(weak_supervision, "feature_bitsets", spy)
+        codes = ["x = 1", "yield", "def f(:", "f = lambda: 0", "print(2)"]
+        engine = CompiledLFEngine(WeakSupervisionLabeler().labeling_functions)
+        arrow = engine.vote_matrix_arrow(pa.array(codes))
+        assert parsed == ["yield", "f = lambda: 0"]
+        assert arrow.tolist() == engine.vote_matrix(codes).tolist()
+
+    def test_non_portable_ast_pattern_parses_every_row(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Without an RE2 prefilter for an AST LF, every row is parsed."""
+        parsed: list[str] = []
+
+        def spy(codes: list[str]) -> np.ndarray:
+            parsed.extend(codes)
+            return feature_bitsets(codes)
+
+        monkeypatch.setattr(weak_supervision, "feature_bitsets", spy)
+        lf = LabelingFunction(
+            "gen", 0.9, r"(?<=\s)yield", Label.HIGH_RISK, feature=Feature.GENERATOR
+        )
+        engine = CompiledLFEngine([lf])
+        arrow = engine.vote_matrix_arrow(pa.array(["x = 1", "def f(: yield"]))
+        assert parsed == ["x = 1", "def f(: yield"]
+        assert arrow.tolist() == [[-1], [0]]
+
+    def test_null_matches_like_empty(self) -> None:
+        """Nulls are matched as empty strings."""
+        lfs = [LabelingFunction("empty", 0.5, r"x*", Label.LOW_RISK)]
+        engine = CompiledLFEngine(lfs)
+        assert engine.vote_matrix_arrow(pa.array([None], pa.string())).tolist() == [
+            [Label.LOW_RISK.code]
+        ]
+
+    def test_re2_portability(self) -> None:
+        """Only patterns with identical RE2 semantics run on Arrow kernels."""
+        engine = CompiledLFEngine(
+            [
+                LabelingFunction("plain", 0.5, r"async def|await "),
+                LabelingFunction("escaped", 0.5, r"a\\d"),
+                LabelingFunction("word", 0.5, r"\w"),
+                LabelingFunction("flags", 0.5, r"(?i)async"),
+                LabelingFunction("backref", 0.5, r"(a)\1"),
+            ]
+        )
+        engine.vote_matrix_arrow(pa.array(["a"]))
+        assert engine._re2_portable == [True, True, False, False, False]
+
+
+class TestLabelerCache:
+    """Tests for the labeler's vote cache."""
+
+    def test_no_cache_stats(self) -> None:
+        """Cache counters are only reported when a cache is configured."""
+        assert "cache_hits" not in WeakSupervisionLabeler().get_stats()
+
+    def test_label_hits(self) -> None:
+        """Repeated code is served from the cache with identical results."""
+        labeler = WeakSupervisionLabeler(cache=LabelCache())
+        first = labeler.label("async def f(): return lambda x: x")
+        second = labeler.label("async def f(): return lambda x: x")
+        assert first == second
+        stats = labeler.get_stats()
+        assert (stats["cache_hits"], stats["cache_misses"]) == (1, 1)
+        assert stats["total_labeled"] == 2
+        assert stats["conflicts"] == 1.0
+
+    def test_weights_applied_after_lookup(self) -> None:
+        """Changing weights reuses cached votes but changes the label."""
+        cache = LabelCache()
+        code = "async def f(): return lambda x: x"
+        WeakSupervisionLabeler(cache=cache).label(code)
+        labeler = WeakSupervisionLabeler(cache=cache)
+        for lf in labeler.labeling_functions:
+            if lf.label == Label.HIGH_RISK:
+                lf.weight = 0.1
+        assert labeler.label(code).label == Label.MEDIUM_RISK
+        assert cache.hits == 1
+
+    def test_lf_change_misses(self) -> None:
+        """Changing the LF set invalidates cached votes."""
+        cache = LabelCache()
+        WeakSupervisionLabeler(cache=cache).label("x := 1")
+        labeler = WeakSupervisionLabeler(cache=cache)
+        labeler.labeling_functions.append(
+            LabelingFunction("walrus", 0.85, r":=", Label.HIGH_RISK)
+        )
+        assert labeler.label("x := 1").label == Label.HIGH_RISK
+        assert cache.hits == 0
+
+    def test_batch_matches_uncached(self) -> None:
+        """Cached batch labeling equals uncached labeling, list and Arrow."""
+        codes = ["x = 1", "yield 1", "x = 1", None, "lambda x: x"]
+        expected = WeakSupervisionLabeler().label_batch(codes)
+        labeler = WeakSupervisionLabeler(cache=LabelCache())
+        for source in (codes, pa.array(codes), codes):
+            batch = labeler.label_batch(source)
+            assert batch.votes.tolist() == expected.votes.tolist()
+            assert batch.labels.tolist() == expected.labels.tolist()
+        stats = labeler.get_stats()
+        assert stats["cache_misses"] == 4
+        assert stats["cache_hits"] == 11
+
+    def test_prior_unknowns_from_cache(self) -> None:
+        """Rows with unknown prior cells are looked up, list and Arrow."""
+        codes = ["x = 1", "yield 1", None, "yield 1"]
+        expected = WeakSupervisionLabeler().label_batch(codes)
+        prior = expected.votes.copy()
+        prior[1:, 0] = UNKNOWN_VOTE
+        labeler = WeakSupervisionLabeler(cache=LabelCache())
+        for source in (codes, pa.array(codes)):
+            batch = labeler.label_batch(source, prior=prior)
+            assert batch.votes.tolist() == expected.votes.tolist()
+        stats = labeler.get_stats()
+        assert (stats["cache_hits"], stats["cache_misses"]) == (4, 2)
+
+    def test_batch_then_label(self) -> None:
+        """Votes cached by label_batch are served to label()."""
+        labeler = WeakSupervisionLabeler(cache=LabelCache())
+        labeler.label_batch(["with a: pass"])
+        assert labeler.label("with a: pass").label == Label.MEDIUM_RISK
+        assert labeler.get_stats()["cache_hits"] == 1
+
+
+class TestMergeStats:
+    """Tests for mergeable labeling counters."""
+
+    def test_merge_equals_single_labeler(self) -> None:
+        """Merging shard counters reproduces single-labeler stats."""
+        codes = ["x = 1", "async def f(): return lambda x: x", "yield 1", ""]
+        whole = WeakSupervisionLabeler()
+        whole.label_batch(codes)
+        merged = WeakSupervisionLabeler()
+        for shard in (codes[:1], codes[1:3], codes[3:]):
+            worker = WeakSupervisionLabeler()
+            worker.label_batch(shard)
+            merged.merge_stats(worker.counters)
+        assert merged.get_stats() == whole.get_stats()
+
+    def test_counters_are_a_copy(self) -> None:
+        """Mutating returned counters does not affect the labeler."""
+        labeler = WeakSupervisionLabeler()
+        labeler.counters["labeled"] = 10
+        assert labeler.get_stats()["total_labeled"] == 0
+
+    def test_merged_cache_counters_reported(self) -> None:
+        """Cache counters merged from workers appear without a local cache."""
+        worker = WeakSupervisionLabeler(cache=LabelCache())
+        worker.label_batch(["x = 1", "x = 1"])
+        parent = WeakSupervisionLabeler()
+        parent.merge_stats(worker.counters)
+        stats = parent.get_stats()
+        assert (stats["cache_hits"], stats["cache_misses"]) == (1, 1)
+
+
+class TestLabelModelAggregation:
+    """Tests for aggregating votes with a fitted label model."""
+
+    _codes = (
+        "async def f(): await g()",
+        "def g(): yield 1",
+        "f = lambda x: x",
+        "async def f(): return lambda x: x",
+        "x = 1",
+    )
+
+    def _labeler(self) -> WeakSupervisionLabeler:
+        votes = WeakSupervisionLabeler().label_batch(self._codes).votes
+        return WeakSupervisionLabeler(label_model=LabelModel().fit(votes))
+
+    def test_batch_uses_model(self) -> None:
+        """Batch labels and confidences come from the label model."""
+        labeler = self._labeler()
+        batch = labeler.label_batch(self._codes)
+        assert labeler.label_model is not None
+        labels, confidence = labeler.label_model.predict(batch.votes)
+        assert batch.labels.tolist() == labels.tolist()
+        assert batch.confidence.tolist() == confidence.tolist()
+
+    def test_label_matches_batch(self) -> None:
+        """Per-example labels equal batch labels under the model."""
+        labeler = self._labeler()
+        batch = labeler.label_batch(self._codes)
+        for row, code in enumerate(self._codes):
+            result = labeler.label(code)
+            assert result.label == batch.to_labels()[row]
+            assert result.confidence == batch.confidence[row]
+
+    def test_abstentions_keep_default(self) -> None:
+        """Rows with no votes stay LOW_RISK with full confidence."""
+        result = self._labeler().label("x = 1")
+        assert result.label == Label.LOW_RISK
+        assert result.confidence == 1.0
+
+
+class TestRegexSafety:
+    """Tests for LF pattern validation, rewriting and time budgets."""
+
+    # Exponential on a run of "a" with no "c": every split is tried. The
+    # branches overlap without starting alike, so validation lets it pass.
+    _SLOW = r"(?:a|.)*c"
+
+    def test_nested_quantifiers_rejected(self) -> None:
+        """Nested quantifiers that can backtrack exponentially are rejected."""
+        for pattern in (
+            r"(a+b)+",
+            r"(\w+\s?)*:",
+            r"(?:x|y+)*",
+            r"(a{1,3})+",
+            r"(a{2,}b){3,}",
+        ):
+            with pytest.raises(ValueError, match="nests quantifiers"):
+                LabelingFunction("bad", 0.5, pattern)
+
+    def test_overlapping_alternation_rejected(self) -> None:
+        """Repeated alternatives that start alike are rejected."""
+        for pattern in (r"(a|a)*", r"(?:x|xy)+z", r"(\s|\s ?){2,}", r"([ab]|[ab]c)*"):
+            with pytest.raises(ValueError, match="overlapping alternatives"):
+                LabelingFunction("bad", 0.5, pattern)
+        for pattern in (
+            r"(?:a|b)*c",
+            r"(?>a|ab)*",
+            r"(a|ab)",
+            r"(?:|a)*c",
+            r"async def|await ",
+        ):
+            assert LabelingFunction("ok", 0.5, pattern).safe_pattern == pattern
+
+    def test_safe_nesting_allowed(self) -> None:
+        """Possessive, atomic and bounded inner repeats are accepted as is."""
+        for pattern in (r"(?:a++b)+", r"(?>a+b)+", r"(ab){2}", r"\(a+\)+", r"with .+:"):
+            assert LabelingFunction("ok", 0.5, pattern).safe_pattern == pattern
+
+    @given(st.text(alphabet="ab:", max_size=30))
+    def test_collapsed_nesting_is_equivalent(self, code: str) -> None:
+        """Collapsed patterns match exactly where the originals do."""
+        for pattern in (r"(a+)+:", r"(a*)*:", r"([ab]+)*:", r"(?:b*)+a"):
+            lf = LabelingFunction("lf", 0.5, pattern)
+            assert lf.safe_pattern != pattern
+            expected = re.search(pattern, code) is not None
+            assert (lf.apply(code) != Label.ABSTAIN) == expected
+
+    def test_long_rows_use_re2(self) -> None:
+        """Rows past the RE2 threshold vote like short rows, in linear time."""
+        labeler = WeakSupervisionLabeler()
+        engine = labeler.engine
+        hostile = "with " * (_RE2_MIN_LENGTH // 2)
+        matching = "x = 1\n" * _RE2_MIN_LENGTH + "async def f(): yield 1"
+        started = time.perf_counter()
+        matrix = engine.vote_matrix([hostile, matching, "yield 1"])
+        assert time.perf_counter() - started < 1.0
+        assert matrix.tolist() == [
+            [-1, -1, -1, -1, -1, -1, -1],
+            [0, 0, -1, -1, -1, -1, -1],
+            [-1, 0, -1, -1, -1, -1, -1],
+        ]
+        assert engine.votes(matching) == [Label.HIGH_RISK] * 2 + [Label.ABSTAIN] * 5
+
+    def test_budget_records_abstain(self) -> None:
+        """LFs overrunning the budget abstain and are counted; others still vote."""
+        labeler = WeakSupervisionLabeler(time_budget=0.05)
+        labeler.labeling_functions.append(
+            LabelingFunction("slow", 0.9, self._SLOW, Label.MEDIUM_RISK)
+        )
+        code = "yield " + "a" * 40
+        result = labeler.label(code)
+        assert result.lf_votes["slow"] == Label.ABSTAIN
+        assert result.lf_votes["generator_pattern"] == Label.HIGH_RISK
+        batch = labeler.label_batch([code, "ac"])
+        assert batch.votes[:, -1].tolist() == [ABSTAIN_VOTE, Label.MEDIUM_RISK.code]
+        assert labeler.get_stats()["timeouts"] == 2
+
+    def test_budget_in_fallback_rows_and_prior(self) -> None:
+        """Budgets also apply to non-RE2 LFs and to recomputed prior cells."""
+        labeler = WeakSupervisionLabeler(time_budget=0.05)
+        labeler.labeling_functions.append(
+            LabelingFunction("slow", 0.9, r"(?<=x)" + self._SLOW)
+        )
+        codes = ["x" + "a" * 40, "xac"]
+        batch = labeler.label_batch(pa.array(codes))
+        assert batch.votes[:, -1].tolist() == [ABSTAIN_VOTE, Label.HIGH_RISK.code]
+        prior = np.full((2, len(labeler.labeling_functions)), ABSTAIN_VOTE, np.int8)
+        prior[:, -1] = UNKNOWN_VOTE
+        labeler.label_batch(codes, prior=prior)
+        assert labeler.counters["timeouts"] == 2
+
+    def test_no_budget(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """By default nothing is timed and no timeouts are reported."""
+        calls: list[object] = []
+        monkeypatch.setattr(signal, "setitimer", lambda *args: calls.append(args))
+        labeler = WeakSupervisionLabeler()
+        labeler.label_batch(["yield 1", "x = 1"])
+        assert labeler.engine.time_budget is None
+        assert calls == []
+        assert "timeouts" not in labeler.get_stats()
+
+    def test_outer_timer_restored(self) -> None:
+        """A timer armed by the caller keeps running across labeling."""
+        fired: list[int] = []
+        previous = signal.signal(signal.SIGALRM, lambda signum, frame: fired.append(1))
+        try:
+            signal.setitimer(signal.ITIMER_REAL, 0.3)
+            labeler = WeakSupervisionLabeler(time_budget=DEFAULT_TIME_BUDGET)
+            labeler.label_batch(["yield 1"] * 10)
+            assert 0 < signal.getitimer(signal.ITIMER_REAL)[0] <= 0.3
+            time.sleep(0.4)
+            assert fired == [1]
+        finally:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+
+    def test_worker_threads_label_without_timers(self) -> None:
+        """Outside the main thread labeling works, without a budget."""
+        results: list[Label] = []
+        thread = threading.Thread(
+            target=lambda: results.append(
+                WeakSupervisionLabeler(time_budget=DEFAULT_TIME_BUDGET)
+                .label("yield 1")
+                .label
+            )
+        )
+        thread.start()
+        thread.join()
+        assert results == [Label.HIGH_RISK]
+
+
+class TestLFProfiling:
+    """Tests for per-LF evaluation counters."""
+
+    CODES = ("yield 1", "x = 1", "async def f(): await g()", "é = 1")
+
+    def test_disabled_by_default(self) -> None:
+        """Without profiling no per-LF counters are collected."""
+        labeler = WeakSupervisionLabeler()
+        labeler.label_batch(self.CODES)
+        assert labeler.lf_profiles() == {}
+        assert not any(key.startswith("lf.") for key in labeler.get_stats())
+
+    def test_counts_calls_matches_and_bytes(self) -> None:
+        """Every LF counts every example, its matches and the bytes scanned."""
+        labeler = WeakSupervisionLabeler(profile=True)
+        batch = labeler.label_batch(self.CODES)
+        labeler.label("yield 2")
+        profiles = labeler.lf_profiles()
+        size = sum(len(code.encode()) for code in [*self.CODES, "yield 2"])
+        assert list(profiles) == [lf.name for lf in labeler.labeling_functions]
+        for j, (name, profile) in enumerate(profiles.items()):
+            assert profile.calls == 5
+            assert profile.bytes_scanned == size
+            assert profile.time_ns > 0
+            fired = int((batch.votes[:, j] != ABSTAIN_VOTE).sum())
+            assert profile.matches == fired + (name == "generator_pattern")
+        stats = labeler.get_stats()
+        assert stats["lf.generator_pattern.matches"] == 2
+        assert stats["lf.generator_pattern.seconds"] > 0
+
+    def test_votes_unchanged(self) -> None:
+        """Profiled labeling produces the same votes as the merged scan."""
+        plain = WeakSupervisionLabeler().label_batch(self.CODES)
+        profiled = WeakSupervisionLabeler(profile=True).label_batch(self.CODES)
+        assert (plain.votes == profiled.votes).all()
+
+    def test_arrow_path(self) -> None:
+        """Arrow kernels are profiled per LF like the Python path."""
+        python = WeakSupervisionLabeler(profile=True)
+        python.label_batch(self.CODES)
+        arrow = WeakSupervisionLabeler(profile=True)
+        arrow.label_batch(pa.array(self.CODES))
+        for name, profile in arrow.lf_profiles().items():
+            expected = python.lf_profiles()[name]
+            assert (profile.calls, profile.matches, profile.bytes_scanned) == (
+                expected.calls,
+                expected.matches,
+                expected.bytes_scanned,
+            )
+
+    def test_prior_profiles_evaluated_lfs_only(self) -> None:
+        """With prior votes only the re-evaluated LFs are counted."""
+        labeler = WeakSupervisionLabeler(profile=True)
+        prior = np.full((2, len(TARANTULA_WEIGHTS)), ABSTAIN_VOTE, dtype=np.int8)
+        prior[:, 1] = UNKNOWN_VOTE
+        labeler.label_batch(["yield 1", "x = 1"], prior=prior)
+        assert list(labeler.lf_profiles()) == ["generator_pattern"]
+        assert labeler.lf_profiles()["generator_pattern"].matches == 1
+
+    def test_merge_sums_profiles(self) -> None:
+        """Worker profiles merge by summing each counter."""
+        parent = WeakSupervisionLabeler()
+        for shard in (self.CODES[:2], self.CODES[2:]):
+            worker = WeakSupervisionLabeler(profile=True)
+            worker.label_batch(shard)
+            parent.merge_stats(worker.counters)
+        assert parent.lf_profiles()["generator_pattern"].calls == len(self.CODES)
+
+    def test_format_profile(self) -> None:
+        """The report ranks LFs by time and handles empty profiles."""
+        table = format_profile(
+            {"idle": LFProfile(), "busy": LFProfile(calls=2, time_ns=5)}
+        )
+        rows = table.splitlines()
+        assert rows[1].startswith("busy")
+        assert rows[2].split()[1:] == ["0.0", "0.0%", "0.0", "0.0%"]
+
+
+class TestASTLabelingFunctions:
+    """Tests for LFs voting on the shared AST feature bitset."""
+
+    CODES = (
+        "s = 'yield x'  # lambda y: y",
+        "async def f():\n    await g()",
+        "with open(p) as f:",
+        "try:\n    x = 1\nexcept ValueError:\n    raise",
+        "class A:\n    f = lambda self: (n := 1)",
+        "x = 1\0",
+        "",
+    )
+
+    def test_default_lfs_are_ast_backed(self) -> None:
+        """Every built-in LF reads a feature, labeled by its weight band."""
+        for lf in WeakSupervisionLabeler().labeling_functions:
+            assert lf.feature is not None
+            expected = (
+                Label.HIGH_RISK
+                if lf.weight >= 0.8
+                else Label.MEDIUM_RISK
+                if lf.weight >= 0.6
+                else Label.LOW_RISK
+            )
+            assert lf.label == expected
+
+    def test_strings_and_comments_do_not_fire(self) -> None:
+        """Keywords outside code no longer trigger HIGH_RISK votes."""
+        result = WeakSupervisionLabeler().label(self.CODES[0])
+        assert set(result.lf_votes.values()) == {Label.ABSTAIN}
+
+    def test_unparsable_code_falls_back_to_regex(self) -> None:
+        """Code that does not parse is labeled by the LF patterns."""
+        result = WeakSupervisionLabeler().label(self.CODES[2])
+        assert result.lf_votes["context_manager_pattern"] == Label.MEDIUM_RISK
+        lf = LabelingFunction("gen", 0.9, r"yield ", feature=Feature.GENERATOR)
+        assert lf.apply("yield x +") == Label.HIGH_RISK
+
+    def test_one_parse_per_example(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """All AST LFs share a single parse of each example."""
+        calls: list[str] = []
+        original = weak_supervision.extract_features
+
+        def spy(code: str) -> int:
+            calls.append(code)
+            return original(code)
+
+        monkeypatch.setattr(weak_supervision, "extract_features", spy)
+        labeler = WeakSupervisionLabeler()
+        labeler.label_batch(list(self.CODES))
+        labeler.label(self.CODES[1])
+        assert calls == [*self.CODES, self.CODES[1]]
+
+    def test_paths_agree(self) -> None:
+        """Python, Arrow and per-LF evaluation give the same votes."""
+        labeler = WeakSupervisionLabeler()
+        labeler.labeling_functions += [
+            LabelingFunction("cls_b", 0.6, r"\bclass\b", feature=Feature.CLASS),
+            LabelingFunction("cls_ref", 0.6, r"(c)lass", feature=Feature.CLASS),
+        ]
+        codes = [*self.CODES, "class B(", "x = 'class'"]
+        expected = [
+            [lf.apply(code).code for lf in labeler.labeling_functions] for code in codes
+        ]
+        assert labeler.label_batch(codes).votes.tolist() == expected
+        assert labeler.label_batch(pa.array(codes)).votes.tolist() == expected
+        profiled = WeakSupervisionLabeler(profile=True)
+        profiled.labeling_functions = labeler.labeling_functions
+        assert profiled.label_batch(codes).votes.tolist() == expected
+        assert profiled.label_batch(pa.array(codes)).votes.tolist() == expected
+
+    def test_profiles_share_parse(self) -> None:
+        """AST LFs are each charged one call and their match per example."""
+        labeler = WeakSupervisionLabeler(profile=True)
+        labeler.labeling_functions.append(LabelingFunction("plain", 0.5, r"class"))
+        labeler.label_batch(["class A: pass", "class B("])
+        for name in ("class_pattern", "plain"):
+            profile = labeler.lf_profiles()[name]
+            assert (profile.calls, profile.matches) == (2, 2)
+            assert profile.time_ns > 0
+        engine = CompiledLFEngine([LabelingFunction("plain", 0.5, r"x")], profile=True)
+        engine.vote_matrix(["x", "y"])
+        assert (engine.profiles[0].calls, engine.profiles[0].matches) == (2, 1)
+
+    def test_fingerprint_covers_feature(self) -> None:
+        """Switching an LF between regex and AST invalidates its votes."""
+        regex = LabelingFunction("gen", 0.9, r"yield ")
+        ast_lf = LabelingFunction("gen", 0.9, r"yield ", feature=Feature.GENERATOR)
+        assert regex.fingerprint != ast_lf.fingerprint
+        assert (
+            CompiledLFEngine([regex]).fingerprint
+            != CompiledLFEngine([ast_lf]).fingerprint
+        )
+
+
+class TestLabelingFunctionRegistry:
+    """Tests for YAML LF registries and shippable compiled engines."""
+
+    REGISTRY = """
+labeling_functions:
+  - name: prints
+    weight: 0.3
+    pattern: "print[(]"
+    label: LOW_RISK
+  - {name: gen, weight: 0.9, pattern: "yield ", label: HIGH_RISK, feature: GENERATOR}
+"""
+
+    def _write(self, tmp_path: Path, text: str) -> Path:
+        """Write a registry file and return its path."""
+        path = tmp_path / "lfs.yaml"
+        path.write_text(text)
+        return path
+
+    def test_default_registry(self) -> None:
+        """The built-in registry holds the Tarantula table and is parsed once."""
+        lfs = load_labeling_functions()
+        assert {lf.name: lf.weight for lf in lfs} == TARANTULA_WEIGHTS
+        assert load_labeling_functions(DEFAULT_REGISTRY)[0] is lfs[0]
+
+    def test_custom_registry(self, tmp_path: Path) -> None:
+        """A labeler can be built from any registry file."""
+        labeler = WeakSupervisionLabeler(registry=self._write(tmp_path, self.REGISTRY))
+        assert [lf.name for lf in labeler.labeling_functions] == ["prints", "gen"]
+        assert labeler.labeling_functions[0].feature is None
+        result = labeler.label("print(1)")
+        assert result.lf_votes == {"prints": Label.LOW_RISK, "gen": Label.ABSTAIN}
+
+    def test_edited_registry_is_reloaded(self, tmp_path: Path) -> None:
+        """Editing a registry file takes effect on the next load."""
+        path = self._write(tmp_path, self.REGISTRY)
+        assert load_labeling_functions(path)[0].weight == 0.3
+        path.write_text(self.REGISTRY.replace("0.3", "0.2"))
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        assert load_labeling_functions(path)[0].weight == 0.2
+
+    def test_labelers_own_their_lfs(self) -> None:
+        """Tuning one labeler's weights leaves other labelers alone."""
+        WeakSupervisionLabeler().labeling_functions[0].weight = 0.0
+        assert WeakSupervisionLabeler().labeling_functions[0].weight > 0
+
+    @pytest.mark.parametrize(
+        ("text", "match"),
+        [
+            ("- a", "labeling_functions"),
+            ("labeling_functions: {}", "labeling_functions"),
+            ("labeling_functions: [{name: a}]", "need name"),
+            (
+                "labeling_functions: [{name: a, weight: 1, pattern: x, label: BAD}]",
+                "unknown label",
+            ),
+            (
+                "labeling_functions: [{name: a, weight: 1, pattern: x,"
+                " label: LOW_RISK, feature: BAD}]",
+                "unknown label or feature",
+            ),
+            (
+                "labeling_functions:\n"
+                "  - {name: a, weight: 1, pattern: x, label: LOW_RISK}\n"
+                "  - {name: a, weight: 1, pattern: y, label: LOW_RISK}",
+                "duplicate",
+            ),
+        ],
+    )
+    def test_invalid_registry(self, tmp_path: Path, text: str, match: str) -> None:
+        """Malformed registries are rejected with the file and problem named."""
+        with pytest.raises(ValueError, match=match):
+            load_labeling_functions(self._write(tmp_path, text))
+
+    def test_engine_pickles_without_counters(self) -> None:
+        """A warm engine ships its compiled state but not its run counters."""
+        engine = WeakSupervisionLabeler(profile=True).engine.warm()
+        engine.vote_matrix(["yield 1"])
+        engine.timeouts = 3
+        clone = pickle.loads(pickle.dumps(engine))
+        assert clone.timeouts == 0
+        assert all(profile.calls == 0 for profile in clone.profiles)
+        assert clone._re2_portable == engine._re2_portable
+        codes = ["yield 1", "with x:", "class A: pass"]
+        assert (clone.vote_matrix(codes) == engine.vote_matrix(codes)).all()
+
+    def test_labeler_with_engine(self) -> None:
+        """A labeler built on an engine uses its LFs without recompiling."""
+        engine = CompiledLFEngine(load_labeling_functions()).warm()
+        labeler = WeakSupervisionLabeler(engine=engine)
+        assert labeler.engine is engine
+        assert labeler.label("yield 1").label == Label.HIGH_RISK
+
+
+class TestMutationDelta:
+    """Tests for labeling mutants from their originals' votes."""
+
+    ORIGINALS = (
+        "def hello(): return 42",
+        "async def f(): return lambda x: x",
+        "class A:\n    def f(self):\n        x = 1\n        return x\n",
+        "try:\n    y = g()\nexcept E:\n    raise\n",
+        "def f(a):\n    with a as b:\n        return b\n",
+        "s = 'yield x'\ndef f():\n    return s\n",
+        "",
+    )
+
+    def _mutants(self) -> tuple[list[str], list[str], list[int]]:
+        """Return every mutation of every original with its injected bits."""
+        examples = [
+            example
+            for code in self.ORIGINALS
+            for example in SyntheticAugmenter().generate_batch(code, 4)
+        ]
+        return (
+            [example.original_code for example in examples],
+            [example.mutated_code for example in examples],
+            [MUTATION_FEATURES[example.mutation_type] for example in examples],
+        )
+
+    def test_matches_full_relabel(self) -> None:
+        """Delta votes equal evaluating every LF on every mutant."""
+        engine = WeakSupervisionLabeler().engine
+        originals, mutants, injected = self._mutants()
+        votes = engine.vote_matrix(originals)
+        delta = engine.delta_vote_matrix(votes, originals, mutants, injected)
+        assert (delta == engine.vote_matrix(mutants)).all()
+        assert 0 < engine.inherited < delta.size
+
+    def test_unchanged_mutant_inherits_every_vote(self) -> None:
+        """A mutation that changed nothing evaluates no LF."""
+        engine = WeakSupervisionLabeler().engine
+        votes = engine.vote_matrix(["x = 1"])
+        delta = engine.delta_vote_matrix(votes, ["x = 1"], ["x = 1"], [0])
+        assert (delta == votes).all()
+        assert engine.inherited == len(TARANTULA_WEIGHTS)
+
+    def test_untouched_lf_is_not_evaluated(self) -> None:
+        """LFs not matching the changed lines keep the original's vote."""
+        lfs = [
+            LabelingFunction("ctx", 0.6, r"with .+:", Label.MEDIUM_RISK),
+            LabelingFunction("cls", 0.6, r"class \w", Label.HIGH_RISK),
+        ]
+        engine = CompiledLFEngine(lfs)
+        # A stale vote for "cls" survives, proving it was copied, not rescanned.
+        votes = np.array([[ABSTAIN_VOTE, Label.HIGH_RISK.code]], dtype=np.int8)
+        original = "x = 1\ny = 2"
+        mutant = "with x:\ny = 2"
+        delta = engine.delta_vote_matrix(votes, [original], [mutant], [0])
+        assert delta.tolist() == [[Label.MEDIUM_RISK.code, Label.HIGH_RISK.code]]
+        assert engine.inherited == 1
+
+    def test_line_spanning_lf_always_evaluated(self) -> None:
+        """Patterns that may cross lines are rescanned on any change."""
+        lf = LabelingFunction("body", 0.6, r"def f\(\):\s+pass")
+        engine = CompiledLFEngine([lf])
+        original = "def f():\n    return 1\n"
+        mutant = "def f():\n    pass\n"
+        votes = engine.vote_matrix([original])
+        delta = engine.delta_vote_matrix(votes, [original], [mutant], [0])
+        assert delta.tolist() == engine.vote_matrix([mutant]).tolist()
+        assert engine.inherited == 0
+
+    def test_unparsable_mutant_uses_fallback(self) -> None:
+        """Touched AST LFs fall back to their regex on broken mutants."""
+        engine = WeakSupervisionLabeler().engine
+        original = "x = 1\nclass A: pass"
+        mutant = "x = 1\nclass A: pass("
+        votes = engine.vote_matrix([original])
+        delta = engine.delta_vote_matrix(votes, [original], [mutant], [0])
+        assert (delta == engine.vote_matrix([mutant])).all()
+
+    def test_unparsable_mutant_rescans_every_ast_lf(self) -> None:
+        """AST LFs the change did not touch also fall back to their regex."""
+        labeler = WeakSupervisionLabeler()
+        original = "def f():\n    x = 'await y'\n    return 1"
+        mutant = original + "\n  )"
+        votes = labeler.label_batch([original]).votes
+        batch = labeler.label_mutants(votes, [original], [mutant], [0])
+        expected = WeakSupervisionLabeler().label_batch([mutant])
+        assert batch.votes.tolist() == expected.votes.tolist()
+        assert batch.labels.tolist() == expected.labels.tolist()
+        assert batch.to_labels() == [Label.HIGH_RISK]
+
+    def test_label_mutants(self) -> None:
+        """Mutant batches aggregate their votes and report inherited votes."""
+        labeler = WeakSupervisionLabeler()
+        originals, mutants, injected = self._mutants()
+        votes = labeler.label_batch(originals).votes
+        batch = labeler.label_mutants(votes, originals, mutants, injected)
+        expected = WeakSupervisionLabeler().label_batch(mutants)
+        assert batch.labels.tolist() == expected.labels.tolist()
+        assert batch.lf_names == expected.lf_names
+        assert labeler.get_stats()["inherited_votes"] > 0
+        assert "inherited_votes" not in WeakSupervisionLabeler().get_stats()